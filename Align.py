@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Align lines up the series from several books (or hosts) on their sample times, rather than on
+#               their row numbers, so that books whose sa collectors started at different times, were restarted
+#               during the day, or sampled at different intervals are charted against the right times.
+#
+#               Each book is a "track": a sorted array of sample times (in seconds) and the series read from
+#               it, in the same rows. The tracks are merged with one of these methods:
+#
+#               row         -   no alignment, the tracks are charted row for row against the times of the
+#                               first one (this is how GenGraphs has always worked)
+#               outer       -   every sample time from every track, with empty cells where a track has no
+#                               sample at that time
+#               nearest     -   the sample times of the first track, with each other track's sample nearest
+#                               to each time, if there's one within Tolerance seconds
+#               resample    -   a regular time every Interval seconds, with the mean of each track's samples
+#                               in each interval
+#
+#               outer and nearest walk the tracks' (already sorted) sample times together in a single sorted
+#               merge, so they take time in proportion to the total number of samples; resample puts each
+#               sample straight into its interval.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import heapq
+import numpy
+
+#
+# The methods that can be given as Align= in the ini file
+#
+Methods = ("row", "outer", "nearest", "resample")
+DefaultMethod = "row"
+
+#-------------------------------------------------------------------------------------------------------------
+def MedianInterval(Times):
+
+    """Returns the median time between samples, or 0 if there are fewer than two samples"""
+
+    if len(Times) < 2:
+        return 0.0
+    return float(numpy.median(numpy.diff(Times)))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def OuterRows(TrackTimes):
+
+    """Merge the sorted sample times of several tracks into one sorted list of the distinct times. Returns a
+    tuple of (merged times array, [array of the merged row of each sample, for each track]).
+    This is a k-way merge, so it's linear in the total number of samples (times log of the number of tracks)
+    """
+
+    Times = [Track.tolist() for Track in TrackTimes]
+    Positions = [numpy.empty(len(Track), dtype=numpy.int64) for Track in Times]
+    Next = [0] * len(Times)
+    Merged = []
+    Heap = [(Track[0], Index) for (Index, Track) in enumerate(Times) if len(Track) > 0]
+    heapq.heapify(Heap)
+    while Heap:
+        (Time, Index) = Heap[0]
+        if not Merged or Merged[-1] != Time:
+            Merged.append(Time)
+        Positions[Index][Next[Index]] = len(Merged) - 1
+        Next[Index] += 1
+        if Next[Index] < len(Times[Index]):
+            heapq.heapreplace(Heap, (Times[Index][Next[Index]], Index))
+        else:
+            heapq.heappop(Heap)
+    return (numpy.array(Merged, dtype=numpy.float64), Positions)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def NearestRows(Reference, Times, Tolerance):
+
+    """For each of the Reference times, returns the row of the nearest of Times within Tolerance, or -1 if
+    there isn't one. Both are sorted, so the nearest row only ever moves forward and one pass over each is enough
+    """
+
+    Reference = Reference.tolist()
+    Times = Times.tolist()
+    Rows = numpy.empty(len(Reference), dtype=numpy.int64)
+    Row = 0
+    for (Index, Time) in enumerate(Reference):
+        while Row + 1 < len(Times) and abs(Times[Row + 1] - Time) <= abs(Times[Row] - Time):
+            Row += 1
+        if len(Times) > 0 and abs(Times[Row] - Time) <= Tolerance:
+            Rows[Index] = Row
+        else:
+            Rows[Index] = -1
+    return Rows
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Scatter(Values, Rows, Length):
+
+    """Returns an array of Length empty (NaN) cells, with Values put in Rows"""
+
+    Result = numpy.empty(Length)
+    Result.fill(numpy.nan)
+    Result[Rows] = Values[:len(Rows)]
+    return Result
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def AlignTracks(Tracks, Method=DefaultMethod, Tolerance=None, Interval=None):
+
+    """Align the series of several tracks on their sample times. Returns a tuple of (sample times array,
+    [[series arrays] for each track]), with every series array as long as the sample times (except with row,
+    where the series are left as they are).
+    Description of parameters (self explanatory parameters are not described):
+        Tracks      -   list of (sample times, [series arrays]) tuples. The sample times are seconds, sorted, and
+                        each series has a cell for each sample time
+        Method      -   one of Methods
+        Tolerance   -   for nearest, how far (in seconds) a sample can be from the time it's matched to. By default
+                        half of the first track's median sampling interval
+        Interval    -   for resample, the interval in seconds. By default the longest of the tracks' median
+                        sampling intervals
+    """
+
+    if Method not in Methods:
+        raise ValueError("Align method must be one of " + ", ".join(Methods) + ", not \"" + str(Method) + "\"")
+    if len(Tracks) == 0:
+        return (numpy.zeros(0), [])
+    if Method == "row":
+        return (Tracks[0][0], [list(Series) for (Times, Series) in Tracks])
+    if Method == "outer":
+        (Times, Positions) = OuterRows([Track[0] for Track in Tracks])
+        return (Times, [[Scatter(Values, Rows, len(Times)) for Values in Series]
+                        for ((TrackTimes, Series), Rows) in zip(Tracks, Positions)])
+    if Method == "nearest":
+        Times = Tracks[0][0]
+        if Tolerance is None:
+            Tolerance = MedianInterval(Times) / 2
+        Aligned = []
+        for (TrackTimes, Series) in Tracks:
+            Rows = NearestRows(Times, TrackTimes, Tolerance)
+            Found = Rows >= 0
+            Aligned.append([Scatter(Values[Rows[Found]], numpy.flatnonzero(Found), len(Times)) for Values in Series])
+        return (Times, Aligned)
+    #
+    # resample: put each sample in its interval, and take the mean of the samples in each one
+    #
+    if Interval is None:
+        Interval = max([MedianInterval(Track[0]) for Track in Tracks])
+    Used = [Track[0] for Track in Tracks if len(Track[0]) > 0]
+    if Interval <= 0 or len(Used) == 0:
+        return AlignTracks(Tracks, "outer")
+    Start = numpy.floor(min([TrackTimes[0] for TrackTimes in Used]) / Interval) * Interval
+    Intervals = int((max([TrackTimes[-1] for TrackTimes in Used]) - Start) // Interval) + 1
+    Times = Start + numpy.arange(Intervals) * Interval
+    Aligned = []
+    for (TrackTimes, Series) in Tracks:
+        Bins = ((TrackTimes - Start) // Interval).astype(numpy.int64)
+        Aligned.append([])
+        for Values in Series:
+            Empty = numpy.isnan(Values[:len(Bins)])
+            Totals = numpy.bincount(Bins, weights=numpy.where(Empty, 0.0, Values[:len(Bins)]), minlength=Intervals)
+            Counts = numpy.bincount(Bins, weights=(~Empty).astype(numpy.float64), minlength=Intervals)
+            Means = numpy.empty(Intervals)
+            Means.fill(numpy.nan)
+            numpy.divide(Totals, Counts, out=Means, where=Counts > 0)
+            Aligned[-1].append(Means)
+    return (Times, Aligned)
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,424 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  BookCache is an on-disk cache of the sheets read from source workbooks (and sar files), so that
+#               re-running GenGraphs against the same books doesn't have to parse them again. Each book is
+#               stored as one .npz file of typed column arrays, named from a hash of the book's path, size and
+#               modification time, so a book that changes is simply a cache miss.
+#
+#               The cache is kept under a size limit by deleting the least recently used entries. Entries are
+#               touched each time they're loaded, so the file modification time is the last use time.
+#
+#               ReadBookSheets reads the sheets of a source book through the cache. GenGraphs, ScanThresholds,
+#               IngestBooks and SarSeries all read their books with it, so they share each other's entries.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Store and load NumericColumn columns as arrays, without going through cell lists
+#           0.3     18-Oct-26   agent   load() can decode just some of the sheets
+#           0.4     18-Oct-26   agent   Added ReadBookSheets and BookVariant, so every tool reads its books the same way
+#           0.5     18-Oct-26   agent   Cache date and time cells, and report the books that couldn't be cached or found
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import time
+import datetime
+import numpy
+from ColumnMath import NumericColumn, HeadRows
+from SarParser import IsSarFile, OpenSarFile
+from SheetCache import UsedRangeToColumns
+from UseWorkbook import UseWorkbook, ReadColumns
+import Profile
+
+#
+# Bump FormatVersion if the layout of the cache files changes, so old entries are no longer found
+#
+FormatVersion = 2
+DefaultCacheDirectory = os.path.join(os.path.expanduser("~"), ".gengraphs_cache")
+DefaultCacheSize = 1024         # MB
+#
+# Cell types, as stored in the "kinds" array of each sheet
+#
+EMPTY = 0
+NUMBER = 1
+STRING = 2
+BOOLEAN = 3
+DATETIME = 4            # microseconds since 1970
+DATE = 5                # proleptic Gregorian ordinal
+TIME = 6                # microseconds since midnight
+Epoch = datetime.datetime(1970, 1, 1)
+
+#-------------------------------------------------------------------------------------------------------------
+def EncodeColumns(Columns):
+
+    """Encode a sheet (a list of columns, each a list of cell values) as four arrays: the length of each
+    column, the type of each cell, and the numeric and string cell values. Dates and times (as a workbook
+    reader returns date formatted cells) are stored as numbers. Raises TypeError for any other type of cell value
+    """
+
+    Lengths = []
+    KindArrays = []
+    NumberArrays = []
+    Strings = []
+    for Column in Columns:
+        Lengths.append(len(Column))
+        if isinstance(Column, NumericColumn):
+            Cells = Column.head
+        else:
+            Cells = Column
+        Kinds = []
+        Numbers = []
+        for Value in Cells:
+            if Value is None:
+                Kinds.append(EMPTY)
+            elif isinstance(Value, bool):
+                Kinds.append(BOOLEAN)
+                Numbers.append(float(Value))
+            elif isinstance(Value, (int, long, float)):
+                Kinds.append(NUMBER)
+                Numbers.append(float(Value))
+            elif isinstance(Value, basestring):
+                Kinds.append(STRING)
+                if isinstance(Value, str):
+                    Value = Value.decode("utf-8", "replace")
+                Strings.append(Value)
+            elif isinstance(Value, datetime.datetime):
+                Kinds.append(DATETIME)
+                Delta = Value.replace(tzinfo=None) - Epoch
+                Numbers.append(float((Delta.days * 86400 + Delta.seconds) * 1000000 + Delta.microseconds))
+            elif isinstance(Value, datetime.date):
+                Kinds.append(DATE)
+                Numbers.append(float(Value.toordinal()))
+            elif isinstance(Value, datetime.time):
+                Kinds.append(TIME)
+                Numbers.append(float(((Value.hour * 60 + Value.minute) * 60 + Value.second) * 1000000 + Value.microsecond))
+            else:
+                raise TypeError("Can't cache a cell value of type " + type(Value).__name__)
+        KindArrays.append(numpy.array(Kinds, dtype=numpy.int8))
+        NumberArrays.append(numpy.array(Numbers, dtype=numpy.float64))
+        if isinstance(Column, NumericColumn):
+            Empty = numpy.isnan(Column.data)
+            KindArrays.append(numpy.where(Empty, EMPTY, NUMBER).astype(numpy.int8))
+            NumberArrays.append(Column.data[~Empty])
+    return (numpy.array(Lengths, dtype=numpy.int64),
+            numpy.concatenate(KindArrays) if KindArrays else numpy.zeros(0, dtype=numpy.int8),
+            numpy.concatenate(NumberArrays) if NumberArrays else numpy.zeros(0),
+            numpy.array(Strings, dtype=numpy.unicode_) if Strings else numpy.zeros(0, dtype="U1"))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def DecodeColumns(Lengths, Kinds, Numbers, Strings):
+
+    """The reverse of EncodeColumns. Returns a list of columns, each a list of cell values, or a NumericColumn
+    if its data cells are all numeric
+    """
+
+    #
+    # Put the numbers back in their cells, with NaN everywhere else, and work out which string each string
+    # cell has
+    #
+    Values = numpy.empty(len(Kinds))
+    Values.fill(numpy.nan)
+    Values[(Kinds != EMPTY) & (Kinds != STRING)] = Numbers
+    StringIndexes = numpy.cumsum(Kinds == STRING) - 1
+    NotNumeric = (Kinds != NUMBER) & (Kinds != EMPTY)
+    Strings = Strings.tolist()
+
+    def Cells(Start, End):
+        Cells = []
+        for (Kind, Value, StringIndex) in zip(Kinds[Start:End].tolist(), Values[Start:End].tolist(), StringIndexes[Start:End].tolist()):
+            if Kind == NUMBER:
+                Cells.append(Value)
+            elif Kind == STRING:
+                Cells.append(Strings[StringIndex])
+            elif Kind == BOOLEAN:
+                Cells.append(bool(Value))
+            elif Kind == DATETIME:
+                Cells.append(Epoch + datetime.timedelta(microseconds=int(Value)))
+            elif Kind == DATE:
+                Cells.append(datetime.date.fromordinal(int(Value)))
+            elif Kind == TIME:
+                (Seconds, Microseconds) = divmod(int(Value), 1000000)
+                Cells.append(datetime.time(Seconds // 3600, Seconds // 60 % 60, Seconds % 60, Microseconds))
+            else:
+                Cells.append(None)
+        return Cells
+
+    Columns = []
+    Start = 0
+    for Length in Lengths.tolist():
+        End = Start + Length
+        if Length > HeadRows and not NotNumeric[Start + HeadRows:End].any():
+            Columns.append(NumericColumn(Cells(Start, Start + HeadRows), Values[Start + HeadRows:End]))
+        else:
+            Columns.append(Cells(Start, End))
+        Start = End
+    return Columns
+#-------------------------------------------------------------------------------------------------------------
+
+class BookCache(object):
+    """On-disk cache of the sheets of source workbooks.
+
+    key() works out the cache entry for a book as it is now, load() returns its sheets if they're cached,
+    and save() stores them after the book has been read. evict() trims the cache to its size limit.
+    Books can be loaded and saved from several threads at once.
+    """
+
+    __slots__ = ("directory", "maxSize", "rebuild", "lock", "hits", "misses", "missing", "stored", "unstored")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, directory=DefaultCacheDirectory, maxSize=DefaultCacheSize * 1024 * 1024, rebuild=False):
+
+        """Description of parameters (self explanatory parameters are not described):
+            maxSize     -   maximum total size of the cache files, in bytes
+            rebuild     -   ignore the cached books, and read and cache every book again
+        """
+
+        self.directory = directory
+        self.maxSize = maxSize
+        self.rebuild = rebuild
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.missing = 0
+        self.stored = 0
+        self.unstored = 0
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _count(self, Counter):
+        with self.lock:
+            setattr(self, Counter, getattr(self, Counter) + 1)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def key(self, fileName, variant=""):
+
+        """Returns the cache file name for a book in its current state, or None if the book doesn't exist.
+        Description of parameters (self explanatory parameters are not described):
+            variant     -   anything else that changes what's read from the book (such as the sar file
+                            begin and end times), as a string
+        """
+
+        try:
+            Stat = os.stat(fileName)
+        except OSError:
+            return None
+        Key = repr((FormatVersion, os.path.abspath(fileName), Stat.st_size, Stat.st_mtime, variant))
+        return os.path.join(self.directory, hashlib.sha1(Key).hexdigest() + ".npz")
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def load(self, key, sheetNames=None):
+
+        """Returns an ordered dictionary of sheet name -> list of columns for a cached book, or None if it isn't cached.
+        Description of parameters (self explanatory parameters are not described):
+            sheetNames  -   if given, only these sheets are decoded (the others are never read from the file)
+        """
+
+        if key is None:
+            #
+            # The book itself doesn't exist, so it won't be read either
+            #
+            self._count("missing")
+            return None
+        if self.rebuild or not os.path.isfile(key):
+            self._count("misses")
+            return None
+        try:
+            Data = numpy.load(key, allow_pickle=False)
+            try:
+                Sheets = OrderedDict()
+                for (Index, SheetName) in enumerate(Data["sheets"].tolist()):
+                    if sheetNames is not None and SheetName not in sheetNames:
+                        continue
+                    Prefix = "s" + str(Index) + "_"
+                    Sheets[SheetName] = DecodeColumns(Data[Prefix + "lengths"], Data[Prefix + "kinds"],
+                                                      Data[Prefix + "numbers"], Data[Prefix + "strings"])
+            finally:
+                Data.close()
+        except Exception:
+            #
+            # A damaged or half-written entry is just a miss, it'll be replaced when the book is saved
+            #
+            self._count("misses")
+            return None
+        #
+        # Mark the entry as recently used
+        #
+        try:
+            os.utime(key, None)
+        except OSError:
+            pass
+        self._count("hits")
+        return Sheets
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def save(self, key, sheets):
+
+        """Store the sheets of a book in the cache. Sheets that couldn't be read (None) aren't stored.
+        Returns True if the book was cached. A book that can't be cached (it has a type of cell value that can't be
+        stored, or the cache can't be written) is counted, for report().
+        Description of parameters (self explanatory parameters are not described):
+            key         -   cache file name, from key()
+            sheets      -   ordered dictionary of sheet name -> list of columns
+        """
+
+        if key is None:
+            return False
+        Arrays = {}
+        SheetNames = []
+        try:
+            for (SheetName, Columns) in sheets.items():
+                if Columns is None:
+                    continue
+                Prefix = "s" + str(len(SheetNames)) + "_"
+                (Arrays[Prefix + "lengths"], Arrays[Prefix + "kinds"],
+                 Arrays[Prefix + "numbers"], Arrays[Prefix + "strings"]) = EncodeColumns(Columns)
+                SheetNames.append(SheetName)
+        except TypeError:
+            self._count("unstored")
+            return False
+        Arrays["sheets"] = numpy.array(SheetNames, dtype=numpy.unicode_) if SheetNames else numpy.zeros(0, dtype="U1")
+        #
+        # Write to a temporary file and rename it into place, so that other processes never see a partial entry
+        #
+        TempFile = key + "." + str(os.getpid()) + "." + str(threading.current_thread().ident) + ".tmp"
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            File = open(TempFile, 'wb')
+            try:
+                numpy.savez(File, **Arrays)
+            finally:
+                File.close()
+            if os.path.exists(key):
+                os.remove(key)
+            os.rename(TempFile, key)
+        except (IOError, OSError):
+            if os.path.exists(TempFile):
+                os.remove(TempFile)
+            self._count("unstored")
+            return False
+        self._count("stored")
+        return True
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def evict(self):
+
+        """Delete the least recently used cache entries until the cache is within its size limit"""
+
+        try:
+            Names = os.listdir(self.directory)
+        except OSError:
+            return
+        Entries = []
+        for Name in Names:
+            if Name.endswith(".npz"):
+                try:
+                    Stat = os.stat(os.path.join(self.directory, Name))
+                except OSError:
+                    continue
+                Entries.append((Stat.st_mtime, Stat.st_size, Name))
+        #
+        # Most recently used first
+        #
+        Entries.sort(reverse=True)
+        TotalSize = 0
+        for (LastUsed, Size, Name) in Entries:
+            TotalSize += Size
+            if TotalSize > self.maxSize:
+                try:
+                    os.remove(os.path.join(self.directory, Name))
+                except OSError:
+                    pass
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def report(self):
+
+        """Returns a one line summary of the books loaded from and stored in the cache"""
+
+        Report = "Book cache: " + str(self.hits) + " books loaded, " + str(self.misses) + " read, " \
+            + str(self.stored) + " stored"
+        if self.unstored:
+            Report += ", " + str(self.unstored) + " couldn't be stored"
+        if self.missing:
+            Report += ", " + str(self.missing) + " not found"
+        return Report
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def BookVariant(fileName, beginTime=None, endTime=None, perCPU=False):
+
+    """Returns what, besides the book itself, changes what's read from a source book, as the variant of its
+    cache key: the sar options for a sar file, nothing for a workbook
+    """
+
+    if IsSarFile(fileName):
+        return repr((beginTime, endTime, perCPU))
+    return ""
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ReadBookSheets(fileName, sheetNames=None, beginTime=None, endTime=None, perCPU=False, books=None, workbook=None):
+
+    """Read the sheets of a source book, a sar file (parsed into the sheets sar2xls would have created) or a
+    workbook, from the book cache if it's there. A book that isn't cached has all of its sheets read, and is
+    saved to the cache for next time. Returns an ordered dictionary of sheet name -> list of columns (None for
+    a sheet that couldn't be read). Raises an exception if the book can't be opened.
+    Description of parameters (self explanatory parameters are not described):
+        sheetNames  -   the sheets wanted, or None for all of them. Other sheets may be returned as well
+        beginTime   -   if given (HH:MM:SS), only samples after this time are read from a sar file
+        endTime     -   if given (HH:MM:SS), only samples before this time are read from a sar file
+        perCPU      -   create a sheet for each CPU when reading a sar file
+        books       -   the BookCache (or the LiveBooks), or None to read the book every time
+        workbook    -   the workbook class to open a workbook with, UseWorkbook (the default) streams it
+                        straight into columns
+    """
+
+    SarFile = IsSarFile(fileName)
+    CacheKey = None
+    if books:
+        CacheKey = books.key(fileName, BookVariant(fileName, beginTime, endTime, perCPU))
+        Sheets = books.load(CacheKey, sheetNames)
+        if Sheets is not None:
+            return Sheets
+    if CacheKey:
+        sheetNames = None
+    if not SarFile and (workbook is None or issubclass(workbook, UseWorkbook)):
+        #
+        # Stream the workbook straight into columns, rather than loading the whole grid of cells
+        #
+        Start = time.time()
+        Sheets = ReadColumns(fileName, sheetNames)
+        Profile.count("UseWorkbook.ReadColumns", time.time() - Start, Profile.SheetCells(Sheets))
+    else:
+        if SarFile:
+            Start = time.time()
+            Book = OpenSarFile(fileName, beginTime, endTime, perCPU)
+            Profile.count("SarParser.OpenSarFile", time.time() - Start)
+        else:
+            Book = workbook(fileName)
+        Sheets = OrderedDict()
+        try:
+            for SheetName in sheetNames or Book.sheetnames():
+                try:
+                    Sheets[SheetName] = UsedRangeToColumns(Book.getusedrange(SheetName))
+                except:
+                    Sheets[SheetName] = None
+        finally:
+            Book.close()
+    if CacheKey:
+        books.save(CacheKey, Sheets)
+    return Sheets
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,452 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  ChartPlan reads a GenGraphs ini file and compiles it into a chart plan: an immutable, validated
+#               description of the source files and of the charts to create from them. The ini file is parsed
+#               directly (no win32api), so this works on any platform.
+#
+#               CompileIniFile keeps each compiled plan in the cache directory (GenGraphs' --cache-dir), with
+#               the ini file's size and modification time, so an ini file that hasn't changed since an earlier
+#               run isn't parsed again.
+#
+#               The ini file looks like this (as written by GenIni.pl):
+#
+#                   [General]
+#                   SaveFileName=C:\sar_files\June-graphs.xls
+#                   Stitch=no                   (yes joins each host's books into one series, see Stitch.py)
+#                   Align=row                   (row, outer, nearest or resample, see Align.py)
+#                   Tolerance=5                 (for Align=nearest, in seconds)
+#                   Interval=60                 (for Align=resample, in seconds)
+#                   [Files]
+#                   File1=C:\sar_files\sysora1-2009-06-22.xls
+#                   [Charts]
+#                   Chart1=CPU
+#                   [Chart1Titles]
+#                   GraphTitle=CPU Utilisation
+#                   YAxisTitle=%
+#                   [Chart1Data]
+#                   $SYSNAME=CPU - all::% Utilisation
+#                   $SYSNAME Free::1024=Add(Memory Utilisation::Free Memory (KB),Memory Utilisation::Cached Memory (KB))
+#
+#               A chart can also have a [ChartnOptions] section, to downsample its data before it's charted:
+#
+#                   [Chart1Options]
+#                   MaxPoints=2000
+#                   Downsample=lttb             (lttb, minmax or mean, default lttb)
+#                   KeepFullData=yes            (also keep the full resolution data on a sheet of its own)
+#
+#               and to add a sheet of summary statistics of its series (count, min, max, mean, standard deviation,
+#               percentiles and time of peak, see SummaryStats.py):
+#
+#                   Summary=yes
+#
+#               Rather than a [Files] section, the [General] section can name a SarStore (loaded by IngestBooks.py)
+#               to chart from, with the hosts and dates to chart. The store's samples are always charted as each
+#               host's continuous series, as with Stitch=yes:
+#
+#                   [General]
+#                   Store=C:\sar_files\fleet.db
+#                   Hosts=sysora1,sysora2           (short names or FQDNs, default all of the hosts in the store)
+#                   FirstDate=2009-06-01            (YYYY-MM-DD, default the first date in the store)
+#                   LastDate=2009-08-29             (default the last date in the store)
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Added the [ChartnOptions] section (MaxPoints, Downsample and KeepFullData)
+#           0.3     18-Oct-26   agent   Added Stitch to the [General] section
+#           0.4     18-Oct-26   agent   Added Align, Tolerance and Interval to the [General] section
+#           0.5     18-Oct-26   agent   Added Summary to the [ChartnOptions] section
+#           0.6     18-Oct-26   agent   Added Store, Hosts, FirstDate and LastDate to the [General] section
+#           0.7     18-Oct-26   agent   Removed CompileIniFile and its plan cache, each ini file is only compiled once
+#           0.8     18-Oct-26   agent   Added CompileIniFile back, keeping the compiled plans on disk between runs
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import re
+import hashlib
+import datetime
+import threading
+import cPickle
+from collections import namedtuple
+from Downsample import Methods, DefaultMethod, MinPoints
+import Align
+
+class IniFileError(Exception):
+    """An ini file can't be read, or doesn't describe a valid set of charts"""
+    pass
+
+#
+# Bump FormatVersion if the chart plan (or anything in it) changes, so plans compiled by older versions are
+# compiled again
+#
+FormatVersion = 1
+PlanSuffix = ".plan"
+
+#
+# A column in a source book, a series (a column in the chart data sheet, which may be the total of several
+# source columns), and a chart. MaxPoints is None if the chart isn't downsampled, Summary is True if the chart
+# has a sheet of summary statistics
+#
+Source = namedtuple("Source", ("Sheet", "Column"))
+Series = namedtuple("Series", ("NewColumnHeading", "CellDivisionFactor", "Sources"))
+Chart = namedtuple("Chart", ("Number", "SheetTitle", "GraphTitle", "YAxisTitle", "Series",
+                             "MaxPoints", "Downsample", "KeepFullData", "Summary"))
+
+class ChartPlan(namedtuple("ChartPlan", ("IniFile", "SaveFileName", "Stitch", "Align", "Tolerance", "Interval",
+                                          "SourceFiles", "Charts", "Store", "Hosts", "FirstDate", "LastDate"))):
+    """A compiled ini file. SourceFiles and Charts are tuples, with the charts in chart number order. Store is
+    None unless the charts come from a SarStore rather than the SourceFiles, and Hosts (a tuple), FirstDate and
+    LastDate are None if they aren't given
+    """
+
+    __slots__ = ()
+
+#-------------------------------------------------------------------------------------------------------------
+    def sheetnames(self):
+
+        """Returns a list of the source sheets needed, starting with Overview"""
+
+        SheetNames = ["Overview"]
+        for ThisChart in self.Charts:
+            for ThisSeries in ThisChart.Series:
+                for ThisSource in ThisSeries.Sources:
+                    if ThisSource.Sheet not in SheetNames:
+                        SheetNames.append(ThisSource.Sheet)
+        return SheetNames
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ReadIniSections(IniFile):
+
+    """Read an ini file into a dictionary of section name (lower case) -> list of (key, value) tuples.
+    Blank lines and comment lines (starting with ';') are skipped. Raises IniFileError if the file can't be read
+    """
+
+    try:
+        File = open(IniFile, 'rb')
+    except IOError:
+        raise IniFileError("Can't open file " + IniFile + ", are you sure this file exists and is readable?")
+    Sections = {}
+    Lines = None
+    try:
+        for (LineNumber, Line) in enumerate(File):
+            Line = Line.strip()
+            if not Line or Line.startswith(";"):
+                continue
+            if re.match("^\[.*\]$", Line):
+                Lines = Sections.setdefault(Line[1:-1].strip().lower(), [])
+            elif Lines is not None:
+                if "=" not in Line:
+                    raise IniFileError("Line " + str(LineNumber + 1) + " of " + IniFile + " should be key=value: " + Line)
+                (Key, Value) = Line.split("=", 1)
+                Lines.append((Key.strip(), Value.strip()))
+    finally:
+        File.close()
+    return Sections
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ParseSource(Text, Where):
+
+    """Parse a "Sheet name::Column heading" source column reference"""
+
+    if Text.count("::") != 1:
+        raise IniFileError("\"" + Text + "\" in " + Where + " should be Sheet name::Column heading")
+    (Sheet, Column) = Text.split("::")
+    if not Sheet or not Column:
+        raise IniFileError("\"" + Text + "\" in " + Where + " should be Sheet name::Column heading")
+    return Source(Sheet, Column)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ParseSeries(Key, Value, Where):
+
+    """Parse a [ChartnData] line: NewColumnHeading[::CellDivisionFactor]=Sheet::Column or
+    NewColumnHeading[::CellDivisionFactor]=Add(Sheet::Column,Sheet::Column,...)
+    """
+
+    CellDivisionFactor = 1.0
+    if "::" in Key:
+        (NewColumnHeading, Factor) = Key.split("::", 1)
+        try:
+            CellDivisionFactor = float(Factor)
+        except ValueError:
+            raise IniFileError("Cell division factor \"" + Factor + "\" in " + Where + " isn't a number")
+        if CellDivisionFactor == 0:
+            raise IniFileError("Cell division factor in " + Where + " can't be zero")
+    else:
+        NewColumnHeading = Key
+    match = re.search("Add\((.+)\)", Value)
+    if match:
+        Sources = tuple(ParseSource(Text, Where) for Text in match.group(1).split(","))
+    else:
+        Sources = (ParseSource(Value, Where),)
+    return Series(NewColumnHeading, CellDivisionFactor, Sources)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ParseYesNo(Value, Name, Where):
+
+    """Parse a yes/no setting (yes, no, true, false, 1 or 0). An empty setting is no"""
+
+    if Value.lower() in ("yes", "true", "1"):
+        return True
+    if Value.lower() in ("no", "false", "0", ""):
+        return False
+    raise IniFileError(Name + " in " + Where + " must be yes or no")
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ParseSeconds(Value, Name, Where, Minimum):
+
+    """Parse a number of seconds, which must be at least Minimum"""
+
+    try:
+        Seconds = float(Value)
+    except ValueError:
+        raise IniFileError(Name + " \"" + Value + "\" in " + Where + " isn't a number of seconds")
+    if Seconds < Minimum:
+        raise IniFileError(Name + " in " + Where + " must be at least " + str(Minimum) + " seconds")
+    return Seconds
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ParseDate(Value, Name, Where):
+
+    """Parse a YYYY-MM-DD date"""
+
+    try:
+        datetime.datetime.strptime(Value, "%Y-%m-%d")
+    except ValueError:
+        raise IniFileError(Name + " \"" + Value + "\" in " + Where + " should be a date, YYYY-MM-DD")
+    return Value
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ParseOptions(Lines, Where):
+
+    """Parse a [ChartnOptions] section. Returns a tuple of (MaxPoints, Downsample, KeepFullData, Summary)"""
+
+    Options = dict((Key.lower(), Value) for (Key, Value) in Lines)
+    MaxPoints = None
+    if Options.get("maxpoints"):
+        try:
+            MaxPoints = int(Options["maxpoints"])
+        except ValueError:
+            raise IniFileError("MaxPoints \"" + Options["maxpoints"] + "\" in " + Where + " isn't a whole number")
+        if MaxPoints < MinPoints:
+            raise IniFileError("MaxPoints in " + Where + " must be at least " + str(MinPoints))
+    Downsample = Options.get("downsample", DefaultMethod).lower() or DefaultMethod
+    if Downsample not in Methods:
+        raise IniFileError("Downsample in " + Where + " must be one of " + ", ".join(Methods))
+    return (MaxPoints, Downsample, ParseYesNo(Options.get("keepfulldata", "no"), "KeepFullData", Where),
+            ParseYesNo(Options.get("summary", "no"), "Summary", Where))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ParseIniFile(IniFile):
+
+    """Read an ini file and compile it into a ChartPlan. Raises IniFileError if it isn't valid"""
+
+    Sections = ReadIniSections(IniFile)
+    #
+    # [General] SaveFileName tells us the file name to save the new workbook as (if any),
+    # Stitch whether to join each host's books into one series rather than charting them side by side,
+    # Align how to line the books up on their sample times, and Store the SarStore to chart from (if any)
+    #
+    SaveFileName = None
+    Stitch = False
+    AlignMethod = Align.DefaultMethod
+    Tolerance = None
+    Interval = None
+    Store = None
+    Hosts = None
+    FirstDate = None
+    LastDate = None
+    Where = "[General] in " + IniFile
+    for (Key, Value) in Sections.get("general", []):
+        if Key.lower() == "savefilename" and Value:
+            SaveFileName = Value
+        elif Key.lower() == "stitch":
+            Stitch = ParseYesNo(Value, "Stitch", Where)
+        elif Key.lower() == "align" and Value:
+            AlignMethod = Value.lower()
+            if AlignMethod not in Align.Methods:
+                raise IniFileError("Align in " + Where + " must be one of " + ", ".join(Align.Methods))
+        elif Key.lower() == "tolerance" and Value:
+            Tolerance = ParseSeconds(Value, "Tolerance", Where, 0)
+        elif Key.lower() == "interval" and Value:
+            Interval = ParseSeconds(Value, "Interval", Where, 1)
+        elif Key.lower() == "store" and Value:
+            Store = Value
+        elif Key.lower() == "hosts" and Value:
+            Hosts = tuple(Host.strip() for Host in Value.split(",") if Host.strip())
+        elif Key.lower() == "firstdate" and Value:
+            FirstDate = ParseDate(Value, "FirstDate", Where)
+        elif Key.lower() == "lastdate" and Value:
+            LastDate = ParseDate(Value, "LastDate", Where)
+    if FirstDate and LastDate and FirstDate > LastDate:
+        raise IniFileError("FirstDate in " + Where + " is after LastDate")
+    if (Hosts or FirstDate or LastDate) and not Store:
+        raise IniFileError("Hosts, FirstDate and LastDate in " + Where + " need a Store to chart from")
+    #
+    # [Files] lists the source books to read the data from, unless they come from a store
+    #
+    SourceFiles = tuple(Value for (Key, Value) in Sections.get("files", []))
+    if Store:
+        if len(SourceFiles) > 0:
+            raise IniFileError("Store in " + Where + " and a [Files] section can't both be used")
+    elif len(SourceFiles) == 0:
+        raise IniFileError("Could not read [Files] section from " + IniFile + ". Are you sure "
+                           "you've specified an absolute path, not a relative path to the file?")
+    #
+    # [Charts] gives the chart numbers and the titles of their sheets. Each chart has a [ChartnTitles]
+    # and a [ChartnData] section, and may have a [ChartnOptions] section
+    #
+    ChartList = Sections.get("charts", [])
+    if len(ChartList) == 0:
+        raise IniFileError("Could not read [Charts] section from " + IniFile)
+    Charts = []
+    for (Key, SheetTitle) in ChartList:
+        match = re.match("^Chart(\d+)$", Key, re.IGNORECASE)
+        if not match:
+            raise IniFileError("\"" + Key + "\" in [Charts] in " + IniFile + " should be Chartn")
+        ChartName = "Chart" + match.group(1)
+        Titles = dict((TitleKey.lower(), TitleValue) for (TitleKey, TitleValue) in Sections.get(ChartName.lower() + "titles", []))
+        if "graphtitle" not in Titles or "yaxistitle" not in Titles:
+            raise IniFileError("Could not read GraphTitle and YAxisTitle from [" + ChartName + "Titles] section in " + IniFile)
+        Where = "[" + ChartName + "Data] in " + IniFile
+        ChartSeries = tuple(ParseSeries(DataKey, DataValue, Where)
+                            for (DataKey, DataValue) in Sections.get(ChartName.lower() + "data", []))
+        if len(ChartSeries) == 0:
+            raise IniFileError("Could not read [" + ChartName + "Data] section from " + IniFile)
+        (MaxPoints, Downsample, KeepFullData, Summary) = ParseOptions(Sections.get(ChartName.lower() + "options", []),
+                                                                      "[" + ChartName + "Options] in " + IniFile)
+        Charts.append(Chart(int(match.group(1)), SheetTitle, Titles["graphtitle"], Titles["yaxistitle"], ChartSeries,
+                            MaxPoints, Downsample, KeepFullData, Summary))
+    Charts.sort(key=lambda ThisChart: ThisChart.Number)
+    for Index in range(1, len(Charts)):
+        if Charts[Index].Number == Charts[Index - 1].Number:
+            raise IniFileError("Chart" + str(Charts[Index].Number) + " is in [Charts] more than once in " + IniFile)
+        if Charts[Index].SheetTitle in [ThisChart.SheetTitle for ThisChart in Charts[:Index]]:
+            raise IniFileError("Sheet title \"" + Charts[Index].SheetTitle + "\" is used by more than one chart in " + IniFile)
+    return ChartPlan(IniFile, SaveFileName, Stitch, AlignMethod, Tolerance, Interval, SourceFiles, tuple(Charts),
+                     Store, Hosts, FirstDate, LastDate)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def PlanFile(IniFile, CacheDirectory):
+
+    """Returns the file name the compiled plan of an ini file is kept under in a cache directory"""
+
+    return os.path.join(CacheDirectory, hashlib.sha1(os.path.abspath(IniFile)).hexdigest() + PlanSuffix)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def CompileIniFile(IniFile, CacheDirectory=None):
+
+    """Returns the ChartPlan for an ini file, compiled by an earlier run if the ini file hasn't changed since
+    (the same path, size and modification time, and the same FormatVersion), or compiled now and kept for the
+    next run. Raises IniFileError if it can't be read or isn't valid.
+    Description of parameters (self explanatory parameters are not described):
+        CacheDirectory  -   directory to keep the compiled plans in, or None to compile the ini file every time
+    """
+
+    if CacheDirectory is None:
+        return ParseIniFile(IniFile)
+    try:
+        Stat = os.stat(IniFile)
+    except OSError:
+        raise IniFileError("Can't open file " + IniFile + ", are you sure this file exists and is readable?")
+    Key = (FormatVersion, os.path.abspath(IniFile), Stat.st_size, Stat.st_mtime)
+    CachedFile = PlanFile(IniFile, CacheDirectory)
+    try:
+        File = open(CachedFile, 'rb')
+        try:
+            (CachedKey, Plan) = cPickle.load(File)
+        finally:
+            File.close()
+        if CachedKey == Key and isinstance(Plan, ChartPlan):
+            return Plan._replace(IniFile=IniFile)
+    except Exception:
+        #
+        # Not compiled before, or a damaged or half-written entry, which is replaced below
+        #
+        pass
+    Plan = ParseIniFile(IniFile)
+    #
+    # Write to a temporary file and rename it into place, so that other processes never see a partial entry.
+    # A plan that can't be kept is just compiled again next time
+    #
+    TempFile = CachedFile + "." + str(os.getpid()) + "." + str(threading.current_thread().ident) + ".tmp"
+    try:
+        if not os.path.isdir(CacheDirectory):
+            os.makedirs(CacheDirectory)
+        File = open(TempFile, 'wb')
+        try:
+            cPickle.dump((Key, Plan), File, cPickle.HIGHEST_PROTOCOL)
+        finally:
+            File.close()
+        if os.path.exists(CachedFile):
+            os.remove(CachedFile)
+        os.rename(TempFile, CachedFile)
+    except (IOError, OSError):
+        if os.path.exists(TempFile):
+            os.remove(TempFile)
+    return Plan
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ValidatePlan(Plan, Cache, Books):
+
+    """Check every source column in a plan against the headings of the books' sheets, before any data is read.
+    Sheets that a book doesn't have are allowed (not every book has every sheet), but a heading that isn't in
+    a sheet is an error. Raises IniFileError listing all of the missing headings.
+    Description of parameters (self explanatory parameters are not described):
+        Cache   -   SheetCache holding the books' sheets
+        Books   -   list of the book names (as known to the cache) to check
+    """
+
+    Missing = []
+    for Book in Books:
+        for ThisChart in Plan.Charts:
+            for ThisSeries in ThisChart.Series:
+                for ThisSource in ThisSeries.Sources:
+                    if not Cache.hassheet(Book, ThisSource.Sheet):
+                        continue
+                    try:
+                        Cache.columnnumber(Book, ThisSource.Sheet, ThisSource.Column)
+                    except ValueError:
+                        Message = "Could not find heading \"" + ThisSource.Column + "\" in sheet \"" + ThisSource.Sheet \
+                            + "\" in file \"" + Book + "\". Check spelling."
+                        if Message not in Missing:
+                            Missing.append(Message)
+    if Missing:
+        raise IniFileError("\n".join(Missing))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ValidateStore(Plan, Headings):
+
+    """Check every source column in a plan against the series in its store, before any samples are read. Raises
+    IniFileError listing all of the columns that none of the hosts being charted have.
+    Description of parameters (self explanatory parameters are not described):
+        Headings    -   set of the (sheet, heading) of the series in the store, from SarStore.headings
+    """
+
+    Missing = []
+    for ThisChart in Plan.Charts:
+        for ThisSeries in ThisChart.Series:
+            for ThisSource in ThisSeries.Sources:
+                if (ThisSource.Sheet, ThisSource.Column) not in Headings:
+                    Message = "Could not find heading \"" + ThisSource.Column + "\" in sheet \"" + ThisSource.Sheet \
+                        + "\" in store \"" + Plan.Store + "\". Check spelling."
+                    if Message not in Missing:
+                        Missing.append(Message)
+    if Missing:
+        raise IniFileError("\n".join(Missing))
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Column arithmetic for GenGraphs, done with NumPy arrays rather than cell-by-cell Python loops.
+#               Empty or non-numeric cells (including the cells past the end of a short column) are held
+#               as NaN, and come back out as empty cells.
+#
+#               Columns whose data cells are all numeric can be held as a NumericColumn, a float array rather
+#               than a list of cell values, which takes a fraction of the memory for sheets with a lot of rows.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Added NumericColumn, PackColumn and ColumnBuilder
+#           0.3     18-Oct-26   agent   ColumnBuilder.column() can be called again as more cells are added
+#           0.4     18-Oct-26   agent   ColumnBuilder.column(share=True), which only packs the cells added since the last call
+#
+#-------------------------------------------------------------------------------------------------------------
+
+from array import array
+import numpy
+
+#
+# sar2xls sheets have the heading in row 1 and an empty row 2, so the data starts after the first 2 rows
+#
+HeadRows = 2
+
+#-------------------------------------------------------------------------------------------------------------
+def ToArray(Values, Length=None):
+
+    """Convert a list of cell values into a float array, with NaN for empty or non-numeric cells.
+    Description of parameters (self explanatory parameters are not described):
+        Length  -   if given, the array is truncated or NaN-padded to this many rows
+    """
+
+    if isinstance(Values, numpy.ndarray) and Values.dtype.kind == "f":
+        Array = Values
+    else:
+        Array = numpy.array([Value if isinstance(Value, (int, long, float)) and not isinstance(Value, bool) else numpy.nan
+                             for Value in Values], dtype=numpy.float64)
+    if Length is not None:
+        if len(Array) > Length:
+            Array = Array[:Length]
+        elif len(Array) < Length:
+            Array = numpy.concatenate((Array, numpy.empty(Length - len(Array)) * numpy.nan))
+    return Array
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ToCells(Array):
+
+    """Convert a float array back into a list of cell values, with None (an empty cell) for NaN"""
+
+    Cells = Array.astype(object)
+    Cells[numpy.isnan(Array)] = None
+    return Cells.tolist()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def AddColumns(Columns, Length):
+
+    """Add several columns together, row by row. A missing cell counts as zero, unless it is
+    missing from every column, in which case the total for that row is empty (NaN).
+    Description of parameters (self explanatory parameters are not described):
+        Columns -   list of columns (lists of cell values or arrays)
+        Length  -   number of rows in the result
+    """
+
+    if len(Columns) == 0:
+        return numpy.empty(Length) * numpy.nan
+    Stack = numpy.vstack([ToArray(Column, Length) for Column in Columns])
+    Missing = numpy.isnan(Stack)
+    Total = numpy.where(Missing, 0.0, Stack).sum(axis=0)
+    Total[Missing.all(axis=0)] = numpy.nan
+    return Total
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def DivideColumn(Column, CellDivisionFactor):
+
+    """Divide every cell in a column by CellDivisionFactor (true division, so 1023 / 1024 is not 0)"""
+
+    return ToArray(Column) / float(CellDivisionFactor)
+#-------------------------------------------------------------------------------------------------------------
+
+class NumericColumn(object):
+    """A sheet column whose data cells (row 3 down) are all numbers or empty, held as a float array.
+
+    head is the list of the cells in rows 1 and 2, data is the array of the rest of the column, with NaN
+    for an empty cell. The column never ends with an empty cell.
+    """
+
+    __slots__ = ("head", "data")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, head, data):
+        self.head = head
+        self.data = data
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self.head) + len(self.data)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def cells(self, firstRow=1, lastRow=None):
+
+        """Returns a list of the cell values from firstRow to lastRow (or the end of the column)"""
+
+        Cells = self.head[firstRow - 1:lastRow]
+        if lastRow is None or lastRow > HeadRows:
+            Start = max(firstRow - 1 - HeadRows, 0)
+            End = None if lastRow is None else lastRow - HeadRows
+            Cells = Cells + ToCells(self.data[Start:End])
+        return Cells
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def IsNumber(Value):
+
+    """Returns True if a cell value is a number (booleans aren't)"""
+
+    return isinstance(Value, (int, long, float)) and not isinstance(Value, bool)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def PackColumn(Cells):
+
+    """Returns a column (a list of cell values from row 1, with no empty cells at the end) as a NumericColumn
+    if its data cells are all numbers or empty, otherwise the list unchanged
+    """
+
+    if len(Cells) <= HeadRows:
+        return Cells
+    for Value in Cells[HeadRows:]:
+        if Value is not None and not IsNumber(Value):
+            return Cells
+    return NumericColumn(list(Cells[:HeadRows]), ToArray(Cells[HeadRows:]))
+#-------------------------------------------------------------------------------------------------------------
+
+class ColumnBuilder(object):
+    """Builds a column one cell at a time, as the rows of a sheet are streamed in.
+
+    The data cells are kept in a compact array of doubles for as long as they're all numeric, so the
+    memory used is 8 bytes a cell rather than a Python object per cell.
+    """
+
+    __slots__ = ("head", "numbers", "cells", "packed", "packedRows", "used")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, rows=0):
+
+        """Description of parameters (self explanatory parameters are not described):
+            rows    -   number of empty cells to start the column with (for a column that starts part way down)
+        """
+
+        self.head = []
+        self.numbers = array("d")
+        self.cells = None
+        #
+        # For column(share=True): packed holds the first packedRows data cells as a float array, with room for
+        # more, and used is the number of them up to the last number
+        #
+        self.packed = None
+        self.packedRows = 0
+        self.used = 0
+        for Row in xrange(rows):
+            self.append(None)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def append(self, value):
+
+        """Add the next cell of the column"""
+
+        if self.cells is not None:
+            self.cells.append(value)
+        elif len(self.head) < HeadRows:
+            self.head.append(value)
+        elif value is None:
+            self.numbers.append(numpy.nan)
+        elif IsNumber(value):
+            self.numbers.append(value)
+        else:
+            #
+            # Not a numeric column after all, so carry on with a list of cell values
+            #
+            self.cells = self.head + ToCells(self._array())
+            self.numbers = None
+            self.packed = None
+            self.cells.append(value)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _array(self):
+        if len(self.numbers) == 0:
+            return numpy.zeros(0)
+        return numpy.frombuffer(self.numbers, dtype=numpy.float64).copy()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _pack(self):
+        #
+        # Copy just the data cells added since the last call into the packed array, growing it (by doubling, so
+        # the copying is spread out) when it's full
+        #
+        Rows = len(self.numbers)
+        if self.packed is None or Rows > len(self.packed):
+            Packed = numpy.empty(max(Rows, 2 * self.packedRows, 1024))
+            if self.packed is not None:
+                Packed[:self.packedRows] = self.packed[:self.packedRows]
+            self.packed = Packed
+        if Rows > self.packedRows:
+            self.packed[self.packedRows:Rows] = numpy.frombuffer(self.numbers, dtype=numpy.float64)[self.packedRows:Rows]
+            Used = numpy.flatnonzero(~numpy.isnan(self.packed[self.packedRows:Rows]))
+            if len(Used) > 0:
+                self.used = self.packedRows + Used[-1] + 1
+            self.packedRows = Rows
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def column(self, share=False):
+
+        """Returns the column so far, with the empty cells trimmed from the bottom: a NumericColumn if the data
+        cells are all numeric, otherwise a list of cell values. More cells can still be added afterwards
+        Description of parameters (self explanatory parameters are not described):
+            share       -   the data of a NumericColumn is a read only view of the builder's own array, rather than
+                            a copy, and only the cells added since the last call are packed into it. For a column
+                            that's read again and again as it grows
+        """
+
+        if self.cells is None:
+            if share:
+                self._pack()
+                if self.used > 0:
+                    Data = self.packed[:self.used]
+                    Data.flags.writeable = False
+                    return NumericColumn(self.head, Data)
+            else:
+                Data = self._array()
+                Used = numpy.flatnonzero(~numpy.isnan(Data))
+                if len(Used) > 0:
+                    return NumericColumn(self.head, Data[:Used[-1] + 1])
+            Cells = list(self.head)
+        else:
+            Cells = list(self.cells)
+        while len(Cells) > 0 and Cells[-1] is None:
+            Cells.pop()
+        return Cells
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Downsample reduces the rows of a chart data sheet to a maximum number of points before the chart
+#               is created, so that a long run of short-interval samples doesn't send millions of points to the
+#               chart. All of the series on a chart share the time column, so the rows kept are shared by every
+#               series. Rows that are empty in every series are left out before the rows are chosen. Three
+#               methods are available:
+#
+#               lttb    -   Largest-Triangle-Three-Buckets. Keeps the one row from each bucket of rows that best
+#                           preserves the shape of the lines, so peaks and troughs survive. Series that have values
+#                           in different rows (books lined up on their sample times, say) have their rows chosen
+#                           separately, from the rows they have values in, so each keeps MaxPoints points and
+#                           the sheet can have more than MaxPoints rows (up to a limit, if one is given)
+#               minmax  -   Min/max envelope. Each bucket becomes two rows, the lowest and the highest value of
+#                           each series in the bucket
+#               mean    -   Each bucket becomes one row, the mean of each series over the bucket
+#
+#               The arithmetic is done on NumPy arrays, one bucket at a time for lttb (each bucket depends on the
+#               row chosen from the one before) and in one pass over all of the buckets for minmax and mean.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Choose lttb rows separately for series with values in different rows, and leave
+#                                       out rows that are empty in every series
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import numpy
+from collections import OrderedDict
+from ColumnMath import ToArray, ToCells, HeadRows
+
+#
+# The methods that can be given as Downsample= in the ini file. lttb is used if none is given
+#
+Methods = ("lttb", "minmax", "mean")
+DefaultMethod = "lttb"
+#
+# LTTB always keeps the first and last rows, so it needs at least one bucket in between
+#
+MinPoints = 3
+
+#-------------------------------------------------------------------------------------------------------------
+def BucketStarts(Rows, Buckets):
+
+    """Returns an array of the first row of each of Buckets (nearly) equal-sized buckets of Rows rows"""
+
+    return numpy.unique((numpy.arange(Buckets) * Rows) // Buckets)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def TriangleRows(X, Y, Points):
+
+    """Returns the positions (in X) of the rows chosen by Largest-Triangle-Three-Buckets from a set of rows that
+    all have values.
+    Description of parameters (self explanatory parameters are not described):
+        X           -   float array of the row numbers, in order
+        Y           -   2-D float array of the scaled values in those rows, one column per series, without NaN
+        Points      -   number of rows to keep
+    """
+
+    Rows = len(X)
+    if Rows <= Points:
+        return numpy.arange(Rows)
+    if Points < MinPoints:
+        return numpy.unique(numpy.linspace(0, Rows - 1, Points).round().astype(numpy.int64))
+    #
+    # The first and last rows are always kept, the rows in between are split into Points - 2 buckets
+    #
+    Edges = 1 + (numpy.arange(Points - 1) * (Rows - 2)) // (Points - 2)
+    Chosen = numpy.empty(Points, dtype=numpy.int64)
+    Chosen[0] = 0
+    Chosen[-1] = Rows - 1
+    Previous = 0
+    for Bucket in xrange(Points - 2):
+        (Start, End) = (Edges[Bucket], Edges[Bucket + 1])
+        #
+        # The third point of each triangle is the average of the next bucket (or the last row)
+        #
+        if Bucket + 2 < len(Edges):
+            NextX = X[Edges[Bucket + 1]:Edges[Bucket + 2]].mean()
+            NextY = Y[Edges[Bucket + 1]:Edges[Bucket + 2]].mean(axis=0)
+        else:
+            NextX = X[Rows - 1]
+            NextY = Y[Rows - 1]
+        Area = numpy.abs((X[Previous] - NextX) * (Y[Start:End] - Y[Previous])
+                         - (X[Previous] - X[Start:End])[:, numpy.newaxis] * (NextY - Y[Previous])).sum(axis=1)
+        Previous = Start + int(numpy.argmax(Area))
+        Chosen[Bucket + 1] = Previous
+    return Chosen
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def LTTBRows(Data, MaxPoints, MaxRows=None):
+
+    """Returns the row numbers (from 0, in order) chosen by Largest-Triangle-Three-Buckets. Empty cells never
+    decide which rows are chosen: the series are grouped by the rows they have values in, MaxPoints rows are
+    chosen for each group from just those rows, and all of the groups' rows are kept.
+    Description of parameters (self explanatory parameters are not described):
+        Data        -   2-D float array, one column per series, with NaN for empty cells
+        MaxPoints   -   number of rows to keep for each group, at least MinPoints
+        MaxRows     -   if given, the most rows to keep. If the groups' rows come to more than this, MaxRows is
+                        shared out between the groups in proportion to how many rows they have
+    """
+
+    Rows = len(Data)
+    Valid = ~numpy.isnan(Data)
+    #
+    # Scale each series to its own range, so that a series of large numbers doesn't decide the rows for all
+    # of the others
+    #
+    Low = numpy.where(Valid, Data, numpy.inf).min(axis=0)
+    High = numpy.where(Valid, Data, -numpy.inf).max(axis=0)
+    Range = numpy.where(numpy.isfinite(High - Low) & (High > Low), High - Low, 1.0)
+    Scaled = (Data - numpy.where(numpy.isfinite(Low), Low, 0.0)) / Range
+    Groups = OrderedDict()
+    for Series in range(Data.shape[1]):
+        if Valid[:, Series].any():
+            Groups.setdefault(Valid[:, Series].tobytes(), []).append(Series)
+    if len(Groups) == 0:
+        return numpy.unique([0, Rows - 1])
+    GroupRows = [numpy.flatnonzero(Valid[:, Columns[0]]) for Columns in Groups.values()]
+    Chosen = ChooseGroupRows(Scaled, Groups.values(), GroupRows, [MaxPoints] * len(GroupRows))
+    if MaxRows is not None and len(Chosen) > MaxRows:
+        #
+        # Share out the rows in proportion to the groups' rows, the rows left over from rounding down going
+        # to the groups with the largest remainders
+        #
+        Sizes = numpy.array([len(ThisGroupRows) for ThisGroupRows in GroupRows], dtype=numpy.int64)
+        Shares = MaxRows * Sizes
+        Points = Shares // Sizes.sum()
+        Points[numpy.argsort(-(Shares % Sizes.sum()), kind="mergesort")[:MaxRows - Points.sum()]] += 1
+        Chosen = ChooseGroupRows(Scaled, Groups.values(), GroupRows, Points.tolist())
+    return Chosen
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ChooseGroupRows(Scaled, Groups, GroupRows, Points):
+
+    """Returns the row numbers (in order) chosen by TriangleRows for each group of series, all together.
+    Description of parameters (self explanatory parameters are not described):
+        Scaled      -   2-D float array of the scaled values, one column per series
+        Groups      -   list of the series (column numbers) in each group
+        GroupRows   -   list of arrays of the rows each group has values in
+        Points      -   list of the number of rows to choose for each group
+    """
+
+    Chosen = [ThisGroupRows[TriangleRows(ThisGroupRows.astype(numpy.float64), Scaled[ThisGroupRows][:, Columns], GroupPoints)]
+              for (ThisGroupRows, Columns, GroupPoints) in zip(GroupRows, Groups, Points) if GroupPoints > 0]
+    return numpy.unique(numpy.concatenate(Chosen))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def MinMaxRows(Data, MaxPoints):
+
+    """Returns (row numbers, values) for a min/max envelope: two rows for each bucket, the first labelled with
+    the first row of the bucket and holding each series' lowest value, the second labelled with the last row of
+    the bucket and holding each series' highest value. Buckets where a series has no values are left empty
+    """
+
+    Starts = BucketStarts(len(Data), max(MaxPoints // 2, 1))
+    Ends = numpy.append(Starts[1:], len(Data)) - 1
+    Lowest = numpy.fmin.reduceat(Data, Starts, axis=0)
+    Highest = numpy.fmax.reduceat(Data, Starts, axis=0)
+    Rows = numpy.empty(2 * len(Starts), dtype=numpy.int64)
+    Rows[0::2] = Starts
+    Rows[1::2] = Ends
+    Values = numpy.empty((2 * len(Starts), Data.shape[1]))
+    Values[0::2] = Lowest
+    Values[1::2] = Highest
+    return (Rows, Values)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def MeanRows(Data, MaxPoints):
+
+    """Returns (row numbers, values) for the mean of each series over each bucket of rows, labelled with the
+    first row of the bucket. Buckets where a series has no values are left empty
+    """
+
+    Starts = BucketStarts(len(Data), MaxPoints)
+    Empty = numpy.isnan(Data)
+    Totals = numpy.add.reduceat(numpy.where(Empty, 0.0, Data), Starts, axis=0)
+    Counts = numpy.add.reduceat((~Empty).astype(numpy.float64), Starts, axis=0)
+    Means = numpy.empty(Totals.shape)
+    Means.fill(numpy.nan)
+    numpy.divide(Totals, Counts, out=Means, where=Counts > 0)
+    return (Starts, Means)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def DownsampleColumns(Columns, MaxPoints, Method=DefaultMethod, MaxRows=None):
+
+    """Downsample the columns of a chart data sheet to MaxPoints points for each series: at most MaxPoints data
+    rows, except with lttb where series have values in different rows. Returns the columns unchanged if they're
+    already short enough.
+    Description of parameters (self explanatory parameters are not described):
+        Columns     -   list of columns, each a list of cell values from row 1 (heading, empty row 2, then data).
+                        The first column is the time column, the rest are the series
+        Method      -   one of Methods
+        MaxRows     -   if given, the most data rows to keep (the rows a sheet can have, say)
+    """
+
+    if Method not in Methods:
+        raise ValueError("Downsample method must be one of " + ", ".join(Methods) + ", not \"" + str(Method) + "\"")
+    if MaxPoints < MinPoints:
+        raise ValueError("Can't downsample to fewer than " + str(MinPoints) + " points")
+    Rows = max([len(Column) for Column in Columns]) - HeadRows
+    if Rows <= MaxPoints:
+        return Columns
+    Times = list(Columns[0][HeadRows:]) + [None] * (Rows - len(Columns[0][HeadRows:]))
+    if len(Columns) > 1:
+        Data = numpy.column_stack([ToArray(Column[HeadRows:], Rows) for Column in Columns[1:]])
+    else:
+        Data = numpy.zeros((Rows, 0))
+    #
+    # Rows that are empty in every series (past the end of every series, say) have nothing to
+    # plot, so they take no share of the points or the buckets
+    #
+    Occupied = numpy.flatnonzero(~numpy.isnan(Data).all(axis=1))
+    if 0 < len(Occupied) < Rows:
+        Data = Data[Occupied]
+    else:
+        Occupied = numpy.arange(Rows)
+    if len(Data) <= MaxPoints:
+        (Chosen, Values) = (numpy.arange(len(Data)), Data)
+    elif Method == "lttb":
+        Chosen = LTTBRows(Data, MaxPoints, MaxRows)
+        Values = Data[Chosen]
+    elif Method == "minmax":
+        (Chosen, Values) = MinMaxRows(Data, MaxPoints)
+    else:
+        (Chosen, Values) = MeanRows(Data, MaxPoints)
+    Chosen = Occupied[Chosen]
+    NewColumns = [list(Columns[0][:HeadRows]) + [Times[Row] for Row in Chosen.tolist()]]
+    for (Series, Column) in enumerate(Columns[1:]):
+        #
+        # A book without the sheet has an empty placeholder column, with no heading
+        #
+        Head = list(Column[:HeadRows]) + [None] * (HeadRows - len(Column[:HeadRows]))
+        NewColumns.append(Head + ToCells(Values[:, Series]))
+    return NewColumns
+#-------------------------------------------------------------------------------------------------------------
@@ -33,248 +33,914 @@
 #           0.12    22-Feb-12   PEMcG   Edited to match sar2xls v4.0 format sheet titles
 #           0.13    02-Mar-12   PEMcG   Renamed to GenGraphs
 #           0.14    06-Mar-12   PEMcG   Use '::' rather than ":' as separators in Data section of the ini file
+#           0.15    18-Oct-26   agent   Added -H switch to use the headless UseWorkbook backend rather than Excel
+#           0.16    18-Oct-26   agent   Read source sheets once through a SheetCache rather than re-reading headers and columns
+#           0.17    18-Oct-26   agent   Move the time and unscaled data columns with setrange rather than through the clipboard
+#           0.18    18-Oct-26   agent   Assemble each chart data sheet in memory and write it with a single setrange
+#           0.19    18-Oct-26   agent   Do the Add() and CellDivisionFactor arithmetic on NumPy arrays, with true division
+#           0.20    18-Oct-26   agent   Added -j switch to process ini files in parallel, and moved the main loop into functions
+#           0.21    18-Oct-26   agent   Open and read the source workbooks concurrently (-w switch sets how many at once)
+#           0.22    18-Oct-26   agent   Read sar text files listed in [Files] directly with SarParser (and added -b, -e
+#                                       and -m switches to match sar2xls)
+#           0.23    18-Oct-26   agent   Keep the sheets of each source book in an on-disk BookCache between runs (added
+#                                       --no-cache, --rebuild-cache, --cache-dir and --cache-size switches)
+#           0.24    18-Oct-26   agent   Compile the ini file into a ChartPlan (no more win32api.GetProfileSection), and
+#                                       check all of its headings against the source books before creating anything
+#           0.25    18-Oct-26   agent   Check that each chart data sheet fits within the column limit of the output workbook
+#           0.26    18-Oct-26   agent   Stream .xls/.xlsx source books into columns (numeric columns as float arrays), so
+#                                       million-row .xlsx books can be read, and check the output row limit too
+#           0.27    18-Oct-26   agent   Downsample chart data to MaxPoints rows (lttb, minmax or mean) if the ini file
+#                                       has a [ChartnOptions] section, optionally keeping the full data on a sheet of its own
+#           0.28    18-Oct-26   agent   Added Stitch=yes in [General] to join each host's daily books into one continuous
+#                                       series, with real dates and times, rather than charting them side by side
+#           0.29    18-Oct-26   agent   Added Align (row, outer, nearest or resample), Tolerance and Interval in [General],
+#                                       to line books up on their sample times rather than their row numbers
+#           0.30    18-Oct-26   agent   Added --render, --render-format and --render-workers switches to render the charts
+#                                       as PNG or SVG images (with matplotlib) in a pool of processes
+#           0.31    18-Oct-26   agent   Added --stream switch to write .xlsx chart workbooks with the streaming StreamWorkbook
+#                                       writer, with a chart sheet for each chart
+#           0.32    18-Oct-26   agent   Added --profile and --profile-trace switches to count and time the workbook backend
+#                                       calls, and time each source book and chart
+#           0.33    18-Oct-26   agent   Keep a Manifest next to the SaveFileName, so a rerun only reads the new or changed
+#                                       source books (added --no-manifest and --rebuild-all switches)
+#           0.34    18-Oct-26   agent   Added --watch switch to tail sar files that are still being written, and refresh
+#                                       the charts with the new samples every so many seconds
+#           0.35    18-Oct-26   agent   Added a "Summary - " sheet of statistics for each chart with Summary=yes in its
+#                                       [ChartnOptions] section, worked out with SummaryStats
+#           0.36    18-Oct-26   agent   Chart from a SarStore (loaded by IngestBooks.py) if the ini file has Store= in its
+#                                       [General] section, with one range scan of the store per chart
+#           0.37    18-Oct-26   agent   Work out the series of stitched, aligned and store charts with SarSeries
+#           0.38    18-Oct-26   agent   Downsampling keeps MaxPoints points for each series, up to the rows a sheet can have
+#           0.39    18-Oct-26   agent   Read source books with BookCache.ReadBookSheets, shared with the other tools
+#           0.40    18-Oct-26   agent   Take the system name and sar date from SarSeries.BookDetails
+#           0.41    18-Oct-26   agent   Compile the ini files with ChartPlan.ParseIniFile
+#           0.42    18-Oct-26   agent   Compile the ini files with ChartPlan.CompileIniFile, which keeps the compiled
+#                                       plans in the --cache-dir between runs
+#           0.43    18-Oct-26   agent   Work out the series of charts aligned by row with SarSeries too, rather than with
+#                                       arithmetic of our own
 #
 #
 #--------------------------------------------------------------------------------------------------------------------------
 
-Version = (0.14)
+Version = (0.43)
 
-from UseExcel import UseExcel
+from UseWorkbook import UseWorkbook, xlLine, xlColumns, MaxColumns, MaxXlsxColumns, MaxRows, MaxXlsxRows, ColumnLetter
+from SheetCache import SheetCache
+from BookCache import BookCache, ReadBookSheets, DefaultCacheDirectory, DefaultCacheSize
+from ChartPlan import CompileIniFile, ValidatePlan, ValidateStore, IniFileError
+from SarParser import TimeInSeconds
+from ColumnMath import ToCells, HeadRows, NumericColumn
+from Downsample import DownsampleColumns
+from Stitch import Stitcher, ToDateTimes, ToTimesOfDay, SecondsPerDay
+from Align import AlignTracks
+import RenderCharts
+import Profile
+from RenderCharts import RenderJob, ImageFileName
+from StreamWorkbook import StreamWorkbook, Available as StreamAvailable
+from Manifest import Manifest, Piece
+from SummaryStats import SummarizeColumns, SummaryColumns
+from LiveBooks import LiveBooks
+from SarStore import SarStore, StoreError, DateSeconds
+from SarSeries import LoadSeries, Add, Evaluate, SheetSource, StoreSource, BookDetails
 from optparse import OptionParser
-import ConfigParser, os, sys, re
-import win32api
-from win32com.client import constants
+import os, sys, re, time, json
+import numpy
+import multiprocessing, StringIO, traceback
+from multiprocessing.pool import ThreadPool
 #
-# The following list is used to convert a numeric column index into its character equivalent
+# Excel (and the win32 extensions) are only needed if we're not running headless
 #
-LetterCorrespondingTo = ("A","B","C","D","E","F","G","H","I","J","K","L","M","N","O","P","Q","R","S","T","U","V","W","X","Y","Z")
+try:
+    from UseExcel import UseExcel
+    import pythoncom
+except ImportError:
+    UseExcel = None
+    pythoncom = None
 
-usage = "usage: %prog [-f ini_file] [-a] [-V] [-D directory]"
+#-------------------------------------------------------------------------------
+# Function:     ColumnsToRows
+# Description:  Turns a list of columns (lists of cell values, which may be of different
+#               lengths) into a list of rows suitable for setrange, padding with empty cells
+#-------------------------------------------------------------------------------
+def ColumnsToRows(Columns):
+    Height = max([len(Column) for Column in Columns])
+    return [tuple(Column[Row] if Row < len(Column) else None for Column in Columns) for Row in range(Height)]
 
-parser = OptionParser(usage=usage)
-parser.add_option("-f", dest="IniFilename",
-                    help="specifies the ini file containing instructions")
-parser.add_option("-V", "--version", action="store_true", dest="Version", default=False,
-                    help="prints the version")
-parser.add_option("-a", "--allfiles", action="store_true", dest="AllFiles", default=False,
-                    help="process all ini files in the directory")
-parser.add_option("-D", "--directory", dest="Directory", 
-                    help="Specifies a directory to use for input and output")
+#-------------------------------------------------------------------------------
+# Function:     ReadSourceBook
+# Description:  Reads the sheets of a source book with OpenSourceBook, timing it if we're
+#               profiling (--profile)
+# Arguments:    A tuple of (SourceFile, Workbook, SheetNames, Options, Books), as for
+#               OpenSourceBook
+# Returns:      A tuple of (SourceFile, Sheets), as for OpenSourceBook
+#-------------------------------------------------------------------------------
+def ReadSourceBook(Arguments):
+    Timer = Profile.start("book", Arguments[0])
+    Sheets = None
+    try:
+        (SourceFile, Sheets) = OpenSourceBook(Arguments)
+    finally:
+        Profile.stop(Timer, Profile.SheetCells(Sheets))
+    return (SourceFile, Sheets)
 
-(options, args) = parser.parse_args()
-#
-# Check the sanity of some of our arguments
-#
-# -v ?
-#
-if options.Version:
-    print "GenGraphs.py version: " + str(Version)
-    sys.exit()
-    
-if (options.IniFilename and options.AllFiles):
-    parser.error("options -f and -a are mutually exclusive")
-    parser.print_help()
-    sys.exit()
-  
-if options.Directory:
-    Directory = options.Directory
-else:
-    Directory = "."
-#
-# Now assemble the list of ini files to process (may be only one)
-#
-IniFileList = []
-if options.IniFilename:
+#-------------------------------------------------------------------------------
+# Function:     OpenSourceBook
+# Description:  Reads the sheets we need from a source book with ReadBookSheets (from the
+#               BookCache if it's there). Runs in a thread pool worker, so Excel's COM
+#               objects are only ever used from the thread that created them
+# Arguments:    A tuple of (SourceFile, Workbook, SheetNames, Options, Books), where Books
+#               is the BookCache (or the LiveBooks with --watch), or None if we're not using one
+# Returns:      A tuple of (SourceFile, Sheets), where Sheets is a dictionary of sheet
+#               name -> list of columns (None if the sheet couldn't be read), or None if the
+#               workbook couldn't be opened
+#-------------------------------------------------------------------------------
+def OpenSourceBook(Arguments):
+    (SourceFile, Workbook, SheetNames, Options, Books) = Arguments
+    if pythoncom and issubclass(Workbook, UseExcel):
+        pythoncom.CoInitialize()
+    try:
+        try:
+            return (SourceFile, ReadBookSheets(SourceFile, SheetNames, Options.BeginTime, Options.EndTime, Options.PerCPU,
+                                               Books, Workbook))
+        except:
+            return (SourceFile, None)
+    finally:
+        if pythoncom and issubclass(Workbook, UseExcel):
+            pythoncom.CoUninitialize()
+
+#-------------------------------------------------------------------------------
+# Function:     ColumnHeading
+# Description:  Converts $SYSNAME, $SYSFQDN or $SARDATE in a column heading to the real
+#               system name or sar date
+# Returns:      The new column heading
+#-------------------------------------------------------------------------------
+def ColumnHeading(NewColumnHeading, SystemName, SystemFQDN, SarDate):
+    SysNameRegEx = re.compile("\$SYSNAME")
+    SysFQDNRegEx = re.compile("\$SYSFQDN")
+    SarDateRegEx = re.compile("\$SARDATE")
+
+    if SysNameRegEx.search(NewColumnHeading):
+        NewColumnHeading = SysNameRegEx.sub(SystemName, NewColumnHeading)
+    if SysFQDNRegEx.search(NewColumnHeading):
+        NewColumnHeading = SysFQDNRegEx.sub(SystemFQDN, NewColumnHeading)
+    if SarDateRegEx.search(NewColumnHeading):
+        NewColumnHeading = SarDateRegEx.sub(SarDate, NewColumnHeading)
+    return NewColumnHeading
+
+#-------------------------------------------------------------------------------
+# Function:     PlanSeries
+# Description:  Builds the SarSeries of each series of a chart: its source columns added
+#               together and divided by its CellDivisionFactor. Nothing is read until
+#               they're evaluated
+# Arguments:    Source - the SarSeries source of the samples
+#               ThisChart - the chart, from the chart plan
+#               Start - if given, only samples from this time (seconds since 1970)
+#               End - if given, only samples before this time
+# Returns:      A list of Series, one for each series of the chart
+#-------------------------------------------------------------------------------
+def PlanSeries(Source, ThisChart, Start=None, End=None):
+    return [Add(*[LoadSeries(Source, ThisSource.Sheet, ThisSource.Column, Start, End) for ThisSource in ThisSeries.Sources])
+            / ThisSeries.CellDivisionFactor for ThisSeries in ThisChart.Series]
+
+#-------------------------------------------------------------------------------
+# Function:     CheckSourceSheets
+# Description:  Says which of the sheets a chart's series are read from are missing from
+#               a source book (those sources are left out of the series)
+# Arguments:    Cache - the SheetCache holding the book's sheets
+#               SourceFile - the book name
+#               ThisChart - the chart, from the chart plan
+#-------------------------------------------------------------------------------
+def CheckSourceSheets(Cache, SourceFile, ThisChart):
+    for ThisSeries in ThisChart.Series:
+        for ThisSource in ThisSeries.Sources:
+            if not Cache.hassheet(SourceFile, ThisSource.Sheet):
+                print "Could not read sheet name \"" + ThisSource.Sheet + "\" in file \"" + SourceFile + "\". Check spelling."
+
+#-------------------------------------------------------------------------------
+# Function:     BookTrack
+# Description:  Reads the series of a chart from a source book, with the times of day of
+#               their samples, for lining the books up on their sample times
+# Arguments:    Cache - the SheetCache holding the book's sheets
+#               SourceFile - the book name
+#               ThisChart - the chart, from the chart plan
+# Returns:      The book's piece of the chart data: a Piece with the column headings in
+#               Meta, and the sample times followed by the series arrays in Arrays
+#-------------------------------------------------------------------------------
+def BookTrack(Cache, SourceFile, ThisChart):
+    TimeSheetName = ThisChart.Series[0].Sources[0].Sheet
+    (SystemName, SystemFQDN, SarDate) = BookDetails(Cache, SourceFile)
+    Headings = [ColumnHeading(ThisSeries.NewColumnHeading, SystemName, SystemFQDN, SarDate) for ThisSeries in ThisChart.Series]
+    if not Cache.hassheet(SourceFile, TimeSheetName):
+        print "Could not find sheet name \"" + TimeSheetName + "\" in file \"" + SourceFile + "\". Check spelling."
+        return Piece({"headings": Headings}, None, [numpy.zeros(0)] * (1 + len(ThisChart.Series)))
+    CheckSourceSheets(Cache, SourceFile, ThisChart)
     #
-    # We've been passed an ini file name, so just a single file for the list
+    # Rows without a time can't be lined up, so SarSeries leaves them out. The times of day count
+    # from midnight at the start of the book's sar date
     #
-    IniFileList.append(Directory + "\\" + options.IniFilename)
-elif options.AllFiles:
+    Track = Evaluate(PlanSeries(SheetSource(Cache, [SourceFile]), ThisChart))[SystemFQDN]
+    return Piece({"headings": Headings}, None, [Track.Times - DateSeconds(SarDate)] + Track.Values)
+
+#-------------------------------------------------------------------------------
+# Function:     AlignSourceBooks
+# Description:  Reads the series of a chart from each of the source books (or takes them
+#               from the manifest, for the books that haven't been read), and lines the
+#               books up on the times of day of their samples (rather than on their row
+#               numbers) as the ini file's Align setting says
+# Arguments:    Plan - the chart plan
+#               ThisChart - the chart, from the chart plan
+#               Cache - the SheetCache holding the books' sheets
+#               SourceBooks - the list of source book dictionaries
+#               Manifest - the Manifest, or None if we're not keeping one
+# Returns:      The chart data, as returned by AlignChartData
+#-------------------------------------------------------------------------------
+def AlignSourceBooks(Plan, ThisChart, Cache, SourceBooks, Manifest):
+    Tracks = []
+    Headings = []
+    for SourceBook in SourceBooks:
+        if SourceBook["Stored"]:
+            ThisPiece = Manifest.piece(ThisChart.SheetTitle, SourceBook["FileName"])
+            Manifest.add(ThisChart.SheetTitle, SourceBook["FileName"])
+        else:
+            ThisPiece = BookTrack(Cache, SourceBook["FileName"], ThisChart)
+            if Manifest:
+                Manifest.add(ThisChart.SheetTitle, SourceBook["FileName"], ThisPiece)
+        Tracks.append((ThisPiece.Arrays[0], ThisPiece.Arrays[1:]))
+        Headings += ThisPiece.Meta["headings"]
+    return AlignChartData(Plan, Tracks, Headings)
+
+#-------------------------------------------------------------------------------
+# Function:     AlignChartData
+# Description:  Lines up the series of several books (or stitched hosts) on their sample
+#               times, with the method given by the ini file's Align setting
+# Arguments:    Plan - the chart plan
+#               Tracks - a list of (sample times, [series arrays]) tuples, one for each book
+#               Headings - the column headings of the series, in the same order
+# Returns:      A tuple of (sample times array, Headings, [series arrays]) - the chart data
+#-------------------------------------------------------------------------------
+def AlignChartData(Plan, Tracks, Headings):
+    (Times, Series) = AlignTracks(Tracks, Plan.Align, Plan.Tolerance, Plan.Interval)
+    return (Times, Headings, [Values for TrackSeries in Series for Values in TrackSeries])
+
+#-------------------------------------------------------------------------------
+# Function:     ChartDataHeight
+# Description:  Returns the number of rows of a chart data sheet, including the heading rows
+#-------------------------------------------------------------------------------
+def ChartDataHeight(ChartData):
+    (Times, Headings, Series) = ChartData
+    return HeadRows + max([len(Times)] + [len(Values) for Values in Series])
+
+#-------------------------------------------------------------------------------
+# Function:     ChartDataColumns
+# Description:  Turns chart data into the columns of a chart data sheet
+# Arguments:    ChartData - a tuple of (sample times array, Headings, [series arrays])
+#               TimeLabels - the function to turn the sample times into the time column
+#                            cells (ToDateTimes or ToTimesOfDay)
+# Returns:      A list of columns, each starting at row 1, with the time column first
+#-------------------------------------------------------------------------------
+def ChartDataColumns(ChartData, TimeLabels):
+    (Times, Headings, Series) = ChartData
+    ChartColumns = [["Time", None] + TimeLabels(Times)]
+    for (Heading, Values) in zip(Headings, Series):
+        ChartColumns.append([Heading, None] + ToCells(Values))
+    return ChartColumns
+
+#-------------------------------------------------------------------------------
+# Function:     BookColumns
+# Description:  Reads the series of a chart from a source book, for charting the books side
+#               by side (row for row), adding source columns together and applying the
+#               CellDivisionFactors. The series are worked out by SarSeries, as for the
+#               other charts, with the book read row for row down to its MaxRow
+# Arguments:    Cache - the SheetCache holding the book's sheets
+#               SourceBook - the source book dictionary
+#               ThisChart - the chart, from the chart plan
+# Returns:      A list of columns, one for each series, each starting at row 1 (heading in
+#               row 1, row 2 empty, data from row 3)
+#-------------------------------------------------------------------------------
+def BookColumns(Cache, SourceBook, ThisChart):
     #
-    # Process all the ini files in the specified directory
+    # Pull out the system short name & FQDN and the sar date from the overview page
     #
-    for File in os.listdir(Directory):
-        if os.path.splitext(File)[1] == ".ini":
-            if not os.path.isdir(File):
-                IniFileList.append(Directory + "\\" + File)
-else:
-    parser.error("must specify either -f or -a")
-    parser.print_help()
-    sys.exit()
-#
-# Check we can open the ini file
-#
-for IniFile in IniFileList:
-    print "Processing " + IniFile + "..."
-    try:
-        File = open(IniFile, 'rb')
-    except IOError:
-        print "Can't open file " + IniFile + ", are you sure this file exists and is readable?"
-        sys.exit()
+    (SystemName, SystemFQDN, SarDate) = BookDetails(Cache, SourceBook["FileName"])
+    CheckSourceSheets(Cache, SourceBook["FileName"], ThisChart)
+    Track = Evaluate(PlanSeries(SheetSource(Cache, [SourceBook["FileName"]], SourceBook["MaxRow"]), ThisChart))[SystemFQDN]
+    Columns = []
+    for (ThisSeries, Values) in zip(ThisChart.Series, Track.Values):
+        if len(ThisSeries.Sources) == 1 and not Cache.hassheet(SourceBook["FileName"], ThisSeries.Sources[0].Sheet):
+            #
+            # Leave an empty column, with no heading, for this book
+            #
+            Columns.append([None])
+            continue
+        #
+        # convert $SYSNAME, $SYSFQDN or $SARDATE in column heading to real system name or sar date,
+        # and add the column (heading in row 1, row 2 empty, data from row 3) to the chart data
+        #
+        Columns.append([ColumnHeading(ThisSeries.NewColumnHeading, SystemName, SystemFQDN, SarDate), None] + ToCells(Values))
+    return Columns
+
+#-------------------------------------------------------------------------------
+# Function:     TimeSourceBook
+# Description:  Finds the source book that a chart's time column comes from, when the books
+#               are charted row for row: the first one that has the chart's first sheet
+# Arguments:    Cache - the SheetCache holding the books' sheets
+#               Manifest - the Manifest, or None if we're not keeping one
+#               SourceBooks - the list of source book dictionaries
+#               ThisChart - the chart, from the chart plan
+# Returns:      The source book dictionary, or None if none of the books has the sheet
+#-------------------------------------------------------------------------------
+def TimeSourceBook(Cache, Manifest, SourceBooks, ThisChart):
+    TimeSheetName = ThisChart.Series[0].Sources[0].Sheet
+    for SourceBook in SourceBooks:
+        if SourceBook["Stored"]:
+            if Manifest.meta(ThisChart.SheetTitle, SourceBook["FileName"])["hasTime"]:
+                return SourceBook
+        elif Cache.hassheet(SourceBook["FileName"], TimeSheetName):
+            return SourceBook
+        else:
+            print "Could not find sheet name \"" + TimeSheetName + "\" in file \"" + SourceBook["FileName"] + "\". Check spelling."
+    return None
+
+#-------------------------------------------------------------------------------
+# Function:     PieceCells
+# Description:  Returns a column of a piece from the manifest as a list of cell values
+#-------------------------------------------------------------------------------
+def PieceCells(Column):
+    if isinstance(Column, NumericColumn):
+        return Column.cells()
+    return Column
+
+#-------------------------------------------------------------------------------
+# Function:     BookSegment
+# Description:  Reads the series of a chart from a source book, with the dates and times
+#               of its samples, for stitching each host's books together
+# Arguments:    Cache - the SheetCache holding the book's sheets
+#               SourceFile - the book name
+#               ThisChart - the chart, from the chart plan
+# Returns:      The book's piece of the chart data: a Piece with the system names and
+#               sar date in Meta, and the sample times (seconds since 1970) followed by
+#               the series arrays in Arrays. Meta is empty if the book doesn't have the
+#               chart's time sheet
+#-------------------------------------------------------------------------------
+def BookSegment(Cache, SourceFile, ThisChart):
+    TimeSheetName = ThisChart.Series[0].Sources[0].Sheet
+    if not Cache.hassheet(SourceFile, TimeSheetName):
+        print "Could not find sheet name \"" + TimeSheetName + "\" in file \"" + SourceFile + "\". Check spelling."
+        return Piece({}, None, [])
+    CheckSourceSheets(Cache, SourceFile, ThisChart)
+    Track = Evaluate(PlanSeries(SheetSource(Cache, [SourceFile]), ThisChart)).values()[0]
+    return Piece({"name": Track.Name, "fqdn": Track.FQDN, "date": Track.FirstDate}, None, [Track.Times] + Track.Values)
+
+#-------------------------------------------------------------------------------
+# Function:     SheetRows
+# Description:  Returns the number of rows a sheet can have in the workbook we're saving
+#               to (an .xlsx if we're not saving it)
+#-------------------------------------------------------------------------------
+def SheetRows(SaveFileName):
+    if SaveFileName:
+        return MaxRows(SaveFileName)
+    return MaxXlsxRows
+
+#-------------------------------------------------------------------------------
+# Function:     ChartFits
+# Description:  Checks that a chart data sheet will fit in the workbook we're saving to
+#               (256 columns and 65,536 rows for .xls), and says why if it won't. A
+#               downsampled chart needs at least MaxPoints data rows (more, up to the rows
+#               a sheet can have, if its series have values in different rows), unless the
+#               full data is being kept as well
+# Arguments:    SaveFileName - the file name the workbook will be saved as (or None)
+#               ThisChart - the chart, from the chart plan
+#               Width - the number of columns, including the time column
+#               Height - the number of rows, including the heading rows
+# Returns:      True if it fits
+#-------------------------------------------------------------------------------
+def ChartFits(SaveFileName, ThisChart, Width, Height):
+    if SaveFileName:
+        LastColumn = MaxColumns(SaveFileName)
+    else:
+        LastColumn = MaxXlsxColumns
+    LastRow = SheetRows(SaveFileName)
+    if Width > LastColumn:
+        print "Chart \"" + ThisChart.SheetTitle + "\" needs " + str(Width) + " columns, but a sheet can only go up to column " \
+            + ColumnLetter(LastColumn) + " (" + str(LastColumn) + " columns). Save as .xlsx, or split the chart."
+        return False
+    if ThisChart.MaxPoints and not ThisChart.KeepFullData:
+        Height = min(Height, ThisChart.MaxPoints + HeadRows)
+    if Height > LastRow:
+        print "Chart \"" + ThisChart.SheetTitle + "\" needs " + str(Height) + " rows, but a sheet can only have " + str(LastRow) \
+            + " rows. Save as .xlsx, set MaxPoints in [Chart" + str(ThisChart.Number) + "Options], or use -b and -e" \
+            + " to chart a shorter period."
+        return False
+    return True
+
+#-------------------------------------------------------------------------------
+# Function:     WriteChart
+# Description:  Writes a chart data sheet to the new workbook, and adds a sheet with a
+#               line chart of it. If the chart has Summary=yes, the statistics of each
+#               series (from the full data, before it's downsampled) go on a sheet of
+#               their own too
+# Arguments:    NewxlFile - the new workbook
+#               ThisChart - the chart, from the chart plan
+#               ChartColumns - the chart data, a list of columns each starting at row 1,
+#                              with the time column first
+#               MaxRow - the last row of the chart data to plot
+#               ImageFile - the file to render the chart to as an image as well (or None)
+#               RenderJobs - the list to add the chart's render job to
+#               LastRow - the number of rows a sheet can have, the most a downsampled
+#                         chart data sheet can grow to
+#-------------------------------------------------------------------------------
+def WriteChart(NewxlFile, ThisChart, ChartColumns, MaxRow, ImageFile=None, RenderJobs=None, LastRow=MaxXlsxRows):
+    NewSheetColumn = len(ChartColumns) - 1
+    if isinstance(NewxlFile, StreamWorkbook):
+        #
+        # The streaming writer adds the chart sheet and the data sheet in one go, and they can't be
+        # changed afterwards, so the data is downsampled first
+        #
+        FullColumns = ChartColumns
+        ChartRows = MaxRow
+        if ThisChart.MaxPoints:
+            ChartColumns = DownsampleColumns(ChartColumns, ThisChart.MaxPoints, ThisChart.Downsample, LastRow - HeadRows)
+            ChartRows = min(MaxRow, max([len(Column) for Column in ChartColumns]))
+        NewxlFile.addchart(ThisChart.SheetTitle, ChartColumns, ChartRows, ThisChart.GraphTitle, ThisChart.YAxisTitle)
+        if ThisChart.MaxPoints and ThisChart.KeepFullData:
+            NewxlFile.addsheet("Full - " + ThisChart.SheetTitle, FullColumns)
+        if ThisChart.Summary:
+            NewxlFile.addsheet("Summary - " + ThisChart.SheetTitle, SummaryColumns(SummarizeColumns(FullColumns)))
+        FullColumns = None
+        if ImageFile and RenderJobs is not None:
+            RenderJobs.append(RenderJob(ImageFile, ThisChart.GraphTitle, ThisChart.YAxisTitle, ChartColumns))
+        return
     #
-    # Seem to be ok, close it again
+    # Create and Name the sheet
     #
-    File.close()
+    NewxlFile.addnewworksheetafter("Sheet1", ThisChart.SheetTitle)
+    if ThisChart.Summary:
+        Summary = SummaryColumns(SummarizeColumns(ChartColumns))
+        NewxlFile.addnewworksheetafter(ThisChart.SheetTitle, "Summary - " + ThisChart.SheetTitle)
+        NewxlFile.setrange("Summary - " + ThisChart.SheetTitle, 1, 1, ColumnsToRows(Summary))
+        NewxlFile.setrangefont("Summary - " + ThisChart.SheetTitle, (1, 1, 1, len(Summary)), ("Bold",), "Arial", 10)
     #
-    # Read the [General] section from the inifile. If present, the SaveFileName parameter
-    # tells us the Excel spreadsheet name to save the output file as
+    # Cut the chart data down to MaxPoints rows if we've been asked to, keeping the full resolution
+    # data on a sheet of its own (not charted) if that's wanted too
     #
-    SaveFileName = False
-    SaveFileNameList = win32api.GetProfileSection("General", IniFile)
-    if len(SaveFileNameList) != 0:
-        (SaveFileNameParameterName, SaveFileNameParameterValue) = SaveFileNameList[0].split("=")
-        if re.match("SaveFileName", SaveFileNameParameterName):
-            SaveFileName = SaveFileNameParameterValue
+    ChartRows = MaxRow
+    if ThisChart.MaxPoints:
+        if ThisChart.KeepFullData:
+            NewxlFile.addnewworksheetafter(ThisChart.SheetTitle, "Full - " + ThisChart.SheetTitle)
+            NewxlFile.setrange("Full - " + ThisChart.SheetTitle, 1, 1, ColumnsToRows(ChartColumns))
+            if NewSheetColumn > 0:
+                NewxlFile.setrangefont("Full - " + ThisChart.SheetTitle, (1, 2, 1, NewSheetColumn + 1), ("Bold",), "Arial", 10)
+        ChartColumns = DownsampleColumns(ChartColumns, ThisChart.MaxPoints, ThisChart.Downsample, LastRow - HeadRows)
+        ChartRows = min(MaxRow, max([len(Column) for Column in ChartColumns]))
     #
-    # Read the [Files] section from the inifile. This tells us the Excel spreadsheet
-    # files that we are to read the source data from
+    # Write the whole chart data table with a single range write, then make the headings
+    # Bold, Arial, 10 pt with one style call
     #
-    FileList = win32api.GetProfileSection("Files", IniFile)
-    if len(FileList) == 0:
-        print "Could not read [Files] section from " + IniFile + ". Are you sure "\
-        "you've specified an absolute path, not a relative path to the file?"
-        sys.exit()
+    NewxlFile.setrange(ThisChart.SheetTitle, 1, 1, ColumnsToRows(ChartColumns))
+    if NewSheetColumn > 0:
+        NewxlFile.setrangefont(ThisChart.SheetTitle, (1, 2, 1, NewSheetColumn + 1), ("Bold",), "Arial", 10)
+    
     #
-    # Now split out the filename section (after the "=" character), and add all filenames to
-    # the SourceFiles list
+    # Now add a chart
     #
-    SourceFiles = []
-    for File in FileList:
-        SourceFiles.append(File.split("=")[1])
+    NewxlFile.addnewworksheetbefore(ThisChart.SheetTitle, "Chart - " + ThisChart.SheetTitle)
+    NewChart = NewxlFile.insertchart("Chart - " + ThisChart.SheetTitle, 1, 1, 900, 600)
+    NewxlFile.plotdata(sheet = ThisChart.SheetTitle,
+                       dataRanges = ((1, 1, ChartRows, NewSheetColumn + 1),),
+                       chartObject = NewChart,
+                       gallery = xlLine,
+                       format = 2,      # 2D line, unstacked with no markers
+                       plotBy = xlColumns,
+                       categoryLabels = 1,
+                       seriesLabels = 1,
+                       hasLegend = True,
+                       title = ThisChart.GraphTitle,
+                       categoryTitle = "Time",
+                       valueTitle = ThisChart.YAxisTitle,
+                       extraTitle = ""
+                       )
     #
-    # At this point, SourceFiles is the list of input spreadsheet filenames
+    # The image is drawn from the same (downsampled) data as the chart
     #
-    # -----
+    if ImageFile and RenderJobs is not None:
+        RenderJobs.append(RenderJob(ImageFile, ThisChart.GraphTitle, ThisChart.YAxisTitle, ChartColumns[:NewSheetColumn + 1]))
+
+#-------------------------------------------------------------------------------
+# Function:     NewChartBook
+# Description:  Creates the new workbook for the charts. With --stream (and a .xlsx file to
+#               save to) the workbook is written straight to disk by StreamWorkbook as the
+#               charts are added, otherwise it's built with the Workbook backend
+# Arguments:    Plan - the chart plan
+#               Workbook - the workbook class, UseExcel or UseWorkbook
+#               Options - the command line options
+# Returns:      The new workbook
+#-------------------------------------------------------------------------------
+def NewChartBook(Plan, Workbook, Options):
+    if Options.Stream:
+        if Plan.SaveFileName and os.path.splitext(Plan.SaveFileName)[1].lower() == ".xlsx":
+            return StreamWorkbook(Plan.SaveFileName)
+        print "--stream only writes .xlsx files, so " + Plan.IniFile + " is being written without it"
+    NewxlFile = Workbook()
+    NewxlFile.show()
+    return NewxlFile
+
+#-------------------------------------------------------------------------------
+# Function:     FinishChartBook
+# Description:  Tidies up the new workbook by deleting its first (empty) sheet, and saves
+#               and closes it if we have a SaveFileName. A streamed workbook just needs
+#               to be closed
+#-------------------------------------------------------------------------------
+def FinishChartBook(NewxlFile, SaveFileName):
+    if isinstance(NewxlFile, StreamWorkbook):
+        NewxlFile.close()
+        return
+    NewxlFile.deleteworksheet("Sheet1")
+    if SaveFileName:
+        NewxlFile.save(SaveFileName)
+        NewxlFile.close()
+
+#-------------------------------------------------------------------------------
+# Function:     ChartImageFile
+# Description:  Returns the image file to render a chart to, or None if we're not rendering
+#               charts (no --render switch)
+#-------------------------------------------------------------------------------
+def ChartImageFile(Plan, Options, ThisChart):
+    if not Options.RenderDirectory:
+        return None
+    return ImageFileName(Options.RenderDirectory, Plan.IniFile, ThisChart.Number, ThisChart.SheetTitle, Options.RenderFormat)
+
+#-------------------------------------------------------------------------------
+# Function:     ChartImage
+# Description:  Returns the image file to render a chart to, as ChartImageFile does, but
+#               None if the chart hasn't changed since the last run and its image is still
+#               there, so it isn't rendered again
+#-------------------------------------------------------------------------------
+def ChartImage(Plan, Options, Manifest, ThisChart):
+    ImageFile = ChartImageFile(Plan, Options, ThisChart)
+    if Manifest and Manifest.unchangedchart(ThisChart.SheetTitle, ImageFile):
+        return None
+    return ImageFile
+
+#-------------------------------------------------------------------------------
+# Function:     OpenManifest
+# Description:  Creates the Manifest to keep next to the chart workbook, and loads the one
+#               from the last run (unless --rebuild-all), so that the books it already has
+#               the chart data of don't have to be read again
+# Arguments:    Plan - the chart plan
+#               Options - the command line options
+# Returns:      The Manifest, or None if there's no SaveFileName or --no-manifest was given,
+#               or the charts come from a store (which has no books to skip)
+#-------------------------------------------------------------------------------
+def OpenManifest(Plan, Options):
+    if Options.NoManifest or not Plan.SaveFileName or Plan.Store:
+        return None
     #
-    # Now read the [Charts] section from the inifile. This tells us how many charts
-    # we will be plotting, and what the spreadsheet tab title will be for the chart data
-    # and chart sheets in the new workbook
+    # Anything that changes the data of every chart is part of each chart's definition. Each
+    # book's MaxRow comes from the first chart's first sheet
     #
-    ChartListFromIniFile = win32api.GetProfileSection("Charts", IniFile)
-    if len(ChartListFromIniFile) == 0:
-        print "Could not read [Charts] section from " + IniFile
-        sys.exit()
+    Settings = (Plan.Stitch, Plan.Align, Plan.Tolerance, Plan.Interval, Plan.Charts[0].Series[0].Sources[0].Sheet,
+                Options.BeginTime, Options.EndTime, Options.PerCPU)
+    NewManifest = Manifest(Plan.SaveFileName, Version, Plan.Charts, Settings)
+    if not Options.RebuildAll:
+        NewManifest.load()
+    return NewManifest
+
+#-------------------------------------------------------------------------------
+# Function:     SaveManifest
+# Description:  Writes the manifest of the chart workbook that's just been saved
+#-------------------------------------------------------------------------------
+def SaveManifest(Manifest):
+    if Manifest:
+        print Manifest.report()
+        Manifest.save()
+
+#-------------------------------------------------------------------------------
+# Function:     RenderImages
+# Description:  Renders the charts of an ini file as images, in a pool of processes
+# Arguments:    RenderJobs - the list of render jobs from WriteChart
+#               Options - the command line options
+# Returns:      0 on success, 1 if any of the charts couldn't be rendered
+#-------------------------------------------------------------------------------
+def RenderImages(RenderJobs, Options):
+    if len(RenderJobs) == 0:
+        return 0
+    if not os.path.isdir(Options.RenderDirectory):
+        os.makedirs(Options.RenderDirectory)
+    Failures = 0
+    for (ImageFile, Error) in RenderCharts.RenderCharts(RenderJobs, Options.RenderWorkers):
+        if Error:
+            print "Could not render chart " + ImageFile + ":"
+            print Error
+            Failures += 1
+    print "Rendered " + str(len(RenderJobs) - Failures) + " of " + str(len(RenderJobs)) + " charts to " + Options.RenderDirectory
+    return 1 if Failures > 0 else 0
+
+#-------------------------------------------------------------------------------
+# Function:     StitchIniFile
+# Description:  Creates the chart workbook for an ini file with Stitch=yes. Rather than
+#               laying the books out side by side, each host's books are joined into one
+#               continuous series per chart, with real dates and times in the time column.
+#               The books are read a few at a time (-w of them), and only the columns being
+#               charted are kept from each one, so a month of daily books is never all in
+#               memory at once. Where there's more than one host, the hosts are lined up on
+#               their sample times as the ini file's Align setting says. The books that the
+#               manifest has the chart data of aren't read, their pieces are stitched in
+#               from the manifest instead
+# Arguments:    Plan - the chart plan
+#               Workbook - the workbook class, UseExcel or UseWorkbook
+#               Options - the command line options
+#               Books - the BookCache, or None if we're not using one
+#               Manifest - the Manifest, or None if we're not keeping one
+#               RenderJobs - the list to add the charts' render jobs to
+# Returns:      0 on success, 1 if the ini file couldn't be processed
+#-------------------------------------------------------------------------------
+def StitchIniFile(Plan, Workbook, Options, Books, Manifest, RenderJobs):
+    Stitchers = dict((ThisChart.Number, Stitcher()) for ThisChart in Plan.Charts)
+    SheetNames = Plan.sheetnames()
+    BookCount = 0
     #
-    # Split out the chart number and sheettitle from the chart line (the bit after the "=" character)
-    #
-    Charts = {}
-    for Chart in ChartListFromIniFile:
-        (ChartNumber, SheetTitle) = Chart.split("=")
-        Charts[ChartNumber] = SheetTitle
-    #
-    # At this point, Charts is a dictionary whose keys are the chart numbers, and whose values are
-    # the sheet titles to be applied to the sheet tabs
-    #
-    # Now create a data structure called "ChartDetails"
-    #
-    # ChartDetails{Chartn}  {"SheetTitle" => String from [Charts]
-    #                       {"GraphTitle" => String from [ChartnTitles]
-    #                       {"YAxisTitle" => String from [ChartnTitles]
-    #                       {"DataSourceSheets" => List[for each line under [ChartnData]]
-    #                                                   {"NewColumnHeading" => String from [ChartnData]
-    #                                                   {"CellDivisionFactor" => Integer from [ChartnData]
-    #                                                   {"AddList"} => List[for each DataSource Sheet/Column to add together (could be only one)]
-    #                                                           [{"SheetNameInSourceWorkbook"}
-    #                                                           {"ColumnHeadingInSourceWorkbook"}]
-    #
-    # For example ChartDetails["Chart2"]["SheetTitle"] = "Sheet Title"
-    #             ChartDetails["Chart2"]["GraphTitle"] = "Graph Title"
-    #             ChartDetails["Chart2"]["YAxisTitle"] = "Y Axis title"
-    #             ChartDetails["Chart2"]["DataSourceSheets"][0] = ["NewColumnHeading"] = "New Column heading"
-    #                                                             ["CellDivisionFactor"] = 1024
-    #                                                             ["AddList"][0] = ["SheetNameInSourceWorkbook"] = "Data Source Sheet Name"
-    #                                                                              ["ColumnHeadingInSourceWorkbook"] = "Data Source Column Heading"
-    #                                                                        [1] = ["SheetNameInSourceWorkbook"] = "Data Source Sheet Name"
-    #                                                                              ["ColumnHeadingInSourceWorkbook"] = "Data Source Column Heading"
-    #                                                       [1] = ["NewColumnHeading"] = "New Column heading"
-    #                                                             ["CellDivisionFactor"] = 1
-    #                                                             ["AddList"][0] = ["SheetNameInSourceWorkbook"] = "Data Source Sheet Name"
-    #                                                                              ["ColumnHeadingInSourceWorkbook"] = "Data Source Column Heading"
-    #                      
-    ChartDetails = {}
-    for Chart in Charts.keys():
-        #
-        # Read the [ChartnTitles] sections from the inifile. These tells us the main graph title
-        # and Y Axis titles to be applied to each graph
-        #
-        ChartTitleListFromIniFile = win32api.GetProfileSection(Chart + "Titles", IniFile)
-        if len(ChartTitleListFromIniFile) == 0:
-            print "Could not read [ChartnTitles] section from " + IniFile
-            sys.exit()
-        ChartDetails[Chart] = {}
-        ChartDetails[Chart]["SheetTitle"] = Charts[Chart]
-        ChartDetails[Chart]["GraphTitle"] = ChartTitleListFromIniFile[0].split("=")[1]
-        ChartDetails[Chart]["YAxisTitle"] = ChartTitleListFromIniFile[1].split("=")[1]
-        
-    for Chart in Charts.keys():
-        #
-        # Read the [ChartnData] sections from the inifile. These tell us the column heading to be applied
-        # to each new column, the source sheet name to get the data from, and the source column heading on
-        # that sheet
-        #    
-        ChartDataLinesFromIniFile = win32api.GetProfileSection(Chart + "Data", IniFile)
-        ChartDetails[Chart]["DataSourceSheets"] = []
-        for ChartDataLine in ChartDataLinesFromIniFile:
-            (LeftHalfOfChartDataLine, RightHalfOfChartDataLine) = ChartDataLine.split("=")
-            #
-            # First deal with LeftHalfofChartDataLine
-            # Set a default CellDivisionFactor in case there isn't one in the ini file
-            #
-            CellDivisionFactor = 1
-            if re.search("::", LeftHalfOfChartDataLine):
-                (NewColumnHeading, CellDivisionFactor) = re.split("::", LeftHalfOfChartDataLine)
-            else:
-                NewColumnHeading = LeftHalfOfChartDataLine
-            Temp1 = {}
-            Temp1["NewColumnHeading"] = NewColumnHeading
-            Temp1["CellDivisionFactor"] = int(CellDivisionFactor)
-            Temp1["AddList"] = []
+    # ReadBooks is the positions in Plan.SourceFiles of the books to read, and ReadAhead the books
+    # read in the last batch that haven't been stitched yet
+    #
+    ReadBooks = [Index for (Index, SourceFile) in enumerate(Plan.SourceFiles) if not (Manifest and Manifest.stored(SourceFile))]
+    ReadAhead = {}
+    OpenPool = ThreadPool(processes=max(1, min(Options.OpenWorkers, len(ReadBooks))))
+    try:
+        for (Index, SourceFile) in enumerate(Plan.SourceFiles):
+            if Index not in ReadAhead and (not ReadBooks or ReadBooks[0] != Index):
+                #
+                # Stitch the pieces from the manifest, in the same order as if the book had been read
+                #
+                for ThisChart in Plan.Charts:
+                    ThisPiece = Manifest.piece(ThisChart.SheetTitle, SourceFile)
+                    Manifest.add(ThisChart.SheetTitle, SourceFile)
+                    if ThisPiece.Meta:
+                        Stitchers[ThisChart.Number].addsamples(ThisPiece.Meta["name"], ThisPiece.Meta["fqdn"], ThisPiece.Meta["date"],
+                                                               ThisPiece.Arrays[0], ThisPiece.Arrays[1:])
+                Manifest.addbook(SourceFile)
+                BookCount += 1
+                continue
+            if Index not in ReadAhead:
+                Batch = ReadBooks[:Options.OpenWorkers]
+                del ReadBooks[:Options.OpenWorkers]
+                ReadAhead = dict(zip(Batch, OpenPool.map(ReadSourceBook, [(Plan.SourceFiles[Book], Workbook, SheetNames, Options, Books)
+                                                                          for Book in Batch])))
+            (SourceFile, Sheets) = ReadAhead.pop(Index)
+            if Sheets is None:
+                print "Can't open workbook " + SourceFile + ", are you sure this file exists?"
+                continue
+            Cache = SheetCache()
+            for SheetName in SheetNames:
+                Cache.loadcolumns(SourceFile, SheetName, Sheets.get(SheetName))
+            Sheets = None
+            ValidatePlan(Plan, Cache, [SourceFile])
+            for ThisChart in Plan.Charts:
+                ThisPiece = BookSegment(Cache, SourceFile, ThisChart)
+                if Manifest:
+                    Manifest.add(ThisChart.SheetTitle, SourceFile, ThisPiece)
+                if ThisPiece.Meta:
+                    Stitchers[ThisChart.Number].addsamples(ThisPiece.Meta["name"], ThisPiece.Meta["fqdn"], ThisPiece.Meta["date"],
+                                                           ThisPiece.Arrays[0], ThisPiece.Arrays[1:])
+            if Manifest:
+                Manifest.addbook(SourceFile)
+            BookCount += 1
+        ReadAhead = None
+    except IniFileError, Error:
+        print Error
+        return 1
+    finally:
+        OpenPool.close()
+        OpenPool.join()
+    if Books:
+        print Books.report()
+        Books.evict()
+    #
+    # Bail out to the next ini file if we have no spreadsheets to process
+    #
+    if BookCount == 0:
+        return 1
+    #
+    # Join each host's books together and line the hosts up, then check that the charts will fit
+    # before we create anything
+    #
+    Aligned = {}
+    for ThisChart in Plan.Charts:
+        Tracks = []
+        Headings = []
+        for (SystemFQDN, (SystemName, FirstDate, LastDate, Times, Series)) in Stitchers.pop(ThisChart.Number).series().items():
             #
-            # Deal with RightHalfofChartDataLine
-            # See if we're adding values from multiple columns
+            # $SARDATE is the range of dates the host's books cover
             #
-            match = re.search("Add\((.+)\)", RightHalfOfChartDataLine)
-            if match:
-                ChartDataLinesToAddTogether = match.group(1).split(",")
-                for ChartDataLineToAdd in ChartDataLinesToAddTogether:
-                    (SheetNameInSourceWorkbook, ColumnHeadingInSourceWorkbook) = ChartDataLineToAdd.split("::")
-                    Temp2 = {}
-                    Temp2["SheetNameInSourceWorkbook"] = SheetNameInSourceWorkbook
-                    Temp2["ColumnHeadingInSourceWorkbook"] = ColumnHeadingInSourceWorkbook
-                    Temp1["AddList"].append(Temp2)
+            if FirstDate == LastDate:
+                SarDate = FirstDate
             else:
-                (SheetNameInSourceWorkbook, ColumnHeadingInSourceWorkbook) = RightHalfOfChartDataLine.split("::")
-                Temp2 = {}
-                Temp2["SheetNameInSourceWorkbook"] = SheetNameInSourceWorkbook
-                Temp2["ColumnHeadingInSourceWorkbook"] = ColumnHeadingInSourceWorkbook
-                Temp1["AddList"].append(Temp2)
-            ChartDetails[Chart]["DataSourceSheets"].append(Temp1)
-        # End for ChartDataLine in ChartDataLinesFromIniFile:
-    
+                SarDate = FirstDate + " to " + LastDate
+            Tracks.append((Times, Series))
+            Headings += [ColumnHeading(ThisSeries.NewColumnHeading, SystemName, SystemFQDN, SarDate) for ThisSeries in ThisChart.Series]
+        Aligned[ThisChart.Number] = AlignChartData(Plan, Tracks, Headings)
+        if not ChartFits(Plan.SaveFileName, ThisChart, 1 + len(Headings), ChartDataHeight(Aligned[ThisChart.Number])):
+            return 1
+    print "Stitched " + str(BookCount) + " books"
+    return WriteStitchedCharts(Plan, Workbook, Options, Manifest, Aligned, RenderJobs)
+
+#-------------------------------------------------------------------------------
+# Function:     WriteStitchedCharts
+# Description:  Creates the chart workbook from the chart data of each host's stitched
+#               series, with real dates and times in the time column
+# Arguments:    Plan - the chart plan
+#               Workbook - the workbook class, UseExcel or UseWorkbook
+#               Options - the command line options
+#               Manifest - the Manifest, or None if we're not keeping one
+#               Aligned - dictionary of chart number -> chart data, from AlignChartData
+#               RenderJobs - the list to add the charts' render jobs to
+# Returns:      0 on success, 1 if any of the charts couldn't be rendered
+#-------------------------------------------------------------------------------
+def WriteStitchedCharts(Plan, Workbook, Options, Manifest, Aligned, RenderJobs):
     #
     # Create a new spreadsheet
     #
-    NewxlFile = UseExcel()
-    NewxlFile.show()
+    NewxlFile = NewChartBook(Plan, Workbook, Options)
+    for ThisChart in Plan.Charts:
+        ChartTimer = Profile.start("chart", ThisChart.SheetTitle)
+        ChartColumns = ChartDataColumns(Aligned.pop(ThisChart.Number), ToDateTimes)
+        WriteChart(NewxlFile, ThisChart, ChartColumns, max([len(Column) for Column in ChartColumns]),
+                   ChartImage(Plan, Options, Manifest, ThisChart), RenderJobs, SheetRows(Plan.SaveFileName))
+        Profile.stop(ChartTimer, Profile.CountCells(ChartColumns))
+    FinishChartBook(NewxlFile, Plan.SaveFileName)
+    SaveManifest(Manifest)
+    return RenderImages(RenderJobs, Options)
+
+#-------------------------------------------------------------------------------
+# Function:     StoreIniFile
+# Description:  Creates the chart workbook for an ini file with Store= in its [General]
+#               section. Rather than opening source books, the samples of each chart's
+#               sources for all of the hosts are read from the SarStore in one range scan
+#               (by SarSeries, which works out the series from them as it would from the
+#               books: the time column comes from the sheet of the chart's first source,
+#               and the other sources are lined up with it), and each host's series are
+#               charted as one continuous series, as with Stitch=yes. Where there's more
+#               than one host, the hosts are lined up on their sample times as the ini
+#               file's Align setting says
+# Arguments:    Plan - the chart plan
+#               Workbook - the workbook class, UseExcel or UseWorkbook
+#               Options - the command line options
+#               RenderJobs - the list to add the charts' render jobs to
+# Returns:      0 on success, 1 if the ini file couldn't be processed
+#-------------------------------------------------------------------------------
+def StoreIniFile(Plan, Workbook, Options, RenderJobs):
+    Start = time.time()
+    try:
+        Store = SarStore(Plan.Store)
+    except StoreError, Error:
+        print Error
+        return 1
+    try:
+        Source = StoreSource(Store, Plan.Hosts, Plan.FirstDate, Plan.LastDate)
+        Hosts = Source.hosts()
+        for Host in Plan.Hosts or ():
+            if Host not in Hosts and Host not in [SystemName for (SystemName, FirstDate, LastDate) in Hosts.values()]:
+                print "Host " + Host + " has no books in store " + Plan.Store + " for the dates in " + Plan.IniFile
+        if len(Hosts) == 0:
+            return 1
+        try:
+            ValidateStore(Plan, Store.headings(Hosts.keys()))
+        except IniFileError, Error:
+            print Error
+            return 1
+        #
+        # FirstDate and LastDate are whole days, so the period runs up to midnight at the end of LastDate
+        #
+        PeriodStart = DateSeconds(Plan.FirstDate) if Plan.FirstDate else None
+        PeriodEnd = DateSeconds(Plan.LastDate) + SecondsPerDay if Plan.LastDate else None
+        Aligned = {}
+        for ThisChart in Plan.Charts:
+            Tracks = []
+            Headings = []
+            for (SystemFQDN, Track) in Evaluate(PlanSeries(Source, ThisChart, PeriodStart, PeriodEnd)).items():
+                #
+                # $SARDATE is the range of dates the host's books cover
+                #
+                if Track.FirstDate == Track.LastDate:
+                    SarDate = Track.FirstDate
+                else:
+                    SarDate = Track.FirstDate + " to " + Track.LastDate
+                Tracks.append((Track.Times, Track.Values))
+                Headings += [ColumnHeading(ThisSeries.NewColumnHeading, Track.Name, SystemFQDN, SarDate) for ThisSeries in ThisChart.Series]
+            if len(Tracks) == 0:
+                print "None of the hosts in store " + Plan.Store + " have samples for chart \"" + ThisChart.SheetTitle + "\""
+                return 1
+            Aligned[ThisChart.Number] = AlignChartData(Plan, Tracks, Headings)
+            if not ChartFits(Plan.SaveFileName, ThisChart, 1 + len(Headings), ChartDataHeight(Aligned[ThisChart.Number])):
+                return 1
+        print "Read " + str(Source.samples) + " samples of " + str(len(Hosts)) + " hosts (" + str(Store.chunks) + " chunks) from store " \
+            + Plan.Store + " in " + "%.2f" % (time.time() - Start) + "s"
+    finally:
+        Store.close()
+    return WriteStitchedCharts(Plan, Workbook, Options, None, Aligned, RenderJobs)
+
+#-------------------------------------------------------------------------------
+# Function:     ProcessIniFile
+# Description:  Compiles an ini file into a chart plan and creates the chart workbook it
+#               describes with ProcessPlan
+# Arguments:    IniFile - the ini file name
+#               Workbook - the workbook class, UseExcel or UseWorkbook
+#               Options - the command line options
+# Returns:      0 on success, 1 if the ini file couldn't be processed
+#-------------------------------------------------------------------------------
+def ProcessIniFile(IniFile, Workbook, Options):
     #
-    # Open the source speadsheets
+    # Read and check the ini file. The plan tells us the workbook to save the charts to (if any),
+    # the source workbooks, and the charts in chart number order:
+    #
+    # Plan.SaveFileName = "C:\sar_files\DR\June\graphs.xls"
+    # Plan.SourceFiles = ("C:\sar_files\DR\June\sysora1-2009-06-22.xls", ...)
+    # Plan.Charts[0].SheetTitle = "Sheet Title"                  (from [Charts])
+    #              .GraphTitle = "Graph Title"                  (from [ChartnTitles])
+    #              .YAxisTitle = "Y Axis title"                 (from [ChartnTitles])
+    #              .Series[0].NewColumnHeading = "New Column heading"       (from [ChartnData])
+    #                        .CellDivisionFactor = 1024.0
+    #                        .Sources[0].Sheet = "Data Source Sheet Name"
+    #                                   .Column = "Data Source Column Heading"
+    #                        .Sources[1]...                     (if the series is an Add() of several columns)
+    #
+    print "Processing " + IniFile + "..."
+    try:
+        Plan = CompileIniFile(IniFile, None if Options.NoCache else Options.CacheDirectory)
+    except IniFileError, Error:
+        print Error
+        return 1
+    if Options.NoCache:
+        Books = None
+    else:
+        Books = BookCache(Options.CacheDirectory, Options.CacheSize * 1024 * 1024, Options.RebuildCache)
+    return ProcessPlan(Plan, Workbook, Options, Books, OpenManifest(Plan, Options))
+
+#-------------------------------------------------------------------------------
+# Function:     ProcessPlan
+# Description:  Opens the source workbooks of a chart plan with the Workbook backend
+#               (UseExcel or UseWorkbook), checks the plan against them and creates the
+#               chart workbook it describes. If the manifest from the last run has the
+#               chart data of a book, the book isn't opened again. Plans that chart from a
+#               store, or stitch the books together, are handed on to StoreIniFile or
+#               StitchIniFile
+# Arguments:    Plan - the chart plan
+#               Workbook - the workbook class, UseExcel or UseWorkbook
+#               Options - the command line options
+#               Books - the BookCache (or the LiveBooks with --watch), or None if we're not
+#               using one
+#               Manifest - the Manifest, or None if we're not keeping one
+# Returns:      0 on success, 1 if the ini file couldn't be processed
+#-------------------------------------------------------------------------------
+def ProcessPlan(Plan, Workbook, Options, Books, Manifest):
     #
+    # Open the source speadsheets, several at once, and read the sheets we need from them into
+    # the cache. The pool hands the results back in ini file order, so the column order is stable
+    #
+    RenderJobs = []
+    if Plan.Store:
+        return StoreIniFile(Plan, Workbook, Options, RenderJobs)
+    if Plan.Stitch:
+        return StitchIniFile(Plan, Workbook, Options, Books, Manifest, RenderJobs)
+    Cache = SheetCache()
+    SheetNames = Plan.sheetnames()
     SourceBooks = []
     MaxMaxRow = 0
-    for SourceFile in SourceFiles:
-        try:
-            xlBook = UseExcel(SourceFile)
-        except:
+    FirstSheetName = Plan.Charts[0].Series[0].Sources[0].Sheet
+    ReadFiles = [SourceFile for SourceFile in Plan.SourceFiles if not (Manifest and Manifest.stored(SourceFile))]
+    OpenPool = ThreadPool(processes=max(1, min(Options.OpenWorkers, len(ReadFiles))))
+    try:
+        SourceBookData = dict(OpenPool.map(ReadSourceBook, [(SourceFile, Workbook, SheetNames, Options, Books) for SourceFile in ReadFiles]))
+    finally:
+        OpenPool.close()
+        OpenPool.join()
+    if Books:
+        print Books.report()
+        Books.evict()
+    for SourceFile in Plan.SourceFiles:
+        if SourceFile not in SourceBookData:
+            #
+            # The manifest has this book's chart data, so it wasn't read
+            #
+            SourceBooks.append({"FileName": SourceFile, "MaxRow": Manifest.maxrow(SourceFile), "Stored": True})
+            MaxMaxRow = max(MaxMaxRow, SourceBooks[-1]["MaxRow"])
+            continue
+        Sheets = SourceBookData[SourceFile]
+        if Sheets is None:
             print "Can't open workbook " + SourceFile + ", are you sure this file exists?"
             continue
+        for SheetName in SheetNames:
+            Cache.loadcolumns(SourceFile, SheetName, Sheets.get(SheetName))
         Temp = {}
         Temp["FileName"] = SourceFile
-        Temp["ExcelObject"] = xlBook
+        Temp["Stored"] = False
         #
         # Find out maximum row number - we're assuming that all sheets in this book have the same MaxRow as the first sheet
         #
-        Chart1SheetNameInFirstSourceWorkbook = ChartDetails["Chart1"]["DataSourceSheets"][0]["AddList"][0]["SheetNameInSourceWorkbook"]
-        Temp["MaxRow"] = xlBook.lastcellincolumn(Chart1SheetNameInFirstSourceWorkbook, "A")
+        try:
+            Temp["MaxRow"] = Cache.lastrow(SourceFile, FirstSheetName)
+        except KeyError:
+            print "Could not find sheet name \"" + FirstSheetName + "\" in file \"" + SourceFile + "\". Skipping this file."
+            continue
         if Temp["MaxRow"] > MaxMaxRow:
             MaxMaxRow = Temp["MaxRow"]
         SourceBooks.append(Temp)
@@ -282,250 +948,416 @@ for IniFile in IniFileList:
     # Bail out to the next ini file if we have no spreadsheets to process
     #
     if len(SourceBooks) == 0:
-        continue
+        return 1
     #
     # SourceBooks is now a list of Dictionary objects corresponding to the input spreadsheet files
     #
     #   i.e.    SourceBooks[0]["FileName"] = "C:\sar_files\DR\June\sysora1-2009-06-22.xls"
-    #                         ["ExcelObject"] = UseExcel Object
+    #                         ["MaxRow"] = 8642
+    #                         ["Stored"] = False    (True if its chart data is in the manifest)
     #           SourceBooks[1]["FileName"] = "C:\sar_files\DR\June\sysora2-2009-06-22.xls"
-    #                         ["ExcelObject"] = UseExcel Object
+    #                         ["MaxRow"] = 8642
+    #                         ["Stored"] = True
     #
-    ThisChart = {}
-    HeaderRow = []
+    # The workbooks themselves have already been closed, their sheets are in the cache.
+    # Check that every heading the plan refers to is there before we create anything
     #
-    # Frig around to process the chartdetails keys by order of Chartn number
+    try:
+        ValidatePlan(Plan, Cache, [SourceBook["FileName"] for SourceBook in SourceBooks if not SourceBook["Stored"]])
+    except IniFileError, Error:
+        print Error
+        return 1
     #
-    AllCharts = ChartDetails.keys()
-    TempDictionary = {}
-    for ThisChart in AllCharts:
-        #
-        # Split out the chart number and stick add it to the "TempDictionary" dictionary
-        #
-        TempDictionary[int(re.search("Chart(\d+)", ThisChart).group(1))] = ThisChart
+    # Charted row for row, each chart's time column comes from the first book that has its sheet.
+    # The manifest only has the time column of the book it came from last time, so if that's now
+    # a book that hasn't been read (because the book before it has gone), read it
     #
-    # Sort the keys of this dictionary as a list called "TempKeys"
+    TimeBooks = {}
+    if Plan.Align == "row":
+        for ThisChart in Plan.Charts:
+            TimeBook = TimeSourceBook(Cache, Manifest, SourceBooks, ThisChart)
+            if TimeBook and TimeBook["Stored"] and not Manifest.meta(ThisChart.SheetTitle, TimeBook["FileName"])["timeColumn"]:
+                (SourceFile, Sheets) = ReadSourceBook((TimeBook["FileName"], Workbook, SheetNames, Options, Books))
+                if Sheets is not None:
+                    for SheetName in SheetNames:
+                        Cache.loadcolumns(SourceFile, SheetName, Sheets.get(SheetName))
+                    TimeBook["Stored"] = False
+            TimeBooks[ThisChart.Number] = TimeBook
+    for SourceBook in SourceBooks:
+        if Manifest:
+            Manifest.addbook(SourceBook["FileName"], SourceBook["MaxRow"])
     #
-    TempKeys = TempDictionary.keys()
-    TempKeys.sort(lambda x, y: x-y)
+    # Each chart data sheet has a time column, plus a column for each series from each book. Unless
+    # the books are being charted row for row, line them up on their sample times first
     #
-    # End of frig
+    Aligned = {}
+    for ThisChart in Plan.Charts:
+        Height = MaxMaxRow
+        if Plan.Align != "row":
+            Aligned[ThisChart.Number] = AlignSourceBooks(Plan, ThisChart, Cache, SourceBooks, Manifest)
+            Height = ChartDataHeight(Aligned[ThisChart.Number])
+        if not ChartFits(Plan.SaveFileName, ThisChart, 1 + len(SourceBooks) * len(ThisChart.Series), Height):
+            return 1
     #
-    # Now iterate through this (frigged) sorted list
+    # Create a new spreadsheet
     #
-    for TempKey in TempKeys:
-        Chart = TempDictionary[TempKey]
-        ThisChart = ChartDetails[Chart]
-    # for ThisChart in ChartDetails.keys()
-        #
-        # Create and Name the sheet
+    NewxlFile = NewChartBook(Plan, Workbook, Options)
+    for ThisChart in Plan.Charts:
+        ChartTimer = Profile.start("chart", ThisChart.SheetTitle)
+        if ThisChart.Number in Aligned:
+            ChartColumns = ChartDataColumns(Aligned.pop(ThisChart.Number), ToTimesOfDay)
+            WriteChart(NewxlFile, ThisChart, ChartColumns, max([len(Column) for Column in ChartColumns]),
+                       ChartImage(Plan, Options, Manifest, ThisChart), RenderJobs, SheetRows(Plan.SaveFileName))
+            Profile.stop(ChartTimer, Profile.CountCells(ChartColumns))
+            continue
         #
-        NewxlFile.addnewworksheetafter("Sheet1", ThisChart["SheetTitle"])
+        # The chart data sheet is assembled in memory as a list of columns, each starting at row 1,
+        # then written out in one go. Start with the time column from the first source book that
+        # has the required sheet
         #
-        # Copy the time column from the first source book that has the required sheet
+        TimeSheetName = ThisChart.Series[0].Sources[0].Sheet
+        TimeBook = TimeBooks[ThisChart.Number]
+        ChartColumns = [[None]]
+        if TimeBook and not TimeBook["Stored"]:
+            ChartColumns[0] = Cache.column(TimeBook["FileName"], TimeSheetName, 1, firstRow=1)
         #
-        CellRange = "A1:A1"
-        for ThisBook in range(len(SourceBooks)):
-            try:
-                SourceBooks[ThisBook]["ExcelObject"].copycolumntoclipboard((ThisChart["DataSourceSheets"][0]["AddList"][0]["SheetNameInSourceWorkbook"], CellRange))
-            except:
-                print "Could not find sheet name \"" + ThisChart["DataSourceSheets"][0]["AddList"][0]["SheetNameInSourceWorkbook"] \
-                    + "\" in file \"" + SourceBooks[ThisBook]["FileName"] + "\". Check spelling."
-                continue
-            break
-        NewxlFile.pasterangefromclipboard((ThisChart["SheetTitle"], "A1"))
-        
-        NewSheetColumn = 0
+        # Now iterate through SourceBooks, adding each book's columns (from the manifest if the
+        # book wasn't read)
         #
-        # Now iterate through SourceBooks (the list of open Excel data source workbooks)
-        #
-        for ThisBook in range(len(SourceBooks)):
-            #
-            # Pull out the system short name & FQDN from the overview page
-            #
-            TempValue = SourceBooks[ThisBook]["ExcelObject"].getcell("Overview", "A2")
-            SystemName = re.search("Performance Details for system: ([\w-]+)", TempValue).group(1)
-            SystemFQDN = re.search("Performance Details for system: ([\w-]+\.?.+)", TempValue).group(1)
-            #
-            # Pull out the sar date from the overview page
-            #
-            TempValue = SourceBooks[ThisBook]["ExcelObject"].getcell("Overview", "A6")
-            SarDate = re.search("Statistics for (\d+-\d\d-\d\d)", TempValue).group(1)
-            #
-            # Iterate through our DataSourceSheets
-            #
-            for DataSourceSheet in ThisChart["DataSourceSheets"]:
-                NewSheetColumn += 1
-                #
-                # Are we adding data from multiple source sheet columns?
-                #
-                if len(DataSourceSheet["AddList"]) > 1:
-                    #
-                    # Create/define a list of lists to hold our total values
-                    #
-                    TotalColumn = range(SourceBooks[ThisBook]["MaxRow"] - 2)
-                    for i in range(len(TotalColumn)):
-                        TotalColumn[i] = [0,]
-                    #
-                    # Now iterate through the source sheets and pull out the data
-                    #
-                    for SourceSheetNumber in range(len(DataSourceSheet["AddList"])):
-                        #
-                        # Read the header row from the sheet
-                        #
-                        CellRange = "A1:Z1"
-                        try:
-                            HeaderRow = SourceBooks[ThisBook]["ExcelObject"].getrange(DataSourceSheet["AddList"][SourceSheetNumber]["SheetNameInSourceWorkbook"], CellRange)
-                        except:
-                            print "Could not get range \"" + CellRange + "\" from sheet name \"" + DataSourceSheet["AddList"][SourceSheetNumber]["SheetNameInSourceWorkbook"] \
-                                + "\" in file \"" + SourceBooks[ThisBook]["FileName"] + "\". Check spelling."
-                            continue
-                        #
-                        # Get the column letter corresponding to the heading we're interested in
-                        #
-                        DataSourceColumn = LetterCorrespondingTo[list(HeaderRow[0]).index(DataSourceSheet["AddList"][SourceSheetNumber]["ColumnHeadingInSourceWorkbook"])]
-                        #
-                        # Now get the data column(s). 
-                        #
-                        CellRange = DataSourceColumn + "3:" + DataSourceColumn + str(SourceBooks[ThisBook]["MaxRow"])
-                        try:
-                            TempColumn = SourceBooks[ThisBook]["ExcelObject"].getrange(DataSourceSheet["AddList"][SourceSheetNumber]["SheetNameInSourceWorkbook"], CellRange)
-                        except:
-                            print "Could not get range \"" + CellRange + "\" from sheet name \"" + DataSourceSheet["AddList"][SourceSheetNumber]["SheetNameInSourceWorkbook"] \
-                                + "\" in file \"" + SourceBooks[ThisBook]["FileName"] + "\". Check spelling."
-                            sys.exit()
-                        for Row in range(len(TempColumn)):
-                            try:
-                                TotalColumn[Row][0] += TempColumn[Row][0]
-                            except TypeError:
-                                #
-                                # Column is shorter than usual, bail out of this loop
-                                #
-                                break
-                    #
-                    # Do we have a CellDivisionFactor to take into account (like convert Bytes - KBytes etc)?
-                    #
-                    if DataSourceSheet["CellDivisionFactor"] != 1:
-                        #
-                        # Apply the division factor to each cell
-                        #
-                        for Row in range(len(TotalColumn)):
-                            TotalColumn[Row][0] = TotalColumn[Row][0] / DataSourceSheet["CellDivisionFactor"]
-                    #
-                    # Now write the total column back out the the new sheet
-                    #
-                    NewxlFile.setrange(ThisChart["SheetTitle"], 3, NewSheetColumn + 1, TotalColumn)
-                else:
-                    #
-                    # Read the entire row of headers from the sheet
-                    #
-                    CellRange = "A1:Z1"
-                    try:
-                        HeaderRow = SourceBooks[ThisBook]["ExcelObject"].getrange(DataSourceSheet["AddList"][0]["SheetNameInSourceWorkbook"], CellRange)
-                    except:
-                        print "Could not get range \"" + CellRange + "\" from sheet name \"" + DataSourceSheet["AddList"][0]["SheetNameInSourceWorkbook"] \
-                            + "\" in file \"" + SourceBooks[ThisBook]["FileName"] + "\". Check spelling."
-                        continue
+        for SourceBook in SourceBooks:
+            if SourceBook["Stored"]:
+                ThisPiece = Manifest.piece(ThisChart.SheetTitle, SourceBook["FileName"])
+                Columns = [PieceCells(Column) for Column in ThisPiece.Columns]
+                if ThisPiece.Meta["timeColumn"]:
+                    if SourceBook is TimeBook:
+                        ChartColumns[0] = Columns[0]
+                    Columns = Columns[1:]
+                Manifest.add(ThisChart.SheetTitle, SourceBook["FileName"])
+            else:
+                Columns = BookColumns(Cache, SourceBook, ThisChart)
+                if Manifest:
                     #
-                    # Get the column letter corresponding to the heading we're interested in
+                    # The time column is kept with the piece of the book it came from
                     #
-                    try:
-                        DataSourceColumn = LetterCorrespondingTo[list(HeaderRow[0]).index(DataSourceSheet["AddList"][0]["ColumnHeadingInSourceWorkbook"])]
-                    except ValueError:
-                        print "Could not find heading \"" + DataSourceSheet["AddList"][0]["ColumnHeadingInSourceWorkbook"] + "\" in sheet \"" \
-                            + DataSourceSheet["AddList"][0]["SheetNameInSourceWorkbook"] + "\" in file \"" + SourceBooks[ThisBook]["FileName"] + "\". Check spelling."
-                        sys.exit()
-                    if DataSourceSheet["CellDivisionFactor"] != 1:
-                        NewColumnData = []
-                        #
-                        # Read the column of data from the source sheet
-                        #
-                        CellRange = DataSourceColumn + "3:" + DataSourceColumn + str(SourceBooks[ThisBook]["MaxRow"])
-                        try:
-                            OldColumnData = SourceBooks[ThisBook]["ExcelObject"].getrange(DataSourceSheet["AddList"][0]["SheetNameInSourceWorkbook"], CellRange)
-                        except:
-                            print "Could not get range \"" + CellRange + "\" from sheet name \"" + DataSourceSheet["AddList"][0]["SheetNameInSourceWorkbook"] \
-                                + "\" in file \"" + SourceBooks[ThisBook]["FileName"] + "\". Check spelling."
-                            sys.exit()
-                        #
-                        # Apply the division factor to each cell
-                        #
-                        for Cell in OldColumnData:
-                            try:
-                                NewColumnData.append((Cell[0] / DataSourceSheet["CellDivisionFactor"],))
-                            except TypeError:
-                                #
-                                # Column is shorter than usual, bail out of this loop
-                                #
-                                break
-                        #
-                        # Then write the amended column back out
-                        #
-                        NewxlFile.setrange(ThisChart["SheetTitle"], 3, NewSheetColumn + 1, NewColumnData)
-                    else:
-                        CellRange = DataSourceColumn + "1:" + DataSourceColumn + "1"
-                        try:
-                            SourceBooks[ThisBook]["ExcelObject"].copycolumntoclipboard((DataSourceSheet["AddList"][0]["SheetNameInSourceWorkbook"], CellRange))
-                        except:
-                            print "Could not copy column \"" + CellRange + "\" from sheet \"" + DataSourceSheet["AddList"][0]["SheetNameInSourceWorkbook"] \
-                                + "\" in file \"" + SourceBooks[ThisBook]["FileName"] + "\". Check spelling."
-                            sys.exit()
-                        NewxlFile.pasterangefromclipboard((ThisChart["SheetTitle"], LetterCorrespondingTo[NewSheetColumn] + "1"))
-                    # end if DataSourceSheet["CellDivisionFactor"] != 1:
-                #
-                # convert $SYSNAME, $SYSFQDN or $SARDATE in column heading to real system name or sar date
-                #
-                SysNameRegEx = re.compile("\$SYSNAME")
-                SysFQDNRegEx = re.compile("\$SYSFQDN")
-                SarDateRegEx = re.compile("\$SARDATE")
+                    Manifest.add(ThisChart.SheetTitle, SourceBook["FileName"],
+                                 Piece({"hasTime": Cache.hassheet(SourceBook["FileName"], TimeSheetName), "timeColumn": SourceBook is TimeBook},
+                                       ([ChartColumns[0]] if SourceBook is TimeBook else []) + Columns, []))
+            ChartColumns += Columns
         
-                NewColumnHeading = DataSourceSheet["NewColumnHeading"]
-                if SysNameRegEx.search(NewColumnHeading):
-                    NewColumnHeading = SysNameRegEx.sub(SystemName, NewColumnHeading)
-                if SysFQDNRegEx.search(NewColumnHeading):
-                    NewColumnHeading = SysFQDNRegEx.sub(SystemFQDN, NewColumnHeading)
-                if SarDateRegEx.search(NewColumnHeading):
-                    NewColumnHeading = SarDateRegEx.sub(SarDate, NewColumnHeading)
+        WriteChart(NewxlFile, ThisChart, ChartColumns, MaxMaxRow, ChartImage(Plan, Options, Manifest, ThisChart), RenderJobs,
+                   SheetRows(Plan.SaveFileName))
+        Profile.stop(ChartTimer, Profile.CountCells(ChartColumns))
+    print Cache.report()
+    FinishChartBook(NewxlFile, Plan.SaveFileName)
+    SaveManifest(Manifest)
+    return RenderImages(RenderJobs, Options)
+
+#-------------------------------------------------------------------------------
+# Function:     RunIniFile
+# Description:  Runs ProcessIniFile for one ini file, as a pool worker or in-line. Any
+#               failure is caught and reported so that it doesn't stop the other ini files.
+#               If CaptureOutput is set, the output is collected and returned rather than
+#               printed, so the output from parallel workers isn't interleaved.
+#               With --profile, the workbook backend's methods are counted and timed, as are
+#               the source books and charts, and a summary is printed at the end
+# Arguments:    A tuple of (IniFile, Options, CaptureOutput)
+# Returns:      A tuple of (IniFile, Status, Output, Trace), where Trace is the profile for
+#               the trace file (or None if we're not writing one)
+#-------------------------------------------------------------------------------
+def RunIniFile(Arguments):
+    (IniFile, Options, CaptureOutput) = Arguments
+    if CaptureOutput:
+        StdOut = sys.stdout
+        sys.stdout = StringIO.StringIO()
+    Workbook = SelectBackend(Options.Headless)
+    Trace = None
+    if Options.Profile:
+        Profile.Current = Profile.Profiler(IniFile)
+        Workbook = Profile.Current.wrap(Workbook)
+    try:
+        try:
+            Status = ProcessIniFile(IniFile, Workbook, Options)
+        except SystemExit, Exit:
+            Status = 1 if Exit.code else 0
+        except Exception:
+            print "Error processing " + IniFile + ":"
+            traceback.print_exc(file=sys.stdout)
+            Status = 1
+        if Profile.Current:
+            print Profile.Current.report()
+            if Options.ProfileTrace:
+                Trace = Profile.Current.trace(Status)
+    finally:
+        Profile.Current = None
+        if CaptureOutput:
+            Output = sys.stdout.getvalue()
+            sys.stdout = StdOut
+        else:
+            Output = ""
+    return (IniFile, Status, Output, Trace)
+
+#-------------------------------------------------------------------------------
+# Function:     WatchIniFiles
+# Description:  Watches the sar files of the ini files as they're written (--watch). Every
+#               WatchInterval seconds the lines added to each sar file are parsed and added
+#               to its columns, and the charts of each ini file that has new samples are
+#               created again from the sheets read so far. The source books that aren't sar
+#               files are only read once. Runs until it's interrupted (Ctrl-C)
+# Arguments:    IniFileList - the ini file names
+#               Options - the command line options
+# Returns:      The number of ini files that couldn't be watched
+#-------------------------------------------------------------------------------
+def WatchIniFiles(IniFileList, Options):
+    Workbook = SelectBackend(Options.Headless)
+    Watches = []
+    Failures = 0
+    for IniFile in IniFileList:
+        try:
+            Plan = CompileIniFile(IniFile, None if Options.NoCache else Options.CacheDirectory)
+        except IniFileError, Error:
+            print Error
+            Failures += 1
+            continue
+        if Plan.Store:
+            print IniFile + " charts from store " + Plan.Store + ", so it has no sar files to watch"
+            Failures += 1
+            continue
+        Watches.append([Plan, LiveBooks(Plan.SourceFiles, Plan.sheetnames(), Options.BeginTime, Options.EndTime, Options.PerCPU), False])
+    if len(Watches) == 0:
+        return Failures
+    print "Watching " + str(len(Watches)) + " ini files, refreshing every " + str(Options.WatchInterval) + " seconds (Ctrl-C to stop)"
+    try:
+        while True:
+            Started = time.time()
+            for Watch in Watches:
+                (Plan, Books, Refreshed) = Watch
                 #
-                # Make the heading Bold, Arial, 10 pt
+                # Chart each ini file straight away, even if its sar files haven't been written to yet,
+                # then again each time there are new samples
                 #
-                NewxlFile.setcellvalue(ThisChart["SheetTitle"], NewColumnHeading, LetterCorrespondingTo[NewSheetColumn] + "1", "Bold", "Arial", 10)
-            # end for DataSourceSheet in ThisChart["DataSourceSheets"]:
-        # end for SourceBook in SourceBooks:   
-        
+                if Books.poll() or not Refreshed:
+                    print time.strftime("%H:%M:%S") + " Refreshing " + Plan.IniFile + "..."
+                    try:
+                        ProcessPlan(Plan, Workbook, Options, Books, None)
+                    except Exception:
+                        print "Error processing " + Plan.IniFile + ":"
+                        traceback.print_exc(file=sys.stdout)
+                    Watch[2] = True
+            sys.stdout.flush()
+            time.sleep(max(0, Options.WatchInterval - (time.time() - Started)))
+    except KeyboardInterrupt:
+        print "Stopped watching"
+    return Failures
+
+#-------------------------------------------------------------------------------
+# Function:     WriteTraceFile
+# Description:  Writes the profiles of the ini files to a trace file, as JSON: the
+#               Trace Events of all of them (for chrome://tracing or Perfetto), and the
+#               backend call totals of each one
+# Arguments:    TraceFile - the file name
+#               Traces - the list of profiles, from RunIniFile
+#-------------------------------------------------------------------------------
+def WriteTraceFile(TraceFile, Traces):
+    Events = []
+    IniFiles = []
+    for Trace in Traces:
+        Events += Trace["traceEvents"]
+        IniFiles.append(dict((Key, Value) for (Key, Value) in Trace.items() if Key != "traceEvents"))
+    File = open(TraceFile, "wb")
+    try:
+        json.dump({"version": Version, "displayTimeUnit": "ms", "iniFiles": IniFiles, "traceEvents": Events}, File, indent=1)
+    finally:
+        File.close()
+    print "Profile trace written to " + TraceFile
+
+#-------------------------------------------------------------------------------
+# Function:     SelectBackend
+# Description:  Returns the workbook class to use, UseExcel or UseWorkbook
+#-------------------------------------------------------------------------------
+def SelectBackend(Headless):
+    if Headless or not UseExcel:
         #
-        # Now add a chart
+        # Use the in-process workbook backend, it has the same methods as UseExcel
         #
-        NewxlFile.addnewworksheetbefore(ThisChart["SheetTitle"], "Chart - " + ThisChart["SheetTitle"])
-        NewChart = NewxlFile.insertchart("Chart - " + ThisChart["SheetTitle"], 1, 1, 900, 600)
-        NewxlFile.plotdata(sheet = ThisChart["SheetTitle"],
-                           dataRanges = ((1, 1, MaxMaxRow, NewSheetColumn + 1),),
-                           chartObject = NewChart,
-                           gallery = constants.xlLine,
-                           format = 2,      # 2D line, unstacked with no markers
-                           plotBy = constants.xlColumns,
-                           categoryLabels = 1,
-                           seriesLabels = 1,
-                           hasLegend = True,
-                           title = ThisChart["GraphTitle"],
-                           categoryTitle = "Time",
-                           valueTitle = ThisChart["YAxisTitle"],
-                           extraTitle = ""
-                           )
-    #
-    # Now close the source workbooks
-    #
-    for ThisBook in range(len(SourceBooks)):
-        SourceBooks[ThisBook]["ExcelObject"].close()
-    #
-    # and tidy up by deleting the first sheet in the new workbook
+        return UseWorkbook
+    return UseExcel
+
+#-------------------------------------------------------------------------------
+# Function:     main
+# Description:  Parses the command line and processes the ini file(s)
+#-------------------------------------------------------------------------------
+def main():
+    usage = "usage: %prog [-f ini_file] [-a] [-V] [-H] [-j jobs] [-w workers] [-D directory] [-b begin_time -e end_time] [-m]"
+    usage += " [--no-cache | --rebuild-cache] [--cache-dir directory] [--cache-size MB]"
+    usage += " [--render directory] [--render-format png|svg] [--render-workers workers] [--stream]"
+    usage += " [--profile] [--profile-trace trace_file] [--no-manifest | --rebuild-all] [--watch seconds]"
+
+    parser = OptionParser(usage=usage)
+    parser.add_option("-f", dest="IniFilename",
+                        help="specifies the ini file containing instructions")
+    parser.add_option("-V", "--version", action="store_true", dest="Version", default=False,
+                        help="prints the version")
+    parser.add_option("-a", "--allfiles", action="store_true", dest="AllFiles", default=False,
+                        help="process all ini files in the directory")
+    parser.add_option("-D", "--directory", dest="Directory", 
+                        help="Specifies a directory to use for input and output")
+    parser.add_option("-H", "--headless", action="store_true", dest="Headless", default=False,
+                        help="read and write the workbooks directly rather than through Excel")
+    parser.add_option("-j", "--jobs", type="int", dest="Jobs", default=1,
+                        help="number of ini files to process in parallel (needs -H)")
+    parser.add_option("-w", "--workers", type="int", dest="OpenWorkers", default=4,
+                        help="number of source workbooks to open and read at once (default 4)")
+    parser.add_option("-b", "--begin", dest="BeginTime",
+                        help="only use samples after this time (HH:MM:SS) from sar files")
+    parser.add_option("-e", "--end", dest="EndTime",
+                        help="only use samples before this time (HH:MM:SS) from sar files")
+    parser.add_option("-m", "--multicpu", action="store_true", dest="PerCPU", default=False,
+                        help="create a sheet for each CPU when reading sar files")
+    parser.add_option("--no-cache", action="store_true", dest="NoCache", default=False,
+                        help="don't load source books (or compiled ini files) from, or save them to, the cache")
+    parser.add_option("--rebuild-cache", action="store_true", dest="RebuildCache", default=False,
+                        help="re-read every source book and replace its entry in the book cache")
+    parser.add_option("--cache-dir", dest="CacheDirectory", default=DefaultCacheDirectory,
+                        help="directory to keep the book cache and compiled ini files in (default " + DefaultCacheDirectory + ")")
+    parser.add_option("--cache-size", type="int", dest="CacheSize", default=DefaultCacheSize,
+                        help="maximum size of the book cache in MB (default " + str(DefaultCacheSize) + ")")
+    parser.add_option("--render", dest="RenderDirectory",
+                        help="also render each chart as an image in this directory (needs matplotlib)")
+    parser.add_option("--render-format", type="choice", choices=RenderCharts.Formats, dest="RenderFormat",
+                        default=RenderCharts.DefaultFormat,
+                        help="image format for --render, png or svg (default " + RenderCharts.DefaultFormat + ")")
+    parser.add_option("--render-workers", type="int", dest="RenderWorkers", default=multiprocessing.cpu_count(),
+                        help="number of charts to render at once (default one per CPU)")
+    parser.add_option("--stream", action="store_true", dest="Stream", default=False,
+                        help="write .xlsx chart workbooks straight to disk with XlsxWriter, a row at a time")
+    parser.add_option("--profile", action="store_true", dest="Profile", default=False,
+                        help="count and time the workbook calls, source books and charts of each ini file, and print a summary")
+    parser.add_option("--profile-trace", dest="ProfileTrace",
+                        help="also write the profile to this trace file, as JSON (implies --profile)")
+    parser.add_option("--no-manifest", action="store_true", dest="NoManifest", default=False,
+                        help="don't keep a manifest next to the SaveFileName, or use the one from the last run")
+    parser.add_option("--rebuild-all", action="store_true", dest="RebuildAll", default=False,
+                        help="ignore the manifest from the last run and read every source book again")
+    parser.add_option("--watch", type="float", dest="WatchInterval",
+                        help="keep reading the sar files as they're written, and refresh the charts with the new samples every so many seconds")
+
+    (options, args) = parser.parse_args()
     #
-    NewxlFile.deleteworksheet("Sheet1")
+    # Check the sanity of some of our arguments
     #
-    # Save the file if we have a SaveFileName
+    # -v ?
     #
-    if SaveFileName:
-        NewxlFile.save(SaveFileName)
-        NewxlFile.close()
-        NewxlFile = None
-# End for IniFile in IniFileList
\ No newline at end of file
+    if options.Version:
+        print "GenGraphs.py version: " + str(Version)
+        sys.exit()
+
+    if (options.IniFilename and options.AllFiles):
+        parser.error("options -f and -a are mutually exclusive")
+        parser.print_help()
+        sys.exit()
+
+    if options.Jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    if options.OpenWorkers < 1:
+        parser.error("--workers must be at least 1")
+
+    if options.NoCache and options.RebuildCache:
+        parser.error("options --no-cache and --rebuild-cache are mutually exclusive")
+
+    if options.NoManifest and options.RebuildAll:
+        parser.error("options --no-manifest and --rebuild-all are mutually exclusive")
+
+    if options.CacheSize < 1:
+        parser.error("--cache-size must be at least 1")
+
+    if options.RenderWorkers < 1:
+        parser.error("--render-workers must be at least 1")
+
+    if options.RenderDirectory and not RenderCharts.Available():
+        parser.error("--render needs matplotlib, which isn't installed")
+
+    if options.Stream and not StreamAvailable():
+        parser.error("--stream needs XlsxWriter, which isn't installed")
+
+    if options.ProfileTrace:
+        options.Profile = True
+
+    if options.WatchInterval is not None:
+        if options.WatchInterval <= 0:
+            parser.error("--watch must be more than 0 seconds")
+        if options.Jobs > 1 or options.Profile:
+            parser.error("--watch can't be used with --jobs or --profile")
+
+    if options.Jobs > 1 and SelectBackend(options.Headless) is UseExcel:
+        parser.error("--jobs needs the headless backend (-H), Excel can't be driven from several processes at once")
+
+    if (options.BeginTime and not options.EndTime) or (options.EndTime and not options.BeginTime):
+        parser.error("options -b and -e must be used together")
+
+    for Time in (options.BeginTime, options.EndTime):
+        if Time:
+            try:
+                TimeInSeconds(Time)
+            except ValueError, Error:
+                parser.error(str(Error))
+
+    if options.Directory:
+        Directory = options.Directory
+    else:
+        Directory = "."
+    #
+    # Now assemble the list of ini files to process (may be only one)
+    #
+    IniFileList = []
+    if options.IniFilename:
+        #
+        # We've been passed an ini file name, so just a single file for the list
+        #
+        IniFileList.append(os.path.join(Directory, options.IniFilename))
+    elif options.AllFiles:
+        #
+        # Process all the ini files in the specified directory
+        #
+        for File in os.listdir(Directory):
+            if os.path.splitext(File)[1] == ".ini":
+                if not os.path.isdir(File):
+                    IniFileList.append(os.path.join(Directory, File))
+    else:
+        parser.error("must specify either -f or -a")
+        parser.print_help()
+        sys.exit()
+    #
+    # Process the ini files, either one after the other, or in a pool of worker processes with
+    # one worker per ini file. Each worker's output is printed in one piece when it finishes
+    #
+    Failures = 0
+    Traces = []
+    if options.WatchInterval is not None:
+        Failures = WatchIniFiles(IniFileList, options)
+    elif options.Jobs > 1 and len(IniFileList) > 1:
+        WorkerPool = multiprocessing.Pool(processes=min(options.Jobs, len(IniFileList)), maxtasksperchild=1)
+        Results = WorkerPool.imap(RunIniFile, [(IniFile, options, True) for IniFile in IniFileList])
+        for (IniFile, Status, Output, Trace) in Results:
+            sys.stdout.write(Output)
+            sys.stdout.flush()
+            Failures += Status
+            if Trace:
+                Traces.append(Trace)
+        WorkerPool.close()
+        WorkerPool.join()
+    else:
+        for IniFile in IniFileList:
+            (IniFile, Status, Output, Trace) = RunIniFile((IniFile, options, False))
+            Failures += Status
+            if Trace:
+                Traces.append(Trace)
+    if options.ProfileTrace:
+        WriteTraceFile(options.ProfileTrace, Traces)
+    if Failures > 0:
+        print str(Failures) + " of " + str(len(IniFileList)) + " ini files could not be processed"
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
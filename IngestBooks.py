@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+#
+#--------------------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  IngestBooks loads a set of sar files (or sar2xls workbooks) into a SarStore, a SQLite database of the
+#               samples of every column of every sheet, indexed by host, sheet, column and time. An ini file with
+#               Store= in its [General] section then charts straight from the store, without opening the books
+#               again. See SarStore.py.
+#
+#               Books that are already in the store, unchanged, are skipped, so the same directory can be ingested
+#               every day to add the new books. The books are read in a pool of processes (-j), through the same
+#               book cache as GenGraphs, and written to the store one at a time.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Read the books with BookCache.ReadBookSheets, rather than through ScanThresholds
+#           0.3     18-Oct-26   agent   Count the distinct host and date books stored, and warn when one book replaces another
+#
+#--------------------------------------------------------------------------------------------------------------------------
+
+Version = (0.3)
+
+from BookCache import BookCache, ReadBookSheets, BookVariant, DefaultCacheDirectory, DefaultCacheSize
+from SarParser import IsSarFile, TimeInSeconds
+from SarStore import SarStore, StoreError, BookSamples
+from optparse import OptionParser
+import os, sys, time
+import multiprocessing
+
+#-------------------------------------------------------------------------------
+# Function:     ReadBook
+# Description:  Reads a source book and pulls out its samples, ready to store. Runs in a
+#               pool worker
+# Arguments:    A tuple of (FileName, Options)
+# Returns:      A tuple of (FileName, Samples, Error), with Samples from BookSamples, or
+#               None and the reason if the book couldn't be read
+#-------------------------------------------------------------------------------
+def ReadBook(Arguments):
+    (FileName, Options) = Arguments
+    if Options.NoCache:
+        Books = None
+    else:
+        Books = BookCache(Options.CacheDirectory, Options.CacheSize * 1024 * 1024, Options.RebuildCache)
+    try:
+        Sheets = ReadBookSheets(FileName, None, Options.BeginTime, Options.EndTime, Options.PerCPU, Books)
+    except Exception:
+        return (FileName, None, "can't read it, are you sure this file exists?")
+    try:
+        return (FileName, BookSamples(Sheets), None)
+    except StoreError, Error:
+        return (FileName, None, str(Error))
+
+#-------------------------------------------------------------------------------
+# Function:     main
+# Description:  Parses the command line and ingests the books
+#-------------------------------------------------------------------------------
+def main():
+    usage = "usage: %prog -s store_file [-D directory] [-a | file ...] [-j jobs] [-b begin_time -e end_time] [-m]"
+    usage += " [--no-cache | --rebuild-cache] [--cache-dir directory] [--cache-size MB] [--reingest] [-l]"
+
+    parser = OptionParser(usage=usage)
+    parser.add_option("-V", "--version", action="store_true", dest="Version", default=False,
+                        help="prints the version")
+    parser.add_option("-s", "--store", dest="StoreFile",
+                        help="the store to load the books into (created if it doesn't exist)")
+    parser.add_option("-a", "--allfiles", action="store_true", dest="AllFiles", default=False,
+                        help="ingest all the sar files and workbooks in the directory")
+    parser.add_option("-D", "--directory", dest="Directory",
+                        help="Specifies a directory to use for input")
+    parser.add_option("-j", "--jobs", type="int", dest="Jobs", default=multiprocessing.cpu_count(),
+                        help="number of books to read at once (default one per CPU)")
+    parser.add_option("-b", "--begin", dest="BeginTime",
+                        help="only use samples after this time (HH:MM:SS) from sar files")
+    parser.add_option("-e", "--end", dest="EndTime",
+                        help="only use samples before this time (HH:MM:SS) from sar files")
+    parser.add_option("-m", "--multicpu", action="store_true", dest="PerCPU", default=False,
+                        help="create a sheet for each CPU when reading sar files")
+    parser.add_option("--no-cache", action="store_true", dest="NoCache", default=False,
+                        help="don't load source books from, or save them to, the book cache")
+    parser.add_option("--rebuild-cache", action="store_true", dest="RebuildCache", default=False,
+                        help="re-read every source book and replace its entry in the book cache")
+    parser.add_option("--cache-dir", dest="CacheDirectory", default=DefaultCacheDirectory,
+                        help="directory to keep the book cache in (default " + DefaultCacheDirectory + ")")
+    parser.add_option("--cache-size", type="int", dest="CacheSize", default=DefaultCacheSize,
+                        help="maximum size of the book cache in MB (default " + str(DefaultCacheSize) + ")")
+    parser.add_option("--reingest", action="store_true", dest="Reingest", default=False,
+                        help="ingest the books again even if they're already in the store unchanged")
+    parser.add_option("-l", "--list", action="store_true", dest="List", default=False,
+                        help="list the hosts in the store, and the dates of their books")
+
+    (options, args) = parser.parse_args()
+
+    if options.Version:
+        print "IngestBooks.py version: " + str(Version)
+        sys.exit()
+
+    if not options.StoreFile:
+        parser.error("must specify the store with -s")
+
+    if options.AllFiles and args:
+        parser.error("option -a and a list of files are mutually exclusive")
+
+    if options.Jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    if options.NoCache and options.RebuildCache:
+        parser.error("options --no-cache and --rebuild-cache are mutually exclusive")
+
+    if options.CacheSize < 1:
+        parser.error("--cache-size must be at least 1")
+
+    if (options.BeginTime and not options.EndTime) or (options.EndTime and not options.BeginTime):
+        parser.error("options -b and -e must be used together")
+
+    for Time in (options.BeginTime, options.EndTime):
+        if Time:
+            try:
+                TimeInSeconds(Time)
+            except ValueError, Error:
+                parser.error(str(Error))
+
+    if options.Directory:
+        Directory = options.Directory
+    else:
+        Directory = "."
+    #
+    # Now assemble the list of books to ingest
+    #
+    if options.AllFiles:
+        FileList = []
+        for File in sorted(os.listdir(Directory)):
+            FileName = os.path.join(Directory, File)
+            if os.path.isfile(FileName) and (os.path.splitext(File)[1].lower() in (".xls", ".xlsx") or IsSarFile(FileName)):
+                FileList.append(FileName)
+    elif args:
+        FileList = [os.path.join(Directory, File) for File in args]
+    elif not options.List:
+        parser.error("must specify either -a, -l or the files to ingest")
+    else:
+        FileList = []
+
+    try:
+        Store = SarStore(options.StoreFile, create=bool(FileList))
+    except StoreError, Error:
+        print Error
+        sys.exit(1)
+    #
+    # Read the books that aren't in the store yet (or have changed) in a pool of worker processes, and
+    # store each one as it comes back
+    #
+    Start = time.time()
+    ReadFiles = [FileName for FileName in FileList
+                 if options.Reingest or not Store.current(FileName, BookVariant(FileName, options.BeginTime, options.EndTime, options.PerCPU))]
+    Arguments = [(FileName, options) for FileName in ReadFiles]
+    if options.Jobs > 1 and len(ReadFiles) > 1:
+        WorkerPool = multiprocessing.Pool(processes=min(options.Jobs, len(ReadFiles)))
+        Results = WorkerPool.imap(ReadBook, Arguments)
+    else:
+        WorkerPool = None
+        Results = (ReadBook(Argument) for Argument in Arguments)
+    Failures = 0
+    #
+    # A sar file and the workbook made from it (or any two books of the same host and date) replace each other
+    # in the store, so count the host and dates stored (and the samples of the book kept for each), rather than
+    # the files read
+    #
+    Stored = {}
+    try:
+        for (FileName, BookData, Error) in Results:
+            if BookData is not None:
+                try:
+                    (Samples, Replaced) = Store.ingest(FileName, BookData, BookVariant(FileName, options.BeginTime,
+                                                                                       options.EndTime, options.PerCPU))
+                    Stored[(BookData[1], BookData[2])] = Samples
+                    for OldPath in Replaced:
+                        print "Warning: " + FileName + " replaces " + OldPath + " in the store (same host and date " \
+                            + BookData[2] + ")"
+                    continue
+                except StoreError, Error:
+                    Error = str(Error)
+            print "Can't ingest " + FileName + ": " + Error
+            Failures += 1
+    finally:
+        if WorkerPool:
+            WorkerPool.close()
+            WorkerPool.join()
+    if not options.NoCache and ReadFiles:
+        BookCache(options.CacheDirectory, options.CacheSize * 1024 * 1024).evict()
+    if FileList:
+        print "Ingested " + str(len(Stored)) + " books (" + str(sum(Stored.values())) + " samples) in " \
+            + "%.2f" % (time.time() - Start) + "s, " + str(len(FileList) - len(ReadFiles)) + " already in the store"
+    print Store.report()
+    if options.List:
+        for (FQDN, (Name, FirstDate, LastDate)) in Store.hosts().items():
+            print "    %-20s %-40s %s to %s" % (Name, FQDN, FirstDate, LastDate)
+    Store.close()
+    if Failures > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
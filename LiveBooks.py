@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  LiveBooks is what GenGraphs reads its source books through when it's watching sar files that
+#               are still being written (--watch). Each sar text file is tailed by a SarTail, which remembers
+#               how far through the file it has read, and on each poll parses only the lines appended since,
+#               with the same SarParser that reads a whole sar file. The new samples are added to the end of
+#               in-memory columns, so the work done for each poll grows with the new lines, not the size of
+#               the file. The numeric columns that sheets() returns are views of those columns, with only the
+#               new cells packed into them; the text columns (the sample times) are still copied each time.
+#
+#               LiveBooks has the same key(), load(), save(), evict() and report() methods as the BookCache,
+#               so GenGraphs charts the sheets built so far just as it would charts books from the cache.
+#               Source books that aren't sar files (workbooks don't grow) are read once and kept in memory.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   sheets() shares the numeric columns' arrays, rather than copying them each time
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import threading
+from collections import OrderedDict
+from SarParser import SarParser
+from SheetCache import UsedRangeToColumns
+from ColumnMath import ColumnBuilder
+
+#
+# How much of a sar file to read at a time
+#
+ReadSize = 1024 * 1024
+
+#-------------------------------------------------------------------------------------------------------------
+def IsWorkbookFile(fileName):
+
+    """Returns True if fileName is a workbook rather than a sar file. Unlike IsSarFile, this doesn't look
+    inside the file, as a sar file that's being watched might not have been written to yet
+    """
+
+    return os.path.splitext(fileName)[1].lower() in (".xls", ".xlsx", ".xlsm")
+#-------------------------------------------------------------------------------------------------------------
+
+class SarTail(object):
+    """Reads a sar text file as it grows.
+
+    poll() parses the complete lines added to the file since the last poll, and sheets() returns the sheets
+    read so far, as lists of columns. If the file is truncated or replaced (rotated), it's read again from
+    the start.
+    """
+
+    __slots__ = ("fileName", "sheetNames", "beginTime", "endTime", "perCPU", "parser", "identity", "offset",
+                 "partial", "columns", "lines", "samples")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, fileName, sheetNames=None, beginTime=None, endTime=None, perCPU=False):
+
+        """Description of parameters (self explanatory parameters are not described):
+            sheetNames  -   if given, only these sheets (and the Overview) are kept, the samples of the others
+                            are dropped as they're read
+            beginTime   -   if given (HH:MM:SS), only samples after this time are kept
+            endTime     -   if given (HH:MM:SS), only samples before this time are kept
+            perCPU      -   create a sheet for each CPU, rather than just the aggregated CPU sheet
+        """
+
+        self.fileName = fileName
+        self.sheetNames = set(sheetNames) if sheetNames is not None else None
+        self.beginTime = beginTime
+        self.endTime = endTime
+        self.perCPU = perCPU
+        self._restart(None)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _restart(self, Identity):
+        #
+        # identity is the (device, inode) of the file we're reading, offset how far through it we've read,
+        # and partial the start of a line that hasn't been finished yet. columns is an ordered dictionary
+        # of sheet name -> list of ColumnBuilders, one per heading
+        #
+        self.parser = SarParser(self.beginTime, self.endTime, self.perCPU,
+                                os.path.dirname(os.path.abspath(self.fileName)))
+        self.identity = Identity
+        self.offset = 0
+        self.partial = ""
+        self.columns = OrderedDict()
+        self.lines = 0
+        self.samples = 0
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def poll(self):
+
+        """Parse the lines added to the file since the last poll. Returns the number of new samples, or -1 if
+            the file has been truncated or replaced and read again from the start (and so has to be charted
+            again, even if there are no samples in it yet). Raises ValueError if the file isn't a sar file
+        """
+
+        try:
+            Stat = os.stat(self.fileName)
+        except OSError:
+            #
+            # Not there yet, or part way through being rotated
+            #
+            return 0
+        Identity = (Stat.st_dev, Stat.st_ino)
+        Restarted = False
+        if Identity != self.identity or Stat.st_size < self.offset:
+            Restarted = self.identity is not None
+            self._restart(Identity)
+        if Stat.st_size == self.offset:
+            return -1 if Restarted else 0
+        try:
+            File = open(self.fileName, 'rb')
+        except IOError:
+            return 0
+        Samples = self.samples
+        try:
+            File.seek(self.offset)
+            while True:
+                Data = File.read(ReadSize)
+                if not Data:
+                    break
+                self.offset += len(Data)
+                #
+                # Hold back the last line until it's finished
+                #
+                Lines = (self.partial + Data).split("\n")
+                self.partial = Lines.pop()
+                for Line in Lines:
+                    self.parser.feed(Line)
+                self.lines += len(Lines)
+                self._append()
+        finally:
+            File.close()
+        if Restarted:
+            return -1
+        return self.samples - Samples
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _append(self):
+        for (SheetName, (Headings, Rows)) in self.parser.takerows().items():
+            if self.sheetNames is not None and SheetName not in self.sheetNames:
+                continue
+            Builders = self.columns.get(SheetName)
+            if Builders is None:
+                #
+                # A new sheet, with the headings in row 1 and row 2 empty
+                #
+                Builders = [ColumnBuilder() for Heading in Headings]
+                for (Builder, Heading) in zip(Builders, Headings):
+                    Builder.append(Heading)
+                    Builder.append(None)
+                self.columns[SheetName] = Builders
+            for Row in Rows:
+                for (Index, Builder) in enumerate(Builders):
+                    Builder.append(Row[Index] if Index < len(Row) else None)
+            self.samples += len(Rows)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def sheets(self):
+
+        """Returns an ordered dictionary of sheet name -> list of columns of the sheets read so far, in sar2xls
+        order, or None if we haven't read the first line of the file yet
+        """
+
+        if self.parser.sysstat is None:
+            return None
+        Sheets = OrderedDict()
+        Sheets["Overview"] = UsedRangeToColumns(self.parser.getusedrange("Overview"))
+        for SheetName in self.parser.sheetnames():
+            if SheetName in self.columns:
+                Sheets[SheetName] = [Builder.column(share=True) for Builder in self.columns[SheetName]]
+        return Sheets
+#-------------------------------------------------------------------------------------------------------------
+
+class LiveBooks(object):
+    """The source books of an ini file that's being watched, in place of the BookCache.
+
+    poll() reads what's been added to each sar file, load() returns the sheets of a book as they are now.
+    """
+
+    __slots__ = ("tails", "books", "lock", "polls")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, fileNames, sheetNames=None, beginTime=None, endTime=None, perCPU=False):
+
+        """Description of parameters (self explanatory parameters are not described):
+            fileNames   -   the source books, sar files or workbooks
+            sheetNames  -   if given, only these sheets (and the Overview) are kept from the sar files
+            beginTime   -   if given (HH:MM:SS), only samples after this time are kept
+            endTime     -   if given (HH:MM:SS), only samples before this time are kept
+            perCPU      -   create a sheet for each CPU, rather than just the aggregated CPU sheet
+        """
+
+        self.tails = OrderedDict()
+        for FileName in fileNames:
+            if not IsWorkbookFile(FileName) and FileName not in self.tails:
+                self.tails[FileName] = SarTail(FileName, sheetNames, beginTime, endTime, perCPU)
+        #
+        # books is the sheets of the source books that aren't sar files, by file name
+        #
+        self.books = {}
+        self.lock = threading.Lock()
+        self.polls = 0
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def poll(self):
+
+        """Read the lines added to each sar file since the last poll. Returns True if any of them has new
+        samples (or has been rotated), so the charts need to be refreshed
+        """
+
+        Changed = False
+        for (FileName, Tail) in self.tails.items():
+            try:
+                if Tail.poll() != 0:
+                    Changed = True
+            except ValueError, Error:
+                #
+                # Stop watching it, it'll be read (and reported on) like any other source book
+                #
+                print FileName + ": " + str(Error) + ", not watching it"
+                del self.tails[FileName]
+        self.polls += 1
+        return Changed
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def key(self, fileName, variant=""):
+
+        """Returns the key to load a book with. The variant is ignored, all of the sar files are read with the
+        same options
+        """
+
+        return fileName
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def load(self, key, sheetNames=None):
+
+        """Returns an ordered dictionary of sheet name -> list of columns for a book as it is now, or None if it
+        has to be read (a workbook that hasn't been read yet, or a sar file that nothing has been written to).
+        sheetNames is accepted for the BookCache's sake; the sheets are already in memory, so all are returned
+        """
+
+        if key in self.tails:
+            return self.tails[key].sheets()
+        with self.lock:
+            return self.books.get(key)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def save(self, key, sheets):
+
+        """Keep the sheets of a workbook once it's been read. Returns True if the book was kept"""
+
+        if key in self.tails or sheets is None:
+            return False
+        with self.lock:
+            self.books[key] = sheets
+        return True
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def evict(self):
+
+        """Nothing to evict, the books are only held in memory. Here for compatibility with the BookCache"""
+
+        pass
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def report(self):
+
+        """Returns a one line summary of what's been read from the sar files"""
+
+        return "Watching " + str(len(self.tails)) + " sar files: " + str(sum([Tail.lines for Tail in self.tails.values()])) \
+            + " lines read, " + str(sum([Tail.samples for Tail in self.tails.values()])) + " samples"
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Manifest records what went into a GenGraphs chart workbook, so that a rerun only has to read the
+#               source books that are new or have changed. It's kept next to the workbook, as
+#               <SaveFileName>.manifest (JSON), with the chart data it refers to in <SaveFileName>.manifest.npz.
+#
+#               The manifest lists each source book (its size, modification time and SHA-1 hash) and each chart
+#               sheet: the ini file sections it came from, a hash of its definition (the chart, and the [General]
+#               and command line settings that change its data) and the books charted on it. For each chart and
+#               book it keeps the "piece" of the chart data that came from that book: the book's columns of the
+#               chart data sheet, or its sample times and series arrays if the books are aligned or stitched.
+#
+#               On a rerun, a book whose size and modification time are the same (or whose hash is, if it's
+#               only been touched) isn't read again as long as none of the chart definitions have changed;
+#               its pieces are taken from the manifest instead, and only the new books are read. A chart that
+#               has no new pieces, and the same books as before, is unchanged.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   List [ChartnOptions] for a chart with any option set, not just MaxPoints
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import json
+import hashlib
+from collections import namedtuple, OrderedDict
+import numpy
+from BookCache import EncodeColumns, DecodeColumns
+from Downsample import DefaultMethod
+
+#
+# Bump FormatVersion if the layout of the manifest changes, so old manifests are ignored
+#
+FormatVersion = 1
+ManifestSuffix = ".manifest"
+DataSuffix = ".manifest.npz"
+HashBlockSize = 1024 * 1024
+#
+# The part of a chart's data that came from one book. Meta is a dictionary of anything else about it (it's
+# saved as JSON), Columns a list of chart data sheet columns (or None) and Arrays a list of float arrays
+#
+Piece = namedtuple("Piece", ("Meta", "Columns", "Arrays"))
+
+#-------------------------------------------------------------------------------------------------------------
+def FileHash(fileName):
+
+    """Returns the SHA-1 hash of a file's contents, as a hex string"""
+
+    Hash = hashlib.sha1()
+    File = open(fileName, "rb")
+    try:
+        Block = File.read(HashBlockSize)
+        while Block:
+            Hash.update(Block)
+            Block = File.read(HashBlockSize)
+    finally:
+        File.close()
+    return Hash.hexdigest()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ChartDefinition(ThisChart, Settings):
+
+    """Returns a hash of everything that decides what a chart's data is: the chart from the chart plan, and
+    the settings (as a tuple) that apply to all of the charts
+    """
+
+    return hashlib.sha1(repr((ThisChart, Settings))).hexdigest()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ChartSections(ThisChart):
+
+    """Returns the names of the ini file sections a chart came from. [ChartnOptions] is listed if any of its
+    options isn't the default
+    """
+
+    Prefix = "Chart" + str(ThisChart.Number)
+    Sections = ["[Charts] " + Prefix, "[" + Prefix + "Titles]", "[" + Prefix + "Data]"]
+    if ThisChart.MaxPoints or ThisChart.Downsample != DefaultMethod or ThisChart.KeepFullData or ThisChart.Summary:
+        Sections.append("[" + Prefix + "Options]")
+    return Sections
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Utf8(Value):
+
+    """Returns a unicode string (as read from the JSON manifest) as a UTF-8 str, so it matches the file names
+    and sheet titles of the chart plan
+    """
+
+    if isinstance(Value, unicode):
+        return Value.encode("utf-8")
+    return Value
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def FileStat(fileName):
+
+    """Returns a file's [size, modification time], or None if it doesn't exist"""
+
+    try:
+        Stat = os.stat(fileName)
+    except OSError:
+        return None
+    return [Stat.st_size, Stat.st_mtime]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ReplaceFile(tempFile, fileName):
+
+    """Rename a newly written file over the old one (Windows won't rename over a file that's there)"""
+
+    if os.path.exists(fileName):
+        os.remove(fileName)
+    os.rename(tempFile, fileName)
+#-------------------------------------------------------------------------------------------------------------
+
+class Manifest(object):
+    """The manifest of a chart workbook.
+
+    load() reads the manifest from the previous run, stored() says whether all of a book's pieces can be
+    taken from it, and piece() returns one of them. add() records each piece of the new workbook, whether
+    it was taken from the old manifest or built again, and save() writes the new manifest once the workbook
+    has been saved.
+    """
+
+    __slots__ = ("saveFileName", "version", "definitions", "sections", "previous", "previousPieces", "data",
+                 "fingerprints", "books", "charts", "built", "reused")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, saveFileName, version, charts, settings):
+
+        """Description of parameters (self explanatory parameters are not described):
+            version     -   the GenGraphs version (a manifest from another version is ignored)
+            charts      -   the charts from the chart plan
+            settings    -   a tuple of the settings that change the data of every chart
+        """
+
+        self.saveFileName = saveFileName
+        self.version = version
+        self.definitions = OrderedDict((ThisChart.SheetTitle, ChartDefinition(ThisChart, settings)) for ThisChart in charts)
+        self.sections = dict((ThisChart.SheetTitle, ChartSections(ThisChart)) for ThisChart in charts)
+        #
+        # previous is the old manifest, with previousPieces a dictionary of (sheet title, book) -> its
+        # entry for the piece, and data the old chart data file
+        #
+        self.previous = None
+        self.previousPieces = {}
+        self.data = None
+        #
+        # fingerprints is a dictionary of book -> fingerprint as it is now. books and charts are the
+        # entries of the new manifest, with the new pieces (or None for a piece that's reused) in charts
+        #
+        self.fingerprints = {}
+        self.books = OrderedDict()
+        self.charts = OrderedDict()
+        self.built = 0
+        self.reused = 0
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def load(self):
+
+        """Read the manifest from the previous run. Returns False (and says why) if there isn't one that can
+        be used, in which case every chart is built from scratch
+        """
+
+        ManifestFile = self.saveFileName + ManifestSuffix
+        if not os.path.isfile(ManifestFile):
+            return False
+        try:
+            File = open(ManifestFile, "rb")
+            try:
+                Previous = json.load(File)
+            finally:
+                File.close()
+            if Previous.get("format") != FormatVersion or Previous.get("version") != self.version:
+                print "Ignoring " + ManifestFile + ", it was written by a different version of GenGraphs"
+                return False
+            if FileStat(self.saveFileName + DataSuffix) != Previous["data"]:
+                print "Ignoring " + ManifestFile + ", its chart data file " + self.saveFileName + DataSuffix + " has changed"
+                return False
+            self.data = numpy.load(self.saveFileName + DataSuffix, allow_pickle=False)
+        except (IOError, OSError, ValueError, KeyError, TypeError), Error:
+            print "Ignoring " + ManifestFile + ", it can't be read: " + str(Error)
+            return False
+        Previous["books"] = dict((Utf8(Book), Entry) for (Book, Entry) in Previous["books"].items())
+        for Chart in Previous["charts"]:
+            Chart["books"] = [Utf8(Book) for Book in Chart["books"]]
+            for Entry in Chart["pieces"]:
+                self.previousPieces[(Utf8(Chart["sheet"]), Utf8(Entry["book"]))] = Entry
+        Previous["charts"] = dict((Utf8(Chart["sheet"]), Chart) for Chart in Previous["charts"])
+        self.previous = Previous
+        return True
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def fingerprint(self, fileName):
+
+        """Returns a book's size, modification time and hash as a dictionary, or None if it doesn't exist. The
+        book is only hashed if its size or modification time isn't the same as in the old manifest
+        """
+
+        if fileName in self.fingerprints:
+            return self.fingerprints[fileName]
+        Stat = FileStat(fileName)
+        if Stat is None:
+            Fingerprint = None
+        else:
+            Old = self.previous["books"].get(fileName) if self.previous else None
+            if Old and [Old["size"], Old["mtime"]] == Stat:
+                Hash = Old["sha1"]
+            else:
+                Hash = FileHash(fileName)
+            Fingerprint = {"size": Stat[0], "mtime": Stat[1], "sha1": Hash}
+        self.fingerprints[fileName] = Fingerprint
+        return Fingerprint
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def unchanged(self, fileName):
+
+        """Returns True if a book is in the old manifest, with the same contents"""
+
+        if self.previous is None or fileName not in self.previous["books"]:
+            return False
+        Fingerprint = self.fingerprint(fileName)
+        Old = self.previous["books"][fileName]
+        return Fingerprint is not None and (Fingerprint["size"], Fingerprint["sha1"]) == (Old["size"], Old["sha1"])
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def stored(self, fileName):
+
+        """Returns True if the old manifest has a piece from this book, as it is now, for every chart"""
+
+        if not self.unchanged(fileName):
+            return False
+        for (SheetTitle, Definition) in self.definitions.items():
+            Chart = self.previous["charts"].get(SheetTitle)
+            if Chart is None or Chart["definition"] != Definition or (SheetTitle, fileName) not in self.previousPieces:
+                return False
+        return True
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def maxrow(self, fileName):
+
+        """Returns the MaxRow of a book in the old manifest"""
+
+        return self.previous["books"][fileName]["maxRow"]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def meta(self, sheetTitle, fileName):
+
+        """Returns the Meta dictionary of a piece in the old manifest, without reading its data"""
+
+        return self.previousPieces[(sheetTitle, fileName)]["meta"]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def piece(self, sheetTitle, fileName):
+
+        """Returns a piece from the old manifest (only for a book that stored() is True for)"""
+
+        Entry = self.previousPieces[(sheetTitle, fileName)]
+        Key = Entry["key"]
+        Columns = None
+        if Entry["columns"]:
+            Columns = DecodeColumns(*[self.data[Key + Name] for Name in ("_lengths", "_kinds", "_numbers", "_strings")])
+        return Piece(Entry["meta"], Columns, [self.data[Key + "_a" + str(Index)] for Index in range(Entry["arrays"])])
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def addbook(self, fileName, maxRow=None):
+
+        """Record a source book of the new workbook"""
+
+        self.books[fileName] = dict(self.fingerprint(fileName) or {}, maxRow=maxRow)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def add(self, sheetTitle, fileName, piece=None):
+
+        """Record a piece of the new workbook, or that the piece from the old manifest is being reused if piece
+        is None. The pieces of each chart are added in the order of its books
+        """
+
+        Chart = self.charts.setdefault(sheetTitle, {"books": [], "pieces": [], "image": None})
+        Chart["books"].append(fileName)
+        Chart["pieces"].append(piece)
+        if piece is None:
+            self.reused += 1
+        else:
+            self.built += 1
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def unchangedchart(self, sheetTitle, imageFile=None):
+
+        """Returns True if all of a chart's pieces have been reused, and it has the same books (and image file,
+        which must still be there) as in the old manifest. Records the image file for the new manifest
+        """
+
+        Chart = self.charts.get(sheetTitle)
+        if Chart is None:
+            return False
+        Chart["image"] = imageFile
+        if self.previous is None or sheetTitle not in self.previous["charts"]:
+            return False
+        Old = self.previous["charts"][sheetTitle]
+        if Old["definition"] != self.definitions[sheetTitle] or Old["books"] != Chart["books"] \
+           or len([ThisPiece for ThisPiece in Chart["pieces"] if ThisPiece is not None]) > 0:
+            return False
+        if imageFile and (Old.get("image") != imageFile or not os.path.isfile(imageFile)):
+            return False
+        return True
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def save(self):
+
+        """Write the new manifest and its chart data file, once the workbook has been saved"""
+
+        Arrays = {}
+        Charts = []
+        for (SheetTitle, Chart) in self.charts.items():
+            Entries = []
+            for (FileName, ThisPiece) in zip(Chart["books"], Chart["pieces"]):
+                Key = "p" + str(len(Arrays))
+                if ThisPiece is None:
+                    #
+                    # Copy the piece's arrays from the old data file as they are
+                    #
+                    Entry = dict(self.previousPieces[(SheetTitle, FileName)])
+                    Names = ["_a" + str(Index) for Index in range(Entry["arrays"])]
+                    if Entry["columns"]:
+                        Names += ["_lengths", "_kinds", "_numbers", "_strings"]
+                    for Name in Names:
+                        Arrays[Key + Name] = self.data[Entry["key"] + Name]
+                    Entry["key"] = Key
+                else:
+                    Entry = {"book": FileName, "key": Key, "meta": ThisPiece.Meta, "columns": ThisPiece.Columns is not None,
+                             "arrays": len(ThisPiece.Arrays)}
+                    if ThisPiece.Columns is not None:
+                        for (Name, Array) in zip(("_lengths", "_kinds", "_numbers", "_strings"), EncodeColumns(ThisPiece.Columns)):
+                            Arrays[Key + Name] = Array
+                    for (Index, Array) in enumerate(ThisPiece.Arrays):
+                        Arrays[Key + "_a" + str(Index)] = numpy.asarray(Array, dtype=numpy.float64)
+                Entries.append(Entry)
+            Charts.append({"sheet": SheetTitle, "sections": self.sections.get(SheetTitle), "definition": self.definitions.get(SheetTitle),
+                           "books": Chart["books"], "image": Chart["image"], "pieces": Entries})
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        DataFile = self.saveFileName + DataSuffix
+        File = open(DataFile + ".tmp", "wb")
+        try:
+            numpy.savez(File, **Arrays)
+        finally:
+            File.close()
+        ReplaceFile(DataFile + ".tmp", DataFile)
+        ManifestFile = self.saveFileName + ManifestSuffix
+        File = open(ManifestFile + ".tmp", "wb")
+        try:
+            json.dump(OrderedDict((("format", FormatVersion), ("version", self.version), ("data", FileStat(DataFile)),
+                                   ("books", self.books), ("charts", Charts))), File, indent=1)
+        finally:
+            File.close()
+        ReplaceFile(ManifestFile + ".tmp", ManifestFile)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def report(self):
+
+        """Returns a line of statistics for the end of the run"""
+
+        Unchanged = len([SheetTitle for SheetTitle in self.charts if self.unchangedchart(SheetTitle, self.charts[SheetTitle]["image"])])
+        return "Manifest " + self.saveFileName + ManifestSuffix + ": " + str(Unchanged) + " of " + str(len(self.charts)) \
+            + " charts unchanged, " + str(self.reused) + " of " + str(self.reused + self.built) + " chart data pieces reused"
+#-------------------------------------------------------------------------------------------------------------
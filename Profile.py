@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Profile is the instrumentation behind GenGraphs' --profile switch. It counts the calls made to
+#               each method of the workbook backend (UseExcel or UseWorkbook), with the time spent in them and
+#               the number of cells they moved, and times each source book and each chart of an ini file.
+#
+#               A Profiler is started for each ini file, and is the current one for the process (ini files in
+#               parallel run in processes of their own). GenGraphs calls start() and stop() around the work it
+#               wants timed; these do nothing when there's no current Profiler, so GenGraphs runs as before
+#               without --profile. The Profiler is shared by the threads that read the source books.
+#
+#               At the end of the ini file report() gives a summary table, and trace() returns the timings as a
+#               dictionary, which GenGraphs writes to a trace file (in the Trace Event format, which can be
+#               loaded into chrome://tracing or Perfetto, with the call counts alongside).
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+#
+# The Profiler for the ini file being processed, or None if we're not profiling
+#
+Current = None
+#
+# How many of the slowest books and charts to list in the report
+#
+ReportRows = 10
+#
+# Backend methods that read or write a single cell
+#
+SingleCellMethods = ("getcell", "setcellvalue", "setcellformula", "lastcellincolumn")
+
+#-------------------------------------------------------------------------------------------------------------
+def CountCells(Value):
+
+    """Returns the number of cells in a tuple of row tuples (or list of columns), or 0 if it isn't one"""
+
+    if not isinstance(Value, (tuple, list)):
+        return 0
+    Cells = 0
+    for Row in Value:
+        if not isinstance(Row, basestring):
+            try:
+                Cells += len(Row)
+            except TypeError:
+                return 0
+        else:
+            return 0
+    return Cells
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def SheetCells(Sheets):
+
+    """Returns the number of cells in a book's sheets (a dictionary of sheet name -> list of columns)"""
+
+    if not Sheets:
+        return 0
+    return sum([CountCells(Columns) for Columns in Sheets.values() if Columns is not None])
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def MethodCells(MethodName, args, kwargs, Result):
+
+    """Returns the number of cells a backend method call moved: the cells of the range it returned or was
+    given to write, or 1 for the methods that read or write a single cell
+    """
+
+    if MethodName in SingleCellMethods:
+        return 1
+    if MethodName == "setrange":
+        return CountCells(kwargs["data"] if "data" in kwargs else args[3] if len(args) > 3 else None)
+    return CountCells(Result)
+#-------------------------------------------------------------------------------------------------------------
+
+class Profiler(object):
+    """Call counts and timings for one ini file.
+
+    wrap() returns a profiled subclass of a workbook backend class, start() and stop() time a piece of work
+    (a source book or a chart), and report() and trace() give the results.
+    """
+
+    __slots__ = ("iniFile", "lock", "began", "calls", "timings")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, iniFile):
+        #
+        # calls is an ordered dictionary of "Class.method" -> [calls, seconds, cells]
+        # timings is a list of (kind, name, start time, seconds, cells, thread) tuples, in the order they finished
+        #
+        self.iniFile = iniFile
+        self.lock = threading.Lock()
+        self.began = time.time()
+        self.calls = OrderedDict()
+        self.timings = []
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def count(self, name, seconds, cells):
+
+        """Add a call of a backend method (or function) to its totals"""
+
+        with self.lock:
+            Totals = self.calls.setdefault(name, [0, 0.0, 0])
+            Totals[0] += 1
+            Totals[1] += seconds
+            Totals[2] += cells
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _wrapmethod(self, ClassName, MethodName, Method):
+        Name = ClassName + "." + MethodName
+        Profiler = self
+
+        def Profiled(*args, **kwargs):
+            Start = time.time()
+            Result = Method(*args, **kwargs)
+            Profiler.count(Name, time.time() - Start, MethodCells(MethodName, args[1:], kwargs, Result))
+            return Result
+
+        Profiled.__name__ = Method.__name__
+        Profiled.__doc__ = Method.__doc__
+        return Profiled
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def wrap(self, Class):
+
+        """Returns a subclass of a workbook backend class with every public method (and the constructor, which
+        opens or creates the workbook) counted and timed
+        """
+
+        Methods = {"__init__": self._wrapmethod(Class.__name__, "open", Class.__init__)}
+        for MethodName in dir(Class):
+            if MethodName.startswith("_") or not callable(getattr(Class, MethodName)):
+                continue
+            Methods[MethodName] = self._wrapmethod(Class.__name__, MethodName, getattr(Class, MethodName))
+        return type(Class.__name__, (Class,), Methods)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def start(self, kind, name):
+
+        """Start timing a piece of work. Returns the timer to pass to stop()
+        Description of parameters (self explanatory parameters are not described):
+            kind        -   "book" or "chart"
+            name        -   the book's file name or the chart's sheet title
+        """
+
+        return (kind, name, time.time())
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def stop(self, timer, cells=0):
+
+        """Finish timing a piece of work, with the number of cells read or written for it"""
+
+        (Kind, Name, Start) = timer
+        with self.lock:
+            self.timings.append((Kind, Name, Start, time.time() - Start, cells, threading.current_thread().ident))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def report(self):
+
+        """Returns the summary table: the backend calls, slowest first, then the slowest source books and charts"""
+
+        Lines = ["Profile of " + self.iniFile + " (" + "%.3f" % (time.time() - self.began) + "s)"]
+        Lines.append("    %-36s %9s %11s %12s" % ("Backend call", "Calls", "Seconds", "Cells"))
+        for (Name, (Calls, Seconds, Cells)) in sorted(self.calls.items(), key=lambda Item: -Item[1][1]):
+            Lines.append("    %-36s %9d %11.3f %12d" % (Name, Calls, Seconds, Cells))
+        for (Kind, Heading) in (("book", "Source book"), ("chart", "Chart")):
+            Timings = sorted([Timing for Timing in self.timings if Timing[0] == Kind], key=lambda Timing: -Timing[3])
+            if len(Timings) == 0:
+                continue
+            Lines.append("    %-36s %9s %11s %12s" % (Heading + " (slowest " + str(min(ReportRows, len(Timings))) + " of "
+                                                      + str(len(Timings)) + ")", "", "Seconds", "Cells"))
+            for (Kind, Name, Start, Seconds, Cells, Thread) in Timings[:ReportRows]:
+                if len(Name) > 46:
+                    Name = "..." + Name[-43:]
+                Lines.append("    %-46s %11.3f %12d" % (Name, Seconds, Cells))
+        return "\n".join(Lines)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def trace(self, status=None):
+
+        """Returns the profile as a dictionary for the trace file: the backend call totals, and a Trace Event
+        ("X", complete) for the ini file and for each book and chart, with times in microseconds
+        """
+
+        Process = os.getpid()
+        Events = [{"name": os.path.basename(self.iniFile), "cat": "ini", "ph": "X", "pid": Process,
+                   "tid": threading.current_thread().ident, "ts": int(self.began * 1e6),
+                   "dur": int((time.time() - self.began) * 1e6), "args": {"iniFile": self.iniFile, "status": status}}]
+        for (Kind, Name, Start, Seconds, Cells, Thread) in self.timings:
+            Events.append({"name": Name, "cat": Kind, "ph": "X", "pid": Process, "tid": Thread,
+                           "ts": int(Start * 1e6), "dur": int(Seconds * 1e6), "args": {"cells": Cells}})
+        Calls = OrderedDict((Name, {"calls": Calls, "seconds": Seconds, "cells": Cells})
+                            for (Name, (Calls, Seconds, Cells)) in self.calls.items())
+        return {"iniFile": self.iniFile, "status": status, "calls": Calls, "traceEvents": Events}
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def start(kind, name):
+
+    """Start timing a piece of work with the current Profiler. Returns None if we're not profiling"""
+
+    if Current is None:
+        return None
+    return Current.start(kind, name)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def stop(timer, cells=0):
+
+    """Finish timing a piece of work started with start()"""
+
+    if timer is not None and Current is not None:
+        Current.stop(timer, cells)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def count(name, seconds, cells=0):
+
+    """Add a call of a function that isn't a backend method (such as ReadColumns) to the current Profiler"""
+
+    if Current is not None:
+        Current.count(name, seconds, cells)
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  RenderCharts draws GenGraphs charts as PNG or SVG images with matplotlib, without Excel, for web
+#               pages and email reports. Each chart is drawn from the same chart data that's written to the
+#               chart data sheet (title, y axis title, time column, series and their headings for the legend),
+#               as a line chart with a time category axis, like the Excel chart.
+#
+#               matplotlib is only imported in the processes that draw the charts, with the non-interactive Agg
+#               backend, so no display is needed. The charts are drawn in parallel across a pool of processes.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import re
+import datetime
+import multiprocessing
+import traceback
+import numpy
+from ColumnMath import ToArray, HeadRows
+
+Formats = ("png", "svg")
+DefaultFormat = "png"
+#
+# The size of the image in pixels (the same size as the Excel chart GenGraphs inserts), and the most time
+# labels to put along the bottom
+#
+Width = 900
+Height = 600
+DPI = 100
+MaxTimeLabels = 10
+
+#-------------------------------------------------------------------------------------------------------------
+def Available():
+
+    """Returns True if matplotlib can be imported, so charts can be rendered"""
+
+    try:
+        import matplotlib
+    except ImportError:
+        return False
+    return True
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ImageFileName(directory, iniFile, chartNumber, sheetTitle, format=DefaultFormat):
+
+    """Returns the image file name for a chart: the ini file name, chart number and sheet title, with anything
+    that isn't safe in a file name replaced by '_'
+    """
+
+    Name = os.path.splitext(os.path.basename(iniFile))[0] + "-" + str(chartNumber) + "-" + sheetTitle
+    return os.path.join(directory, re.sub("[^\w.-]", "_", Name) + "." + format)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def RenderJob(fileName, graphTitle, yAxisTitle, chartColumns):
+
+    """Returns the job for RenderChart to draw a chart from its chart data sheet columns.
+    Description of parameters (self explanatory parameters are not described):
+        chartColumns    -   list of columns, each a list of cell values from row 1 (heading, empty row 2, then data),
+                            with the time column first
+    """
+
+    Rows = max([len(Column) for Column in chartColumns]) - HeadRows
+    Times = list(chartColumns[0][HeadRows:]) + [None] * (Rows - len(chartColumns[0][HeadRows:]))
+    Headings = [Column[0] if len(Column) > 0 else None for Column in chartColumns[1:]]
+    Series = [ToArray(Column[HeadRows:], Rows) for Column in chartColumns[1:]]
+    return (fileName, graphTitle, yAxisTitle, Times, Headings, Series)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def TimeLabel(Value):
+
+    """Returns the text of a time column cell for the time axis"""
+
+    if Value is None:
+        return ""
+    if isinstance(Value, datetime.datetime):
+        return Value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(Value, unicode):
+        return Value
+    return str(Value)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def RenderChart(Job):
+
+    """Draw one chart and save it as an image (PNG or SVG, from the file name extension).
+    Runs in a pool worker. Returns a tuple of (file name, None) or (file name, error message)
+    """
+
+    (FileName, GraphTitle, YAxisTitle, Times, Headings, Series) = Job
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        ThisFigure = Figure(figsize=(float(Width) / DPI, float(Height) / DPI), dpi=DPI)
+        FigureCanvasAgg(ThisFigure)
+        Axes = ThisFigure.add_subplot(1, 1, 1)
+        X = numpy.arange(len(Times))
+        for (Heading, Values) in zip(Headings, Series):
+            #
+            # Join up the cells that have values, so a series that's been aligned with others (and so has
+            # empty cells between its samples) is still drawn as a line
+            #
+            Used = ~numpy.isnan(Values)
+            Axes.plot(X[Used], Values[Used], linewidth=1, label=Heading if Heading is not None else "")
+        Axes.set_title(GraphTitle)
+        Axes.set_xlabel("Time")
+        Axes.set_ylabel(YAxisTitle)
+        #
+        # The time axis is a category axis, as in Excel, labelled at (up to) MaxTimeLabels evenly spaced rows
+        #
+        if len(Times) > 0:
+            Ticks = numpy.unique(numpy.linspace(0, len(Times) - 1, min(len(Times), MaxTimeLabels)).astype(numpy.int64))
+            Axes.set_xticks(Ticks)
+            Axes.set_xticklabels([TimeLabel(Times[Tick]) for Tick in Ticks.tolist()], rotation=30, ha="right", fontsize="small")
+            Axes.set_xlim(0, max(len(Times) - 1, 1))
+        if any(Heading is not None for Heading in Headings):
+            Axes.legend(loc="best", fontsize="small")
+        Axes.grid(True, linestyle=":", linewidth=0.5)
+        ThisFigure.tight_layout()
+        ThisFigure.savefig(FileName, format=os.path.splitext(FileName)[1][1:].lower())
+    except Exception:
+        return (FileName, traceback.format_exc())
+    return (FileName, None)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def RenderCharts(jobs, processes=None):
+
+    """Draw a list of charts (jobs from RenderJob) in a pool of processes. If this is already a pool worker (which
+    can't have a pool of its own) they're drawn one after the other. Returns a list of (file name, error) tuples,
+    with error None for the charts that were drawn.
+    Description of parameters (self explanatory parameters are not described):
+        processes       -   the most processes to use, by default one per CPU
+    """
+
+    if len(jobs) == 0:
+        return []
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(jobs)))
+    if processes == 1 or multiprocessing.current_process().daemon:
+        return [RenderChart(Job) for Job in jobs]
+    RenderPool = multiprocessing.Pool(processes=processes)
+    try:
+        return RenderPool.map(RenderChart, jobs, chunksize=1)
+    finally:
+        RenderPool.close()
+        RenderPool.join()
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,945 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  SarParser reads a sar text file (the output of sar -A) in a single pass, line by line, and
+#               builds the same sheets and columns that sar2xls writes to its workbook: an Overview sheet,
+#               one sheet per set of statistics, and one sheet per instance (network interface, block
+#               device, or CPU with -m) for the statistics that are listed per instance. GenGraphs can then
+#               read a sar file directly, rather than a workbook that sar2xls created from it.
+#
+#               The sheets follow the sar2xls layout: headings (translated into meaningful names) in row 1,
+#               row 2 empty, and the data from row 3.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Added takerows, so a sar file that's still being written can be read as it grows
+#           0.3     18-Oct-26   agent   Added OverviewDetails, shared by everything that reads a book's Overview sheet
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import re
+import time
+from collections import OrderedDict
+from ColumnMath import NumericColumn
+
+#
+# How each set of statistics is laid out in the workbook, in the order that sar2xls creates the sheets.
+# Each entry is (sheet name, a heading unique to the header line of the section, how the section is read,
+# the sysstat versions that the sheet is created for). Section types are:
+#
+#   SINGLE  -   one row per sample, all on one sheet
+#   MULTI   -   one row per instance per sample, with a sheet per instance ("Network - eth0")
+#   CPU     -   the aggregated ("all") CPU rows, plus a calculated %utilisation column. With perCPU
+#               this is read as a MULTI section instead ("CPU - all", "CPU - 0" etc.)
+#
+SINGLE = "Single"
+MULTI = "Multi"
+CPU = "CPU"
+
+SheetLayout = (
+    ("Processes",                   "proc/s",       SINGLE, (7, 9)),
+    ("Context Switches",            "cswch/s",      SINGLE, (7,)),
+    ("Interrupts",                  "intr/s",       SINGLE, (7,)),
+    ("Memory & Swap Utilisation",   "kbmemfree",    SINGLE, (7,)),
+    ("CPU",                         "%nice",        CPU,    (7, 9)),
+    ("Paging",                      "pgpgin/s",     SINGLE, (7, 9)),
+    ("Swapping",                    "pswpin/s",     SINGLE, (7, 9)),
+    ("Memory",                      "frmpg/s",      SINGLE, (7, 9)),
+    ("Memory Utilisation",          "kbmemfree",    SINGLE, (9,)),
+    ("Swap Utilisation",            "kbswpfree",    SINGLE, (9,)),
+    ("Inode & File Tables",         "dentunusd",    SINGLE, (7, 9)),
+    ("Sockets",                     "totsck",       SINGLE, (7, 9)),
+    ("Load Average",                "runq-sz",      SINGLE, (7, 9)),
+    ("Network",                     "rxpck/s",      MULTI,  (7, 9)),
+    ("Net Errors",                  "rxerr/s",      MULTI,  (7, 9)),
+    ("NFS Client",                  "call/s",       SINGLE, (7, 9)),
+    ("NFS Server",                  "scall/s",      SINGLE, (7, 9)),
+    ("IPv4",                        "irec/s",       SINGLE, (7, 9)),
+    ("IPv4 Errors",                 "ihdrerr/s",    SINGLE, (7, 9)),
+    ("ICMPv4",                      "imsg/s",       SINGLE, (7, 9)),
+    ("ICMPv4 Errors",               "ierr/s",       SINGLE, (7, 9)),
+    ("TCPv4",                       "active/s",     SINGLE, (7, 9)),
+    ("TCPv4 Errors",                "atmptf/s",     SINGLE, (7, 9)),
+    ("UDP",                         "idgm/s",       SINGLE, (7, 9)),
+    ("Total IO",                    "bread/s",      SINGLE, (7, 9)),
+    ("IO",                          "DEV",          MULTI,  (7, 9)),
+    )
+#
+# Excel's limit on the length of a sheet name
+#
+MaxSheetNameLength = 31
+#
+# Translations from the sar column headings to more meaningful headings, as used by sar2xls
+#
+Sar7Headings = {
+    #
+    # sar -b : I/O and transfer rate stats
+    #
+    'tps': "Transfers/Sec",
+    'rtps': "Read Transfers/Sec",
+    'wtps': "Write Transfers/Sec",
+    'bread/s': "Blocks Read/Sec",
+    'bwrtn/s': "Blocks Written/Sec",
+    #
+    # sar -B : Paging stats
+    #
+    'pgpgin/s': "KB Paged In/Sec",
+    'pgpgout/s': "KB Paged Out/Sec",
+    'fault/s': "Total Page Faults/Sec",
+    'majflt/s': "Major Faults/Sec",
+    #
+    # sar -c : process creation
+    #
+    'proc/s': "Processes Created/Sec",
+    #
+    # sar -d : I/O activity for each block device
+    #
+    'rd_sec/s': "Sectors Read/Sec",
+    'wr_sec/s': "Sectors Written/Sec",
+    'avgrq-sz': "Average Request Size (Sectors)",
+    'avgqu-sz': "Average Queue Length",
+    'await': "Average I/O Time inc Wait(ms)",
+    'svctm': "Average I/O Service Time (ms)",
+    '%util': "% Bandwidth Utilisation",
+    #
+    # sar -I SUM : Total interrupts
+    #
+    'intr/s': "Interrupts/Sec",
+    #
+    # sar -n DEV : Network device stats
+    #
+    'rxpck/s': "Pkts Recv'd/Sec",
+    'txpck/s': "Pkts Trans'd/Sec",
+    'rxbyt/s': "Bytes Recv'd/Sec",
+    'txbyt/s': "Bytes Trans'd/Sec",
+    'rxcmp/s': "Compressed Pkts Recv'd/Sec",
+    'txcmp/s': "Compressed Pkts Trans'd/Sec",
+    'rxmcst/s': "Multicast Pkts Recv'd/Sec",
+    #
+    # sar -n EDEV : Network device errors
+    #
+    'rxerr/s': "Bad Pkts Recv'd/Sec",
+    'txerr/s': "Trans Errors/Sec",
+    'coll/s': "Collisions/Sec",
+    'rxdrop/s': "Recv Pkts Dropped/Sec",
+    'txdrop/s': "Trans Pkts Dropped/Sec",
+    'txcarr/s': "Trans Carrier Errors/Sec",
+    'rxfram/s': "Recv Frame Alignment Errors/Sec",
+    'rxfifo/s': "Recv FIFO Overrun Errors/Sec",
+    'txfifo/s': "Trans FIFO Overrun Errors/Sec",
+    #
+    # sar -n NFS : NFS client activity
+    #
+    'call/s': "RPC Requests Made/Sec",
+    'retrans/s': "RPC Retransmitted Requests Made/Sec",
+    'read/s': "RPC Read Requests Made/Sec",
+    'write/s': "RPC Write Requests Made/Sec",
+    'access/s': "RPC Access Requests Made/Sec",
+    'getatt/s': "RPC Getattr Requests Made/Sec",
+    #
+    # sar -n NFSD : NFS server activity
+    #
+    'scall/s': "RPC Requests Recv'd/Sec",
+    'badcall/s': "Bad RPC Requests Recv'd/Sec",
+    'packet/s': "Network Packets Recv'd/Sec",
+    'udp/s': "UDP Packets Recv'd/Sec",
+    'tcp/s': "TCP Packets Recv'd/Sec",
+    'hit/s': "Reply Cache Hits/Sec",
+    'miss/s': "Reply Cache Misses/Sec",
+    'sread/s': "RPC Read Calls Recv'd/Sec",
+    'swrite/s': "RPC Write Calls Recv'd/Sec",
+    'saccess/s': "RPC Access Calls Recv'd/Sec",
+    'sgetatt/s': "RPC Getattr Calls Recv'd/Sec",
+    #
+    # sar -n SOCK : Socket stats
+    #
+    'totsck': "Total Used Sockets",
+    'tcpsck': "TCP Sockets in Use",
+    'udpsck': "UDP Sockets in Use",
+    'rawsck': "Raw Sockets in Use",
+    'ip-frag': "IP Fragments in Use",
+    #
+    # sar -q : Queue length & load average
+    #
+    'runq-sz': "Run Queue Length",
+    'plist-sz': "No. of Processes in List",
+    'ldavg-1': "System Load Avg. Last Min.",
+    'ldavg-5': "System Load Avg. Last 5 Mins.",
+    'ldavg-15': "System Load Avg. Last 15 Mins.",
+    #
+    # sar -r : Memory & swap space utilisation stats
+    #
+    'kbmemfree': "Free Memory KB",
+    'kbmemused': "Used Memory KB",
+    '%memused': "% Memory Used",
+    'kbbuffers': "Kernel Buffers KB",
+    'kbcached': "Data Cache KB",
+    'kbswpfree': "Free Swap Space KB",
+    'kbswpused': "Used Swap Space KB",
+    '%swpused': "% Swap Used",
+    'kbswpcad': "Cached Swap KB",
+    #
+    # sar -R : Memory stats
+    #
+    'frmpg/s': "Memory Pages Freed/Sec",
+    'bufpg/s': "Add'l Buffer Pages/Sec",
+    'campg/s': "Add'l Cache Pages/Sec",
+    #
+    # sar -u : CPU stats
+    #
+    '%user': "% User Level",
+    '%nice': "% User Level (nice)",
+    '%system': "% System Level",
+    '%iowait': "% Idle Waiting on I/O (IOwait)",
+    '%steal': "% Time Involuntary Waiting on Another vCPU",
+    '%idle': "% Idle",
+    '%utilisation': "% Utilisation",
+    #
+    # sar -v : Files, inodes & other kernel tables
+    #
+    'dentunusd': "Unused Directory Cache Entries",
+    'file-sz': "Used File Handles",
+    '%file-sz': "% Used File Handles",
+    'inode-sz': "Used Inode Handlers",
+    'super-sz': "Super Block Handlers",
+    '%super-sz': "% Allocated Super Block Handlers",
+    'dquot-sz': "Allocated Disc Quota Entries",
+    '%dquot-sz': "% Allocated Disc Quota Entries",
+    'rtsig-sz': "Queued RT Signals",
+    '%rtsig-sz': "% Queued RT Signals",
+    #
+    # sar -w : Context switches
+    #
+    'cswch/s': "Context Switches/Sec",
+    #
+    # sar -W : Swapping stats
+    #
+    'pswpin/s': "Pages Swapped In/Sec",
+    'pswpout/s': "Pages Swapped Out/Sec",
+    #
+    # sar -x ALL : Process stats
+    #
+    'minflt/s': "Minor Faults/Sec",
+    'majflt/s': "Major Faults/Sec",
+    'nswap/s': "Process Pages Swapped Out/Sec",
+    #
+    # sar -X ALL : Child process stats
+    #
+    'cminflt/s': "Child Process Minor Faults/Sec",
+    'cmajflt/s': "Child Process Major Faults/Sec",
+    '%cuser': "Child Process % User Level",
+    '%csystem': "Child Process % System Level",
+    'cnswap/s': "Child Process Pages Swapped Out/Sec",
+    #
+    # sar -y : TTY device activity
+    #
+    'Recvin/s': "Serial Line Recv Ints/Sec",
+    'xmtin/s': "Serial Line Trans Ints/Sec",
+    'framerr/s': "Serial Line Frame Errors/Sec",
+    'prtyerr/s': "Serial Line Parity Errors/Sec",
+    'brk/s': "Serial Line Breaks/Sec",
+    'ovrun/s': "Serial Line Overruns/Sec",
+    #
+    # Legacy
+    #
+    'blks/s': "Blocks Tranferred/Sec",
+    'activepg': "Active Memory Pages",
+    'inadtypg': "Inactive Dirty Pages",
+    'inaclnpg': "Inactive Clean Pages",
+    'inatarpg': "Inactive Target Pages",
+    'shmpg/s': "Add'l Pages Shared/Sec",
+    'kbmemshrd': "Shared Memory KB"
+    }
+
+Sar9Headings = {
+    #
+    # sar -b : I/O and transfer rate stats
+    #
+    'tps': "Transfers/Sec",
+    'rtps': "Read Transfers/Sec",
+    'wtps': "Write Transfers/Sec",
+    'bread/s': "Blocks Read/Sec",
+    'bwrtn/s': "Blocks Written/Sec",
+    #
+    # sar -B : Paging stats
+    #
+    'pgpgin/s': "KB Paged In/Sec",
+    'pgpgout/s': "KB Paged Out/Sec",
+    'fault/s': "Total Page Faults/Sec",
+    'majflt/s': "Major Faults/Sec",
+    'pgfree/s': "Pages Added to Free List/Sec",
+    'pgscank/s': "Pages Scanned by kswapd/Sec",
+    'pgscand/s': "Pages Scanned Directly/Sec",
+    'pgsteal/s': "Pages Reclaimed from Cache/Sec",
+    '%vmeff': "% Efficiency of Page Reclaim",
+    #
+    # sar -d : I/O activity for each block device
+    #
+    'rd_sec/s': "Sectors Read/Sec",
+    'wr_sec/s': "Sectors Written/Sec",
+    'avgrq-sz': "Average Request Size (Sectors)",
+    'avgqu-sz': "Average Queue Length",
+    'await': "Average I/O Time inc Wait(ms)",
+    'svctm': "Average I/O Svc Time (unreliable)",
+    '%util': "% Bandwidth Utilisation",
+    #
+    # sar -I SUM : Total interrupts
+    #
+    'intr/s': "Interrupts/Sec",
+    #
+    # sar -m : Power Management Stats
+    #
+    'MHz': "CPU Clock Frequency (MHz)",
+    #
+    # sar -n DEV : Network device stats
+    #
+    'rxpck/s': "Pkts Recv'd/Sec",
+    'txpck/s': "Pkts Trans'd/Sec",
+    'rxkB/s': "KBytes Recv'd/Sec",
+    'txkB/s': "KBytes Trans'd/Sec",
+    'rxcmp/s': "Compressed Pkts Recv'd/Sec",
+    'txcmp/s': "Compressed Pkts Trans'd/Sec",
+    'rxmcst/s': "Multicast Pkts Recv'd/Sec",
+    #
+    # sar -n EDEV : Network device errors
+    #
+    'rxerr/s': "Bad Pkts Recv'd/Sec",
+    'txerr/s': "Trans Errors/Sec",
+    'coll/s': "Collisions/Sec",
+    'rxdrop/s': "Recv Pkts Dropped/Sec",
+    'txdrop/s': "Trans Pkts Dropped/Sec",
+    'txcarr/s': "Trans Carrier Errors/Sec",
+    'rxfram/s': "Recv Frame Alignment Errors/Sec",
+    'rxfifo/s': "Recv FIFO Overrun Errors/Sec",
+    'txfifo/s': "Trans FIFO Overrun Errors/Sec",
+    #
+    # sar -n NFS : NFS client activity
+    #
+    'call/s': "RPC Requests Made/Sec",
+    'retrans/s': "RPC Retransmitted Requests Made/Sec",
+    'read/s': "RPC Read Requests Made/Sec",
+    'write/s': "RPC Write Requests Made/Sec",
+    'access/s': "RPC Access Requests Made/Sec",
+    'getatt/s': "RPC Getattr Requests Made/Sec",
+    #
+    # sar -n NFSD : NFS server activity
+    #
+    'scall/s': "RPC Requests Recv'd/Sec",
+    'badcall/s': "Bad RPC Requests Recv'd/Sec",
+    'packet/s': "Network Packets Recv'd/Sec",
+    'udp/s': "UDP Packets Recv'd/Sec",
+    'tcp/s': "TCP Packets Recv'd/Sec",
+    'hit/s': "Reply Cache Hits/Sec",
+    'miss/s': "Reply Cache Misses/Sec",
+    'sread/s': "RPC Read Calls Recv'd/Sec",
+    'swrite/s': "RPC Write Calls Recv'd/Sec",
+    'saccess/s': "RPC Access Calls Recv'd/Sec",
+    'sgetatt/s': "RPC Getattr Calls Recv'd/Sec",
+    #
+    # sar -n SOCK : Socket stats
+    #
+    'totsck': "Total Used Sockets",
+    'tcpsck': "TCP Sockets in Use",
+    'udpsck': "UDP Sockets in Use",
+    'rawsck': "Raw Sockets in Use",
+    'ip-frag': "IP Fragments in Use",
+    'tcp-tw': "TCP Sockets in TIME_WAIT State",
+    #
+    # sar -n IP : IPv4 stats (Requires "sa1 -S SNMP")
+    #
+    'irec/s': "Input D'grams/Sec",
+    'fwddgm/s': "Forwarded D'grams/Sec",
+    'idel/s': "Input D'grams Successfully Delivered/Sec",
+    'orq/s': "Locally Originated D'grams/Sec",
+    'asmrq/s': "Fragments Needing Reassembly/Sec",
+    'asmok/s': "D'grams Successfully Reassembed/Sec",
+    'fragok/s': "D'grams Successfully Fragmented/Sec",
+    'fragcrt/s': "D'gram Fragments Created/Sec",
+    #
+    # sar -n EIP : IPv4 errors (Requires "sa1 -S SNMP")
+    #
+    'ihdrerr/s': "Input D'gram IP Header Errors/Sec",
+    'iadrerr/s': "Input D'gram IP Header Invalid Address/Sec",
+    'iukwnpr/s': "Input D'gram Unknown Protocol/Sec",
+    'idisc/s': "Input D'grams Discarded/Sec",
+    'odisc/s': "Output D'grams Discarded/Sec",
+    'onort/s': "D'grams Discarded No Route/Sec",
+    'asmf/s': "IP Reassembly Failures/Sec",
+    'fragf/s': "D'grams Not Fragmented/Sec",
+    #
+    # sar -n ICMP : ICMPv4 stats (Requires "sa1 -S SNMP")
+    #
+    'imsg/s': "ICMP Msgs Recv'd/Sec",
+    'omsg/s': "ICMP Msgs Trans'd (attempted)/Sec",
+    'iech/s': "ICMP Echo Requests Recv'd/Sec",
+    'iechr/s': "ICMP Echo Replies Recv'd/Sec",
+    'oech/s': "ICMP Echo Requests Trans'd/Sec",
+    'oechr/s': "ICMP Echo Replies Trans'd/Sec",
+    'itm/s': "ICMP Timestamp Requests Recv'd/Sec",
+    'itmr/s': "ICMP Timestamp Replies Recv'd/Sec",
+    'otm/s': "ICMP Timestamp Requests Trans'd/Sec",
+    'otmr/s': "ICMP Timestamp Replies Trans'd/Sec",
+    'iadrmk/s': "ICMP Address Mask Requests Recv'd/Sec",
+    'iadrmkr/s': "ICMP Address Mask Replies Recv'd/Sec",
+    'oadrmk/s': "ICMP Address Mask Requests Trans'd/Sec",
+    'oadrmkr/s': "ICMP Address Mask Replies Trans'd/Sec",
+    #
+    # sar -n EICMP : ICMPv4 errors (Requires "sa1 -S SNMP")
+    #
+    'ierr/s': "ICMP Msgs With Errors Recv'd/Sec",
+    'oerr/s': "ICMP Msgs Not Trans'd/Sec",
+    'idstunr/s': "ICMP Dest. Unreach Msgs Recv'd/Sec",
+    'odstunr/s': "ICMP Dest. Unreach Msgs Trans'd/Sec",
+    'itmex/s': "ICMP Time Exceeded Msgs Recv'd/Sec",
+    'otmex/s': "ICMP Time Exceeded Msgs Trans'd/Sec",
+    'iparmpb/s': "ICMP Parameter Problem Msgs Recv'd/Sec",
+    'oparmpb/s': "ICMP Parameter Problem Msgs Trans'd/Sec",
+    'isrcq/s': "ICMP Source Quench Msgs Recv'd/Sec",
+    'osrcq/s': "ICMP Source Quench Msgs Trans'd/Sec",
+    'iredir/s': "ICMP Redirect Msgs Recv'd/Sec",
+    'oredir/s': "ICMP Redirect Msgs Trans'd/Sec",
+    #
+    # sar -n TCP : TCPv4 stats (Requires "sa1 -S SNMP")
+    #
+    'active/s': "TCP Active Opens/Sec",
+    'passive/s': "TCP Passive Opens/Sec",
+    'iseg/s': "TCP Segments Recv'd/Sec",
+    'oseg/s': "TCP Segments Trans'd/Sec",
+    #
+    # sar -n ETCP : TCPv4 errors (Requires "sa1 -S SNMP")
+    #
+    'atmptf/s': "TCP Attempt Fails/Sec",
+    'estres/s': "TCP Establish Resets/Sec",
+    'retrans/s': "TCP Segments Retrans'd/Sec",
+    'isegerr/s': "Bad TCP Segments Recv'd/Sec",
+    'orsts/s': "TCP RSTs Trans'd/Sec",
+    #
+    # sar -n UDP : UDPv4 stats (Requires "sa1 -S SNMP")
+    #
+    'idgm/s': "UDP D'grams Recv'd/Sec",
+    'odgm/s': "UDP D'grams Trans'd/Sec",
+    'noport/s': "UDP D'grams Trans'd/Sec No Port",
+    'idgmerr/s': "UDP D'grams Trans'd/Sec Undelivered",
+    #
+    # sar -q : Queue length & load average
+    #
+    'runq-sz': "Run Queue Length",
+    'plist-sz': "No. of Processes in List",
+    'ldavg-1': "System Load Avg. Last Min.",
+    'ldavg-5': "System Load Avg. Last 5 Mins.",
+    'ldavg-15': "System Load Avg. Last 15 Mins.",
+    'blocked': "No. of Processes Blocked on I/O",
+    #
+    # sar -r : Memory utilisation stats
+    #
+    'kbmemfree': "Free Memory KB",
+    'kbmemused': "Used Memory KB",
+    '%memused': "% Memory Used",
+    'kbbuffers': "Kernel Buffers KB",
+    'kbcached': "Data Cache KB",
+    'kbcommit': "KB Required for Current Workload",
+    '%commit': "% Memory Required for Current Workload",
+    #
+    # sar -R : Memory stats
+    #
+    'frmpg/s': "Memory Pages Freed/Sec",
+    'bufpg/s': "Add'l Buffer Pages/Sec",
+    'campg/s': "Add'l Cache Pages/Sec",
+    #
+    # sar -S : Swap utilisation stats
+    #
+    'kbswpfree': "Free Swap Space KB",
+    'kbswpused': "Used Swap Space KB",
+    '%swpused': "% Swap Used",
+    'kbswpcad': "Cached Swap KB",
+    '%swpcad': "% Cached Swap/Used Swap",
+    #
+    # sar -u : CPU stats
+    #
+    '%user': "% User Level inc. vCPU",
+    '%usr': "% User Level excl. vCPU",
+    '%nice': "% User Level (nice)",
+    '%system': "% System Level (inc. interrupts)",
+    '%sys': "% System Level (excl. interrupts)",
+    '%iowait': "% Idle Waiting on I/O (IOwait)",
+    '%steal': "% Time Involuntary Waiting on Another vCPU",
+    '%irq': "% Time Servicing HW Interrupts",
+    '%soft': "% Time Servicing SW Interrupts",
+    '%guest': "% Time running a vCPU",
+    '%idle': "% Idle",
+    '%utilisation': "% Utilisation",
+    #
+    # sar -v : Files, inodes & other kernel tables
+    #
+    'dentunusd': "Unused Directory Cache Entries",
+    'file-nr': "Used File Handles",
+    'inode-nr': "Used Inode Handlers",
+    'pty-nr': "Number of Pseudo-Terminals in Use",
+    #
+    # sar -w : task creation and system switching activity
+    #
+    'proc/s': "Processes Created/Sec",
+    'cswch/s': "Context Switches/Sec",
+    #
+    # sar -W : Swapping stats
+    #
+    'pswpin/s': "Pages Swapped In/Sec",
+    'pswpout/s': "Pages Swapped Out/Sec",
+    #
+    # sar -y : TTY device activity
+    #
+    'recvin/s': "Serial Line Recv Ints/Sec",
+    'xmtin/s': "Serial Line Trans Ints/Sec",
+    'framerr/s': "Serial Line Frame Errors/Sec",
+    'prtyerr/s': "Serial Line Parity Errors/Sec",
+    'brk/s': "Serial Line Breaks/Sec",
+    'ovrun/s': "Serial Line Overruns/Sec"
+    }
+
+#
+# A cell value that Spreadsheet::WriteExcel (and so sar2xls) would write as a number
+#
+NumberRegEx = re.compile("^([+-]?)(?=\d|\.\d)\d*(\.\d*)?([Ee]([+-]?\d+))?$")
+TimeRegEx = re.compile("^(\d{2}):(\d{2}):(\d{2})$")
+
+#
+# The system and date lines of the Overview sheet (see SarParser.sheets)
+#
+SystemRegEx = re.compile("Performance Details for system: ([\w-]+\.?.*)")
+StatsDateRegEx = re.compile("Statistics for (\d+-\d\d-\d\d)")
+
+#-------------------------------------------------------------------------------------------------------------
+def TimeInSeconds(Time):
+
+    """Convert a time of day in HH:MM:SS format into seconds since midnight. Raises ValueError if it isn't one"""
+
+    match = TimeRegEx.match(Time)
+    if not match:
+        raise ValueError("\"" + Time + "\" is not a time in HH:MM:SS format")
+    return int(match.group(1)) * 3600 + int(match.group(2)) * 60 + int(match.group(3))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def OverviewDetails(cells):
+
+    """Pulls the system short name & FQDN and the sar date out of the Overview sheet of a book (as written by
+    sar2xls or SarParser). Returns a tuple of (SystemName, SystemFQDN, SarDate), with None for any that can't be
+    found
+    Description of parameters (self explanatory parameters are not described):
+        cells       -   the cells of the first column of the Overview sheet (a list, or a NumericColumn)
+    """
+
+    SystemName = None
+    SystemFQDN = None
+    SarDate = None
+    for Cell in cells.cells() if isinstance(cells, NumericColumn) else cells:
+        if not isinstance(Cell, basestring):
+            continue
+        match = SystemRegEx.search(Cell)
+        if match:
+            SystemFQDN = match.group(1).strip()
+            SystemName = re.match("[\w-]+", SystemFQDN).group(0)
+        match = StatsDateRegEx.search(Cell)
+        if match:
+            SarDate = match.group(1)
+    return (SystemName, SystemFQDN, SarDate)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def CellValue(Field):
+
+    """Returns a sar field as a float if it's numeric, otherwise unchanged"""
+
+    if NumberRegEx.match(Field):
+        return float(Field)
+    return Field
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ReadDeviceMap(fileName):
+
+    """Read a device map file (as written by mk_dev_map.pl) of "major-minor = name" lines into a dictionary"""
+
+    DeviceMap = {}
+    for Line in open(fileName, 'rb'):
+        Line = Line.rstrip("\r\n")
+        if " = " in Line:
+            (MajMin, DevName) = Line.split(" = ", 1)
+            DeviceMap[MajMin] = DevName
+    return DeviceMap
+#-------------------------------------------------------------------------------------------------------------
+
+class SarParser(object):
+    """Single pass parser for a sar text file.
+
+    Lines are passed to feed() one at a time, starting with the first line of the file. The sheets built so
+    far can be read at any time with getusedrange(), so SarParser can stand in for a workbook object
+    (UseExcel or UseWorkbook) when reading source data.
+    """
+
+    __slots__ = ("beginTime", "endTime", "perCPU", "directory", "deviceMap", "sysstat", "translateHeading",
+                 "serverFQDN", "serverShortName", "kernelVersion", "statsDate", "reportGenerated",
+                 "sections", "section", "header", "cpuSkip")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, beginTime=None, endTime=None, perCPU=False, directory=None):
+
+        """Description of parameters (self explanatory parameters are not described):
+            beginTime   -   if given (HH:MM:SS), only samples after this time are kept
+            endTime     -   if given (HH:MM:SS), only samples before this time are kept
+            perCPU      -   create a sheet for each CPU, rather than just the aggregated CPU sheet (sar2xls -m)
+            directory   -   directory to look in for a <short system name>_dev_map device name map
+        """
+
+        #
+        # sar2xls only keeps samples strictly between the begin and end times, which default to midnight
+        #
+        self.beginTime = TimeInSeconds(beginTime) if beginTime else 0
+        self.endTime = TimeInSeconds(endTime) if endTime else 86400
+        self.perCPU = perCPU
+        self.directory = directory
+        self.deviceMap = {}
+        self.sysstat = None
+        self.translateHeading = {}
+        self.serverFQDN = None
+        self.serverShortName = None
+        self.kernelVersion = None
+        self.statsDate = None
+        self.reportGenerated = None
+        #
+        # sections is a dictionary of sheet name (from SheetLayout) -> section data. For SINGLE and CPU
+        # sections this is {"Headings": [...], "Rows": [[...], ...]}, for MULTI sections an ordered
+        # dictionary of instance name -> {"Headings": [...], "Rows": [[...], ...]}
+        # section is the SheetLayout entry of the section we're reading, or None between sections
+        # header is the header line of that section, without the time
+        #
+        self.sections = {}
+        self.section = None
+        self.header = None
+        self.cpuSkip = None
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _readfirstline(self, line):
+        match = re.match("^(Linux .*) \((.*)\).*\s+(.+?)\s+_.+_\s+\(\d+ CPU\)$", line)
+        if match:
+            #
+            # Looks like a sysstat 9 file (RHEL6, Ubuntu 10.04, etc.)
+            #
+            self.sysstat = 9
+            self.translateHeading = Sar9Headings
+            (self.kernelVersion, self.serverFQDN, Date) = match.groups()
+            #
+            # Extract the date (annoyingly this could be in DD/MM/YY or YYYY-MM-DD format)
+            #
+            self.statsDate = ""
+            match = re.search("(\d{1,2})/(\d{1,2})/(\d{2,4})", Date)
+            if match:
+                if len(match.group(3)) == 2:
+                    self.statsDate = "20" + match.group(3) + "-" + match.group(2) + "-" + match.group(1)
+                else:
+                    self.statsDate = match.group(3) + "-" + match.group(2) + "-" + match.group(1)
+            else:
+                match = re.search("(\d{1,4})-(\d{1,2})-(\d{2,4})", Date)
+                if match:
+                    self.statsDate = "-".join(match.groups())
+        else:
+            match = re.match("^(Linux .*) \((.*)\)\s+(.*)$", line)
+            if not match:
+                raise ValueError("This doesn't look like a sar file")
+            #
+            # Looks like a sysstat 5 or 7 file (RHEL4 or RHEL5)
+            #
+            self.sysstat = 7
+            self.translateHeading = Sar7Headings
+            (self.kernelVersion, self.serverFQDN, self.statsDate) = match.groups()
+        self.statsDate = self.statsDate.replace("/", "-")
+        self.serverShortName = self.serverFQDN.split(".")[0]
+        self.reportGenerated = time.ctime()
+        if self.directory:
+            DeviceMapFile = os.path.join(self.directory, self.serverShortName + "_dev_map")
+            if os.path.isfile(DeviceMapFile):
+                self.deviceMap = ReadDeviceMap(DeviceMapFile)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _findsection(self, Fields):
+        for Layout in SheetLayout:
+            if self.sysstat in Layout[3] and Layout[1] in Fields:
+                return Layout
+        return None
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _sectiontype(self, Layout):
+        if Layout[2] == CPU and self.perCPU:
+            return MULTI
+        return Layout[2]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _translate(self, Headings, Type):
+        Translated = []
+        for Heading in Headings:
+            if Heading in self.translateHeading:
+                #
+                # Special case 'tps' as is can occur in sar -b or -d listings
+                #
+                if Type == MULTI and "tps" in Heading:
+                    Heading = "Device " + self.translateHeading[Heading]
+                else:
+                    Heading = self.translateHeading[Heading]
+            Translated.append(Heading)
+        return Translated
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def feed(self, line):
+
+        """Parse the next line of the sar file. Raises ValueError if the first line isn't a sar file header"""
+
+        line = line.rstrip("\r\n")
+        if self.sysstat is None:
+            self._readfirstline(line)
+            return
+        Fields = line.split()
+        if len(Fields) == 0:
+            return
+        if Fields[0].startswith("Average"):
+            #
+            # End of this lot of data - might not be the only lot if we have a reboot
+            #
+            self.section = None
+            return
+        if not TimeRegEx.match(Fields[0]):
+            return
+        #
+        # Take out the AM/PM after the time, and convert the time to the 24 hour clock
+        #
+        SampleTime = Fields.pop(0)
+        if len(Fields) > 0 and Fields[0] in ("AM", "PM"):
+            (Hour, Minute, Second) = [int(Value) for Value in SampleTime.split(":")]
+            if Fields[0] == "AM" and Hour == 12:
+                Hour = 0
+            elif Fields[0] == "PM" and Hour < 12:
+                Hour += 12
+            SampleTime = "%02d:%02d:%02d" % (Hour, Minute, Second)
+            Fields.pop(0)
+        if Fields == ["LINUX", "RESTART"]:
+            return
+        #
+        # Is this the header line of a new section?
+        #
+        Layout = self._findsection(Fields)
+        if Layout:
+            self._readheader(Layout, Fields)
+            return
+        if len([Field for Field in Fields if NumberRegEx.match(Field)]) == 0:
+            #
+            # A header line for statistics that we don't make a sheet for
+            #
+            self.section = None
+            return
+        if self.section is None:
+            return
+        self._readsample(SampleTime, Fields)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _readheader(self, Layout, Fields):
+        self.section = Layout
+        self.header = Fields
+        #
+        # For the aggregated CPU sheet, the first sample after the header tells us whether this is the
+        # section with the "all" rows
+        #
+        self.cpuSkip = None
+        if Layout[0] in self.sections:
+            #
+            # The headings are taken from the first header line we find for this section
+            #
+            return
+        Type = self._sectiontype(Layout)
+        if Type == MULTI:
+            #
+            # The headings are stored against each instance as it's first seen
+            #
+            self.sections[Layout[0]] = OrderedDict()
+        elif Type == CPU:
+            Headings = [Field for Field in Fields if Field != "CPU"] + ["%utilisation"]
+            self.sections[Layout[0]] = {"Headings": ["Time"] + self._translate(Headings, Type), "Rows": []}
+        else:
+            self.sections[Layout[0]] = {"Headings": ["Time"] + self._translate(Fields, Type), "Rows": []}
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _readsample(self, SampleTime, Fields):
+        Layout = self.section
+        Type = self._sectiontype(Layout)
+        if Type == SINGLE:
+            Section = self.sections[Layout[0]]
+            Row = [SampleTime] + Fields
+        elif Type == CPU:
+            if self.cpuSkip is None:
+                self.cpuSkip = (Fields[0] != "all")
+            if self.cpuSkip or Fields[0] != "all":
+                return
+            Section = self.sections[Layout[0]]
+            #
+            # Calculate the %utilisation (100-%idle)
+            #
+            Row = [SampleTime] + Fields[1:] + ["%.2f" % (100 - float(Fields[-1]))]
+        else:
+            #
+            # Strip out the instance name (IFACE, DEV or CPU column), translating device names using the
+            # device map if we have one
+            #
+            Instance = Fields[0]
+            if Layout[1] == "DEV":
+                Instance = self.deviceMap.get(Instance, Instance)
+            Instances = self.sections[Layout[0]]
+            if Instance not in Instances:
+                Instances[Instance] = {"Headings": ["Time"] + self._translate(self.header[1:], Type), "Rows": []}
+            Section = Instances[Instance]
+            Row = [SampleTime] + Fields[1:]
+        if self.beginTime < TimeInSeconds(SampleTime) < self.endTime:
+            Section["Rows"].append([CellValue(Field) for Field in Row])
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _multisheetname(self, SheetName, Instance):
+        #
+        # Keep the sheet name within Excel's limit, cutting down the instance name the way sar2xls does
+        #
+        MaxInstanceNameLength = MaxSheetNameLength - len(SheetName + " - ")
+        if len(Instance) > MaxInstanceNameLength:
+            Instance = "..." + Instance[MaxInstanceNameLength - 3:]
+        return SheetName + " - " + Instance
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _datasheets(self):
+        DataSheets = OrderedDict()
+        for Layout in SheetLayout:
+            if Layout[0] not in self.sections:
+                continue
+            if self._sectiontype(Layout) == MULTI:
+                for (Instance, Section) in self.sections[Layout[0]].items():
+                    DataSheets[self._multisheetname(Layout[0], Instance)] = Section
+            elif Layout[2] == CPU:
+                DataSheets["CPU - all"] = self.sections[Layout[0]]
+            else:
+                DataSheets[Layout[0]] = self.sections[Layout[0]]
+        return DataSheets
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def sheetnames(self):
+
+        """Returns a list of the names of the sheets built so far, in sar2xls order"""
+
+        if self.sysstat is None:
+            return []
+        return ["Overview"] + list(self._datasheets().keys())
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def getusedrange(self, sheet):
+
+        """Returns a tuple of tuples of all the cells from A1 to the bottom right of the used range of a sheet,
+            just as UseExcel and UseWorkbook do. Raises KeyError if there's no such sheet.
+
+        Description of parameters (self explanatory parameters are not described):
+            sheet           -   name of the sheet
+        """
+
+        if self.sysstat is None:
+            raise KeyError(sheet)
+        if sheet == "Overview":
+            return ((None,),
+                    ("Performance Details for system: " + self.serverFQDN,),
+                    (None,),
+                    ("Kernel: " + self.kernelVersion,),
+                    (None,),
+                    ("Statistics for " + self.statsDate,),
+                    (None,),
+                    ("Report Generated: " + self.reportGenerated,))
+        Section = self._datasheets()[sheet]
+        #
+        # sar2xls writes as many columns as there are headings
+        #
+        Width = len(Section["Headings"])
+        return (tuple(Section["Headings"]), (None,) * Width) \
+            + tuple(tuple(Row[:Width]) + (None,) * (Width - len(Row)) for Row in Section["Rows"])
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def takerows(self):
+
+        """Returns an ordered dictionary of sheet name -> (headings, list of rows) of the samples read since the
+            last call, in sar2xls order, and drops those rows from the parser. Sheets with no new rows are
+            included, with an empty list. Used to read a sar file that's still being written a few lines at a
+            time, without the parser holding every row read so far (so getusedrange only returns the rows read
+            since the last call)
+        """
+
+        NewRows = OrderedDict()
+        for (SheetName, Section) in self._datasheets().items():
+            NewRows[SheetName] = (Section["Headings"], Section["Rows"])
+            Section["Rows"] = []
+        return NewRows
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def close(self):
+
+        """Nothing to close, the sar file has already been read. Here for compatibility with UseExcel"""
+
+        pass
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def IsSarFile(fileName):
+
+    """Returns True if fileName looks like a sar text file rather than a workbook"""
+
+    if os.path.splitext(fileName)[1].lower() in (".xls", ".xlsx", ".xlsm"):
+        return False
+    try:
+        File = open(fileName, 'rb')
+    except IOError:
+        return False
+    try:
+        return File.readline().startswith("Linux ")
+    finally:
+        File.close()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def OpenSarFile(fileName, beginTime=None, endTime=None, perCPU=False):
+
+    """Read a sar text file in one pass, and return a SarParser holding its sheets.
+        Raises IOError if the file can't be read, or ValueError if it isn't a sar file.
+        A device map for the system is used if there is one in the same directory as the sar file.
+
+    Description of parameters (self explanatory parameters are not described):
+        beginTime   -   if given (HH:MM:SS), only samples after this time are kept
+        endTime     -   if given (HH:MM:SS), only samples before this time are kept
+        perCPU      -   create a sheet for each CPU, rather than just the aggregated CPU sheet
+    """
+
+    Parser = SarParser(beginTime, endTime, perCPU, os.path.dirname(os.path.abspath(fileName)))
+    File = open(fileName, 'rb')
+    try:
+        for Line in File:
+            Parser.feed(Line)
+    finally:
+        File.close()
+    if Parser.sysstat is None:
+        raise ValueError(fileName + " is empty")
+    return Parser
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,603 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  SarSeries is a Python API to the series in sar files, sar2xls workbooks and SarStores, for analysis
+#               without writing an ini file. LoadSeries returns a Series, an expression that can be added to other
+#               Series, divided by a CellDivisionFactor, resampled and cut down to a period of time:
+#
+#                   import SarSeries
+#                   Files = ["/sar/web01-2026-07-01.sar", "/sar/web01-2026-07-02.sar", ...]
+#                   Busy = SarSeries.LoadSeries(Files, "CPU - all", "% User") + SarSeries.LoadSeries(Files, "CPU - all", "% System")
+#                   Received = (SarSeries.LoadSeries("/sar/fleet.db", "Network - eth0", "KBytes Recv'd/Sec",
+#                                                    "2026-07-01", "2026-09-28") / 1024).resample(3600)
+#                   for (SystemFQDN, Track) in Received.evaluate().items():
+#                       print Track.Name, Track.Times, Track.Values
+#
+#               Nothing is read until a Series is evaluated. Then each source is read once, for just the sheets the
+#               expression needs (from a store, just the series and the period, in one range scan), and the
+#               arithmetic is done on the arrays of each host in one pass: Add() sums straight into one result
+#               array, and divisions of divisions and sums of sums are folded together as the expression is
+#               built. Each host's books are joined in time order, as with Stitch=yes, and the sample times are
+#               seconds since 1970.
+#
+#               Evaluate() evaluates several Series together, from one read of their source, with all of them on
+#               the sample times of the first. GenGraphs builds its charts this way.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Read the books with BookCache.ReadBookSheets
+#           0.3     18-Oct-26   agent   OverviewDetails renamed BookDetails, and built on SarParser.OverviewDetails
+#           0.4     18-Oct-26   agent   SheetSource can read books row for row, for GenGraphs' Align=row charts, and
+#                                       Add() and division use ColumnMath's AddColumns and DivideColumn
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import time
+import datetime
+from collections import namedtuple, OrderedDict
+import numpy
+from ColumnMath import ToArray, HeadRows, AddColumns, DivideColumn
+from SheetCache import SheetCache
+from BookCache import ReadBookSheets
+from SarStore import SarStore, IsStoreFile
+from Stitch import Stitcher, SampleTimes, Epoch
+from Align import AlignTracks
+from SarParser import OverviewDetails
+import Profile
+
+#
+# A host's evaluated series: the sample times (seconds since 1970) and the values, an array for a Series, or a
+# list of arrays (one for each Series) from Evaluate(). FirstDate and LastDate are the dates of its first and
+# last books
+#
+Track = namedtuple("Track", ("Name", "FQDN", "FirstDate", "LastDate", "Times", "Values"))
+
+#-------------------------------------------------------------------------------------------------------------
+def ToSeconds(Value):
+
+    """Returns a time as seconds since 1970, from a number of seconds, a datetime or date, or a "YYYY-MM-DD" or
+    "YYYY-MM-DD HH:MM:SS" string. None stays None. Raises ValueError for anything else
+    """
+
+    if Value is None or isinstance(Value, float):
+        return Value
+    if isinstance(Value, (int, long)):
+        return float(Value)
+    if isinstance(Value, basestring):
+        for Format in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+            try:
+                Value = datetime.datetime.strptime(Value.strip(), Format)
+                break
+            except ValueError:
+                pass
+        else:
+            raise ValueError("\"" + Value + "\" should be a date, YYYY-MM-DD, or a date and time, YYYY-MM-DD HH:MM:SS")
+    if isinstance(Value, datetime.date) and not isinstance(Value, datetime.datetime):
+        Value = datetime.datetime(Value.year, Value.month, Value.day)
+    if isinstance(Value, datetime.datetime):
+        Delta = Value - Epoch
+        return Delta.days * 86400.0 + Delta.seconds + Delta.microseconds / 1e6
+    raise ValueError("Can't use a " + type(Value).__name__ + " as a time")
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Later(First, Second):
+
+    """Returns the later of two start times, either of which may be None (no start)"""
+
+    if First is None or Second is None:
+        return Second if First is None else First
+    return max(First, Second)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Earlier(First, Second):
+
+    """Returns the earlier of two end times, either of which may be None (no end)"""
+
+    if First is None or Second is None:
+        return Second if First is None else First
+    return min(First, Second)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def SamplesAt(SourceTimes, Values, Times):
+
+    """Returns the values of a series at the given sample times, with NaN where it has no sample at that time.
+    Description of parameters (self explanatory parameters are not described):
+        SourceTimes -   the sample times of the series, in time order
+    """
+
+    if len(SourceTimes) == len(Times) and numpy.array_equal(SourceTimes, Times):
+        return Values
+    Aligned = numpy.empty(len(Times))
+    Aligned.fill(numpy.nan)
+    if len(SourceTimes) > 0:
+        Rows = numpy.minimum(numpy.searchsorted(SourceTimes, Times), len(SourceTimes) - 1)
+        Found = SourceTimes[Rows] == Times
+        Aligned[Found] = Values[Rows[Found]]
+    return Aligned
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def InPeriod(Times, Values, Start, End):
+
+    """Returns the samples between Start (inclusive) and End (exclusive), either of which may be None"""
+
+    if Start is None and End is None:
+        return (Times, Values)
+    Keep = numpy.ones(len(Times), dtype=bool)
+    if Start is not None:
+        Keep &= Times >= Start
+    if End is not None:
+        Keep &= Times < End
+    return (Times[Keep], Values[Keep])
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def BookDetails(Cache, SourceFile):
+
+    """Pulls the system short name & FQDN and the sar date out of the Overview sheet of a book. Returns a tuple
+    of (SystemName, SystemFQDN, SarDate). Raises ValueError if the Overview sheet doesn't have them all
+    Description of parameters (self explanatory parameters are not described):
+        Cache       -   the SheetCache holding the book's sheets
+        SourceFile  -   the book name
+    """
+
+    Details = OverviewDetails(Cache.column(SourceFile, "Overview", 1, firstRow=1))
+    if None in Details:
+        raise ValueError("No system name or sar date on the Overview sheet of \"" + SourceFile + "\"")
+    return Details
+#-------------------------------------------------------------------------------------------------------------
+
+class SheetSource(object):
+    """Books whose sheets are already in a SheetCache, as a source of series (GenGraphs reads its books this way).
+
+    Given a lastRow, the books are read row for row rather than on their sample times: each sample's "time" is its
+    row number (0 for row 3), every column is read down to lastRow, and a sheet that a book doesn't have is read as
+    empty. GenGraphs charts a book this way, one book at a time, when it's aligned by row.
+    """
+
+    __slots__ = ("cache", "books", "lastRow")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, cache, books, lastRow=None):
+
+        """Description of parameters (self explanatory parameters are not described):
+            cache       -   the SheetCache holding the books' sheets
+            books       -   list of the book names (as known to the cache)
+            lastRow     -   if given, read the books row for row, down to this row
+        """
+
+        self.cache = cache
+        self.books = list(books)
+        self.lastRow = lastRow
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def key(self):
+
+        """Returns what identifies the source, so Series from the same books can be added together"""
+
+        return ("sheets", id(self.cache), tuple(self.books), self.lastRow)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def read(self, leaves):
+
+        """Returns the samples of the leaves (the source columns) of an expression for each host: an ordered
+        dictionary (in the order the hosts' books are given) of host FQDN -> (short name, first date, last date,
+        dictionary of leaf -> (sample times, values)). Each host's books are joined in time order, rows without a
+        time are dropped, and where books overlap the sample from the earlier book is kept.
+        Description of parameters (self explanatory parameters are not described):
+            leaves      -   list of (sheet, heading, start, end) tuples, with start and end in seconds since 1970,
+                            or None
+        """
+
+        #
+        # Each sheet's columns share its time column, so each sheet is stitched together for all of its leaves
+        #
+        Sheets = OrderedDict()
+        for (SheetName, Heading, Start, End) in leaves:
+            if Heading not in Sheets.setdefault(SheetName, []):
+                Sheets[SheetName].append(Heading)
+        Stitchers = dict((SheetName, Stitcher()) for SheetName in Sheets)
+        Hosts = OrderedDict()
+        for Book in self.books:
+            (SystemName, SystemFQDN, SarDate) = BookDetails(self.cache, Book)
+            Hosts.setdefault(SystemFQDN, [SystemName, []])[1].append(SarDate)
+            for (SheetName, Headings) in Sheets.items():
+                if self.lastRow is not None:
+                    LastRow = self.lastRow
+                    Times = numpy.arange(LastRow - HeadRows, dtype=numpy.float64)
+                elif self.cache.hassheet(Book, SheetName):
+                    TimeColumn = self.cache.column(Book, SheetName, 1)
+                    LastRow = len(TimeColumn) + HeadRows
+                    Times = SampleTimes(SarDate, TimeColumn)
+                else:
+                    continue
+                Series = []
+                for Heading in Headings:
+                    try:
+                        Series.append(self.cache.array(Book, SheetName, Heading, lastRow=LastRow))
+                    except (KeyError, ValueError):
+                        Series.append(ToArray([], LastRow - HeadRows))
+                Stitchers[SheetName].addsamples(SystemName, SystemFQDN, SarDate, Times, Series)
+        Samples = OrderedDict((SystemFQDN, (SystemName, min(Dates), max(Dates), {})) for (SystemFQDN, (SystemName, Dates)) in Hosts.items())
+        for (SheetName, Headings) in Sheets.items():
+            for (SystemFQDN, (SystemName, FirstDate, LastDate, Times, Series)) in Stitchers.pop(SheetName).series().items():
+                for (Heading, Values) in zip(Headings, Series):
+                    for Leaf in leaves:
+                        if Leaf[:2] == (SheetName, Heading):
+                            Samples[SystemFQDN][3][Leaf] = InPeriod(Times, Values, Leaf[2], Leaf[3])
+        return Samples
+#-------------------------------------------------------------------------------------------------------------
+
+class BookSource(object):
+    """Source books (sar files or sar2xls workbooks), read when a Series from them is evaluated"""
+
+    __slots__ = ("files", "beginTime", "endTime", "perCPU", "booksCache")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, files, beginTime=None, endTime=None, perCPU=False, books=None):
+
+        """Description of parameters (self explanatory parameters are not described):
+            beginTime   -   if given (HH:MM:SS), only samples after this time are read from sar files
+            endTime     -   if given (HH:MM:SS), only samples before this time are read from sar files
+            perCPU      -   create a sheet for each CPU when reading sar files
+            books       -   the BookCache to read the books through, or None to read them every time
+        """
+
+        self.files = [files] if isinstance(files, basestring) else list(files)
+        self.beginTime = beginTime
+        self.endTime = endTime
+        self.perCPU = perCPU
+        self.booksCache = books
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def key(self):
+
+        """Returns what identifies the source, so Series from the same books can be added together"""
+
+        return ("books", tuple(os.path.abspath(File) for File in self.files), self.beginTime, self.endTime, self.perCPU)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def read(self, leaves):
+
+        """Read the sheets that the leaves are in from each book, and return their samples as SheetSource.read
+        does. Raises IOError if a book can't be read
+        """
+
+        SheetNames = ["Overview"] + sorted(set(Leaf[0] for Leaf in leaves))
+        Cache = SheetCache()
+        for File in self.files:
+            Start = time.time()
+            try:
+                Sheets = ReadBookSheets(File, SheetNames, self.beginTime, self.endTime, self.perCPU, self.booksCache)
+            except Exception, Error:
+                raise IOError("Can't read " + File + ": " + str(Error))
+            Profile.count("SarSeries.ReadBookSheets", time.time() - Start, Profile.SheetCells(Sheets))
+            for SheetName in SheetNames:
+                Cache.loadcolumns(File, SheetName, Sheets.get(SheetName))
+        return SheetSource(Cache, self.files).read(leaves)
+#-------------------------------------------------------------------------------------------------------------
+
+class StoreSource(object):
+    """A SarStore, as a source of series. Each period of time the leaves are read for is one range scan"""
+
+    __slots__ = ("store", "hostNames", "firstDate", "lastDate", "samples")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, store, hosts=None, firstDate=None, lastDate=None):
+
+        """Description of parameters (self explanatory parameters are not described):
+            store       -   the SarStore, or its file name
+            hosts       -   if given, only these hosts, by short name or FQDN
+            firstDate   -   if given (YYYY-MM-DD), only the hosts with books of this date or later
+            lastDate    -   if given (YYYY-MM-DD), only the hosts with books of this date or earlier
+        """
+
+        self.store = SarStore(store) if isinstance(store, basestring) else store
+        self.hostNames = hosts
+        self.firstDate = firstDate
+        self.lastDate = lastDate
+        #
+        # samples counts the samples read
+        #
+        self.samples = 0
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def key(self):
+
+        """Returns what identifies the source, so Series from the same store can be added together"""
+
+        return ("store", os.path.abspath(self.store.fileName), tuple(self.hostNames or ()), self.firstDate, self.lastDate)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def hosts(self):
+
+        """Returns an ordered dictionary of host FQDN -> (short name, first date, last date) of the hosts"""
+
+        return self.store.hosts(self.hostNames, self.firstDate, self.lastDate)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def read(self, leaves):
+
+        """Read the samples of the leaves from the store, and return them as SheetSource.read does"""
+
+        Hosts = self.hosts()
+        Samples = OrderedDict((SystemFQDN, (SystemName, FirstDate, LastDate, {}))
+                              for (SystemFQDN, (SystemName, FirstDate, LastDate)) in Hosts.items())
+        Periods = OrderedDict()
+        for Leaf in leaves:
+            Periods.setdefault(Leaf[2:], []).append(Leaf)
+        for ((Start, End), PeriodLeaves) in Periods.items():
+            ReadStart = time.time()
+            Data = self.store.read(Hosts.keys(), [Leaf[:2] for Leaf in PeriodLeaves], Start, End)
+            Cells = sum([len(Values) for (Times, Values) in Data.values()])
+            Profile.count("SarStore.read", time.time() - ReadStart, Cells)
+            self.samples += Cells
+            for ((SystemFQDN, SheetName, Heading), Values) in Data.items():
+                Samples[SystemFQDN][3][(SheetName, Heading, Start, End)] = Values
+        return Samples
+#-------------------------------------------------------------------------------------------------------------
+
+class Column(object):
+    """A column of a sheet, the leaf of an expression"""
+
+    __slots__ = ("sheet", "heading", "start", "end")
+
+    def __init__(self, sheet, heading, start=None, end=None):
+        self.sheet = sheet
+        self.heading = heading
+        self.start = start
+        self.end = end
+
+    def leaves(self):
+        return [(self.sheet, self.heading, self.start, self.end)]
+
+    def window(self, start, end):
+        return Column(self.sheet, self.heading, Later(self.start, start), Earlier(self.end, end))
+
+    def evaluate(self, samples):
+        #
+        # Returns (sample times, values, whether the values array is a new one that can be changed in place),
+        # or None if there are no samples
+        #
+        if (self.sheet, self.heading, self.start, self.end) not in samples:
+            return None
+        (Times, Values) = samples[(self.sheet, self.heading, self.start, self.end)]
+        return (Times, Values, False)
+
+class Sum(object):
+    """The total of several expressions, as Add() in the ini file: a missing sample counts as zero, unless it's
+    missing from all of them. The samples are lined up on the sample times of the first expression that has any
+    """
+
+    __slots__ = ("terms",)
+
+    def __init__(self, terms):
+        #
+        # Sums of sums are flattened into one
+        #
+        self.terms = []
+        for Term in terms:
+            self.terms += Term.terms if isinstance(Term, Sum) else [Term]
+
+    def leaves(self):
+        return [Leaf for Term in self.terms for Leaf in Term.leaves()]
+
+    def window(self, start, end):
+        return Sum([Term.window(start, end) for Term in self.terms])
+
+    def evaluate(self, samples):
+        Results = [Result for Result in [Term.evaluate(samples) for Term in self.terms] if Result is not None]
+        if len(Results) == 0:
+            return None
+        Times = Results[0][0]
+        return (Times, AddColumns([SamplesAt(Result[0], Result[1], Times) for Result in Results], len(Times)), True)
+
+class Scaled(object):
+    """An expression divided by a CellDivisionFactor (true division, so 1023 / 1024 is not 0)"""
+
+    __slots__ = ("term", "factor")
+
+    def __init__(self, term, factor):
+        #
+        # Divisions of divisions are folded into one
+        #
+        if isinstance(term, Scaled):
+            (term, factor) = (term.term, term.factor * factor)
+        self.term = term
+        self.factor = float(factor)
+
+    def leaves(self):
+        return self.term.leaves()
+
+    def window(self, start, end):
+        return Scaled(self.term.window(start, end), self.factor)
+
+    def evaluate(self, samples):
+        Result = self.term.evaluate(samples)
+        if Result is None:
+            return None
+        (Times, Values, Fresh) = Result
+        if Fresh:
+            Values /= self.factor
+        else:
+            Values = DivideColumn(Values, self.factor)
+        return (Times, Values, True)
+
+class Resampled(object):
+    """An expression resampled to a regular time every so many seconds, with the mean of the samples in each
+    interval, as Align=resample does
+    """
+
+    __slots__ = ("term", "interval")
+
+    def __init__(self, term, interval):
+        self.term = term
+        self.interval = float(interval)
+
+    def leaves(self):
+        return self.term.leaves()
+
+    def window(self, start, end):
+        return Resampled(self.term.window(start, end), self.interval)
+
+    def evaluate(self, samples):
+        Result = self.term.evaluate(samples)
+        if Result is None:
+            return None
+        (Times, [[Values]]) = AlignTracks([(Result[0], [Result[1]])], "resample", None, self.interval)
+        return (Times, Values, True)
+
+class Series(object):
+    """A lazily evaluated series: an expression over the columns of a source.
+
+    Series can be added together (+), divided by a number (/), resampled (resample()) and cut down to a period of
+    time (between()), each of which returns a new Series without reading anything. evaluate() reads the source and
+    returns the values for each host.
+    """
+
+    __slots__ = ("source", "expression")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, source, expression):
+
+        """Description of parameters (self explanatory parameters are not described):
+            source      -   a BookSource, SheetSource or StoreSource
+            expression  -   a Column, Sum, Scaled or Resampled
+        """
+
+        self.source = source
+        self.expression = expression
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def __add__(self, other):
+        return Add(self, other)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def __div__(self, factor):
+        if factor == 0:
+            raise ZeroDivisionError("A Series can't be divided by zero")
+        if factor == 1:
+            return self
+        return Series(self.source, Scaled(self.expression, factor))
+
+    __truediv__ = __div__
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def resample(self, interval):
+
+        """Returns the Series resampled to a regular time every interval seconds, the mean of the samples in each"""
+
+        if interval <= 0:
+            raise ValueError("The resampling interval must be more than 0 seconds")
+        return Series(self.source, Resampled(self.expression, interval))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def between(self, start=None, end=None):
+
+        """Returns the Series cut down to the samples from start up to (but not including) end, either of which
+        may be None, and which can be given as for LoadSeries. Only that period is read from a store
+        """
+
+        return Series(self.source, self.expression.window(ToSeconds(start), ToSeconds(end)))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def evaluate(self):
+
+        """Read the source and evaluate the Series. Returns an ordered dictionary of host FQDN -> Track, with the
+        values as one array, for each host that has any samples
+        """
+
+        return OrderedDict((SystemFQDN, HostTrack._replace(Values=HostTrack.Values[0]))
+                           for (SystemFQDN, HostTrack) in Evaluate([self]).items())
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Add(*series):
+
+    """Returns the total of several Series from the same source, as Add() in the ini file does. Raises ValueError
+    if they're from different sources
+    """
+
+    if len(series) == 0:
+        raise ValueError("Add needs at least one Series")
+    if len(set(ThisSeries.source.key() for ThisSeries in series)) > 1:
+        raise ValueError("Only Series from the same source can be added together")
+    if len(series) == 1:
+        return series[0]
+    return Series(series[0].source, Sum([ThisSeries.expression for ThisSeries in series]))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def LoadSeries(files, sheet, column, start=None, end=None):
+
+    """Returns a Series of a column of a sheet. Nothing is read until it's evaluated.
+    Description of parameters (self explanatory parameters are not described):
+        files       -   a list of source books (sar files or sar2xls workbooks), the file name of a SarStore, or a
+                        BookSource, SheetSource or StoreSource
+        column      -   the column heading
+        start       -   if given, only samples from this time on: seconds since 1970, a datetime or date, or a
+                        "YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS" string
+        end         -   if given, only samples before this time
+    """
+
+    if isinstance(files, (BookSource, SheetSource, StoreSource)):
+        Source = files
+    elif isinstance(files, SarStore) or (isinstance(files, basestring) and IsStoreFile(files)):
+        Source = StoreSource(files)
+    else:
+        Source = BookSource(files)
+    return Series(Source, Column(sheet, column, ToSeconds(start), ToSeconds(end)))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Evaluate(series):
+
+    """Evaluate several Series from the same source together, with one read of the source. Returns an ordered
+    dictionary of host FQDN -> Track for each host that has samples of the first Series, with the values of every
+    Series (a list of arrays) on the sample times of the first (NaN where a Series has no sample at that time).
+    Raises ValueError if they're from different sources
+    """
+
+    if len(series) == 0:
+        return OrderedDict()
+    if len(set(ThisSeries.source.key() for ThisSeries in series)) > 1:
+        raise ValueError("Only Series from the same source can be evaluated together")
+    Leaves = []
+    for ThisSeries in series:
+        for Leaf in ThisSeries.expression.leaves():
+            if Leaf not in Leaves:
+                Leaves.append(Leaf)
+    Tracks = OrderedDict()
+    for (SystemFQDN, (SystemName, FirstDate, LastDate, Samples)) in series[0].source.read(Leaves).items():
+        Results = [ThisSeries.expression.evaluate(Samples) for ThisSeries in series]
+        if Results[0] is None:
+            continue
+        Times = Results[0][0]
+        Values = [Results[0][1]]
+        for Result in Results[1:]:
+            if Result is None:
+                Values.append(ToArray([], len(Times)))
+            else:
+                Values.append(SamplesAt(Result[0], Result[1], Times))
+        Tracks[SystemFQDN] = Track(SystemName, SystemFQDN, FirstDate, LastDate, Times, Values)
+    return Tracks
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  SarStore keeps the samples of many source books (sar files or sar2xls workbooks, typically one per
+#               host per day) in one local SQLite database, so that a chart over months of books for a fleet of
+#               hosts doesn't have to open every one of them again. IngestBooks.py loads books into a store, and
+#               an ini file with Store= in its [General] section charts straight from it (see ChartPlan.py).
+#
+#               Each column of each sheet of a host is a series, identified by (host FQDN, sheet, heading). The
+#               samples of a series are kept in chunks, one per book, as float arrays: a chunk's sample times
+#               (seconds since 1970, as Stitch works them out) are shared by all of the columns of its sheet, and
+#               its values are stored as a blob. The chunks are indexed by (series, time of the first sample), so
+#               reading a set of series over a period of time is one indexed range scan, and only the chunks in
+#               the period are read:
+#
+#                   Store = SarStore("/sar/fleet.db")
+#                   Hosts = Store.hosts(["web01", "web02"], "2026-07-01", "2026-09-28")
+#                   Data = Store.read(Hosts.keys(), [("CPU - all", "% Utilisation")], Start, End)
+#
+#               A book that's ingested again replaces what was stored from it before, as does another book for
+#               the same host and date.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Added IsStoreFile
+#           0.3     18-Oct-26   agent   Take the host and date from SarParser.OverviewDetails
+#           0.4     18-Oct-26   agent   ingest also returns the other books that it replaced
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import sqlite3
+import datetime
+from collections import OrderedDict
+import numpy
+from ColumnMath import ToArray, HeadRows, NumericColumn
+from Stitch import SampleTimes, Epoch, SecondsPerDay
+from SarParser import OverviewDetails
+
+class StoreError(Exception):
+    """A store can't be opened, or a book can't be ingested into it"""
+    pass
+
+#
+# Bump FormatVersion if the layout of the store changes, so old stores are refused rather than misread
+#
+FormatVersion = 1
+#
+# Samples are stored as little-endian doubles
+#
+SampleType = numpy.dtype("<f8")
+#
+# SQLite can only take so many parameters in one statement
+#
+MaxParameters = 500
+
+Schema = """
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS books (id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime REAL, variant TEXT,
+                                  host TEXT, name TEXT, date TEXT);
+CREATE UNIQUE INDEX IF NOT EXISTS books_day ON books (host, date);
+CREATE TABLE IF NOT EXISTS series (id INTEGER PRIMARY KEY, host TEXT, sheet TEXT, heading TEXT, UNIQUE (host, sheet, heading));
+CREATE TABLE IF NOT EXISTS times (id INTEGER PRIMARY KEY, book INTEGER, data BLOB);
+CREATE INDEX IF NOT EXISTS times_book ON times (book);
+CREATE TABLE IF NOT EXISTS chunks (series INTEGER, first REAL, last REAL, book INTEGER, times INTEGER, data BLOB,
+                                   PRIMARY KEY (series, first, book));
+CREATE INDEX IF NOT EXISTS chunks_book ON chunks (book);
+"""
+
+#-------------------------------------------------------------------------------------------------------------
+def DateSeconds(Date):
+
+    """Returns the start of a YYYY-MM-DD date as seconds since 1970, as the sample times are stored"""
+
+    return float((datetime.datetime.strptime(Date, "%Y-%m-%d") - Epoch).days * SecondsPerDay)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ToBlob(Array):
+
+    """Returns a float array as a blob to store"""
+
+    return buffer(numpy.ascontiguousarray(Array, dtype=SampleType).tostring())
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def FromBlob(Blob):
+
+    """Returns a stored blob as a float array"""
+
+    return numpy.frombuffer(Blob, dtype=SampleType)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Batches(Items):
+
+    """Split a list into lists short enough to be the parameters of one statement"""
+
+    return [Items[Index:Index + MaxParameters] for Index in range(0, len(Items), MaxParameters)]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def IsStoreFile(fileName):
+
+    """Returns True if a file is a SQLite database (so may be a store), rather than a source book"""
+
+    try:
+        with open(fileName, "rb") as File:
+            return File.read(16) == "SQLite format 3\0"
+    except IOError:
+        return False
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def BookSamples(sheets):
+
+    """Returns the samples of a book, ready to store: a tuple of (short host name, host FQDN, sar date, list of
+    (sheet name, sample times, list of (heading, values))). Rows without a time, and columns without a heading or
+    without any numbers, are left out. Raises StoreError if the book has no host or date on its Overview sheet.
+    Description of parameters (self explanatory parameters are not described):
+        sheets      -   ordered dictionary of sheet name -> list of columns (as read by GenGraphs, or None for a
+                        sheet that couldn't be read)
+    """
+
+    (SystemName, FQDN, Date) = OverviewDetails((sheets.get("Overview") or [[]])[0])
+    if not FQDN or not Date:
+        raise StoreError("no system name or date on its Overview sheet")
+    Sheets = []
+    for (SheetName, Columns) in sheets.items():
+        if SheetName == "Overview" or not Columns:
+            continue
+        TimeColumn = Columns[0].cells(HeadRows + 1) if isinstance(Columns[0], NumericColumn) else Columns[0][HeadRows:]
+        Times = SampleTimes(Date, TimeColumn)
+        Valid = ~numpy.isnan(Times)
+        if not Valid.any():
+            continue
+        Series = []
+        Headings = set()
+        for Column in Columns[1:]:
+            if isinstance(Column, NumericColumn):
+                (Heading, Values) = (Column.head[0], ToArray(Column.data, len(Times)))
+            else:
+                (Heading, Values) = (Column[0] if Column else None, ToArray(Column[HeadRows:], len(Times)))
+            if not isinstance(Heading, basestring) or Heading in Headings:
+                continue
+            Values = Values[Valid]
+            if numpy.isnan(Values).all():
+                continue
+            Headings.add(Heading)
+            Series.append((Heading, Values))
+        if Series:
+            Sheets.append((SheetName, Times[Valid], Series))
+    return (SystemName, FQDN, Date, Sheets)
+#-------------------------------------------------------------------------------------------------------------
+
+class SarStore(object):
+    """A SQLite store of the samples of many source books.
+
+    ingest() stores a book's sheets, current() says whether a book has already been stored as it is now.
+    hosts() and headings() say what's in the store, and read() returns the samples of a set of series over a
+    period of time.
+    """
+
+    __slots__ = ("fileName", "connection", "maxSpan", "chunks")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, fileName, create=False):
+
+        """Open a store. Raises StoreError if it can't be opened, or isn't a store.
+        Description of parameters (self explanatory parameters are not described):
+            create      -   create the store if it doesn't exist yet, rather than raising StoreError
+        """
+
+        self.fileName = fileName
+        if not create and not os.path.isfile(fileName):
+            raise StoreError("Can't open store " + fileName + ", are you sure this file exists?")
+        try:
+            self.connection = sqlite3.connect(fileName)
+            self.connection.text_factory = str
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            with self.connection:
+                self.connection.executescript(Schema)
+                Settings = dict(self.connection.execute("SELECT name, value FROM settings"))
+                if "format" not in Settings:
+                    self.connection.execute("INSERT INTO settings VALUES ('format', ?)", (FormatVersion,))
+                elif Settings["format"] != FormatVersion:
+                    raise StoreError("Store " + fileName + " was written by another version of SarStore")
+        except sqlite3.DatabaseError, Error:
+            raise StoreError("Can't open store " + fileName + ": " + str(Error))
+        #
+        # maxSpan is the longest time any chunk covers, so a range scan can start that far before the period
+        # it's reading. chunks counts the chunks read
+        #
+        self.maxSpan = float(Settings.get("maxspan", 0))
+        self.chunks = 0
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def close(self):
+        self.connection.close()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def current(self, fileName, variant=""):
+
+        """Returns True if a book has already been stored as it is now (same size and modification time, read
+        with the same variant)
+        """
+
+        try:
+            Stat = os.stat(fileName)
+        except OSError:
+            return False
+        Row = self.connection.execute("SELECT size, mtime, variant FROM books WHERE path = ?",
+                                      (os.path.abspath(fileName),)).fetchone()
+        return Row == (Stat.st_size, Stat.st_mtime, variant)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _delete(self, Books):
+        for Batch in Batches(Books):
+            Marks = ",".join("?" * len(Batch))
+            for Table in ("chunks", "times"):
+                self.connection.execute("DELETE FROM " + Table + " WHERE book IN (" + Marks + ")", Batch)
+            self.connection.execute("DELETE FROM books WHERE id IN (" + Marks + ")", Batch)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def ingest(self, fileName, samples, variant=""):
+
+        """Store the samples of a book, replacing what was stored from the same book, or from another book for the
+        same host and date, before. Returns a tuple of (the number of samples stored, list of the paths of the other
+        books that were replaced because they're for the same host and date).
+        Description of parameters (self explanatory parameters are not described):
+            samples     -   the book's samples, from BookSamples
+            variant     -   anything else that changes what's read from the book (such as the sar file begin and
+                            end times), as a string
+        """
+
+        (Name, FQDN, Date, Sheets) = samples
+        try:
+            Stat = os.stat(fileName)
+        except OSError:
+            raise StoreError("Can't open " + fileName + ", are you sure this file exists?")
+        Path = os.path.abspath(fileName)
+        Samples = 0
+        MaxSpan = self.maxSpan
+        with self.connection:
+            Replaced = self.connection.execute("SELECT id, path FROM books WHERE path = ? OR (host = ? AND date = ?)",
+                                               (Path, FQDN, Date)).fetchall()
+            self._delete([Id for (Id, OldPath) in Replaced])
+            Book = self.connection.execute("INSERT INTO books (path, size, mtime, variant, host, name, date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                           (Path, Stat.st_size, Stat.st_mtime, variant, FQDN, Name, Date)).lastrowid
+            for (SheetName, Times, Series) in Sheets:
+                TimesId = self.connection.execute("INSERT INTO times (book, data) VALUES (?, ?)", (Book, ToBlob(Times))).lastrowid
+                self.connection.executemany("INSERT OR IGNORE INTO series (host, sheet, heading) VALUES (?, ?, ?)",
+                                            [(FQDN, SheetName, Heading) for (Heading, Values) in Series])
+                SeriesIds = dict(self.connection.execute("SELECT heading, id FROM series WHERE host = ? AND sheet = ?",
+                                                         (FQDN, SheetName)))
+                (First, Last) = (float(Times.min()), float(Times.max()))
+                self.connection.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)",
+                                            [(SeriesIds[Heading], First, Last, Book, TimesId, ToBlob(Values))
+                                             for (Heading, Values) in Series])
+                MaxSpan = max(MaxSpan, Last - First)
+                Samples += len(Times) * len(Series)
+            if MaxSpan > self.maxSpan:
+                self.connection.execute("INSERT OR REPLACE INTO settings VALUES ('maxspan', ?)", (MaxSpan,))
+        self.maxSpan = MaxSpan
+        return (Samples, [OldPath for (Id, OldPath) in Replaced if OldPath != Path])
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def hosts(self, names=None, firstDate=None, lastDate=None):
+
+        """Returns an ordered dictionary (in name order) of host FQDN -> (short name, first date, last date) of the
+        hosts with books in the store, the dates being those of their first and last books.
+        Description of parameters (self explanatory parameters are not described):
+            names       -   if given, only these hosts, by short name or FQDN
+            firstDate   -   if given (YYYY-MM-DD), only books of this date or later
+            lastDate    -   if given (YYYY-MM-DD), only books of this date or earlier
+        """
+
+        Hosts = OrderedDict()
+        for (FQDN, Name, FirstDate, LastDate) in self.connection.execute(
+                "SELECT host, name, MIN(date), MAX(date) FROM books WHERE date >= ? AND date <= ? GROUP BY host ORDER BY name, host",
+                (firstDate or "", lastDate or "9999")):
+            if names is None or Name in names or FQDN in names:
+                Hosts[FQDN] = (Name, FirstDate, LastDate)
+        return Hosts
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def headings(self, hosts):
+
+        """Returns the set of (sheet, heading) of the series that any of the hosts (FQDNs) have"""
+
+        Headings = set()
+        for Batch in Batches(list(hosts)):
+            Headings.update(self.connection.execute("SELECT DISTINCT sheet, heading FROM series WHERE host IN ("
+                                                    + ",".join("?" * len(Batch)) + ")", Batch))
+        return Headings
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def read(self, hosts, sources, start=None, end=None):
+
+        """Returns the samples of a set of series between two times: a dictionary of (host FQDN, sheet, heading) ->
+        (sample times, values), as float arrays in time order, for each of the series that the store has. Where
+        books overlap, the sample from the earliest book is kept.
+        Description of parameters (self explanatory parameters are not described):
+            hosts       -   list of host FQDNs
+            sources     -   list of (sheet, heading) to read for each host
+            start       -   if given, only samples at or after this time (seconds since 1970)
+            end         -   if given, only samples before this time
+        """
+
+        SeriesNames = {}
+        Wanted = set(sources)
+        for Batch in Batches(list(hosts)):
+            for (SeriesId, FQDN, SheetName, Heading) in self.connection.execute(
+                    "SELECT id, host, sheet, heading FROM series WHERE host IN (" + ",".join("?" * len(Batch)) + ")", Batch):
+                if (SheetName, Heading) in Wanted:
+                    SeriesNames[SeriesId] = (FQDN, SheetName, Heading)
+        #
+        # One range scan of the chunks index for all of the series. A chunk that starts before the period can
+        # still have samples in it, but only if it starts less than maxSpan before it
+        #
+        Where = ""
+        Bounds = []
+        if start is not None:
+            Where += " AND first >= ? AND last >= ?"
+            Bounds += [start - self.maxSpan, start]
+        if end is not None:
+            Where += " AND first < ?"
+            Bounds.append(end)
+        Chunks = OrderedDict()
+        TimesIds = set()
+        for Batch in Batches(sorted(SeriesNames)):
+            for (SeriesId, TimesId, Data) in self.connection.execute(
+                    "SELECT series, times, data FROM chunks WHERE series IN (" + ",".join("?" * len(Batch)) + ")" + Where
+                    + " ORDER BY series, first, book", Batch + Bounds):
+                Chunks.setdefault(SeriesId, []).append((TimesId, FromBlob(Data)))
+                TimesIds.add(TimesId)
+                self.chunks += 1
+        TimesData = {}
+        for Batch in Batches(sorted(TimesIds)):
+            for (TimesId, Data) in self.connection.execute("SELECT id, data FROM times WHERE id IN (" + ",".join("?" * len(Batch)) + ")",
+                                                           Batch):
+                TimesData[TimesId] = FromBlob(Data)
+        Samples = {}
+        for (SeriesId, SeriesChunks) in Chunks.items():
+            Times = numpy.concatenate([TimesData[TimesId] for (TimesId, Values) in SeriesChunks])
+            Values = numpy.concatenate([Values for (TimesId, Values) in SeriesChunks])
+            #
+            # The chunks are in time order, but may overlap, so a stable sort keeps the first of any duplicate
+            # samples, as Stitch does
+            #
+            Order = numpy.argsort(Times, kind="mergesort")
+            Times = Times[Order]
+            Keep = numpy.concatenate(([True], numpy.diff(Times) > 0))
+            if start is not None:
+                Keep &= Times >= start
+            if end is not None:
+                Keep &= Times < end
+            Samples[SeriesNames[SeriesId]] = (Times[Keep], Values[Order][Keep])
+        return Samples
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def report(self):
+
+        """Returns a one line summary of what's in the store"""
+
+        (Books, Hosts, FirstDate, LastDate) = self.connection.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT host), MIN(date), MAX(date) FROM books").fetchone()
+        Series = self.connection.execute("SELECT COUNT(*) FROM series").fetchone()[0]
+        return "Store " + self.fileName + ": " + str(Books) + " books of " + str(Hosts) + " hosts (" + str(FirstDate) \
+            + " to " + str(LastDate) + "), " + str(Series) + " series"
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+#
+#--------------------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  ScanThresholds checks a set of sar files (or sar2xls workbooks) against a thresholds file, the same
+#               thresholds.txt that sar2xls -t uses, and writes a ranked report of the breaches: each run of
+#               consecutive samples over an Amber or Red threshold, worst first, as a CSV file. See Thresholds.py
+#               for how the thresholds are applied.
+#
+#               The books are read in a pool of processes (-j), through the same book cache as GenGraphs, so a
+#               fleet that has already been charted (or scanned) isn't parsed again.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Read the books with BookCache.ReadBookSheets
+#
+#--------------------------------------------------------------------------------------------------------------------------
+
+Version = (0.2)
+
+from BookCache import BookCache, ReadBookSheets, DefaultCacheDirectory, DefaultCacheSize
+from SarParser import IsSarFile, TimeInSeconds
+from Thresholds import ReadThresholds, ThresholdColumns, ScanBooks, WriteReport, RED, AMBER
+from optparse import OptionParser
+import os, sys, time
+import multiprocessing
+
+#-------------------------------------------------------------------------------
+# Function:     ReadBook
+# Description:  Reads a source book and keeps just the columns that have thresholds.
+#               Runs in a pool worker
+# Arguments:    A tuple of (FileName, Options, Thresholds)
+# Returns:      A tuple of (FileName, BookColumns), with BookColumns None if the book
+#               couldn't be read
+#-------------------------------------------------------------------------------
+def ReadBook(Arguments):
+    (FileName, Options, Thresholds) = Arguments
+    if Options.NoCache:
+        Books = None
+    else:
+        Books = BookCache(Options.CacheDirectory, Options.CacheSize * 1024 * 1024, Options.RebuildCache)
+    try:
+        Sheets = ReadBookSheets(FileName, None, Options.BeginTime, Options.EndTime, Options.PerCPU, Books)
+    except Exception:
+        return (FileName, None)
+    return (FileName, ThresholdColumns(FileName, Sheets, Thresholds))
+
+#-------------------------------------------------------------------------------
+# Function:     main
+# Description:  Parses the command line, scans the books and writes the report
+#-------------------------------------------------------------------------------
+def main():
+    usage = "usage: %prog [-t thresholds_file] [-o report_file] [-D directory] [-a | file ...] [-j jobs]"
+    usage += " [-b begin_time -e end_time] [-m] [--no-cache | --rebuild-cache] [--cache-dir directory] [--cache-size MB] [--top breaches]"
+
+    parser = OptionParser(usage=usage)
+    parser.add_option("-V", "--version", action="store_true", dest="Version", default=False,
+                        help="prints the version")
+    parser.add_option("-t", "--thresholds", dest="ThresholdsFile", default="thresholds.txt",
+                        help="the thresholds file (default thresholds.txt, in the -D directory)")
+    parser.add_option("-o", "--output", dest="ReportFile", default="breaches.csv",
+                        help="the CSV file to write the report to (default breaches.csv, in the -D directory)")
+    parser.add_option("-a", "--allfiles", action="store_true", dest="AllFiles", default=False,
+                        help="scan all the sar files and workbooks in the directory")
+    parser.add_option("-D", "--directory", dest="Directory",
+                        help="Specifies a directory to use for input and output")
+    parser.add_option("-j", "--jobs", type="int", dest="Jobs", default=multiprocessing.cpu_count(),
+                        help="number of books to read at once (default one per CPU)")
+    parser.add_option("-b", "--begin", dest="BeginTime",
+                        help="only use samples after this time (HH:MM:SS) from sar files")
+    parser.add_option("-e", "--end", dest="EndTime",
+                        help="only use samples before this time (HH:MM:SS) from sar files")
+    parser.add_option("-m", "--multicpu", action="store_true", dest="PerCPU", default=False,
+                        help="create a sheet for each CPU when reading sar files")
+    parser.add_option("--no-cache", action="store_true", dest="NoCache", default=False,
+                        help="don't load source books from, or save them to, the book cache")
+    parser.add_option("--rebuild-cache", action="store_true", dest="RebuildCache", default=False,
+                        help="re-read every source book and replace its entry in the book cache")
+    parser.add_option("--cache-dir", dest="CacheDirectory", default=DefaultCacheDirectory,
+                        help="directory to keep the book cache in (default " + DefaultCacheDirectory + ")")
+    parser.add_option("--cache-size", type="int", dest="CacheSize", default=DefaultCacheSize,
+                        help="maximum size of the book cache in MB (default " + str(DefaultCacheSize) + ")")
+    parser.add_option("--top", type="int", dest="Top", default=20,
+                        help="number of the worst breaches to list (default 20)")
+
+    (options, args) = parser.parse_args()
+
+    if options.Version:
+        print "ScanThresholds.py version: " + str(Version)
+        sys.exit()
+
+    if options.AllFiles and args:
+        parser.error("option -a and a list of files are mutually exclusive")
+
+    if options.Jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    if options.NoCache and options.RebuildCache:
+        parser.error("options --no-cache and --rebuild-cache are mutually exclusive")
+
+    if options.CacheSize < 1:
+        parser.error("--cache-size must be at least 1")
+
+    if (options.BeginTime and not options.EndTime) or (options.EndTime and not options.BeginTime):
+        parser.error("options -b and -e must be used together")
+
+    for Time in (options.BeginTime, options.EndTime):
+        if Time:
+            try:
+                TimeInSeconds(Time)
+            except ValueError, Error:
+                parser.error(str(Error))
+
+    if options.Directory:
+        Directory = options.Directory
+    else:
+        Directory = "."
+    #
+    # Now assemble the list of books to scan
+    #
+    if options.AllFiles:
+        FileList = []
+        for File in sorted(os.listdir(Directory)):
+            FileName = os.path.join(Directory, File)
+            if os.path.isfile(FileName) and (os.path.splitext(File)[1].lower() in (".xls", ".xlsx") or IsSarFile(FileName)):
+                FileList.append(FileName)
+    elif args:
+        FileList = [os.path.join(Directory, File) for File in args]
+    else:
+        parser.error("must specify either -a or the files to scan")
+
+    try:
+        Thresholds = ReadThresholds(os.path.join(Directory, options.ThresholdsFile))
+    except IOError:
+        print "Can't open threshold file: " + os.path.join(Directory, options.ThresholdsFile)
+        sys.exit(1)
+    except ValueError, Error:
+        print Error
+        sys.exit(1)
+    #
+    # Read the books in a pool of worker processes, keeping just the columns with thresholds, then scan
+    # each sheet across all of the books at once
+    #
+    Start = time.time()
+    Arguments = [(FileName, options, Thresholds) for FileName in FileList]
+    if options.Jobs > 1 and len(FileList) > 1:
+        WorkerPool = multiprocessing.Pool(processes=min(options.Jobs, len(FileList)))
+        try:
+            Results = WorkerPool.map(ReadBook, Arguments, chunksize=max(1, len(FileList) // (options.Jobs * 4)))
+        finally:
+            WorkerPool.close()
+            WorkerPool.join()
+    else:
+        Results = [ReadBook(Argument) for Argument in Arguments]
+    Books = []
+    for (FileName, Book) in Results:
+        if Book is None:
+            print "Can't read " + FileName + ", are you sure this file exists?"
+        else:
+            Books.append(Book)
+    if not options.NoCache:
+        BookCache(options.CacheDirectory, options.CacheSize * 1024 * 1024).evict()
+    ReadTime = time.time() - Start
+    Breaches = ScanBooks(Books, Thresholds)
+    ReportFile = os.path.join(Directory, options.ReportFile)
+    WriteReport(ReportFile, Breaches)
+    print "Scanned " + str(len(Books)) + " books in " + "%.2f" % (time.time() - Start) + "s (" + "%.2f" % ReadTime \
+        + "s reading them): " + str(len([ThisBreach for ThisBreach in Breaches if ThisBreach.Level == RED])) + " Red and " \
+        + str(len([ThisBreach for ThisBreach in Breaches if ThisBreach.Level == AMBER])) + " Amber breaches"
+    for ThisBreach in Breaches[:options.Top]:
+        print "    %-5s %-20s %-10s %-22s %-32s %8s - %-8s %5d samples, peak %s" % (ThisBreach.Level, ThisBreach.Host, ThisBreach.Date,
+                                                                                 ThisBreach.Sheet, ThisBreach.Heading, ThisBreach.Start,
+                                                                                 ThisBreach.End, ThisBreach.Samples, "%g" % ThisBreach.Peak)
+    print "Report written to " + ReportFile
+    if len(Books) < len(FileList):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
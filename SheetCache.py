@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  SheetCache holds the sheets of a set of source books for GenGraphs. Each sheet is read once
+#               (by BookCache.ReadBookSheets) and loaded into the cache in columnar form, keyed by (book,
+#               sheet). All of the header and column lookups for that sheet are answered from memory.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Added loadsheet and getcell, so books can be read elsewhere and closed
+#           0.3     18-Oct-26   agent   Added UsedRangeToColumns and loadcolumns, for sheets loaded from the BookCache
+#           0.4     18-Oct-26   agent   Index the headings of each sheet, so columnnumber is a dictionary lookup
+#           0.5     18-Oct-26   agent   Hold numeric columns as NumericColumn float arrays, and added array
+#           0.6     18-Oct-26   agent   Added summary, the SummaryStats of every column of a sheet
+#           0.7     18-Oct-26   agent   Removed addbook and loadsheet; sheets are only loaded with loadcolumns
+#
+#-------------------------------------------------------------------------------------------------------------
+
+from ColumnMath import NumericColumn, PackColumn, ToArray, HeadRows
+from SummaryStats import SummarizeColumns
+
+#
+# sar2xls writes the column headings in row 1, leaves row 2 empty, and starts the data in row 3
+#
+FirstDataRow = 3
+
+#-------------------------------------------------------------------------------------------------------------
+def UsedRangeToColumns(UsedRange):
+
+    """Turn a used range (tuple of row tuples, as returned by getusedrange) into a list of columns,
+    with the empty cells trimmed from the bottom of each column. Numeric columns are packed into
+    NumericColumn arrays
+    """
+
+    Columns = [list(Column) for Column in zip(*UsedRange)]
+    for Column in Columns:
+        while len(Column) > 0 and Column[-1] is None:
+            Column.pop()
+    return [PackColumn(Column) for Column in Columns]
+#-------------------------------------------------------------------------------------------------------------
+
+class SheetCache(object):
+    """Cache of the sheets read from a set of source workbooks.
+
+    Sheets that have already been read are handed to the cache with loadcolumns(), and looked up from it.
+    hits counts the lookups answered from memory, and misses the sheets loaded.
+    """
+
+    __slots__ = ("sheets", "hits", "misses")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self):
+        #
+        # sheets is a dictionary of (book name, sheet name) -> {"Headers": [...], "Columns": [[...], ...],
+        # "Index": {heading: column number, ...}}, or None if the sheet couldn't be read
+        #
+        self.sheets = {}
+        self.hits = 0
+        self.misses = 0
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _sheet(self, book, sheet):
+        Key = (book, sheet)
+        if self.sheets.get(Key) is None:
+            raise KeyError("Could not read sheet \"" + sheet + "\" from \"" + book + "\"")
+        self.hits += 1
+        return self.sheets[Key]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _storecolumns(self, Key, Columns):
+        if Columns is None:
+            self.sheets[Key] = None
+        else:
+            Headers = []
+            for Column in Columns:
+                if isinstance(Column, NumericColumn):
+                    Headers.append(Column.head[0])
+                else:
+                    Headers.append(Column[0] if len(Column) > 0 else None)
+            #
+            # If a heading is repeated, the first (leftmost) column with it is the one that's used
+            #
+            Index = {}
+            for (ColumnNumber, Header) in enumerate(Headers):
+                if Header is not None and Header not in Index:
+                    Index[Header] = ColumnNumber + 1
+            self.sheets[Key] = {"Headers": Headers, "Columns": Columns, "Index": Index}
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def loadcolumns(self, book, sheet, columns):
+
+        """Put a sheet that has already been read into the cache, as a list of columns.
+        Description of parameters (self explanatory parameters are not described):
+            columns     -   list of columns (lists of cell values from row 1, as returned by UsedRangeToColumns),
+                            or None if the sheet couldn't be read
+        """
+
+        self.misses += 1
+        self._storecolumns((book, sheet), columns)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def hassheet(self, book, sheet):
+
+        """Returns True if the sheet exists (and can be read) in the book"""
+
+        try:
+            self._sheet(book, sheet)
+        except KeyError:
+            return False
+        return True
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def headers(self, book, sheet):
+
+        """Returns the list of column headings (row 1) of a sheet. Raises KeyError if the sheet can't be read"""
+
+        return self._sheet(book, sheet)["Headers"]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def columnnumber(self, book, sheet, heading):
+
+        """Returns the column number (A = 1) of a heading in a sheet. Raises ValueError if the heading isn't there"""
+
+        Index = self._sheet(book, sheet)["Index"]
+        if heading not in Index:
+            raise ValueError("No heading \"" + heading + "\" in sheet \"" + sheet + "\"")
+        return Index[heading]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def column(self, book, sheet, heading, firstRow=FirstDataRow, lastRow=None):
+
+        """Returns a list of the cell values in a column, from firstRow to lastRow (or the last used cell).
+        Description of parameters (self explanatory parameters are not described):
+            heading     -   column heading (string) or column number (integer, A = 1)
+        """
+
+        Column = self._column(book, sheet, heading)
+        if isinstance(Column, NumericColumn):
+            Values = Column.cells(firstRow, lastRow)
+        else:
+            Values = Column[firstRow - 1:lastRow]
+        if lastRow is None:
+            return Values
+        return Values + [None] * (lastRow - firstRow + 1 - len(Values))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _column(self, book, sheet, heading):
+        if isinstance(heading, (int, long)):
+            return self._sheet(book, sheet)["Columns"][heading - 1]
+        return self._sheet(book, sheet)["Columns"][self.columnnumber(book, sheet, heading) - 1]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def array(self, book, sheet, heading, firstRow=FirstDataRow, lastRow=None):
+
+        """Returns the cells of a column, from firstRow to lastRow (or the last used cell), as a float array
+        with NaN for the empty or non-numeric cells. Numeric columns are returned without being copied, so
+        the array mustn't be changed.
+        Description of parameters (self explanatory parameters are not described):
+            heading     -   column heading (string) or column number (integer, A = 1)
+        """
+
+        Column = self._column(book, sheet, heading)
+        if isinstance(Column, NumericColumn) and firstRow > HeadRows:
+            Data = Column.data[firstRow - 1 - HeadRows:None if lastRow is None else lastRow - HeadRows]
+        else:
+            Data = ToArray(self.column(book, sheet, heading, firstRow, lastRow))
+        if lastRow is None:
+            return Data
+        return ToArray(Data, lastRow - firstRow + 1)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def summary(self, book, sheet):
+
+        """Returns a list of SummaryStats.ColumnSummary (count, min, max, mean, standard deviation, percentiles
+        and time of peak), one for each data column of a sheet, worked out from the cached columns in one pass
+        """
+
+        return SummarizeColumns(self._sheet(book, sheet)["Columns"])
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def getcell(self, book, sheet, row, col):
+
+        """Returns the value of one cell (row and col are numbers, A1 = (1, 1)), or None if it's empty"""
+
+        Columns = self._sheet(book, sheet)["Columns"]
+        if col > len(Columns) or row > len(Columns[col - 1]):
+            return None
+        if isinstance(Columns[col - 1], NumericColumn):
+            return Columns[col - 1].cells(row, row)[0]
+        return Columns[col - 1][row - 1]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def lastrow(self, book, sheet, heading=1):
+
+        """Returns the row number of the last used cell in a column (by default column A)"""
+
+        return len(self._column(book, sheet, heading))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def report(self):
+
+        """Returns a one line summary of the cache hit/miss counts"""
+
+        return "Sheet cache: " + str(self.hits) + " hits, " + str(self.misses) + " misses (" \
+            + str(len(self.sheets)) + " sheets read)"
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Stitch joins the daily books of a host into one continuous series for each chart, rather than
+#               laying each book out as another set of side-by-side columns. Each sample is given a real date
+#               and time, from the "Statistics for" date on the book's Overview sheet plus the Time column, so
+#               the books can be given in any order, and a day that's in two books is only charted once.
+#
+#               Books are added one at a time as they're read. Only the columns being charted are kept from
+#               each book (as float arrays), so the books themselves can be closed and dropped straight away.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Added TimesOfDay and ToTimesOfDay, for aligning books that aren't stitched
+#           0.3     18-Oct-26   agent   Added Stitcher.addsamples, for books whose sample times have already been worked out
+#           0.4     18-Oct-26   agent   Removed TimesOfDay and Stitcher.add, which nothing uses any more
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import datetime
+from collections import OrderedDict
+import numpy
+from ColumnMath import IsNumber
+from SarParser import TimeInSeconds
+
+Epoch = datetime.datetime(1970, 1, 1)
+SecondsPerDay = 86400
+
+#-------------------------------------------------------------------------------------------------------------
+def SampleTimes(SarDate, Times):
+
+    """Returns a float array of the sample times as seconds since 1970, with NaN for cells that aren't times.
+    sar starts the day again after midnight, so each time a sample is earlier in the day than the one before
+    it, it's taken to be on the next day.
+    Description of parameters (self explanatory parameters are not described):
+        SarDate     -   the "Statistics for" date, as YYYY-MM-DD
+        Times       -   list of Time column cells, "HH:MM:SS" strings (or Excel times of day, as fractions)
+    """
+
+    Day = (datetime.datetime.strptime(SarDate, "%Y-%m-%d") - Epoch).days * SecondsPerDay
+    Seconds = numpy.empty(len(Times))
+    for (Row, Time) in enumerate(Times):
+        if isinstance(Time, basestring):
+            try:
+                Seconds[Row] = TimeInSeconds(Time.strip())
+            except ValueError:
+                Seconds[Row] = numpy.nan
+        elif IsNumber(Time) and 0 <= Time < 1:
+            Seconds[Row] = round(Time * SecondsPerDay)
+        else:
+            Seconds[Row] = numpy.nan
+    Valid = ~numpy.isnan(Seconds)
+    TimesOfDay = Seconds[Valid]
+    Days = numpy.concatenate(([0], numpy.cumsum(numpy.diff(TimesOfDay) < 0)))
+    Seconds[Valid] = Day + Days * SecondsPerDay + TimesOfDay
+    return Seconds
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ToDateTimes(Seconds):
+
+    """Convert an array of seconds since 1970 into a list of datetimes"""
+
+    return [Epoch + datetime.timedelta(seconds=Second) for Second in Seconds.tolist()]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ToTimesOfDay(Seconds):
+
+    """Convert an array of seconds since midnight into a list of HH:MM:SS times, as sar2xls writes them"""
+
+    return ["%02d:%02d:%02d" % ((Second // 3600) % 24, (Second // 60) % 60, Second % 60)
+            for Second in numpy.round(Seconds).astype(numpy.int64).tolist()]
+#-------------------------------------------------------------------------------------------------------------
+
+class Stitcher(object):
+    """Joins the books of each host into one continuous set of series, for one chart.
+
+    addsamples() is called for each book as it's read, with the book's sample times (from SampleTimes) and
+    series. series() returns each host's series stitched together in time order.
+    """
+
+    __slots__ = ("hosts",)
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self):
+        #
+        # hosts is an ordered dictionary (in the order the hosts were first seen) of system FQDN ->
+        # {"Name": short name, "Dates": [sar dates], "Segments": [(sample times, [series arrays]), ...]}
+        #
+        self.hosts = OrderedDict()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def addsamples(self, systemName, systemFQDN, sarDate, sampleTimes, series):
+
+        """Add a book's data for this chart, with its sample times already worked out by SampleTimes.
+        Description of parameters (self explanatory parameters are not described):
+            sampleTimes -   float array of the sample times, as seconds since 1970 (NaN for rows without a time)
+            series      -   list of float arrays, one for each series of the chart, the same length as sampleTimes
+        """
+
+        Host = self.hosts.setdefault(systemFQDN, {"Name": systemName, "Dates": [], "Segments": []})
+        Host["Dates"].append(sarDate)
+        Host["Segments"].append((sampleTimes, series))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def series(self):
+
+        """Returns an ordered dictionary of system FQDN -> (short name, first date, last date, sample times,
+        [series arrays]) with each host's books joined in time order. The sample times are seconds since 1970.
+        Rows without a time are dropped, and where books overlap, the sample from the book added first is kept
+        """
+
+        Stitched = OrderedDict()
+        for (FQDN, Host) in self.hosts.items():
+            Times = numpy.concatenate([Segment[0] for Segment in Host["Segments"]])
+            Series = [numpy.concatenate([Segment[1][Index] for Segment in Host["Segments"]])
+                      for Index in range(len(Host["Segments"][0][1]))]
+            #
+            # A stable sort keeps the books in the order they were added where their times are the same,
+            # so the first of any duplicate samples is the one kept
+            #
+            Order = numpy.argsort(Times, kind="mergesort")
+            Order = Order[~numpy.isnan(Times[Order])]
+            Times = Times[Order]
+            Keep = numpy.concatenate(([True], numpy.diff(Times) > 0)) if len(Times) > 0 else numpy.zeros(0, dtype=bool)
+            Stitched[FQDN] = (Host["Name"], min(Host["Dates"]), max(Host["Dates"]), Times[Keep],
+                              [Values[Order][Keep] for Values in Series])
+        return Stitched
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  StreamWorkbook writes a GenGraphs chart workbook straight to a .xlsx file with XlsxWriter in its
+#               constant memory mode. Each chart data sheet is written out row by row as it's added, and each
+#               chart goes on a "Chart - <SheetTitle>" chart sheet of its own, so only the chart being added is
+#               ever in memory, however many charts, books and series there are.
+#
+#               The charts match the ones GenGraphs asks Excel for: a 2D line chart with no markers, plotted by
+#               columns, with the first column as the category (Time) labels, the first row as the series names,
+#               a legend, and chart and axis titles.
+#
+#               The sheets are written in chart order, each chart sheet followed by its data sheet, so there's
+#               no need to insert sheets before one another or to delete a starting "Sheet1".
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Line charts join their points across empty cells
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import datetime
+
+#
+# The number format for dates and times in the time column, as in UseWorkbook
+#
+DateFormat = "yyyy-mm-dd hh:mm:ss"
+
+#-------------------------------------------------------------------------------------------------------------
+def Available():
+
+    """Returns True if XlsxWriter can be imported, so workbooks can be streamed"""
+
+    try:
+        import xlsxwriter
+    except ImportError:
+        return False
+    return True
+#-------------------------------------------------------------------------------------------------------------
+
+class StreamWorkbook(object):
+    """Streaming .xlsx chart workbook writer.
+
+    addchart() writes a chart data sheet and its chart sheet, addsheet() writes a sheet of data on its own,
+    and close() finishes the file. Nothing can be changed once it's been added.
+    """
+
+    __slots__ = ("filename", "book", "headingFormat", "dateFormat")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, fileName):
+        import xlsxwriter
+        self.filename = fileName
+        self.book = xlsxwriter.Workbook(fileName, {"constant_memory": True})
+        #
+        # The series headings are Bold, Arial, 10 pt, as GenGraphs sets them with setrangefont
+        #
+        self.headingFormat = self.book.add_format({"bold": True, "font_name": "Arial", "font_size": 10})
+        self.dateFormat = self.book.add_format({"num_format": DateFormat})
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def addsheet(self, sheet, columns):
+
+        """Write a sheet of data, one row at a time.
+        Description of parameters (self explanatory parameters are not described):
+            columns     -   list of columns, each a list of cell values from row 1, with the time column first.
+                            The headings (row 1) of all but the first column are made bold
+        Returns the number of rows written
+        """
+
+        Worksheet = self.book.add_worksheet(sheet)
+        Rows = max([len(Column) for Column in columns] + [0])
+        for Row in xrange(Rows):
+            for (Col, Column) in enumerate(columns):
+                if Row >= len(Column) or Column[Row] is None:
+                    continue
+                Value = Column[Row]
+                if Row == 0 and Col > 0:
+                    Worksheet.write(Row, Col, Value, self.headingFormat)
+                elif isinstance(Value, (datetime.datetime, datetime.date, datetime.time)):
+                    Worksheet.write_datetime(Row, Col, Value, self.dateFormat)
+                else:
+                    Worksheet.write(Row, Col, Value)
+        return Rows
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def addchart(self, sheet, columns, lastRow, title, valueTitle, categoryTitle="Time"):
+
+        """Add a "Chart - <sheet>" chart sheet with a line chart of a chart data sheet, and write the data sheet.
+        Description of parameters (self explanatory parameters are not described):
+            sheet       -   name of the chart data sheet
+            columns     -   list of columns, each a list of cell values from row 1 (heading, empty row 2, then
+                            data), with the time column first
+            lastRow     -   the last row of the data sheet to plot
+        """
+
+        Chartsheet = self.book.add_chartsheet("Chart - " + sheet)
+        self.addsheet(sheet, columns)
+        LineChart = self.book.add_chart({"type": "line"})
+        #
+        # Row 1 has the series names and column A the category labels. Like the Excel chart, the values and
+        # labels start in row 2 (which sar2xls leaves empty)
+        #
+        for Col in range(1, len(columns)):
+            LineChart.add_series({"name": [sheet, 0, Col],
+                                  "categories": [sheet, 1, 0, lastRow - 1, 0],
+                                  "values": [sheet, 1, Col, lastRow - 1, Col],
+                                  "line": {"width": 1},
+                                  "marker": {"type": "none"},
+                                  "smooth": False})
+        LineChart.set_title({"name": title})
+        LineChart.set_x_axis({"name": categoryTitle})
+        LineChart.set_y_axis({"name": valueTitle})
+        LineChart.set_legend({"position": "right"})
+        #
+        # Books lined up on their sample times leave each series empty on the other books' rows
+        #
+        LineChart.show_blanks_as("span")
+        Chartsheet.set_chart(LineChart)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def close(self):
+
+        """Finish writing the workbook"""
+
+        self.book.close()
+#-------------------------------------------------------------------------------------------------------------
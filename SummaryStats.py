@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  SummaryStats works out summary statistics for the columns of a sheet laid out the sar2xls way
+#               (heading in row 1, row 2 empty, data from row 3, time column first): the count of samples,
+#               min, max, mean, standard deviation, the 50th, 90th, 95th and 99th percentiles, and the time
+#               of the peak. Rather than asking Excel for one worksheet function at a time (excelfunction),
+#               the columns are stacked into one NumPy array and every statistic is worked out for all of
+#               them at once.
+#
+#               The standard deviation is the sample standard deviation, and the percentiles are interpolated
+#               between the closest ranks, as Excel's STDEV and PERCENTILE do. Empty cells aren't counted.
+#
+#               GenGraphs writes the statistics of a chart's series to a "Summary - " sheet if the chart's
+#               [ChartnOptions] section has Summary=yes. From Python:
+#
+#                   for Summary in Cache.summary(SourceFile, "CPU - all"):      (Cache is a SheetCache)
+#                       print Summary.Heading, Summary.Mean, Summary.P95, Summary.PeakTime
+#
+#               or SummarizeColumns() for any list of columns.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+from collections import namedtuple
+import numpy
+from ColumnMath import ToArray, HeadRows, NumericColumn
+
+#
+# The percentiles worked out for each column
+#
+Percentiles = (50, 90, 95, 99)
+#
+# The statistics of one column. Statistics that can't be worked out (the column has no samples, or only one
+# for StdDev) are None
+#
+ColumnSummary = namedtuple("ColumnSummary", ("Heading", "Count", "Min", "Max", "Mean", "StdDev",
+                                             "P50", "P90", "P95", "P99", "PeakTime"))
+#
+# The headings of the Summary sheet, one per ColumnSummary field
+#
+SummaryHeadings = ("Series", "Count", "Min", "Max", "Mean", "Std Dev",
+                   "50th Percentile", "90th Percentile", "95th Percentile", "99th Percentile", "Time of Peak")
+
+#-------------------------------------------------------------------------------------------------------------
+def SummarizeArray(Data):
+
+    """Work out the statistics of each column of a 2-D float array (one column per series, NaN for an empty cell)
+    in one pass. Returns a dictionary of statistic name -> array with a value per column (NaN where it can't be
+    worked out), with "PeakRow" the row of the maximum of each column (-1 for an empty column)
+    """
+
+    (Rows, Series) = Data.shape
+    Valid = ~numpy.isnan(Data)
+    Count = Valid.sum(axis=0)
+    Empty = Count == 0
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        Mean = numpy.where(Valid, Data, 0.0).sum(axis=0) / Count
+        Deviation = numpy.where(Valid, Data - Mean, 0.0)
+        StdDev = numpy.sqrt((Deviation * Deviation).sum(axis=0) / (Count - 1))
+    StdDev[Count < 2] = numpy.nan
+    Min = numpy.where(Valid, Data, numpy.inf).min(axis=0) if Rows else numpy.zeros(Series)
+    Max = numpy.where(Valid, Data, -numpy.inf).max(axis=0) if Rows else numpy.zeros(Series)
+    PeakRow = numpy.where(Valid, Data, -numpy.inf).argmax(axis=0) if Rows else numpy.zeros(Series, dtype=numpy.int64)
+    for Statistic in (Mean, Min, Max):
+        Statistic[Empty] = numpy.nan
+    PeakRow[Empty] = -1
+    Results = {"Count": Count, "Mean": Mean, "StdDev": StdDev, "Min": Min, "Max": Max, "PeakRow": PeakRow}
+    #
+    # One sort of all of the columns gives every percentile. The empty cells (NaN) sort to the bottom, so the
+    # samples of each column are its first Count rows, and the percentile lies between two of them
+    #
+    Sorted = numpy.sort(Data, axis=0)
+    Last = numpy.maximum(Count - 1, 0)
+    Columns = numpy.arange(Series)
+    for Percentile in Percentiles:
+        Rank = Last * (Percentile / 100.0)
+        Lower = numpy.floor(Rank).astype(numpy.int64)
+        Upper = numpy.minimum(Lower + 1, Last)
+        if Rows:
+            Values = Sorted[Lower, Columns] + (Rank - Lower) * (Sorted[Upper, Columns] - Sorted[Lower, Columns])
+        else:
+            Values = numpy.zeros(Series)
+        Values[Empty] = numpy.nan
+        Results["P" + str(Percentile)] = Values
+    return Results
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ColumnHeading(Column):
+
+    """Returns the heading (row 1) of a column (a list of cell values or a NumericColumn), None if it has none"""
+
+    if isinstance(Column, NumericColumn):
+        return Column.head[0]
+    return Column[0] if len(Column) > 0 else None
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Value(Number):
+
+    """Returns a statistic as a cell value, None if it's NaN"""
+
+    if numpy.isnan(Number):
+        return None
+    return float(Number)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def SummarizeColumns(Columns):
+
+    """Returns a list of ColumnSummary, one for each data column of a sheet.
+    Description of parameters (self explanatory parameters are not described):
+        Columns     -   list of columns, each a list of cell values (or a NumericColumn) from row 1 (heading,
+                        empty row 2, then data). The first column is the time column, which gives the time of
+                        each peak. Columns without a heading (a placeholder for a book without the sheet) are
+                        left out
+    """
+
+    Series = [Column for Column in Columns[1:] if ColumnHeading(Column) is not None]
+    if len(Series) == 0:
+        return []
+    Rows = max([len(Column) for Column in Columns] + [HeadRows]) - HeadRows
+    Data = numpy.column_stack([ToArray(Column.data if isinstance(Column, NumericColumn) else Column[HeadRows:], Rows)
+                               for Column in Series])
+    Results = SummarizeArray(Data)
+    if isinstance(Columns[0], NumericColumn):
+        Times = Columns[0].cells(HeadRows + 1)
+    else:
+        Times = Columns[0][HeadRows:]
+    Summaries = []
+    for (Index, Column) in enumerate(Series):
+        PeakRow = int(Results["PeakRow"][Index])
+        Fields = [ColumnHeading(Column), int(Results["Count"][Index])]
+        Fields += [Value(Results[Statistic][Index]) for Statistic in ("Min", "Max", "Mean", "StdDev")]
+        Fields += [Value(Results["P" + str(Percentile)][Index]) for Percentile in Percentiles]
+        Fields.append(Times[PeakRow] if 0 <= PeakRow < len(Times) else None)
+        Summaries.append(ColumnSummary(*Fields))
+    return Summaries
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def SummaryColumns(Summaries):
+
+    """Returns the Summary sheet for a list of ColumnSummary as a list of columns, in the sar2xls layout: the
+    headings in row 1, row 2 empty, then a row for each series
+    """
+
+    return [[Heading, None] + [Summary[Field] for Summary in Summaries] for (Field, Heading) in enumerate(SummaryHeadings)]
+#-------------------------------------------------------------------------------------------------------------
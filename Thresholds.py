@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Thresholds checks the statistics of a set of source books (sar files or sar2xls workbooks)
+#               against a thresholds file, the same thresholds.txt that sar2xls -t colours its cells with, and
+#               finds the breaches: the runs of consecutive samples over an Amber or Red threshold.
+#
+#               The thresholds file has an [Amber] and a [Red] section of sar heading=value lines (the sar
+#               headings as they are in the sar file, such as %util or rxbyt/s). The comparisons are the ones
+#               sar2xls's FillRow makes:
+#
+#                   Amber   value > threshold for a positive threshold (a maximum)
+#                           value < -threshold for a negative threshold (a minimum)
+#                   Red     value >= threshold for a positive threshold
+#                           value <= threshold for a negative threshold
+#
+#               A threshold of 0 is neither a maximum nor a minimum, so (as in sar2xls) it's never breached.
+#
+#               Rather than checking one cell at a time, all of the books' columns of a sheet are stacked into
+#               one array, the thresholds of each column into a row of limits, and the whole array is compared
+#               in one go. The breaching samples of each column are then merged into breach intervals, with the
+#               start and end times, the number of samples, the number of them that were Red, and the peak.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Use SarParser.OverviewDetails, rather than a copy of it
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import re
+import csv
+from collections import namedtuple, OrderedDict
+import numpy
+from ColumnMath import ToArray, HeadRows, NumericColumn
+from SarParser import Sar7Headings, Sar9Headings, OverviewDetails
+
+#
+# Breach levels, worst last
+#
+AMBER = "Amber"
+RED = "Red"
+#
+# The thresholds from a thresholds file, each a dictionary of sar heading -> threshold
+#
+Thresholds = namedtuple("Thresholds", ("Amber", "Red"))
+#
+# A book's columns that have thresholds. Columns is an ordered dictionary of sheet name -> (time column cells,
+# list of (heading, sar heading, data array)), with the cells and data from row 3 down
+#
+BookColumns = namedtuple("BookColumns", ("Book", "Host", "Date", "Columns"))
+#
+# A breach interval. Threshold is the sar heading the threshold is for, Limit the threshold of the worst level
+# reached, and Peak the highest value in the interval (the lowest, for a minimum threshold)
+#
+Breach = namedtuple("Breach", ("Level", "Book", "Host", "Date", "Sheet", "Heading", "Threshold", "Limit",
+                               "Start", "End", "Samples", "RedSamples", "Peak"))
+#
+# The columns of the breach report
+#
+ReportHeadings = ("Rank", "Level", "Host", "Date", "Sheet", "Heading", "Threshold", "Limit", "Start", "End",
+                  "Samples", "Red Samples", "Peak", "Book")
+
+#-------------------------------------------------------------------------------------------------------------
+def ReadThresholds(fileName):
+
+    """Read a thresholds file. Returns a Thresholds tuple. Raises IOError if the file can't be read, or ValueError
+    if a threshold isn't a number
+    """
+
+    Amber = {}
+    Red = {}
+    Reading = None
+    File = open(fileName, 'rb')
+    try:
+        for (LineNumber, Line) in enumerate(File):
+            Line = Line.strip()
+            if Line.startswith("#") or Line == "":
+                continue
+            if re.search("\[Amber\]", Line, re.IGNORECASE):
+                Reading = Amber
+                continue
+            elif re.search("\[Red\]", Line, re.IGNORECASE):
+                Reading = Red
+                continue
+            if Reading is None or "=" not in Line:
+                continue
+            (Key, Value) = Line.split("=", 1)
+            try:
+                Reading[Key.strip()] = float(Value)
+            except ValueError:
+                raise ValueError("Line " + str(LineNumber + 1) + " of " + fileName + ": threshold \"" + Value.strip()
+                                 + "\" for " + Key.strip() + " isn't a number")
+    finally:
+        File.close()
+    return Thresholds(Amber, Red)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def SarHeadings():
+
+    """Returns a dictionary of sheet heading -> list of the sar headings it's translated from (by either version
+    of sysstat), for matching the headings of a sheet up with the thresholds
+    """
+
+    Headings = {}
+    for Translate in (Sar9Headings, Sar7Headings):
+        for (SarHeading, Heading) in Translate.items():
+            for SheetHeading in (Heading, "Device " + Heading if "tps" in SarHeading else None):
+                if SheetHeading and SarHeading not in Headings.setdefault(SheetHeading, []):
+                    Headings[SheetHeading].append(SarHeading)
+    return Headings
+#-------------------------------------------------------------------------------------------------------------
+
+#
+# Sheet heading -> sar headings
+#
+SheetHeadings = SarHeadings()
+
+#-------------------------------------------------------------------------------------------------------------
+def ThresholdHeading(Heading, thresholds):
+
+    """Returns the sar heading that the thresholds have a threshold for, for a (translated) sheet heading, or None
+    if there isn't one. A heading that sar2xls doesn't translate is its own sar heading
+    """
+
+    for SarHeading in SheetHeadings.get(Heading, []) + [Heading]:
+        if SarHeading in thresholds.Amber or SarHeading in thresholds.Red:
+            return SarHeading
+    return None
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ThresholdColumns(book, sheets, thresholds):
+
+    """Returns the BookColumns of a book: just the columns that have a threshold, with each sheet's time column.
+    Description of parameters (self explanatory parameters are not described):
+        book        -   the book's file name
+        sheets      -   ordered dictionary of sheet name -> list of columns (as read by GenGraphs, or None for a
+                        sheet that couldn't be read)
+    """
+
+    (SystemName, Host, Date) = OverviewDetails((sheets.get("Overview") or [[]])[0])
+    Columns = OrderedDict()
+    for (SheetName, SheetColumns) in sheets.items():
+        if SheetName == "Overview" or not SheetColumns:
+            continue
+        Series = []
+        for Column in SheetColumns[1:]:
+            if isinstance(Column, NumericColumn):
+                (Heading, Data) = (Column.head[0], Column.data)
+            elif len(Column) > 0:
+                (Heading, Data) = (Column[0], ToArray(Column[HeadRows:]))
+            else:
+                continue
+            SarHeading = ThresholdHeading(Heading, thresholds)
+            if SarHeading:
+                Series.append((Heading, SarHeading, Data))
+        if Series:
+            Times = SheetColumns[0]
+            Times = Times.cells(HeadRows + 1) if isinstance(Times, NumericColumn) else list(Times[HeadRows:])
+            Columns[SheetName] = (Times, Series)
+    return BookColumns(book, Host, Date, Columns)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Limits(Headings, Levels):
+
+    """Returns an array of the thresholds of a list of sar headings, NaN for those without one"""
+
+    return numpy.array([Levels.get(Heading, numpy.nan) for Heading in Headings], dtype=numpy.float64)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ScanSheet(SheetName, Books, thresholds):
+
+    """Returns a list of the Breach intervals of one sheet of a set of books.
+    Description of parameters (self explanatory parameters are not described):
+        Books       -   list of BookColumns, of the books with the sheet
+    """
+
+    #
+    # One column of the array for each thresholded column of each book
+    #
+    Owners = []
+    for Book in Books:
+        (Times, Series) = Book.Columns[SheetName]
+        for (Heading, SarHeading, Data) in Series:
+            Owners.append((Book, Times, Heading, SarHeading, Data))
+    if len(Owners) == 0:
+        return []
+    Rows = max([len(Owner[4]) for Owner in Owners])
+    if Rows == 0:
+        return []
+    Data = numpy.column_stack([ToArray(Owner[4], Rows) for Owner in Owners])
+    Amber = Limits([Owner[3] for Owner in Owners], thresholds.Amber)
+    Red = Limits([Owner[3] for Owner in Owners], thresholds.Red)
+    #
+    # Every comparison for every sample of every column at once. Limits that don't apply are infinite, and empty
+    # cells (NaN) never breach
+    #
+    with numpy.errstate(invalid="ignore"):
+        IsAmber = (Data > numpy.where(Amber > 0, Amber, numpy.inf)) | (Data < numpy.where(Amber < 0, -Amber, -numpy.inf))
+        IsRed = (Data >= numpy.where(Red > 0, Red, numpy.inf)) | (Data <= numpy.where(Red < 0, Red, -numpy.inf))
+        Minimum = ((Amber < 0) | (Red < 0)) & ~((Amber > 0) | (Red > 0))
+    Breaching = IsAmber | IsRed
+    #
+    # The intervals of each column start where Breaching goes from False to True, and end (exclusive) where it goes
+    # back to False. Transposed, the intervals come out column by column, in time order
+    #
+    Padded = numpy.zeros((Rows + 2, len(Owners)), dtype=numpy.int8)
+    Padded[1:-1] = Breaching
+    Edges = numpy.diff(Padded, axis=0).T
+    (Columns, Starts) = numpy.nonzero(Edges == 1)
+    Ends = numpy.nonzero(Edges == -1)[1]
+    if len(Starts) == 0:
+        return []
+    #
+    # The number of Red samples, and the peak, of every interval at once
+    #
+    RedCounts = numpy.vstack((numpy.zeros((1, len(Owners)), dtype=numpy.int64), numpy.cumsum(IsRed, axis=0)))
+    RedSamples = RedCounts[Ends, Columns] - RedCounts[Starts, Columns]
+    Bounds = numpy.column_stack((Columns * Rows + Starts, Columns * Rows + Ends)).ravel()
+    Highest = numpy.maximum.reduceat(numpy.append(numpy.where(Breaching, Data, -numpy.inf).T.ravel(), -numpy.inf), Bounds)[::2]
+    Lowest = numpy.minimum.reduceat(numpy.append(numpy.where(Breaching, Data, numpy.inf).T.ravel(), numpy.inf), Bounds)[::2]
+    Breaches = []
+    for Index in xrange(len(Starts)):
+        (Column, Start, End) = (Columns[Index], Starts[Index], Ends[Index])
+        (Book, Times, Heading, SarHeading, ColumnData) = Owners[Column]
+        Level = RED if RedSamples[Index] > 0 else AMBER
+        Limit = Red[Column] if Level == RED else Amber[Column]
+        Peak = Lowest[Index] if Minimum[Column] else Highest[Index]
+        Breaches.append(Breach(Level, Book.Book, Book.Host, Book.Date, SheetName, Heading, SarHeading, float(Limit),
+                               Times[Start] if Start < len(Times) else None, Times[End - 1] if End - 1 < len(Times) else None,
+                               int(End - Start), int(RedSamples[Index]), float(Peak)))
+    return Breaches
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def RankBreaches(Breaches):
+
+    """Returns the breaches worst first: Red before Amber, then the longest, then the furthest past its threshold"""
+
+    def Severity(ThisBreach):
+        if ThisBreach.Limit == 0:
+            return 0.0
+        return abs(ThisBreach.Peak - abs(ThisBreach.Limit)) / abs(ThisBreach.Limit)
+
+    return sorted(Breaches, key=lambda ThisBreach: (ThisBreach.Level != RED, -ThisBreach.Samples, -Severity(ThisBreach)))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ScanBooks(Books, thresholds):
+
+    """Returns the ranked Breach intervals of a list of BookColumns, scanning each sheet across all of the books at
+    once
+    """
+
+    SheetNames = []
+    for Book in Books:
+        SheetNames += [SheetName for SheetName in Book.Columns.keys() if SheetName not in SheetNames]
+    Breaches = []
+    for SheetName in SheetNames:
+        Breaches += ScanSheet(SheetName, [Book for Book in Books if SheetName in Book.Columns], thresholds)
+    return RankBreaches(Breaches)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ReportCell(Value):
+
+    """Returns a cell value for the CSV report (which is UTF-8)"""
+
+    if Value is None:
+        return ""
+    if isinstance(Value, unicode):
+        return Value.encode("utf-8")
+    if isinstance(Value, float) and Value.is_integer():
+        return str(int(Value))
+    return str(Value)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def WriteReport(fileName, breaches):
+
+    """Write the ranked breaches to a CSV file, one row per breach interval, worst first"""
+
+    File = open(fileName, 'wb')
+    try:
+        Writer = csv.writer(File)
+        Writer.writerow(ReportHeadings)
+        for (Rank, ThisBreach) in enumerate(breaches):
+            Writer.writerow([ReportCell(Value) for Value in
+                             (Rank + 1, ThisBreach.Level, ThisBreach.Host, ThisBreach.Date, ThisBreach.Sheet,
+                              ThisBreach.Heading, ThisBreach.Threshold, ThisBreach.Limit, ThisBreach.Start,
+                              ThisBreach.End, ThisBreach.Samples, ThisBreach.RedSamples, ThisBreach.Peak,
+                              ThisBreach.Book)])
+    finally:
+        File.close()
+#-------------------------------------------------------------------------------------------------------------
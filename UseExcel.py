@@ -8,6 +8,13 @@
 #           0.2     02-Jul-09   PEMcG   Improved error handling
 #           0.3     13-Jul-09   PEMcG   Added comments to plotdata, and debugged save
 #           0.4     16-May-11   PEMcG   Added lastcellincolumn function
+#           0.5     18-Oct-26   agent   Added getusedrange function
+#           0.6     18-Oct-26   agent   Added setrangefont function
+#           0.7     18-Oct-26   agent   Added sheetnames function
+#           0.8     18-Oct-26   agent   lastcellincolumn takes a column number as well as a letter
+#           0.9     18-Oct-26   agent   lastcellincolumn searches up from the last row of the sheet rather than row 65536
+#           0.10    18-Oct-26   agent   excelfunction calls the worksheet function directly rather than through eval
+#           0.11    18-Oct-26   agent   plotdata joins the points of a line across empty cells
 #
 # Revision History
 #
@@ -90,11 +97,13 @@ class UseExcel(object):
         """Find the last used cell in a column
         Description of parameters (self explanatory parameters are not described):
             sheet       -   name of the excel worksheet
-            column      -   Column letter to find max row in
+            column      -   Column letter (or number, A = 1) to find max row in
         """
         xlUp = -4162
         sht = self.xlbook.Worksheets(sheet)
-        LastRow = sht.Range(column + "65536").End(xlUp).Row
+        if isinstance(column, basestring):
+            column = sht.Range(column + "1").Column
+        LastRow = sht.Cells(sht.Rows.Count, column).End(xlUp).Row
         return LastRow
 
 #-------------------------------------------------------------------------------------------------------------
@@ -144,6 +153,42 @@ class UseExcel(object):
             sht.Cells(row, col).Font.Name = fontName
 #-------------------------------------------------------------------------------------------------------------
 
+#-------------------------------------------------------------------------------------------------------------
+    def setrangefont(self, sheet, rangeAddress, fontStyle=("Regular",), fontName="Arial", fontSize=12, fontColor=1):
+
+        """Set the font of a range of cells in one call.
+        Description of parameters (self explanatory parameters are not described):
+            sheet           -   name of the excel worksheet
+            rangeAddress    -   tuple of integers (row1,col1,row2,col2) or "cell1Address:cell2Address"
+                                e.g. (1,2,5,7) or "B1:G5"
+            fontStyle       -   tuple. Combination of Regular, Bold, Italic, Underline
+                                e.g. ("Regular", "Bold", "Italic")
+            fontColor       -   ColorIndex. Refer ColorIndex property in Microsoft Excel Visual Basic Reference
+        """
+
+        sht = self.xlbook.Worksheets(sheet)
+        if (isinstance(rangeAddress,str)):
+            font = sht.Range(rangeAddress).Font
+        elif (isinstance(rangeAddress,tuple)):
+            row1 = rangeAddress[0]
+            col1 = rangeAddress[1]
+            row2 = rangeAddress[2]
+            col2 = rangeAddress[3]
+            font = sht.Range(sht.Cells(row1, col1), sht.Cells(row2,col2)).Font
+        font.Size = fontSize
+        font.ColorIndex = fontColor
+        for item in fontStyle:
+            if (item.lower() == "bold"):
+                font.Bold = True
+            elif (item.lower() == "italic"):
+                font.Italic = True
+            elif (item.lower() == "underline"):
+                font.Underline = True
+            elif (item.lower() == "regular"):
+                font.FontStyle = "Regular"
+        font.Name = fontName
+#-------------------------------------------------------------------------------------------------------------
+
 #-------------------------------------------------------------------------------------------------------------
     def setcellformula(self, sheet, formula, cellAddress, fontStyle=("Regular",), fontName="Arial", fontSize=12, fontColor=1):
 
@@ -215,6 +260,33 @@ class UseExcel(object):
             return sht.Range(sht.Cells(row1, col1), sht.Cells(row2,col2)).Value
 #-------------------------------------------------------------------------------------------------------------
 
+#-------------------------------------------------------------------------------------------------------------
+    def getusedrange(self, sheet):
+
+        """Returns a tuple of tuples of all the cells from A1 to the bottom right of the used range of a sheet,
+            in a single read. Each tuple corresponds to a row in excel sheet.
+
+        Description of parameters (self explanatory parameters are not described):
+            sheet           -   name of the excel worksheet
+        """
+
+        sht = self.xlbook.Worksheets(sheet)
+        usedRange = sht.UsedRange
+        row2 = usedRange.Row + usedRange.Rows.Count - 1
+        col2 = usedRange.Column + usedRange.Columns.Count - 1
+        if row2 == 1 and col2 == 1:
+            return ((sht.Cells(1, 1).Value,),)
+        return sht.Range(sht.Cells(1, 1), sht.Cells(row2, col2)).Value
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def sheetnames(self):
+
+        """Returns a list of the names of the worksheets in the workbook"""
+
+        return [self.xlbook.Worksheets(index).Name for index in range(1, self.xlbook.Worksheets.Count + 1)]
+#-------------------------------------------------------------------------------------------------------------
+
 #-------------------------------------------------------------------------------------------------------------
     def setrange(self, sheet, topRow, leftCol, data):
 
@@ -407,6 +479,11 @@ class UseExcel(object):
                     The series axis title for 3-D charts or the second value axis title for 2-D charts.
         """
         chartObject.Chart.ChartWizard(source, gallery, format, plotBy, categoryLabels, seriesLabels, hasLegend, title, categoryTitle, valueTitle, extraTitle)
+        #
+        # Plot empty cells as interpolated (xlInterpolated), so a series that's empty on every other row
+        # still has a line
+        #
+        chartObject.Chart.DisplayBlanksAs = 3
         
         nSeries = chartObject.Chart.SeriesCollection().Count
         for chart in range(1,nSeries+1):
@@ -547,19 +624,19 @@ class UseExcel(object):
                         row2,col2 refers to second cell
                         e.g. (1,2,5,7) or "B1:G5"
             For list of functions refer List of Worksheet Functions Available to Visual Basic in Microsoft Excel Visual Basic Reference
+        Each call is a round trip to Excel. For the usual statistics of a lot of columns, SummaryStats works them all out at once
         """
 
         sht = self.xlbook.Worksheets(sheet)
         if isinstance(range,str):
-            xlRange = "(sht.Range(" + "'" + range + "'" + "))"
+            xlRange = sht.Range(range)
         elif isinstance(range,tuple):
             topRow = range[0]
             leftColumn = range[1]
             bottomRow = range[2]
             rightColumn = range[3]
-            xlRange = "(sht.Range(sht.Cells(topRow, leftColumn), sht.Cells(bottomRow, rightColumn)))"
-        xlFunction = "self.xlapp.WorksheetFunction." + function + xlRange
-        return eval(xlFunction, globals(), locals())
+            xlRange = sht.Range(sht.Cells(topRow, leftColumn), sht.Cells(bottomRow, rightColumn))
+        return getattr(self.xlapp.WorksheetFunction, function)(xlRange)
 #-------------------------------------------------------------------------------------------------------------
 
 #-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,672 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  UseWorkbook is a headless, in-process alternative to UseExcel. It provides the same
+#               methods, but reads and writes .xls and .xlsx files directly (using xlrd/xlwt and openpyxl)
+#               rather than driving Excel through COM, so it runs without Excel, and on Linux.
+#
+#               The workbook is held in memory as a grid of cell values per sheet, and is only written
+#               out when save() is called.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Added getusedrange and setrangefont functions
+#           0.3     18-Oct-26   agent   Added sheetnames function
+#           0.4     18-Oct-26   agent   Column names checked against the A..XFD range, lastcellincolumn takes a column
+#                                       number as well as a letter, and added MaxColumns
+#           0.5     18-Oct-26   agent   Added ReadColumns to stream sheets straight into columns, and MaxRows
+#           0.6     18-Oct-26   agent   Write dates and times to .xls files with a date format
+#           0.7     18-Oct-26   agent   Line charts join their points across empty cells
+#           0.8     18-Oct-26   agent   Removed copycolumntoclipboard and pasterangefromclipboard, GenGraphs uses setrange
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import re
+import datetime
+from collections import OrderedDict
+from ColumnMath import ColumnBuilder
+
+#
+# Constants that GenGraphs passes to plotdata (these are the Excel enumeration values)
+#
+xlLine = 4
+xlColumns = 2
+#
+# The number of columns a sheet can have: .xls (Excel 97-2003) sheets go up to column IV, .xlsx up to XFD
+#
+MaxXlsColumns = 256
+MaxXlsxColumns = 16384
+#
+# and the number of rows: 65,536 for .xls, 1,048,576 for .xlsx
+#
+MaxXlsRows = 65536
+MaxXlsxRows = 1048576
+#
+# The number format for dates and times in .xls files (openpyxl formats them itself in .xlsx files)
+#
+DateFormat = "yyyy-mm-dd hh:mm:ss"
+
+#-------------------------------------------------------------------------------------------------------------
+def MaxColumns(fileName):
+
+    """Returns the maximum number of columns in a sheet of a workbook saved as fileName"""
+
+    if os.path.splitext(fileName)[1].lower() == ".xls":
+        return MaxXlsColumns
+    return MaxXlsxColumns
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def MaxRows(fileName):
+
+    """Returns the maximum number of rows in a sheet of a workbook saved as fileName"""
+
+    if os.path.splitext(fileName)[1].lower() == ".xls":
+        return MaxXlsRows
+    return MaxXlsxRows
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ReadColumns(fileName, sheetNames=None):
+
+    """Read sheets from a .xls or .xlsx workbook straight into columns, one row at a time, without holding the
+    whole grid of cells in memory. Numeric columns are built as NumericColumn float arrays, so memory only grows
+    by 8 bytes a cell however many rows there are. Raises IOError if the workbook can't be opened.
+    Returns an ordered dictionary of sheet name -> list of columns (None for a sheet the workbook doesn't have).
+
+    Description of parameters (self explanatory parameters are not described):
+        sheetNames      -   the sheets to read, or None to read all of them
+    """
+
+    if not os.path.isfile(fileName):
+        raise IOError("Can't open workbook " + fileName)
+    Sheets = OrderedDict()
+    if os.path.splitext(fileName)[1].lower() == ".xls":
+        import xlrd
+        Book = xlrd.open_workbook(fileName, on_demand=True)
+        try:
+            for SheetName in (Book.sheet_names() if sheetNames is None else sheetNames):
+                if SheetName not in Book.sheet_names():
+                    Sheets[SheetName] = None
+                    continue
+                Sheet = Book.sheet_by_name(SheetName)
+                Columns = []
+                for Col in range(Sheet.ncols):
+                    Builder = ColumnBuilder()
+                    for Cell in Sheet.col(Col):
+                        if Cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+                            Builder.append(None)
+                        else:
+                            Builder.append(Cell.value)
+                    Columns.append(Builder.column())
+                Sheets[SheetName] = Columns
+                Book.unload_sheet(SheetName)
+        finally:
+            Book.release_resources()
+    else:
+        import openpyxl
+        Book = openpyxl.load_workbook(fileName, read_only=True, data_only=True)
+        try:
+            for SheetName in (Book.sheetnames if sheetNames is None else sheetNames):
+                if SheetName not in Book.sheetnames:
+                    Sheets[SheetName] = None
+                    continue
+                Builders = []
+                RowCount = 0
+                for Row in Book[SheetName].iter_rows(values_only=True):
+                    while len(Builders) < len(Row):
+                        Builders.append(ColumnBuilder(RowCount))
+                    for (Col, Builder) in enumerate(Builders):
+                        Builder.append(Row[Col] if Col < len(Row) else None)
+                    RowCount += 1
+                Sheets[SheetName] = [Builder.column() for Builder in Builders]
+        finally:
+            Book.close()
+    return Sheets
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ColumnNumber(ColumnLetters):
+
+    """Convert a column name such as "A" or "AB" (up to "XFD") into a column number (A = 1).
+    Raises ValueError if it isn't a column name
+    """
+
+    if not re.match("^[A-Za-z]{1,3}$", ColumnLetters):
+        raise ValueError("\"" + ColumnLetters + "\" is not a column name")
+    Number = 0
+    for Letter in ColumnLetters.upper():
+        Number = Number * 26 + (ord(Letter) - ord("A") + 1)
+    if Number > MaxXlsxColumns:
+        raise ValueError("Column " + ColumnLetters + " is past the last column (XFD)")
+    return Number
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ColumnLetter(ColumnNumber):
+
+    """Convert a column number (A = 1) into a column name such as "A" or "AB" (up to "XFD").
+    Raises ValueError if it's out of range
+    """
+
+    if ColumnNumber < 1 or ColumnNumber > MaxXlsxColumns:
+        raise ValueError("Column number " + str(ColumnNumber) + " is outside columns A to XFD")
+    Letters = ""
+    while ColumnNumber > 0:
+        (ColumnNumber, Remainder) = divmod(ColumnNumber - 1, 26)
+        Letters = chr(ord("A") + Remainder) + Letters
+    return Letters
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def CellAddressToRowColumn(cellAddress):
+
+    """Convert a cell address into a (row, column) tuple
+        cellAddress -   tuple of integers (row, column) or string "ColumnRow"
+                        e.g. (3,4) or "D3"
+    """
+
+    if isinstance(cellAddress, tuple):
+        return cellAddress
+    match = re.match("^\$?([A-Za-z]+)\$?(\d+)$", cellAddress.strip())
+    if not match:
+        raise ValueError("Invalid cell address \"" + cellAddress + "\"")
+    return (int(match.group(2)), ColumnNumber(match.group(1)))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def RangeAddressToRowsColumns(rangeAddress):
+
+    """Convert a range address into a (row1, col1, row2, col2) tuple
+        rangeAddress    -   tuple of integers (row1,col1,row2,col2) or "cell1Address:cell2Address"
+                            e.g. (1,2,5,7) or "B1:G5"
+    """
+
+    if isinstance(rangeAddress, tuple):
+        return rangeAddress
+    Cells = rangeAddress.split(":")
+    (row1, col1) = CellAddressToRowColumn(Cells[0])
+    if len(Cells) > 1:
+        (row2, col2) = CellAddressToRowColumn(Cells[1])
+    else:
+        (row2, col2) = (row1, col1)
+    return (min(row1, row2), min(col1, col2), max(row1, row2), max(col1, col2))
+#-------------------------------------------------------------------------------------------------------------
+
+
+class UseWorkbook(object):
+    """Headless Workbook Interface. It provides the subset of the UseExcel methods that
+    GenGraphs uses, operating on an in-memory copy of the workbook.
+
+    .xls files are read with xlrd and written with xlwt, .xlsx files are read and
+    written with openpyxl. Charts are only written to .xlsx files.
+    """
+
+    __slots__ = ("filename", "sheets", "fonts", "charts")
+
+#-------------------------------------------------------------------------------------------------------------
+    def __init__(self, fileName=None):
+        #
+        # e.g. xlFile = UseWorkbook("/var/tmp/sar/sysora1-2009-06-22.xls")
+        #
+        # sheets is an ordered dictionary of sheet name -> list of rows, each row being a list of cell values
+        # fonts is a dictionary of (sheet, row, col) -> (fontStyle, fontName, fontSize, fontColor)
+        # charts is a list of chart dictionaries created by insertchart and filled in by plotdata
+        #
+        self.filename = fileName
+        self.sheets = OrderedDict()
+        self.fonts = {}
+        self.charts = []
+        if fileName:
+            if not os.path.isfile(fileName):
+                raise IOError("Can't open workbook " + fileName)
+            if os.path.splitext(fileName)[1].lower() == ".xls":
+                self._readxls(fileName)
+            else:
+                self._readxlsx(fileName)
+        else:
+            self.sheets["Sheet1"] = []
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _readxls(self, fileName):
+        import xlrd
+        Book = xlrd.open_workbook(fileName, on_demand=True)
+        try:
+            for SheetName in Book.sheet_names():
+                Sheet = Book.sheet_by_name(SheetName)
+                Rows = []
+                for Row in range(Sheet.nrows):
+                    Values = []
+                    for Cell in Sheet.row(Row):
+                        if Cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+                            Values.append(None)
+                        else:
+                            Values.append(Cell.value)
+                    Rows.append(Values)
+                self.sheets[SheetName] = Rows
+                Book.unload_sheet(SheetName)
+        finally:
+            Book.release_resources()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _readxlsx(self, fileName):
+        import openpyxl
+        Book = openpyxl.load_workbook(fileName, read_only=True, data_only=True)
+        try:
+            for SheetName in Book.sheetnames:
+                Rows = []
+                for Row in Book[SheetName].iter_rows(values_only=True):
+                    Rows.append(list(Row))
+                self.sheets[SheetName] = Rows
+        finally:
+            Book.close()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _sheet(self, sheet):
+        try:
+            return self.sheets[sheet]
+        except KeyError:
+            raise KeyError("No sheet named \"" + sheet + "\" in workbook")
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _value(self, Rows, row, col):
+        if row > len(Rows):
+            return None
+        Row = Rows[row - 1]
+        if col > len(Row):
+            return None
+        return Row[col - 1]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _setvalue(self, Rows, row, col, value):
+        while len(Rows) < row:
+            Rows.append([])
+        Row = Rows[row - 1]
+        if len(Row) < col:
+            Row.extend([None] * (col - len(Row)))
+        Row[col - 1] = value
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def save(self, NewFileName=None):
+        if NewFileName:
+            self.filename = NewFileName
+        if not self.filename:
+            raise IOError("No file name to save workbook as")
+        if os.path.splitext(self.filename)[1].lower() == ".xls":
+            self._writexls(self.filename)
+        else:
+            self._writexlsx(self.filename)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _writexls(self, fileName):
+        import xlwt
+        if len(self.charts) > 0:
+            print "Charts can't be written to .xls files without Excel, save as .xlsx to keep them"
+        for SheetName in self.sheets:
+            if max([len(Row) for Row in self.sheets[SheetName]] + [0]) > MaxXlsColumns:
+                raise ValueError("Sheet \"" + SheetName + "\" is too wide for a .xls file (more than "
+                                 + str(MaxXlsColumns) + " columns), save as .xlsx instead")
+            if len(self.sheets[SheetName]) > MaxXlsRows:
+                raise ValueError("Sheet \"" + SheetName + "\" is too long for a .xls file (more than "
+                                 + str(MaxXlsRows) + " rows), save as .xlsx instead")
+        Book = xlwt.Workbook()
+        Styles = {}
+        for SheetName in self.sheets:
+            Sheet = Book.add_sheet(SheetName)
+            for (Row, Values) in enumerate(self.sheets[SheetName]):
+                for (Col, Value) in enumerate(Values):
+                    if Value is None:
+                        continue
+                    Font = self.fonts.get((SheetName, Row + 1, Col + 1))
+                    IsDate = isinstance(Value, (datetime.datetime, datetime.date, datetime.time))
+                    if Font or IsDate:
+                        if (Font, IsDate) not in Styles:
+                            Style = xlwt.XFStyle()
+                            if Font:
+                                (fontStyle, fontName, fontSize, fontColor) = Font
+                                Style.font.name = fontName
+                                Style.font.height = int(fontSize * 20)
+                                Style.font.bold = "bold" in fontStyle
+                                Style.font.italic = "italic" in fontStyle
+                                Style.font.underline = "underline" in fontStyle
+                            if IsDate:
+                                Style.num_format_str = DateFormat
+                            Styles[(Font, IsDate)] = Style
+                        Sheet.write(Row, Col, Value, Styles[(Font, IsDate)])
+                    else:
+                        Sheet.write(Row, Col, Value)
+        Book.save(fileName)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _writexlsx(self, fileName):
+        import openpyxl
+        from openpyxl.styles import Font
+        Book = openpyxl.Workbook()
+        Book.remove(Book.active)
+        for SheetName in self.sheets:
+            Sheet = Book.create_sheet(SheetName)
+            for Values in self.sheets[SheetName]:
+                Sheet.append(Values)
+        for ((SheetName, Row, Col), (fontStyle, fontName, fontSize, fontColor)) in self.fonts.items():
+            if SheetName in self.sheets:
+                Book[SheetName].cell(row=Row, column=Col).font = Font(name=fontName, size=fontSize,
+                                                                     bold="bold" in fontStyle,
+                                                                     italic="italic" in fontStyle,
+                                                                     underline="single" if "underline" in fontStyle else None)
+        for Chart in self.charts:
+            if Chart["sheet"] in self.sheets and Chart["source"]:
+                self._addxlsxchart(Book, Chart)
+        Book.save(fileName)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _addxlsxchart(self, Book, Chart):
+        from openpyxl.chart import LineChart, Reference
+        (sheet, topRow, leftCol, bottomRow, rightCol) = Chart["source"]
+        DataSheet = Book[sheet]
+        LineGraph = LineChart()
+        #
+        # Sizes are in points in Excel, and in cm in openpyxl
+        #
+        LineGraph.width = Chart["width"] * 2.54 / 72
+        LineGraph.height = Chart["height"] * 2.54 / 72
+        LineGraph.title = Chart["title"]
+        LineGraph.x_axis.title = Chart["categoryTitle"]
+        LineGraph.y_axis.title = Chart["valueTitle"]
+        if not Chart["hasLegend"]:
+            LineGraph.legend = None
+        firstSeriesCol = leftCol + Chart["categoryLabels"]
+        Data = Reference(DataSheet, min_col=firstSeriesCol, min_row=topRow, max_col=rightCol, max_row=bottomRow)
+        LineGraph.add_data(Data, titles_from_data=Chart["seriesLabels"] > 0)
+        if Chart["categoryLabels"] > 0:
+            Categories = Reference(DataSheet, min_col=leftCol, min_row=topRow + Chart["seriesLabels"], max_row=bottomRow)
+            LineGraph.set_categories(Categories)
+        #
+        # Books lined up on their sample times leave each series empty on the other books' rows, so the
+        # line is drawn across the empty cells rather than broken at every one of them
+        #
+        LineGraph.display_blanks = "span"
+        for Series in LineGraph.series:
+            Series.smooth = False
+            Series.graphicalProperties.line.width = 12700      # 1 point, in EMUs
+        Book[Chart["sheet"]].add_chart(LineGraph, "A1")
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def close(self):
+        self.sheets = OrderedDict()
+        self.fonts = {}
+        self.charts = []
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def show(self):
+        pass
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def hide(self):
+        pass
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def getcell(self, sheet, cellAddress):
+
+        """Get value of one cell.
+        Description of parameters (self explanatory parameters are not described):
+            sheet       -   name of the excel worksheet
+            cellAddress -   tuple of integers (row, column) or string "ColumnRow"
+                            e.g. (3,4) or "D3"
+        """
+
+        (row, col) = CellAddressToRowColumn(cellAddress)
+        return self._value(self._sheet(sheet), row, col)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def lastcellincolumn(self, sheet, column):
+
+        """Find the last used cell in a column
+        Description of parameters (self explanatory parameters are not described):
+            sheet       -   name of the excel worksheet
+            column      -   Column letter (or number, A = 1) to find max row in
+        """
+
+        Rows = self._sheet(sheet)
+        if isinstance(column, basestring):
+            col = ColumnNumber(column)
+        else:
+            col = column
+        for row in range(len(Rows), 0, -1):
+            if self._value(Rows, row, col) is not None:
+                return row
+        #
+        # Excel returns row 1 for an empty column
+        #
+        return 1
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def setcellvalue(self, sheet, value, cellAddress, fontStyle=("Regular",), fontName="Arial", fontSize=12, fontColor=1):
+
+        """Set value of one cell.
+        Description of parameters (self explanatory parameters are not described):
+            sheet       -   name of the excel worksheet
+            value       -   The cell value. it can be a number, string etc.
+            cellAddress -   tuple of integers (row, column) or string "ColumnRow"
+                            e.g. (3,4) or "D3"
+            fontStyle   -   tuple. Combination of Regular, Bold, Italic, Underline
+                            e.g. ("Regular", "Bold", "Italic")
+            fontColor   -   ColorIndex. Ignored, but accepted for compatibility with UseExcel
+        """
+
+        (row, col) = CellAddressToRowColumn(cellAddress)
+        self._setvalue(self._sheet(sheet), row, col, value)
+        if isinstance(fontStyle, str):
+            fontStyle = (fontStyle,)
+        fontStyle = tuple(sorted(item.lower() for item in fontStyle))
+        self.fonts[(sheet, row, col)] = (fontStyle, fontName, fontSize, fontColor)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def setrangefont(self, sheet, rangeAddress, fontStyle=("Regular",), fontName="Arial", fontSize=12, fontColor=1):
+
+        """Set the font of a range of cells in one call.
+        Description of parameters (self explanatory parameters are not described):
+            sheet           -   name of the excel worksheet
+            rangeAddress    -   tuple of integers (row1,col1,row2,col2) or "cell1Address:cell2Address"
+                                e.g. (1,2,5,7) or "B1:G5"
+            fontStyle       -   tuple. Combination of Regular, Bold, Italic, Underline
+                                e.g. ("Regular", "Bold", "Italic")
+            fontColor       -   ColorIndex. Ignored, but accepted for compatibility with UseExcel
+        """
+
+        self._sheet(sheet)
+        (row1, col1, row2, col2) = RangeAddressToRowsColumns(rangeAddress)
+        if isinstance(fontStyle, str):
+            fontStyle = (fontStyle,)
+        Font = (tuple(sorted(item.lower() for item in fontStyle)), fontName, fontSize, fontColor)
+        for row in range(row1, row2 + 1):
+            for col in range(col1, col2 + 1):
+                self.fonts[(sheet, row, col)] = Font
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def getrange(self, sheet, rangeAddress):
+
+        """Returns a tuple of tuples from a range of cells. Each tuple corresponds to a row in excel sheet.
+
+        Description of parameters (self explanatory parameters are not described):
+            sheet           -   name of the excel worksheet
+            rangeAddress    -   tuple of integers (row1,col1,row2,col2) or "cell1Address:cell2Address"
+                                row1,col1 refers to first cell
+                                row2,col2 refers to second cell
+                                e.g. (1,2,5,7) or "B1:G5"
+        """
+
+        Rows = self._sheet(sheet)
+        (row1, col1, row2, col2) = RangeAddressToRowsColumns(rangeAddress)
+        #
+        # Excel returns a single value rather than a tuple of tuples for a one-cell range
+        #
+        if row1 == row2 and col1 == col2:
+            return self._value(Rows, row1, col1)
+        return tuple(tuple(self._value(Rows, row, col) for col in range(col1, col2 + 1))
+                     for row in range(row1, row2 + 1))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def getusedrange(self, sheet):
+
+        """Returns a tuple of tuples of all the cells from A1 to the bottom right of the used range of a sheet.
+            Each tuple corresponds to a row in excel sheet.
+
+        Description of parameters (self explanatory parameters are not described):
+            sheet           -   name of the excel worksheet
+        """
+
+        Rows = self._sheet(sheet)
+        Width = max([len(Row) for Row in Rows] + [1])
+        return tuple(tuple(Row) + (None,) * (Width - len(Row)) for Row in Rows) or ((None,),)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def sheetnames(self):
+
+        """Returns a list of the names of the worksheets in the workbook"""
+
+        return list(self.sheets.keys())
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def setrange(self, sheet, topRow, leftCol, data):
+
+        """Sets range of cells with values from data. data is a tuple of tuples.
+            Each tuple corresponds to a row in excel sheet.
+
+        Description of parameters (self explanatory parameters are not described):
+            sheet   -   name of the excel worksheet
+            topRow  -   row number (integer data type)
+            leftCol -   column number (integer data type)
+        """
+
+        bottomRow = topRow + len(data) - 1
+        rightCol = leftCol + len(data[0]) - 1
+        Rows = self._sheet(sheet)
+        for (rowOffset, Values) in enumerate(data):
+            for (colOffset, Value) in enumerate(Values):
+                self._setvalue(Rows, topRow + rowOffset, leftCol + colOffset, Value)
+        return (bottomRow, rightCol)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def _addworksheet(self, position, newSheetName):
+        if newSheetName in self.sheets:
+            raise ValueError("A sheet named \"" + newSheetName + "\" already exists")
+        Names = list(self.sheets.keys())
+        Names.insert(position, newSheetName)
+        Sheets = OrderedDict()
+        for Name in Names:
+            Sheets[Name] = self.sheets.get(Name, [])
+        self.sheets = Sheets
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def addnewworksheetbefore(self, oldSheet, newSheetName):
+
+        """Adds a new excel sheet before the given excel sheet.
+
+        Description of parameters (self explanatory parameters are not described):
+            oldSheet        -   Name of the sheet before which a new sheet should be inserted
+            newSheetName    -   Name of the new sheet
+        """
+
+        self._sheet(oldSheet)
+        self._addworksheet(list(self.sheets.keys()).index(oldSheet), newSheetName)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def deleteworksheet(self, SheetName):
+
+        """Deletes an excel sheet in a workbook.
+
+        Description of parameters (self explanatory parameters are not described):
+            SheetName    -   Name of the sheet to delete
+        """
+
+        self._sheet(SheetName)
+        del self.sheets[SheetName]
+        for Key in [Key for Key in self.fonts if Key[0] == SheetName]:
+            del self.fonts[Key]
+        self.charts = [Chart for Chart in self.charts if Chart["sheet"] != SheetName]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def addnewworksheetafter(self, oldSheet, newSheetName):
+
+        """Adds a new excel sheet after the given excel sheet.
+
+        Description of parameters (self explanatory parameters are not described):
+            oldSheet        -   Name of the sheet after which a new sheet should be inserted
+            newSheetName    -   Name of the new sheet
+        """
+
+        self._sheet(oldSheet)
+        self._addworksheet(list(self.sheets.keys()).index(oldSheet) + 1, newSheetName)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def insertchart(self, sheet, left, top, width, height):
+
+        """Creates a new embedded chart. Returns a chart object to pass to plotdata.
+
+        Description of parameters (self explanatory parameters are not described):
+            sheet           -   name of the excel worksheet
+            left, top       -   The initial coordinates of the new object (in points). Ignored, charts are anchored at A1
+            width, height   -   The initial size of the new object, in points.
+        """
+
+        self._sheet(sheet)
+        Chart = {"sheet": sheet, "width": width, "height": height, "source": None}
+        self.charts.append(Chart)
+        return Chart
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+    def plotdata(self, sheet, dataRanges, chartObject, gallery, format=None, plotBy=None,
+                        categoryLabels=1, seriesLabels=0, hasLegend=None, title=None,
+                        categoryTitle=None, valueTitle=None, extraTitle=None):
+
+        """Plots data as a line chart. Only a single data range, plotted by columns, is supported.
+
+        Description of parameters:
+            sheet       -   name of the excel worksheet containing the data
+            dataRanges  -   tuple of tuples ((topRow, leftCol, bottomRow, rightCol),). Range of data in excel worksheet to be plotted.
+            chartObject -   Chart object returned by insertchart method.
+            For remaining parameters refer UseExcel.plotdata
+        """
+
+        self._sheet(sheet)
+        if gallery != xlLine:
+            raise ValueError("Only line charts are supported by UseWorkbook")
+        (topRow, leftCol, bottomRow, rightCol) = dataRanges[0]
+        chartObject["source"] = (sheet, topRow, leftCol, bottomRow, rightCol)
+        chartObject["categoryLabels"] = categoryLabels
+        chartObject["seriesLabels"] = seriesLabels
+        chartObject["hasLegend"] = hasLegend
+        chartObject["title"] = title
+        chartObject["categoryTitle"] = categoryTitle
+        chartObject["valueTitle"] = valueTitle
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  GenSarData creates synthetic sar data for the benchmarks: a sar -A text file (in the sysstat 9
+#               layout that SarParser reads) for each host for each day, and optionally a sar2xls-shaped .xls or
+#               .xlsx workbook of each one. The number of hosts, days, CPUs, block devices and network
+#               interfaces, and the sample interval, can all be set, so the same ini files can be run against
+#               data of any size.
+#
+#               The workbooks are written straight from the generated samples (with xlwt or openpyxl), not by
+#               parsing the sar files, so the .xls and .xlsx benchmarks don't depend on SarParser.
+#
+#               The values are random walks from a seeded random number generator, so the same settings always
+#               give the same files. Each host starts sampling a second after the one before it, as real hosts
+#               rarely start their sa collectors at exactly the same time.
+#
+#               e.g.    GenSarData.py -o /var/tmp/bench --hosts 4 --days 2 --interval 60 --format xls
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Write the workbooks from the samples with xlwt and openpyxl, rather than through SarParser
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import random
+import datetime
+from collections import OrderedDict
+from optparse import OptionParser
+
+Formats = ("sar", "xls", "xlsx")
+DefaultStartDate = "2012-03-01"
+SecondsPerDay = 86400
+MaxXlsRows = 65536
+KernelVersion = "2.6.32-71.el6.x86_64"
+#
+# The sections of the sar file, in the order sar -A writes them: (sar2xls sheet name, instance heading or None,
+# headings, the headings sar2xls translates them into, and for each heading the (lowest, highest, biggest step)
+# of its random walk). The sections with an instance heading have a sheet for each instance ("Network - eth0")
+#
+CPUHeadings = ("%user", "%nice", "%system", "%iowait", "%steal")
+CPUSheetHeadings = ("% User Level inc. vCPU", "% User Level (nice)", "% System Level (inc. interrupts)",
+                    "% Idle Waiting on I/O (IOwait)", "% Time Involuntary Waiting on Another vCPU", "% Idle", "% Utilisation")
+Sections = (
+    ("Processes", None, ("proc/s", "cswch/s"),
+        ("Processes Created/Sec", "Context Switches/Sec"),
+        ((0, 50, 5), (100, 20000, 500))),
+    ("Paging", None, ("pgpgin/s", "pgpgout/s", "fault/s", "majflt/s", "pgfree/s", "pgscank/s", "pgscand/s", "pgsteal/s", "%vmeff"),
+        ("KB Paged In/Sec", "KB Paged Out/Sec", "Total Page Faults/Sec", "Major Faults/Sec", "Pages Added to Free List/Sec",
+         "Pages Scanned by kswapd/Sec", "Pages Scanned Directly/Sec", "Pages Reclaimed from Cache/Sec", "% Efficiency of Page Reclaim"),
+        ((0, 5000, 200), (0, 8000, 300), (0, 20000, 800), (0, 50, 3), (0, 30000, 900), (0, 500, 40),
+         (0, 200, 20), (0, 600, 40), (0, 100, 5))),
+    ("Total IO", None, ("tps", "rtps", "wtps", "bread/s", "bwrtn/s"),
+        ("Transfers/Sec", "Read Transfers/Sec", "Write Transfers/Sec", "Blocks Read/Sec", "Blocks Written/Sec"),
+        ((0, 2000, 60), (0, 1000, 30), (0, 1000, 30), (0, 40000, 1500), (0, 40000, 1500))),
+    ("Memory Utilisation", None, ("kbmemfree", "kbmemused", "%memused", "kbbuffers", "kbcached", "kbcommit", "%commit"),
+        ("Free Memory KB", "Used Memory KB", "% Memory Used", "Kernel Buffers KB", "Data Cache KB",
+         "KB Required for Current Workload", "% Memory Required for Current Workload"),
+        ((100000, 8000000, 50000), (8000000, 16000000, 50000), (50, 99, 1), (10000, 500000, 5000),
+         (100000, 6000000, 40000), (1000000, 20000000, 80000), (10, 150, 2))),
+    ("Swap Utilisation", None, ("kbswpfree", "kbswpused", "%swpused", "kbswpcad", "%swpcad"),
+        ("Free Swap Space KB", "Used Swap Space KB", "% Swap Used", "Cached Swap KB", "% Cached Swap/Used Swap"),
+        ((1000000, 4000000, 10000), (0, 3000000, 10000), (0, 75, 1), (0, 100000, 1000), (0, 20, 1))),
+    ("Load Average", None, ("runq-sz", "plist-sz", "ldavg-1", "ldavg-5", "ldavg-15"),
+        ("Run Queue Length", "No. of Processes in List", "System Load Avg. Last Min.", "System Load Avg. Last 5 Mins.",
+         "System Load Avg. Last 15 Mins."),
+        ((0, 20, 2), (100, 800, 10), (0, 16, 0.5), (0, 16, 0.3), (0, 16, 0.1))),
+    ("Network", "IFACE", ("rxpck/s", "txpck/s", "rxkB/s", "txkB/s", "rxcmp/s", "txcmp/s", "rxmcst/s"),
+        ("Pkts Recv'd/Sec", "Pkts Trans'd/Sec", "KBytes Recv'd/Sec", "KBytes Trans'd/Sec", "Compressed Pkts Recv'd/Sec",
+         "Compressed Pkts Trans'd/Sec", "Multicast Pkts Recv'd/Sec"),
+        ((0, 50000, 2000), (0, 50000, 2000), (0, 60000, 2500), (0, 60000, 2500), (0, 0, 0), (0, 0, 0), (0, 10, 1))),
+    ("Net Errors", "IFACE", ("rxerr/s", "txerr/s", "coll/s", "rxdrop/s", "txdrop/s", "txcarr/s", "rxfram/s", "rxfifo/s", "txfifo/s"),
+        ("Bad Pkts Recv'd/Sec", "Trans Errors/Sec", "Collisions/Sec", "Recv Pkts Dropped/Sec", "Trans Pkts Dropped/Sec",
+         "Trans Carrier Errors/Sec", "Recv Frame Alignment Errors/Sec", "Recv FIFO Overrun Errors/Sec",
+         "Trans FIFO Overrun Errors/Sec"),
+        ((0, 2, 0.2), (0, 2, 0.2), (0, 0, 0), (0, 5, 0.5), (0, 0, 0), (0, 0, 0), (0, 1, 0.1), (0, 0, 0), (0, 0, 0))),
+    ("IO", "DEV", ("tps", "rd_sec/s", "wr_sec/s", "avgrq-sz", "avgqu-sz", "await", "svctm", "%util"),
+        ("Device Transfers/Sec", "Sectors Read/Sec", "Sectors Written/Sec", "Average Request Size (Sectors)",
+         "Average Queue Length", "Average I/O Time inc Wait(ms)", "Average I/O Svc Time (unreliable)", "% Bandwidth Utilisation"),
+        ((0, 1000, 40), (0, 20000, 800), (0, 20000, 800), (8, 512, 16), (0, 30, 1), (0, 200, 8), (0, 20, 1), (0, 100, 4))),
+    )
+#
+# The order sar2xls creates the sheets in (which isn't the order sar writes the sections in)
+#
+SheetOrder = ("Processes", "CPU", "Paging", "Memory Utilisation", "Swap Utilisation", "Load Average", "Network",
+              "Net Errors", "Total IO", "IO")
+
+#-------------------------------------------------------------------------------------------------------------
+def SampleTimes(Interval, Offset=0):
+
+    """Returns a list of the sample times of a day, in seconds since midnight. Like sa1, the day starts at
+    00:00:01 (plus Offset seconds), with the first sample one Interval later
+    """
+
+    return range(1 + Offset + Interval, SecondsPerDay, Interval)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def SarTime(Seconds):
+
+    """Returns a time of day, in seconds, as sysstat 9 writes it (hh:mm:ss AM)"""
+
+    return (datetime.datetime(2000, 1, 1) + datetime.timedelta(seconds=Seconds)).strftime("%I:%M:%S %p")
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def SheetTime(Seconds):
+
+    """Returns a time of day, in seconds, as sar2xls writes it to the Time column (HH:MM:SS)"""
+
+    return (datetime.datetime(2000, 1, 1) + datetime.timedelta(seconds=Seconds)).strftime("%H:%M:%S")
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Rounded(Value):
+
+    """Returns a value as it reads back from the sar file, which has 2 decimal places"""
+
+    return float("%.2f" % Value)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def RandomWalk(Generator, Samples, Lowest, Highest, Step):
+
+    """Returns a list of Samples values wandering between Lowest and Highest, by up to Step each sample"""
+
+    Value = Generator.uniform(Lowest, Highest)
+    Values = []
+    for Sample in xrange(Samples):
+        Value = min(Highest, max(Lowest, Value + Generator.uniform(-Step, Step)))
+        Values.append(Value)
+    return Values
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def CPUValues(Generator, Samples):
+
+    """Returns a list of rows of %user, %nice, %system, %iowait, %steal and %idle, which add up to 100"""
+
+    Busy = zip(*[RandomWalk(Generator, Samples, 0, Highest, Step)
+                 for (Highest, Step) in ((60, 4), (5, 0.5), (25, 2), (10, 1), (2, 0.2))])
+    return [Row + (max(0.0, 100 - sum(Row)),) for Row in Busy]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def SarSamples(HostName, SarDate, Interval, CPUs=2, Devices=2, Interfaces=2, Seed=0, Offset=0):
+
+    """Generates the samples of one host for one day. Returns a tuple of (the time sampling started, list of the
+    sample times, list of the rows of values of each CPU, list of (section, list of (instance, rows of values))
+    for the rest of the Sections), with the times in seconds since midnight.
+    Description of parameters (self explanatory parameters are not described):
+        HostName    -   the host's FQDN
+        SarDate     -   the date, as YYYY-MM-DD
+        Interval    -   the sample interval in seconds
+        Seed        -   seed for the random values
+        Offset      -   seconds to delay the first sample by
+    """
+
+    Generator = random.Random("%s %s %d" % (HostName, SarDate, Seed))
+    Times = SampleTimes(Interval, Offset)
+    AllCPUs = [CPUValues(Generator, len(Times)) for CPU in range(CPUs)]
+    SectionValues = []
+    for Section in Sections:
+        if Section[1] == "IFACE":
+            Instances = ["lo"] + ["eth%d" % Interface for Interface in range(Interfaces)]
+        elif Section[1] == "DEV":
+            Instances = ["dev8-%d" % (16 * Device) for Device in range(Devices)]
+        else:
+            Instances = [None]
+        SectionValues.append((Section, [(Instance, zip(*[RandomWalk(Generator, len(Times), *Walk) for Walk in Section[4]]))
+                                        for Instance in Instances]))
+    return (1 + Offset, Times, AllCPUs, SectionValues)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def AllCPURows(AllCPUs):
+
+    """Returns the rows of the "all" CPU, the average of the rows of each CPU"""
+
+    return [[sum(Row[Column] for Row in Rows) / len(AllCPUs) for Column in range(len(CPUHeadings) + 1)]
+            for Rows in zip(*AllCPUs)]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def SarLines(HostName, SarDate, Samples):
+
+    """Generates the lines of a synthetic sar -A text file for one host for one day.
+    Description of parameters (self explanatory parameters are not described):
+        HostName    -   the host's FQDN
+        SarDate     -   the date, as YYYY-MM-DD
+        Samples     -   the host's samples for the day, from SarSamples
+    """
+
+    (Start, Times, AllCPUs, SectionValues) = Samples
+    Times = [SarTime(Time) for Time in Times]
+    Start = SarTime(Start)
+    Date = datetime.datetime.strptime(SarDate, "%Y-%m-%d")
+    #
+    # SarParser (like sar2xls) reads the date in the first line as DD/MM/YY
+    #
+    yield "Linux %s (%s) \t%s \t_x86_64_\t(%d CPU)" % (KernelVersion, HostName, Date.strftime("%d/%m/%y"), len(AllCPUs))
+    yield ""
+    #
+    # CPU, the "all" rows followed by a row for each CPU at each sample time
+    #
+    yield "%s     CPU " % Start + " ".join("%9s" % Heading for Heading in CPUHeadings + ("%idle",))
+    Averages = [0.0] * (len(CPUHeadings) + 1)
+    for (Sample, (Time, All)) in enumerate(zip(Times, AllCPURows(AllCPUs))):
+        Averages = [Total + Value for (Total, Value) in zip(Averages, All)]
+        yield "%s     all " % Time + " ".join("%9.2f" % Value for Value in All)
+        for CPU in range(len(AllCPUs)):
+            yield "%s %7d " % (Time, CPU) + " ".join("%9.2f" % Value for Value in AllCPUs[CPU][Sample])
+    yield "Average:        all " + " ".join("%9.2f" % (Total / max(len(Times), 1)) for Total in Averages)
+    #
+    # The rest of the sections, with a set of rows for each network interface or block device
+    #
+    for ((SheetName, InstanceHeading, Headings, SheetHeadings, Walks), Instances) in SectionValues:
+        yield ""
+        Header = "%s %9s " % (Start, InstanceHeading) if InstanceHeading else "%s " % Start
+        yield Header + " ".join("%9s" % Heading for Heading in Headings)
+        for (Sample, Time) in enumerate(Times):
+            for (Instance, Values) in Instances:
+                Prefix = "%s %9s " % (Time, Instance) if Instance else "%s " % Time
+                yield Prefix + " ".join("%9.2f" % Value for Value in Values[Sample])
+        for (Instance, Values) in Instances:
+            Prefix = "Average: %9s " % Instance if Instance else "Average: "
+            yield Prefix + " ".join("%9.2f" % (sum(Column) / max(len(Column), 1)) for Column in zip(*Values))
+    yield ""
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def BookSheets(HostName, SarDate, Samples):
+
+    """Returns the sheets that sar2xls creates from the sar file of a host's samples for a day, as an ordered
+    dictionary of sheet name -> list of rows: an Overview sheet, then a sheet for each set of statistics, each
+    with the headings in row 1, row 2 empty, and the data from row 3. The values are rounded as they are in the
+    sar file.
+    Description of parameters (self explanatory parameters are not described):
+        HostName    -   the host's FQDN
+        SarDate     -   the date, as YYYY-MM-DD
+        Samples     -   the host's samples for the day, from SarSamples
+    """
+
+    (Start, Times, AllCPUs, SectionValues) = Samples
+    Times = [SheetTime(Time) for Time in Times]
+    Date = datetime.datetime.strptime(SarDate, "%Y-%m-%d")
+    Groups = dict((Name, []) for Name in SheetOrder)
+    CPURows = []
+    for (Time, All) in zip(Times, AllCPURows(AllCPUs)):
+        All = [Rounded(Value) for Value in All]
+        CPURows.append([Time] + All + [Rounded(100 - All[-1])])
+    Groups["CPU"].append(("CPU - all", ["Time"] + list(CPUSheetHeadings), CPURows))
+    for ((SheetName, InstanceHeading, Headings, SheetHeadings, Walks), Instances) in SectionValues:
+        for (Instance, Values) in Instances:
+            Rows = [[Time] + [Rounded(Value) for Value in Row] for (Time, Row) in zip(Times, Values)]
+            Groups[SheetName].append((SheetName + " - " + Instance if Instance else SheetName, ["Time"] + list(SheetHeadings), Rows))
+    Sheets = OrderedDict()
+    Sheets["Overview"] = [[None], ["Performance Details for system: " + HostName], [None], ["Kernel: Linux " + KernelVersion],
+                          [None], ["Statistics for " + SarDate], [None], ["Report Generated: " + Date.strftime("%a %b %d %H:%M:%S %Y")]]
+    for Name in SheetOrder:
+        for (SheetName, Headings, Rows) in Groups[Name]:
+            Sheets[SheetName] = [Headings, [None] * len(Headings)] + Rows
+    return Sheets
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def WriteSarFile(fileName, HostName, SarDate, Samples):
+
+    """Write a synthetic sar -A text file. Takes the same arguments as SarLines"""
+
+    File = open(fileName, "wb")
+    try:
+        for Line in SarLines(HostName, SarDate, Samples):
+            File.write(Line + "\n")
+    finally:
+        File.close()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def WriteWorkbook(bookFile, sheets):
+
+    """Write the sheets of a workbook to a .xls file with xlwt, or a .xlsx file with openpyxl (from the extension
+    of bookFile). Raises ValueError if a sheet has too many rows for a .xls file.
+    Description of parameters (self explanatory parameters are not described):
+        sheets      -   ordered dictionary of sheet name -> list of rows, from BookSheets
+    """
+
+    if os.path.splitext(bookFile)[1].lower() == ".xls":
+        import xlwt
+        Book = xlwt.Workbook()
+        for (SheetName, Rows) in sheets.items():
+            if len(Rows) > MaxXlsRows:
+                raise ValueError("Sheet \"" + SheetName + "\" is too long for a .xls file (more than "
+                                 + str(MaxXlsRows) + " rows), use xlsx or a longer interval instead")
+            Sheet = Book.add_sheet(SheetName)
+            for (Row, Values) in enumerate(Rows):
+                for (Col, Value) in enumerate(Values):
+                    if Value is not None:
+                        Sheet.write(Row, Col, Value)
+        Book.save(bookFile)
+    else:
+        import openpyxl
+        Book = openpyxl.Workbook(write_only=True)
+        for (SheetName, Rows) in sheets.items():
+            Sheet = Book.create_sheet(SheetName)
+            for Values in Rows:
+                Sheet.append(Values)
+        Book.save(bookFile)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def GenerateData(directory, hosts=2, days=1, interval=600, cpus=2, devices=2, interfaces=2, format="sar",
+                 startDate=DefaultStartDate, seed=0):
+
+    """Create the sar files (and workbooks) for a set of hosts and days in a directory. Files that are already
+    there are left alone, so data that's been generated once can be used again. Returns a list of the files
+    that GenGraphs is to read (sar files, or workbooks), ordered by host then date.
+    Description of parameters (self explanatory parameters are not described):
+        format      -   sar for sar text files only, or xls or xlsx for workbooks as well
+    """
+
+    if format not in Formats:
+        raise ValueError("format must be one of " + ", ".join(Formats) + ", not \"" + str(format) + "\"")
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    Start = datetime.datetime.strptime(startDate, "%Y-%m-%d")
+    Files = []
+    for Host in range(hosts):
+        HostName = "bench%02d.example.com" % (Host + 1)
+        for Day in range(days):
+            SarDate = (Start + datetime.timedelta(days=Day)).strftime("%Y-%m-%d")
+            BaseName = os.path.join(directory, "%s-%s" % (HostName.split(".")[0], SarDate))
+            SarFile = BaseName + ".sar"
+            BookFile = BaseName + "." + format
+            Samples = None
+            if not os.path.isfile(SarFile):
+                Samples = SarSamples(HostName, SarDate, interval, cpus, devices, interfaces, seed, Host)
+                WriteSarFile(SarFile, HostName, SarDate, Samples)
+            if format == "sar":
+                Files.append(SarFile)
+                continue
+            if not os.path.isfile(BookFile):
+                if Samples is None:
+                    Samples = SarSamples(HostName, SarDate, interval, cpus, devices, interfaces, seed, Host)
+                WriteWorkbook(BookFile, BookSheets(HostName, SarDate, Samples))
+            Files.append(BookFile)
+    return Files
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def main():
+    usage = "usage: %prog -o directory [--hosts hosts] [--days days] [--interval seconds] [--cpus cpus]"
+    usage += " [--devices devices] [--interfaces interfaces] [--format sar|xls|xlsx] [--start-date YYYY-MM-DD] [--seed seed]"
+
+    parser = OptionParser(usage=usage)
+    parser.add_option("-o", "--output", dest="Directory",
+                        help="directory to create the files in")
+    parser.add_option("--hosts", type="int", dest="Hosts", default=2,
+                        help="number of hosts (default 2)")
+    parser.add_option("--days", type="int", dest="Days", default=1,
+                        help="number of days for each host (default 1)")
+    parser.add_option("--interval", type="int", dest="Interval", default=600,
+                        help="sample interval in seconds (default 600)")
+    parser.add_option("--cpus", type="int", dest="CPUs", default=2,
+                        help="number of CPUs (default 2)")
+    parser.add_option("--devices", type="int", dest="Devices", default=2,
+                        help="number of block devices (default 2)")
+    parser.add_option("--interfaces", type="int", dest="Interfaces", default=2,
+                        help="number of network interfaces, as well as lo (default 2)")
+    parser.add_option("--format", type="choice", choices=Formats, dest="Format", default="sar",
+                        help="sar for sar text files only, or xls or xlsx for workbooks as well (default sar)")
+    parser.add_option("--start-date", dest="StartDate", default=DefaultStartDate,
+                        help="date of the first day (default " + DefaultStartDate + ")")
+    parser.add_option("--seed", type="int", dest="Seed", default=0,
+                        help="seed for the random values (default 0)")
+
+    (options, args) = parser.parse_args()
+
+    if not options.Directory:
+        parser.error("must specify an output directory with -o")
+
+    for (Name, Value) in (("--hosts", options.Hosts), ("--days", options.Days), ("--interval", options.Interval),
+                          ("--cpus", options.CPUs)):
+        if Value < 1:
+            parser.error(Name + " must be at least 1")
+
+    for (Name, Value) in (("--devices", options.Devices), ("--interfaces", options.Interfaces)):
+        if Value < 0:
+            parser.error(Name + " can't be negative")
+
+    try:
+        datetime.datetime.strptime(options.StartDate, "%Y-%m-%d")
+    except ValueError:
+        parser.error("--start-date must be YYYY-MM-DD")
+
+    for File in GenerateData(options.Directory, options.Hosts, options.Days, options.Interval, options.CPUs,
+                             options.Devices, options.Interfaces, options.Format, options.StartDate, options.Seed):
+        print File
+
+
+if __name__ == "__main__":
+    main()
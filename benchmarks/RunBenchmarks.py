@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  RunBenchmarks times GenGraphs against synthetic sar data (from GenSarData) at several scales,
+#               with each of the ini files in benchmarks/ini, and writes the results as JSON so that runs on
+#               different commits can be compared.
+#
+#               Each ini file is run through the same steps that GenGraphs takes, timing each stage on its own:
+#
+#               parse       -   compiling the ini file into a chart plan
+#               open        -   opening each source book and reading its sheets into columns
+#               extract     -   loading the sheets into a SheetCache, checking the plan against them and
+#                               pulling out the time column of each chart
+#               arithmetic  -   working out each book's series with SarSeries (the Add()s and
+#                               CellDivisionFactors), and building the chart data columns
+#               write       -   writing the chart data sheets to a workbook, without charts, and saving it
+#               chart       -   writing the chart workbook as GenGraphs does, data sheets and charts
+#               stream      -   the same, with --stream (if XlsxWriter is installed)
+#               total       -   the whole of ProcessIniFile, end to end
+#
+#               The book cache isn't used, so every run reads the books. Stitched ini files are only timed end
+#               to end. Each stage is run --repeat times, and the minimum and median are kept as well as
+#               each run's time.
+#
+#               e.g.    RunBenchmarks.py --scales small,medium --format xls -o before.json
+#                       RunBenchmarks.py --scales small,medium --format xls -o after.json --compare before.json
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   Take the system name and sar date from SarSeries.BookDetails
+#           0.3     18-Oct-26   agent   ChartPlan no longer keeps compiled plans, so there are none to clear
+#           0.4     18-Oct-26   agent   Pass AlignSourceBooks its manifest (none), so aligned ini files run
+#           0.5     18-Oct-26   agent   The arithmetic stage builds each book's columns with GenGraphs.BookColumns
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+import gc
+import json
+import time
+import glob
+import platform
+import StringIO
+import shutil
+import tempfile
+import subprocess
+from optparse import OptionParser, Values
+from collections import OrderedDict
+from timeit import default_timer
+
+BenchmarkDirectory = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BenchmarkDirectory, os.pardir))
+
+import GenGraphs
+from GenGraphs import ReadSourceBook, ColumnsToRows, WriteChart, NewChartBook, FinishChartBook, \
+    AlignSourceBooks, ChartDataColumns, BookColumns, ProcessIniFile
+from ChartPlan import ParseIniFile, ValidatePlan
+from SheetCache import SheetCache
+from UseWorkbook import UseWorkbook
+from Stitch import ToTimesOfDay
+from StreamWorkbook import Available as StreamAvailable
+from GenSarData import GenerateData, Formats
+
+#
+# The scales to run at: the arguments to GenerateData for each one
+#
+Scales = OrderedDict((
+    ("small",   {"hosts": 2, "days": 1, "interval": 600}),
+    ("medium",  {"hosts": 4, "days": 1, "interval": 60}),
+    ("large",   {"hosts": 4, "days": 2, "interval": 10}),
+    ))
+DefaultScales = "small,medium"
+Stages = ("parse", "open", "extract", "arithmetic", "write", "chart", "stream", "total")
+IniDirectory = os.path.join(BenchmarkDirectory, "ini")
+
+#-------------------------------------------------------------------------------------------------------------
+def GenGraphsOptions(**kwargs):
+
+    """Returns the options that GenGraphs' functions expect from its command line: no book cache or manifest,
+    one book opened at a time, and no rendering. kwargs override any of them
+    """
+
+    Options = {"BeginTime": None, "EndTime": None, "PerCPU": False, "NoCache": True, "RebuildCache": False,
+               "OpenWorkers": 1, "RenderDirectory": None, "RenderFormat": "png", "RenderWorkers": 1, "Stream": False,
+               "NoManifest": True, "RebuildAll": False}
+    Options.update(kwargs)
+    return Values(Options)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def GitCommit():
+
+    """Returns the commit the repository is at, or None if it can't be found"""
+
+    try:
+        Process = subprocess.Popen(["git", "rev-parse", "HEAD"], cwd=os.path.join(BenchmarkDirectory, os.pardir),
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (Output, Errors) = Process.communicate()
+    except OSError:
+        return None
+    if Process.returncode != 0:
+        return None
+    return Output.strip()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def WriteIniFile(template, iniFile, saveFileName, sourceFiles):
+
+    """Write an ini file from one of the templates in benchmarks/ini, filling in $SAVEFILENAME and $FILES"""
+
+    Text = open(template, "rb").read()
+    Files = "\n".join("File" + str(Number + 1) + "=" + SourceFile for (Number, SourceFile) in enumerate(sourceFiles))
+    File = open(iniFile, "wb")
+    try:
+        File.write(Text.replace("$SAVEFILENAME", saveFileName).replace("$FILES", Files))
+    finally:
+        File.close()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Timed(Function, *args):
+
+    """Run a function, after a garbage collection. Returns a tuple of (seconds taken, the function's result)"""
+
+    gc.collect()
+    Start = default_timer()
+    Result = Function(*args)
+    return (default_timer() - Start, Result)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def OpenBooks(Plan, Options):
+
+    """The open stage: read the sheets each chart needs from every source book"""
+
+    SheetNames = Plan.sheetnames()
+    return [ReadSourceBook((SourceFile, UseWorkbook, SheetNames, Options, None)) for SourceFile in Plan.SourceFiles]
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ExtractColumns(Plan, SourceBookData):
+
+    """The extract stage: load the books into a SheetCache, check the plan against them, and pull out the time
+    column of each chart. Returns a tuple of (Cache, SourceBooks, {chart number -> time column})
+    """
+
+    Cache = SheetCache()
+    SheetNames = Plan.sheetnames()
+    SourceBooks = []
+    FirstSheetName = Plan.Charts[0].Series[0].Sources[0].Sheet
+    for (SourceFile, Sheets) in SourceBookData:
+        for SheetName in SheetNames:
+            Cache.loadcolumns(SourceFile, SheetName, Sheets.get(SheetName))
+        SourceBooks.append({"FileName": SourceFile, "MaxRow": Cache.lastrow(SourceFile, FirstSheetName), "Stored": False})
+    ValidatePlan(Plan, Cache, [SourceBook["FileName"] for SourceBook in SourceBooks])
+    Extracted = {}
+    for ThisChart in Plan.Charts:
+        TimeSheetName = ThisChart.Series[0].Sources[0].Sheet
+        Extracted[ThisChart.Number] = Cache.column(SourceBooks[0]["FileName"], TimeSheetName, 1, firstRow=1)
+    return (Cache, SourceBooks, Extracted)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def ChartArithmetic(Plan, Cache, SourceBooks, Extracted):
+
+    """The arithmetic stage: work out the series of each book, as GenGraphs does, and build the columns of each
+    chart data sheet (or line the books up on their sample times, if the plan isn't aligned by row). Returns a
+    list of (chart, chart data columns, last row) tuples
+    """
+
+    Charts = []
+    for ThisChart in Plan.Charts:
+        if Plan.Align != "row":
+            ChartColumns = ChartDataColumns(AlignSourceBooks(Plan, ThisChart, Cache, SourceBooks, None), ToTimesOfDay)
+            Charts.append((ThisChart, ChartColumns, max([len(Column) for Column in ChartColumns])))
+            continue
+        ChartColumns = [Extracted[ThisChart.Number]]
+        for SourceBook in SourceBooks:
+            ChartColumns += BookColumns(Cache, SourceBook, ThisChart)
+        Charts.append((ThisChart, ChartColumns, max([SourceBook["MaxRow"] for SourceBook in SourceBooks])))
+    return Charts
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def WriteDataSheets(Charts, saveFileName):
+
+    """The write stage: write each chart data sheet to a new workbook, with bold headings, and save it"""
+
+    NewxlFile = UseWorkbook()
+    for (ThisChart, ChartColumns, MaxRow) in Charts:
+        NewxlFile.addnewworksheetafter("Sheet1", ThisChart.SheetTitle)
+        NewxlFile.setrange(ThisChart.SheetTitle, 1, 1, ColumnsToRows(ChartColumns))
+        NewxlFile.setrangefont(ThisChart.SheetTitle, (1, 2, 1, len(ChartColumns)), ("Bold",), "Arial", 10)
+    NewxlFile.deleteworksheet("Sheet1")
+    NewxlFile.save(saveFileName)
+    NewxlFile.close()
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def WriteChartBook(Plan, Charts, Options):
+
+    """The chart (and stream) stage: write the chart workbook as GenGraphs does"""
+
+    NewxlFile = NewChartBook(Plan, UseWorkbook, Options)
+    for (ThisChart, ChartColumns, MaxRow) in Charts:
+        WriteChart(NewxlFile, ThisChart, ChartColumns, MaxRow)
+    FinishChartBook(NewxlFile, Plan.SaveFileName)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def RunGenGraphs(IniFile, Options):
+
+    """Run all of GenGraphs for an ini file, with its output thrown away. Raises RuntimeError if it fails"""
+
+    StdOut = sys.stdout
+    sys.stdout = StringIO.StringIO()
+    try:
+        Status = ProcessIniFile(IniFile, UseWorkbook, Options)
+        Output = sys.stdout.getvalue()
+    finally:
+        sys.stdout = StdOut
+    if Status != 0:
+        raise RuntimeError(IniFile + " failed:\n" + Output)
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def BenchmarkIniFile(IniFile, WorkDirectory, Repeat):
+
+    """Time each stage of an ini file Repeat times. Returns an ordered dictionary of stage -> list of times"""
+
+    Times = OrderedDict((Stage, []) for Stage in Stages)
+    Options = GenGraphsOptions()
+    Name = os.path.splitext(os.path.basename(IniFile))[0]
+    for Run in range(Repeat):
+        (Seconds, Plan) = Timed(ParseIniFile, IniFile)
+        Times["parse"].append(Seconds)
+        if not Plan.Stitch:
+            (Seconds, SourceBookData) = Timed(OpenBooks, Plan, Options)
+            Times["open"].append(Seconds)
+            for (SourceFile, Sheets) in SourceBookData:
+                if Sheets is None:
+                    raise RuntimeError("Can't open " + SourceFile)
+            (Seconds, (Cache, SourceBooks, Extracted)) = Timed(ExtractColumns, Plan, SourceBookData)
+            Times["extract"].append(Seconds)
+            SourceBookData = None
+            (Seconds, Charts) = Timed(ChartArithmetic, Plan, Cache, SourceBooks, Extracted)
+            Times["arithmetic"].append(Seconds)
+            Extracted = None
+            (Seconds, Result) = Timed(WriteDataSheets, Charts, os.path.join(WorkDirectory, Name + "-data.xlsx"))
+            Times["write"].append(Seconds)
+            (Seconds, Result) = Timed(WriteChartBook, Plan, Charts, Options)
+            Times["chart"].append(Seconds)
+            if StreamAvailable():
+                (Seconds, Result) = Timed(WriteChartBook, Plan, Charts, GenGraphsOptions(Stream=True))
+                Times["stream"].append(Seconds)
+            Cache = SourceBooks = Charts = None
+        (Seconds, Result) = Timed(RunGenGraphs, IniFile, Options)
+        Times["total"].append(Seconds)
+    return Times
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Summary(Times):
+
+    """Returns a dictionary of the minimum, median and all of a stage's times, or None if it wasn't run"""
+
+    if len(Times) == 0:
+        return None
+    Sorted = sorted(Times)
+    return OrderedDict((("min", Sorted[0]), ("median", Sorted[len(Sorted) // 2]), ("runs", Times)))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Compare(Results, Baseline):
+
+    """Print each stage's median time against the same stage in a baseline results file"""
+
+    if Baseline.get("format") != Results["format"]:
+        print "The baseline charted " + str(Baseline.get("format")) + " files, not " + Results["format"] + " files"
+    print "%-8s %-12s %-11s %10s %10s %8s" % ("Scale", "Ini file", "Stage", "Baseline", "Now", "Ratio")
+    for (ScaleName, Scale) in Results["scales"].items():
+        for (IniName, Ini) in Scale["inis"].items():
+            for (Stage, Timing) in Ini.items():
+                try:
+                    Before = Baseline["scales"][ScaleName]["inis"][IniName][Stage]
+                except KeyError:
+                    continue
+                if Timing is None or Before is None:
+                    continue
+                print "%-8s %-12s %-11s %10.3f %10.3f %8.2f" % (ScaleName, IniName, Stage, Before["median"], Timing["median"],
+                                                                 Timing["median"] / max(Before["median"], 1e-9))
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def main():
+    usage = "usage: %prog [-o results.json] [--scales small,medium,large] [--ini name,...] [--format sar|xls|xlsx]"
+    usage += " [--repeat runs] [--data-dir directory] [--compare baseline.json]"
+
+    parser = OptionParser(usage=usage)
+    parser.add_option("-o", "--output", dest="Output",
+                        help="file to write the results to (default bench-<commit>.json)")
+    parser.add_option("--scales", dest="Scales", default=DefaultScales,
+                        help="scales to run at, from " + ", ".join(Scales.keys()) + " (default " + DefaultScales + ")")
+    parser.add_option("--ini", dest="IniFiles",
+                        help="ini files from benchmarks/ini to run, without .ini (default all of them)")
+    parser.add_option("--format", type="choice", choices=Formats, dest="Format", default="xls",
+                        help="source files to chart, sar text files or xls or xlsx workbooks (default xls)")
+    parser.add_option("--repeat", type="int", dest="Repeat", default=3,
+                        help="number of times to run each stage (default 3)")
+    parser.add_option("--data-dir", dest="DataDirectory", default=os.path.join(tempfile.gettempdir(), "sar2xls-bench"),
+                        help="directory for the generated data, kept between runs (default " \
+                        + os.path.join(tempfile.gettempdir(), "sar2xls-bench") + ")")
+    parser.add_option("--compare", dest="Baseline",
+                        help="results file from an earlier run to compare these results with")
+
+    (options, args) = parser.parse_args()
+
+    if options.Repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    ScaleNames = [Name.strip() for Name in options.Scales.split(",") if Name.strip()]
+    for Name in ScaleNames:
+        if Name not in Scales:
+            parser.error("--scales must be from " + ", ".join(Scales.keys()) + ", not \"" + Name + "\"")
+
+    Templates = OrderedDict((os.path.splitext(os.path.basename(Template))[0], Template)
+                            for Template in sorted(glob.glob(os.path.join(IniDirectory, "*.ini"))))
+    if options.IniFiles:
+        IniNames = [Name.strip() for Name in options.IniFiles.split(",") if Name.strip()]
+        for Name in IniNames:
+            if Name not in Templates:
+                parser.error("there's no " + Name + ".ini in " + IniDirectory)
+        Templates = OrderedDict((Name, Templates[Name]) for Name in IniNames)
+
+    Baseline = None
+    if options.Baseline:
+        try:
+            Baseline = json.load(open(options.Baseline, "rb"))
+        except (IOError, ValueError), Error:
+            parser.error("can't read " + options.Baseline + ": " + str(Error))
+
+    Commit = GitCommit()
+    Results = OrderedDict((("commit", Commit),
+                           ("version", GenGraphs.Version),
+                           ("date", time.strftime("%Y-%m-%d %H:%M:%S")),
+                           ("python", platform.python_version()),
+                           ("platform", platform.platform()),
+                           ("format", options.Format),
+                           ("repeat", options.Repeat),
+                           ("scales", OrderedDict())))
+    for ScaleName in ScaleNames:
+        Scale = Scales[ScaleName]
+        DataDirectory = os.path.join(options.DataDirectory, "%s-%dh-%dd-%ds" % (ScaleName, Scale["hosts"], Scale["days"], Scale["interval"]))
+        print "Generating " + ScaleName + " data in " + DataDirectory + "..."
+        SourceFiles = GenerateData(DataDirectory, format=options.Format, **Scale)
+        WorkDirectory = tempfile.mkdtemp(prefix="sar2xls-bench-")
+        Results["scales"][ScaleName] = OrderedDict((("config", Scale), ("inis", OrderedDict())))
+        for (Name, Template) in Templates.items():
+            IniFile = os.path.join(WorkDirectory, Name + ".ini")
+            WriteIniFile(Template, IniFile, os.path.join(WorkDirectory, Name + ".xlsx"), SourceFiles)
+            print "Running " + Name + " at " + ScaleName + " scale..."
+            Times = BenchmarkIniFile(IniFile, WorkDirectory, options.Repeat)
+            Results["scales"][ScaleName]["inis"][Name] = OrderedDict((Stage, Summary(Times[Stage])) for Stage in Stages)
+            print "    " + ", ".join("%s %.3fs" % (Stage, Results["scales"][ScaleName]["inis"][Name][Stage]["min"])
+                                     for Stage in Stages if Times[Stage])
+        shutil.rmtree(WorkDirectory)
+
+    Output = options.Output or "bench-" + (Commit[:10] if Commit else "unknown") + ".json"
+    File = open(Output, "wb")
+    try:
+        json.dump(Results, File, indent=2)
+    finally:
+        File.close()
+    print "Results written to " + Output
+    if Baseline:
+        Compare(Results, Baseline)
+
+
+if __name__ == "__main__":
+    main()
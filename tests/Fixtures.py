@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  What the tests share: the repository directory on the path (so the tests import the modules
+#               just as the tools do), and small synthetic sar files and sar2xls-shaped sheets to test with.
+#
+#               Run the tests from the top of the repository with:
+#
+#                   python -m unittest discover -s tests
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import sys
+from collections import OrderedDict
+
+RepoDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, RepoDirectory)
+sys.path.insert(0, os.path.join(RepoDirectory, "benchmarks"))
+
+from GenSarData import SarSamples, WriteSarFile
+
+#-------------------------------------------------------------------------------------------------------------
+def SarBook(directory, hostName, sarDate, interval=3600, offset=0):
+
+    """Write a synthetic sar file for a host for a day (one CPU, one block device, lo and eth0), and return its
+    file name
+    """
+
+    FileName = os.path.join(directory, "%s-%s.sar" % (hostName.split(".")[0], sarDate))
+    WriteSarFile(FileName, hostName, sarDate, SarSamples(hostName, sarDate, interval, 1, 1, 1, 0, offset))
+    return FileName
+#-------------------------------------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------------------------------------
+def Sheets(hostName, sarDate, times, **columns):
+
+    """Returns the sheets of a book as GenGraphs reads them (ordered dictionary of sheet name -> list of columns),
+    with an Overview sheet and one "Test" sheet of a Time column and the given columns (heading -> list of values)
+    """
+
+    Book = OrderedDict()
+    Book["Overview"] = [[None, "Performance Details for system: " + hostName, None, "Kernel: Linux 2.6.32",
+                         None, "Statistics for " + sarDate]]
+    Book["Test"] = [["Time", None] + list(times)] + [[Heading, None] + list(Values)
+                                                     for (Heading, Values) in sorted(columns.items())]
+    return Book
+#-------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of Align: merging and matching the sample times of several tracks.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import unittest
+import numpy
+import Fixtures
+from Align import OuterRows, NearestRows, AlignTracks
+
+NaN = numpy.nan
+
+
+def Times(*Seconds):
+    return numpy.array(Seconds, dtype=numpy.float64)
+
+
+class OuterRowsTests(unittest.TestCase):
+
+    def test_merge(self):
+        (Merged, Positions) = OuterRows([Times(0, 10, 20), Times(5, 10, 25), Times()])
+        self.assertEqual(Merged.tolist(), [0, 5, 10, 20, 25])
+        self.assertEqual([Rows.tolist() for Rows in Positions], [[0, 2, 3], [1, 2, 4], []])
+
+    def test_notracks(self):
+        (Merged, Positions) = OuterRows([])
+        self.assertEqual((Merged.tolist(), Positions), ([], []))
+
+
+class NearestRowsTests(unittest.TestCase):
+
+    def test_tolerance(self):
+        Rows = NearestRows(Times(0, 10, 20, 30), Times(1, 12, 29), 2)
+        self.assertEqual(Rows.tolist(), [0, 1, -1, 2])
+
+    def test_nearest(self):
+        #
+        # 14 is nearer 15 than 12 is, and a time can be the nearest for more than one reference time
+        #
+        self.assertEqual(NearestRows(Times(10, 15, 16), Times(12, 14), 5).tolist(), [0, 1, 1])
+
+    def test_empty(self):
+        self.assertEqual(NearestRows(Times(0, 10), Times(), 5).tolist(), [-1, -1])
+        self.assertEqual(NearestRows(Times(), Times(0, 10), 5).tolist(), [])
+
+
+class AlignTracksTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tracks = [(Times(0, 60, 120), [Times(1, 2, 3)]), (Times(30, 90, 121), [Times(4, 5, 6)])]
+
+    def test_row(self):
+        (Aligned, Series) = AlignTracks(self.tracks, "row")
+        self.assertEqual(Aligned.tolist(), [0, 60, 120])
+        self.assertEqual([[Values.tolist() for Values in Track] for Track in Series], [[[1, 2, 3]], [[4, 5, 6]]])
+
+    def test_outer(self):
+        (Aligned, Series) = AlignTracks(self.tracks, "outer")
+        self.assertEqual(Aligned.tolist(), [0, 30, 60, 90, 120, 121])
+        numpy.testing.assert_array_equal(Series[0][0], [1, NaN, 2, NaN, 3, NaN])
+        numpy.testing.assert_array_equal(Series[1][0], [NaN, 4, NaN, 5, NaN, 6])
+
+    def test_nearest(self):
+        (Aligned, Series) = AlignTracks(self.tracks, "nearest", Tolerance=5)
+        self.assertEqual(Aligned.tolist(), [0, 60, 120])
+        numpy.testing.assert_array_equal(Series[1][0], [NaN, NaN, 6])
+
+    def test_resample(self):
+        (Aligned, Series) = AlignTracks(self.tracks, "resample", Interval=60)
+        self.assertEqual(Aligned.tolist(), [0, 60, 120])
+        numpy.testing.assert_array_equal(Series[0][0], [1, 2, 3])
+        numpy.testing.assert_array_equal(Series[1][0], [4, 5, 6])
+        (Aligned, Series) = AlignTracks(self.tracks, "resample", Interval=120)
+        numpy.testing.assert_array_equal(Series[0][0], [1.5, 3])
+
+    def test_badmethod(self):
+        self.assertRaises(ValueError, AlignTracks, self.tracks, "inner")
+
+
+if __name__ == "__main__":
+    unittest.main()
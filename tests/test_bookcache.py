@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of BookCache: encoding sheets into arrays and back, and saving and loading books.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import datetime
+import unittest
+import numpy
+import Fixtures
+from ColumnMath import NumericColumn
+from BookCache import EncodeColumns, DecodeColumns, BookCache, ReadBookSheets
+
+
+class EncodeColumnsTests(unittest.TestCase):
+
+    def roundtrip(self, Columns):
+        return DecodeColumns(*EncodeColumns(Columns))
+
+    def test_mixedcells(self):
+        Column = ["Time", None, u"00:05:01", 1.5, 2, True, False, None, u"caf\xe9",
+                  datetime.datetime(2012, 3, 1, 23, 55, 1, 250), datetime.date(2012, 3, 2),
+                  datetime.time(0, 5, 1, 7)]
+        Decoded = self.roundtrip([Column])
+        self.assertEqual(Decoded, [Column])
+        self.assertEqual([type(Cell) for Cell in Decoded[0][3:7]], [float, float, bool, bool])
+
+    def test_numericcolumn(self):
+        Column = NumericColumn(["% Idle", None], numpy.array([1.0, numpy.nan, 3.25]))
+        (Decoded,) = self.roundtrip([Column])
+        self.assertTrue(isinstance(Decoded, NumericColumn))
+        self.assertEqual(Decoded.head, ["% Idle", None])
+        numpy.testing.assert_array_equal(Decoded.data, Column.data)
+
+    def test_numericlist(self):
+        #
+        # A list of cells whose data cells are all numbers comes back as a NumericColumn
+        #
+        (Decoded,) = self.roundtrip([["Free Memory KB", None, 1.0, None, 2.0]])
+        self.assertTrue(isinstance(Decoded, NumericColumn))
+        numpy.testing.assert_array_equal(Decoded.data, [1.0, numpy.nan, 2.0])
+
+    def test_emptysheets(self):
+        self.assertEqual(self.roundtrip([]), [])
+        self.assertEqual(self.roundtrip([[], ["Heading"]]), [[], ["Heading"]])
+
+    def test_unsupportedcell(self):
+        self.assertRaises(TypeError, EncodeColumns, [["Heading", None, object()]])
+
+
+class BookCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = BookCache(os.path.join(self.directory, "cache"))
+        self.book = os.path.join(self.directory, "book.xlsx")
+        open(self.book, "wb").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_saveandload(self):
+        Sheets = Fixtures.Sheets("web01.example.com", "2012-03-01", ["00:05:01", "00:10:01"], Busy=[1.0, 2.0])
+        Sheets["Unreadable"] = None
+        Key = self.cache.key(self.book)
+        self.assertEqual(self.cache.load(Key), None)
+        self.assertTrue(self.cache.save(Key, Sheets))
+        Loaded = self.cache.load(Key)
+        self.assertEqual(Loaded.keys(), ["Overview", "Test"])
+        self.assertEqual(Loaded["Test"][0], ["Time", None, "00:05:01", "00:10:01"])
+        numpy.testing.assert_array_equal(Loaded["Test"][1].data, [1.0, 2.0])
+        self.assertEqual(self.cache.load(Key, ["Test"]).keys(), ["Test"])
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.stored), (2, 1, 1))
+
+    def test_changedbook(self):
+        Key = self.cache.key(self.book)
+        self.cache.save(Key, Fixtures.Sheets("web01", "2012-03-01", []))
+        with open(self.book, "wb") as File:
+            File.write("changed")
+        self.assertNotEqual(self.cache.key(self.book), Key)
+        self.assertNotEqual(self.cache.key(self.book, "variant"), self.cache.key(self.book))
+
+    def test_missingandunstored(self):
+        self.assertEqual(self.cache.load(self.cache.key(os.path.join(self.directory, "missing.xlsx"))), None)
+        self.assertFalse(self.cache.save(self.cache.key(self.book), {"Test": [["Heading", None, object()]]}))
+        self.assertEqual((self.cache.missing, self.cache.misses, self.cache.unstored), (1, 0, 1))
+        self.assertTrue(self.cache.report().endswith(", 1 couldn't be stored, 1 not found"))
+
+    def test_readbooksheets(self):
+        SarFile = Fixtures.SarBook(self.directory, "web01.example.com", "2012-03-01")
+        Read = ReadBookSheets(SarFile, books=self.cache)
+        Cached = ReadBookSheets(SarFile, ["CPU - all"], books=self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.stored), (1, 1, 1))
+        self.assertEqual(Cached.keys(), ["CPU - all"])
+        for (Column, CachedColumn) in zip(Read["CPU - all"], Cached["CPU - all"]):
+            if isinstance(Column, NumericColumn):
+                numpy.testing.assert_array_equal(Column.data, CachedColumn.data)
+            else:
+                self.assertEqual(Column, CachedColumn)
+
+
+if __name__ == "__main__":
+    unittest.main()
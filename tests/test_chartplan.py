@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of ChartPlan: compiling ini files, the errors in them, keeping compiled plans, and checking
+#               a plan against the books.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+import Fixtures
+import ChartPlan
+from ChartPlan import ParseIniFile, CompileIniFile, ValidatePlan, IniFileError, PlanFile, Source
+from SheetCache import SheetCache
+
+General = "[General]\nSaveFileName=/tmp/graphs.xlsx\n"
+Files = "[Files]\nFile1=/sar/web01-2012-03-01.xls\nFile2=/sar/db01-2012-03-01.xls\n"
+Charts = """[Charts]
+Chart2=Memory
+Chart1=CPU
+[Chart1Titles]
+GraphTitle=CPU Utilisation
+YAxisTitle=%
+[Chart1Data]
+; A comment
+$SYSNAME=CPU - all::% Utilisation
+[Chart2Titles]
+GraphTitle=Memory
+YAxisTitle=MB
+[Chart2Data]
+$SYSNAME Free::1024=Add(Memory Utilisation::Free Memory KB,Memory Utilisation::Data Cache KB)
+[Chart2Options]
+MaxPoints=500
+Downsample=minmax
+Summary=yes
+"""
+
+
+class ParseIniFileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def iniFile(self, text, name="test.ini"):
+        IniFile = os.path.join(self.directory, name)
+        with open(IniFile, "wb") as File:
+            File.write(text)
+        return IniFile
+
+    def assertIniError(self, text, message):
+        try:
+            ParseIniFile(self.iniFile(text))
+        except IniFileError, Error:
+            self.assertTrue(message in str(Error), str(Error))
+        else:
+            self.fail("No IniFileError for " + repr(text))
+
+    def test_plan(self):
+        Plan = ParseIniFile(self.iniFile(General + Files + Charts))
+        self.assertEqual((Plan.SaveFileName, Plan.Stitch, Plan.Align, Plan.Store), ("/tmp/graphs.xlsx", False, "row", None))
+        self.assertEqual(len(Plan.SourceFiles), 2)
+        (CPU, Memory) = Plan.Charts
+        self.assertEqual((CPU.Number, CPU.SheetTitle, CPU.MaxPoints, CPU.Summary), (1, "CPU", None, False))
+        self.assertEqual((Memory.MaxPoints, Memory.Downsample, Memory.Summary), (500, "minmax", True))
+        (Free,) = Memory.Series
+        self.assertEqual((Free.NewColumnHeading, Free.CellDivisionFactor), ("$SYSNAME Free", 1024.0))
+        self.assertEqual(Free.Sources, (Source("Memory Utilisation", "Free Memory KB"),
+                                        Source("Memory Utilisation", "Data Cache KB")))
+        self.assertEqual(Plan.sheetnames(), ["Overview", "CPU - all", "Memory Utilisation"])
+
+    def test_store(self):
+        Plan = ParseIniFile(self.iniFile("[General]\nStore=/sar/fleet.db\nHosts=web01, db01\nFirstDate=2012-03-01\n" + Charts))
+        self.assertEqual((Plan.Store, Plan.Hosts, Plan.FirstDate, Plan.LastDate, Plan.SourceFiles),
+                         ("/sar/fleet.db", ("web01", "db01"), "2012-03-01", None, ()))
+
+    def test_fileerrors(self):
+        self.assertRaises(IniFileError, ParseIniFile, os.path.join(self.directory, "missing.ini"))
+        self.assertIniError(General + "[Files]\nFile1\n" + Charts, "should be key=value")
+        self.assertIniError(General + Charts, "Could not read [Files] section")
+        self.assertIniError(General + Files, "Could not read [Charts] section")
+
+    def test_charterrors(self):
+        self.assertIniError(General + Files + Charts.replace("Chart1=CPU", "Graph1=CPU"), "should be Chartn")
+        self.assertIniError(General + Files + Charts.replace("YAxisTitle=%\n", ""), "Could not read GraphTitle and YAxisTitle")
+        self.assertIniError(General + Files + Charts.replace("$SYSNAME=CPU - all::% Utilisation\n", ""),
+                            "Could not read [Chart1Data] section")
+        self.assertIniError(General + Files + Charts.replace("CPU - all::% Utilisation", "CPU - all"),
+                            "should be Sheet name::Column heading")
+        self.assertIniError(General + Files + Charts.replace("Free::1024", "Free::0"), "can't be zero")
+        self.assertIniError(General + Files + Charts.replace("Free::1024", "Free::KB"), "isn't a number")
+        self.assertIniError(General + Files + Charts.replace("MaxPoints=500", "MaxPoints=lots"), "isn't a whole number")
+        self.assertIniError(General + Files + Charts.replace("Downsample=minmax", "Downsample=median"),
+                            "Downsample in [Chart2Options]")
+        self.assertIniError(General + Files + Charts.replace("Summary=yes", "Summary=perhaps"), "must be yes or no")
+
+    def test_duplicatecharts(self):
+        self.assertIniError(General + Files + Charts.replace("Chart2=Memory", "Chart1=Memory"),
+                            "Chart1 is in [Charts] more than once")
+        self.assertIniError(General + Files + Charts.replace("Chart2=Memory", "Chart2=CPU"),
+                            "Sheet title \"CPU\" is used by more than one chart")
+
+    def test_generalerrors(self):
+        self.assertIniError(General + "Align=inner\n" + Files + Charts, "Align in [General]")
+        self.assertIniError(General + "Tolerance=-1\n" + Files + Charts, "must be at least 0 seconds")
+        self.assertIniError(General + "Interval=soon\n" + Files + Charts, "isn't a number of seconds")
+        self.assertIniError(General + "Stitch=maybe\n" + Files + Charts, "must be yes or no")
+
+    def test_storeerrors(self):
+        self.assertIniError(General + "Store=/sar/fleet.db\n" + Files + Charts, "can't both be used")
+        self.assertIniError(General + "Hosts=web01\n" + Files + Charts, "need a Store to chart from")
+        self.assertIniError("[General]\nStore=/sar/fleet.db\nFirstDate=2012-03-02\nLastDate=2012-03-01\n" + Charts,
+                            "is after LastDate")
+        self.assertIniError("[General]\nStore=/sar/fleet.db\nFirstDate=March\n" + Charts, "should be a date")
+
+
+class CompileIniFileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cacheDirectory = os.path.join(self.directory, "cache")
+        self.iniFile = os.path.join(self.directory, "test.ini")
+        with open(self.iniFile, "wb") as File:
+            File.write(General + Files + Charts)
+        self.parseIniFile = ChartPlan.ParseIniFile
+        self.parsed = []
+        ChartPlan.ParseIniFile = self.parse
+
+    def tearDown(self):
+        ChartPlan.ParseIniFile = self.parseIniFile
+        shutil.rmtree(self.directory)
+
+    def parse(self, IniFile):
+        self.parsed.append(IniFile)
+        return self.parseIniFile(IniFile)
+
+    def test_cached(self):
+        Plan = CompileIniFile(self.iniFile, self.cacheDirectory)
+        self.assertTrue(os.path.isfile(PlanFile(self.iniFile, self.cacheDirectory)))
+        self.assertEqual(CompileIniFile(self.iniFile, self.cacheDirectory), Plan)
+        self.assertEqual(len(self.parsed), 1)
+
+    def test_changed(self):
+        Plan = CompileIniFile(self.iniFile, self.cacheDirectory)
+        with open(self.iniFile, "wb") as File:
+            File.write(General + "Stitch=yes\n" + Files + Charts)
+        Changed = CompileIniFile(self.iniFile, self.cacheDirectory)
+        self.assertTrue(Changed.Stitch and not Plan.Stitch)
+        self.assertEqual(len(self.parsed), 2)
+
+    def test_formatversion(self):
+        CompileIniFile(self.iniFile, self.cacheDirectory)
+        FormatVersion = ChartPlan.FormatVersion
+        ChartPlan.FormatVersion += 1
+        try:
+            CompileIniFile(self.iniFile, self.cacheDirectory)
+        finally:
+            ChartPlan.FormatVersion = FormatVersion
+        self.assertEqual(len(self.parsed), 2)
+
+    def test_damaged(self):
+        with open(PlanFile(self.iniFile, self.directory), "wb") as File:
+            File.write("not a plan")
+        self.assertEqual(len(CompileIniFile(self.iniFile, self.directory).Charts), 2)
+
+    def test_nocache(self):
+        CompileIniFile(self.iniFile)
+        CompileIniFile(self.iniFile)
+        self.assertEqual(len(self.parsed), 2)
+        self.assertRaises(IniFileError, CompileIniFile, os.path.join(self.directory, "missing.ini"), self.cacheDirectory)
+
+
+class ValidatePlanTests(unittest.TestCase):
+
+    def test_validate(self):
+        Directory = tempfile.mkdtemp()
+        try:
+            IniFile = os.path.join(Directory, "test.ini")
+            with open(IniFile, "wb") as File:
+                File.write(General + Files + Charts)
+            Plan = ParseIniFile(IniFile)
+        finally:
+            shutil.rmtree(Directory)
+        Cache = SheetCache()
+        Cache.loadcolumns("web01", "CPU - all", [["Time", None, "00:05:01"], ["% Utilisation", None, 5.0]])
+        Cache.loadcolumns("web01", "Memory Utilisation", [["Time", None, "00:05:01"], ["Free Memory KB", None, 1.0]])
+        Cache.loadcolumns("db01", "Memory Utilisation", None)
+        #
+        # db01 has none of the sheets, which is allowed, but web01 is missing a heading
+        #
+        try:
+            ValidatePlan(Plan, Cache, ["web01", "db01"])
+        except IniFileError, Error:
+            self.assertEqual(str(Error), "Could not find heading \"Data Cache KB\" in sheet \"Memory Utilisation\" "
+                             "in file \"web01\". Check spelling.")
+        else:
+            self.fail("No IniFileError for a missing heading")
+        Cache.loadcolumns("web01", "Memory Utilisation", [["Data Cache KB", None], ["Free Memory KB", None]])
+        ValidatePlan(Plan, Cache, ["web01", "db01"])
+
+
+if __name__ == "__main__":
+    unittest.main()
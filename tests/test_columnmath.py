@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of ColumnMath: converting cells to arrays and back, the Add() and CellDivisionFactor
+#               arithmetic, and building columns as they're read.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#           0.2     18-Oct-26   agent   ColumnBuilder, and the columns it shares with its caller
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import unittest
+import numpy
+import Fixtures
+from ColumnMath import ToArray, ToCells, AddColumns, DivideColumn, ColumnBuilder, NumericColumn
+
+
+class ColumnMathTests(unittest.TestCase):
+
+    def test_toarray(self):
+        Array = ToArray([1, 2.5, None, "text", True, 4L])
+        self.assertEqual(Array[[0, 1, 5]].tolist(), [1.0, 2.5, 4.0])
+        self.assertTrue(numpy.isnan(Array[2:5]).all())
+        self.assertEqual(len(ToArray([1.0, 2.0, 3.0], 2)), 2)
+        self.assertTrue(numpy.isnan(ToArray([1.0], 3)[1:]).all())
+        Floats = numpy.array([1.0, 2.0])
+        self.assertTrue(ToArray(Floats) is Floats)
+
+    def test_tocells(self):
+        self.assertEqual(ToCells(numpy.array([1.5, numpy.nan, 3.0])), [1.5, None, 3.0])
+        self.assertEqual(ToCells(ToArray([])), [])
+
+    def test_addcolumns(self):
+        #
+        # A missing cell counts as zero, unless it's missing from every column
+        #
+        Total = AddColumns([[1.0, None, None, 4.0], numpy.array([10.0, 20.0, numpy.nan]), [100.0, "text"]], 5)
+        self.assertEqual(ToCells(Total), [111.0, 20.0, None, 4.0, None])
+        self.assertEqual(ToCells(AddColumns([[1.0, 2.0, 3.0]], 2)), [1.0, 2.0])
+        self.assertTrue(numpy.isnan(AddColumns([], 3)).all())
+
+    def test_dividecolumn(self):
+        self.assertEqual(ToCells(DivideColumn([1023, None, 2048.0], 1024)), [1023 / 1024.0, None, 2.0])
+        self.assertEqual(DivideColumn(numpy.array([3.0]), 2).tolist(), [1.5])
+
+
+class ColumnBuilderTests(unittest.TestCase):
+
+    def build(self, cells, rows=0):
+        Builder = ColumnBuilder(rows)
+        for Value in cells:
+            Builder.append(Value)
+        return Builder
+
+    def test_column(self):
+        Column = self.build(["Busy", None, 1.0, None, 2, None, None]).column()
+        self.assertTrue(isinstance(Column, NumericColumn))
+        self.assertEqual(Column.cells(), ["Busy", None, 1.0, None, 2.0])
+        self.assertEqual(self.build(["Time", None, "00:05:01", None]).column(), ["Time", None, "00:05:01"])
+        self.assertEqual(self.build(["Busy", None, 1.0, "text"]).column(), ["Busy", None, 1.0, "text"])
+        self.assertEqual(self.build([5.0], 3).column().cells(), [None, None, None, 5.0])
+        self.assertEqual(self.build(["Busy", None, None]).column(), ["Busy"])
+
+    def test_share(self):
+        Builder = self.build(["Busy", None, 1.0, 2.0])
+        First = Builder.column(share=True)
+        self.assertEqual(First.cells(), ["Busy", None, 1.0, 2.0])
+        self.assertFalse(First.data.flags.writeable)
+        #
+        # The shared column is a view of the builder's array, so what's added later doesn't change it, and
+        # the next column shares the same array
+        #
+        for Value in [None, 3.0, None]:
+            Builder.append(Value)
+        Second = Builder.column(share=True)
+        self.assertEqual(First.cells(), ["Busy", None, 1.0, 2.0])
+        self.assertEqual(Second.cells(), ["Busy", None, 1.0, 2.0, None, 3.0])
+        self.assertTrue(numpy.may_share_memory(First.data, Second.data))
+        self.assertEqual(Builder.column().cells(), Second.cells())
+        #
+        # Growing past the array's room copies it, without changing the columns already returned
+        #
+        for Value in range(2000):
+            Builder.append(float(Value))
+        Third = Builder.column(share=True)
+        self.assertEqual(len(Third.data), 2005)
+        self.assertEqual(Third.data[-1], 1999.0)
+        self.assertEqual(Second.cells(), ["Busy", None, 1.0, 2.0, None, 3.0])
+        Builder.append("text")
+        self.assertEqual(Builder.column(share=True)[-2:], [1999.0, "text"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of Downsample: LTTB, min/max and mean row selection, with and without empty cells.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import unittest
+import numpy
+import Fixtures
+from ColumnMath import HeadRows
+from Downsample import LTTBRows, MinMaxRows, MeanRows, DownsampleColumns
+
+
+def Wave(Rows, Phase=0.0):
+    return numpy.sin(numpy.arange(Rows) / 7.0 + Phase) * 100
+
+
+class LTTBRowsTests(unittest.TestCase):
+
+    def test_oneseries(self):
+        Chosen = LTTBRows(Wave(1000)[:, numpy.newaxis], 50)
+        self.assertEqual(len(Chosen), 50)
+        self.assertEqual((Chosen[0], Chosen[-1]), (0, 999))
+        self.assertTrue((numpy.diff(Chosen) > 0).all())
+
+    def test_spike(self):
+        Data = numpy.zeros((1000, 1))
+        Data[567] = 1000
+        self.assertTrue(567 in LTTBRows(Data, 20))
+
+    def test_alternaterows(self):
+        #
+        # Two hosts lined up with Align=outer: each has values in every other row. Each gets its own MaxPoints
+        # rows, chosen from just the rows it has values in
+        #
+        Data = numpy.empty((2000, 2))
+        Data.fill(numpy.nan)
+        Data[0::2, 0] = Wave(1000)
+        Data[1::2, 1] = Wave(1000, 1.0)
+        Chosen = LTTBRows(Data, 50)
+        for Series in range(2):
+            self.assertEqual((~numpy.isnan(Data[Chosen, Series])).sum(), 50)
+
+    def test_gaps(self):
+        #
+        # Rows where a series has no value never take any of its points
+        #
+        Data = Wave(1000)[:, numpy.newaxis]
+        Data[100:600] = numpy.nan
+        Chosen = LTTBRows(Data, 40)
+        self.assertEqual(len(Chosen), 40)
+        self.assertFalse(numpy.isnan(Data[Chosen]).any())
+
+    def test_maxrows(self):
+        Data = numpy.empty((3000, 3))
+        Data.fill(numpy.nan)
+        for Series in range(3):
+            Data[Series::3, Series] = Wave(1000, Series)
+        Chosen = LTTBRows(Data, 100, MaxRows=150)
+        self.assertEqual(len(Chosen), 150)
+        self.assertEqual([(~numpy.isnan(Data[Chosen, Series])).sum() for Series in range(3)], [50, 50, 50])
+
+    def test_allempty(self):
+        Data = numpy.empty((10, 2))
+        Data.fill(numpy.nan)
+        self.assertEqual(LTTBRows(Data, 5).tolist(), [0, 9])
+
+
+class BucketTests(unittest.TestCase):
+
+    def test_minmax(self):
+        Data = numpy.array([[1.0, numpy.nan], [5.0, numpy.nan], [numpy.nan, 3.0], [2.0, numpy.nan],
+                            [numpy.nan, numpy.nan], [4.0, numpy.nan]])
+        (Rows, Values) = MinMaxRows(Data, 4)
+        self.assertEqual(Rows.tolist(), [0, 2, 3, 5])
+        numpy.testing.assert_array_equal(Values, [[1.0, 3.0], [5.0, 3.0], [2.0, numpy.nan], [4.0, numpy.nan]])
+
+    def test_mean(self):
+        Data = numpy.array([[1.0, numpy.nan], [3.0, numpy.nan], [numpy.nan, numpy.nan], [6.0, 2.0]])
+        (Rows, Values) = MeanRows(Data, 2)
+        self.assertEqual(Rows.tolist(), [0, 2])
+        numpy.testing.assert_array_equal(Values, [[2.0, numpy.nan], [6.0, 2.0]])
+
+
+class DownsampleColumnsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = [["Time", None] + ["t%d" % Row for Row in range(1000)],
+                        ["Busy", None] + Wave(1000).tolist(),
+                        ["Short", None] + Wave(400).tolist()]
+
+    def test_shortenough(self):
+        self.assertTrue(DownsampleColumns(self.columns, 1000) is self.columns)
+
+    def test_methods(self):
+        for Method in ("lttb", "minmax", "mean"):
+            Columns = DownsampleColumns(self.columns, 100, Method)
+            self.assertEqual([Column[:HeadRows] for Column in Columns], [Column[:HeadRows] for Column in self.columns])
+            #
+            # With lttb, the two series have values in different rows, so each gets its own 100 rows
+            #
+            self.assertTrue(len(Columns[0]) - HeadRows <= (200 if Method == "lttb" else 100))
+            Times = Columns[0][HeadRows:]
+            self.assertEqual(Times, sorted(Times, key=lambda Time: int(Time[1:])))
+
+    def test_emptyrows(self):
+        #
+        # Rows that are empty in every series take no points
+        #
+        Columns = [Column + [None] * 1000 for Column in self.columns]
+        Columns[0] = Columns[0][:HeadRows + 1000] + ["u%d" % Row for Row in range(1000)]
+        Downsampled = DownsampleColumns(Columns, 100)
+        self.assertFalse(any(Time.startswith("u") for Time in Downsampled[0][HeadRows:]))
+
+    def test_badmethod(self):
+        self.assertRaises(ValueError, DownsampleColumns, self.columns, 100, "median")
+        self.assertRaises(ValueError, DownsampleColumns, self.columns, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of LiveBooks' SarTail: reading a sar file as it's written, holding back a line that
+#               isn't finished, and starting again when the file is truncated or rotated.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+import Fixtures
+from GenSarData import SarLines, SarSamples
+from LiveBooks import SarTail
+from SarParser import OverviewDetails
+
+
+def Cells(Column):
+
+    """Returns a column's cell values as a list, whether or not it's a NumericColumn"""
+
+    if isinstance(Column, list):
+        return Column
+    return Column.cells()
+
+
+def SheetCells(Sheets):
+
+    """Returns a dictionary of sheet name -> list of columns of cell values"""
+
+    return dict((SheetName, [Cells(Column) for Column in Columns]) for (SheetName, Columns) in Sheets.items())
+
+
+class SarTailTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, "web01.sar")
+        self.lines = [Line + "\n" for Line in SarLines("web01.example.com", "2012-03-01",
+                                                       SarSamples("web01.example.com", "2012-03-01", 3600, 1, 1, 1))]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text, mode="ab", fileName=None):
+        with open(fileName or self.fileName, mode) as File:
+            File.write(text)
+
+    def cpusamples(self, Tail):
+        return len(Cells(Tail.sheets()["CPU - all"][0])) - 2
+
+    def test_partialline(self):
+        Tail = SarTail(self.fileName)
+        self.assertEqual((Tail.poll(), Tail.sheets()), (0, None))
+        #
+        # The first CPU sample, and half of the second. The half a line isn't parsed until it's finished
+        #
+        self.write("".join(self.lines[:5]) + self.lines[5][:15])
+        self.assertEqual(Tail.poll(), 1)
+        self.assertEqual(Tail.sheets().keys(), ["Overview", "CPU - all"])
+        self.assertEqual(self.cpusamples(Tail), 1)
+        self.assertEqual(Tail.poll(), 0)
+        self.write(self.lines[5][15:] + "".join(self.lines[6:]))
+        self.assertTrue(Tail.poll() > 1)
+        self.assertEqual(OverviewDetails(Tail.sheets()["Overview"][0]), ("web01", "web01.example.com", "2012-03-01"))
+        #
+        # The file read a bit at a time gives the same sheets as reading it all at once
+        #
+        Whole = SarTail(self.fileName)
+        Whole.poll()
+        self.assertEqual(SheetCells(Tail.sheets()), SheetCells(Whole.sheets()))
+        self.assertEqual(self.cpusamples(Tail), 23)
+
+    def test_sheetnames(self):
+        self.write("".join(self.lines))
+        Tail = SarTail(self.fileName, ["CPU - all"])
+        Tail.poll()
+        self.assertEqual(Tail.sheets().keys(), ["Overview", "CPU - all"])
+
+    def test_truncate(self):
+        self.write("".join(self.lines))
+        Tail = SarTail(self.fileName)
+        Tail.poll()
+        self.assertEqual(self.cpusamples(Tail), 23)
+        self.write("".join(self.lines[:7]), "wb")
+        self.assertEqual(Tail.poll(), -1)
+        self.assertEqual(self.cpusamples(Tail), 2)
+        self.write("".join(self.lines[7:9]))
+        self.assertEqual(Tail.poll(), 1)
+        self.assertEqual(self.cpusamples(Tail), 3)
+
+    def test_rotate(self):
+        self.write("".join(self.lines))
+        Tail = SarTail(self.fileName)
+        Tail.poll()
+        os.rename(self.fileName, self.fileName + ".1")
+        self.assertEqual(Tail.poll(), 0)
+        #
+        # A new file is read from the start, even before anything is written to it
+        #
+        self.write("", "wb")
+        self.assertEqual(Tail.poll(), -1)
+        self.assertEqual(Tail.sheets(), None)
+        self.write("".join(Line + "\n" for Line in SarLines("db01.example.com", "2012-03-02",
+                                                             SarSamples("db01.example.com", "2012-03-02", 7200, 1, 1, 1))))
+        self.assertTrue(Tail.poll() > 0)
+        self.assertEqual(OverviewDetails(Tail.sheets()["Overview"][0]), ("db01", "db01.example.com", "2012-03-02"))
+        self.assertEqual(self.cpusamples(Tail), 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of Manifest: saving the pieces of a chart workbook and loading them back, and which books
+#               and charts a rerun can reuse.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import Fixtures
+from ChartPlan import Chart, Series, Source
+from Manifest import Manifest, Piece, ChartSections, ManifestSuffix
+
+CPU = Chart(1, "CPU", "CPU Utilisation", "%", (Series("$SYSNAME", 1.0, (Source("CPU - all", "% Utilisation"),)),),
+            None, "lttb", False, False)
+Memory = Chart(2, "Memory", "Memory", "MB", (Series("$SYSNAME Free", 1024.0, (Source("Memory Utilisation", "Free"),)),),
+               500, "minmax", False, False)
+
+
+class ChartSectionsTests(unittest.TestCase):
+
+    def test_sections(self):
+        self.assertEqual(ChartSections(CPU), ["[Charts] Chart1", "[Chart1Titles]", "[Chart1Data]"])
+        self.assertEqual(ChartSections(Memory)[-1], "[Chart2Options]")
+        for Options in ({"Downsample": "minmax"}, {"KeepFullData": True}, {"Summary": True}):
+            self.assertEqual(ChartSections(CPU._replace(**Options))[-1], "[Chart1Options]")
+
+
+class ManifestTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.saveFileName = os.path.join(self.directory, "graphs.xlsx")
+        self.books = []
+        for Name in ("web01.xls", "db01.xls"):
+            self.books.append(os.path.join(self.directory, Name))
+            self.writebook(self.books[-1], Name)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def writebook(self, fileName, contents):
+        with open(fileName, "wb") as File:
+            File.write(contents)
+
+    def manifest(self, version="0.43", settings=("row",)):
+        ThisManifest = Manifest(self.saveFileName, version, [CPU, Memory], settings)
+        ThisManifest.load()
+        return ThisManifest
+
+    def piece(self, book, chart):
+        return Piece({"hasTime": True, "chart": chart.Number}, [["Heading " + os.path.basename(book), None, 1.5, None, "text"]],
+                     [numpy.arange(3.0) + chart.Number])
+
+    def build(self):
+        #
+        # The first run builds every piece, and saves them
+        #
+        First = self.manifest()
+        self.assertEqual(First.previous, None)
+        for Book in self.books:
+            self.assertFalse(First.stored(Book))
+            First.addbook(Book, 5)
+        for ThisChart in (CPU, Memory):
+            for Book in self.books:
+                First.add(ThisChart.SheetTitle, Book, self.piece(Book, ThisChart))
+            self.assertFalse(First.unchangedchart(ThisChart.SheetTitle))
+        First.save()
+        self.assertEqual(First.built, 4)
+
+    def reuse(self, ThisManifest):
+        for ThisChart in (CPU, Memory):
+            for Book in self.books:
+                ThisManifest.add(ThisChart.SheetTitle, Book)
+
+    def test_roundtrip(self):
+        self.build()
+        Second = self.manifest()
+        for Book in self.books:
+            self.assertTrue(Second.stored(Book))
+            self.assertEqual(Second.maxrow(Book), 5)
+            for ThisChart in (CPU, Memory):
+                Expected = self.piece(Book, ThisChart)
+                self.assertEqual(Second.meta(ThisChart.SheetTitle, Book), Expected.Meta)
+                Stored = Second.piece(ThisChart.SheetTitle, Book)
+                self.assertEqual(Stored.Meta, Expected.Meta)
+                self.assertEqual([list(Column) for Column in Stored.Columns], Expected.Columns)
+                numpy.testing.assert_array_equal(Stored.Arrays[0], Expected.Arrays[0])
+            Second.addbook(Book, Second.maxrow(Book))
+        self.reuse(Second)
+        self.assertTrue(Second.unchangedchart("CPU") and Second.unchangedchart("Memory"))
+        self.assertEqual((Second.reused, Second.built), (4, 0))
+        #
+        # Reused pieces are copied into the new manifest as they were
+        #
+        Second.save()
+        Third = self.manifest()
+        numpy.testing.assert_array_equal(Third.piece("Memory", self.books[1]).Arrays[0], numpy.arange(3.0) + 2)
+        self.assertEqual(list(Third.piece("CPU", self.books[0]).Columns[0]), self.piece(self.books[0], CPU).Columns[0])
+
+    def test_changedbook(self):
+        self.build()
+        self.writebook(self.books[1], "db01.xls, with more samples")
+        Second = self.manifest()
+        self.assertTrue(Second.stored(self.books[0]))
+        self.assertFalse(Second.stored(self.books[1]))
+        Second.add("CPU", self.books[0])
+        Second.add("CPU", self.books[1], self.piece(self.books[1], CPU))
+        self.assertFalse(Second.unchangedchart("CPU"))
+
+    def test_touchedbook(self):
+        #
+        # A book with a new modification time but the same contents is still stored
+        #
+        self.build()
+        Stat = os.stat(self.books[0])
+        os.utime(self.books[0], (Stat.st_atime, Stat.st_mtime + 60))
+        self.assertTrue(self.manifest().stored(self.books[0]))
+
+    def test_changedcharts(self):
+        self.build()
+        self.assertFalse(self.manifest(settings=("nearest",)).stored(self.books[0]))
+        self.assertEqual(self.manifest(version="0.44").previous, None)
+        Second = self.manifest()
+        Second.add("CPU", self.books[1])
+        Second.add("CPU", self.books[0])
+        self.assertFalse(Second.unchangedchart("CPU"))
+        self.assertFalse(Second.unchangedchart("Disks"))
+
+    def test_image(self):
+        Image = os.path.join(self.directory, "CPU.png")
+        self.writebook(Image, "png")
+        First = self.manifest()
+        First.add("CPU", self.books[0], self.piece(self.books[0], CPU))
+        First.unchangedchart("CPU", Image)
+        First.save()
+        Second = self.manifest()
+        Second.add("CPU", self.books[0])
+        self.assertTrue(Second.unchangedchart("CPU", Image))
+        self.assertFalse(Second.unchangedchart("CPU", os.path.join(self.directory, "Other.png")))
+        os.remove(Image)
+        self.assertFalse(Second.unchangedchart("CPU", Image))
+
+    def test_damaged(self):
+        self.build()
+        self.writebook(self.saveFileName + ManifestSuffix, "not json")
+        self.assertEqual(self.manifest().previous, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of SarParser's OverviewDetails: the host and date of a book from its Overview sheet.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import unittest
+import numpy
+import Fixtures
+from ColumnMath import NumericColumn
+from SarParser import OverviewDetails
+
+
+class OverviewDetailsTests(unittest.TestCase):
+
+    def test_details(self):
+        Overview = Fixtures.Sheets("web-01.example.com ", "2012-03-01", [])["Overview"][0]
+        self.assertEqual(OverviewDetails(Overview), ("web-01", "web-01.example.com", "2012-03-01"))
+        self.assertEqual(OverviewDetails(NumericColumn(Overview, numpy.zeros(0))),
+                         ("web-01", "web-01.example.com", "2012-03-01"))
+
+    def test_nodetails(self):
+        self.assertEqual(OverviewDetails([]), (None, None, None))
+        self.assertEqual(OverviewDetails([None, "Statistics for 2012-03-01", 3.0]), (None, None, "2012-03-01"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of SarSeries: loading series from books and from a store, and the arithmetic on them.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import Fixtures
+from BookCache import ReadBookSheets
+from SarStore import SarStore, BookSamples
+from SheetCache import SheetCache
+from SarSeries import LoadSeries, SheetSource, Add, Evaluate
+
+March1 = 1330560000.0           # 2012-03-01 00:00:00, in seconds since 1970
+Sheet = "CPU - all"
+(User, System) = ("% User Level inc. vCPU", "% System Level (inc. interrupts)")
+
+
+class SarSeriesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.books = [Fixtures.SarBook(self.directory, "web01.example.com", "2012-03-01"),
+                      Fixtures.SarBook(self.directory, "web01.example.com", "2012-03-02", offset=1),
+                      Fixtures.SarBook(self.directory, "db01.example.com", "2012-03-01", offset=2)]
+        self.storeFile = os.path.join(self.directory, "fleet.db")
+        Store = SarStore(self.storeFile, create=True)
+        for Book in self.books:
+            Store.ingest(Book, BookSamples(ReadBookSheets(Book)))
+        Store.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_books(self):
+        Tracks = LoadSeries(self.books, Sheet, User).evaluate()
+        self.assertEqual(sorted(Tracks.keys()), ["db01.example.com", "web01.example.com"])
+        Web = Tracks["web01.example.com"]
+        self.assertEqual((Web.Name, Web.FirstDate, Web.LastDate), ("web01", "2012-03-01", "2012-03-02"))
+        #
+        # The two days are joined in time order
+        #
+        self.assertTrue((numpy.diff(Web.Times) > 0).all())
+        self.assertTrue(March1 <= Web.Times[0] and Web.Times[-1] < March1 + 3 * 86400)
+        Expected = numpy.concatenate([ReadBookSheets(Book, [Sheet])[Sheet][1].data for Book in self.books[:2]])
+        numpy.testing.assert_array_equal(Web.Values, Expected)
+
+    def test_store(self):
+        #
+        # The same books give the same series from a store as they do read directly
+        #
+        FromBooks = LoadSeries(self.books, Sheet, User).evaluate()
+        FromStore = LoadSeries(self.storeFile, Sheet, User).evaluate()
+        self.assertEqual(sorted(FromStore.keys()), sorted(FromBooks.keys()))
+        for SystemFQDN in FromBooks:
+            numpy.testing.assert_array_equal(FromStore[SystemFQDN].Times, FromBooks[SystemFQDN].Times)
+            numpy.testing.assert_array_equal(FromStore[SystemFQDN].Values, FromBooks[SystemFQDN].Values)
+
+    def test_between(self):
+        for Source in (self.books, self.storeFile):
+            Web = LoadSeries(Source, Sheet, User).evaluate()["web01.example.com"]
+            Period = LoadSeries(Source, Sheet, User).between("2012-03-01 12:00:00", "2012-03-02").evaluate()
+            Cut = Period["web01.example.com"]
+            Rows = (Web.Times >= March1 + 43200) & (Web.Times < March1 + 86400)
+            numpy.testing.assert_array_equal(Cut.Times, Web.Times[Rows])
+            numpy.testing.assert_array_equal(Cut.Values, Web.Values[Rows])
+
+    def test_arithmetic(self):
+        Tracks = Evaluate([LoadSeries(self.books, Sheet, User), LoadSeries(self.books, Sheet, System),
+                           (LoadSeries(self.books, Sheet, User) + LoadSeries(self.books, Sheet, System)) / 2])
+        for Track in Tracks.values():
+            (UserValues, SystemValues, Mean) = Track.Values
+            numpy.testing.assert_allclose(Mean, (UserValues + SystemValues) / 2)
+
+    def test_resample(self):
+        Tracks = LoadSeries(self.books, Sheet, User).resample(7200).evaluate()
+        Web = Tracks["web01.example.com"]
+        self.assertTrue((numpy.diff(Web.Times) == 7200).all())
+        self.assertEqual(Web.Times[0] % 7200, 0)
+
+    def test_differentsources(self):
+        self.assertRaises(ValueError, Add, LoadSeries(self.books, Sheet, User), LoadSeries(self.storeFile, Sheet, User))
+        self.assertRaises(ValueError, Evaluate, [LoadSeries(self.books[:1], Sheet, User),
+                                                 LoadSeries(self.books, Sheet, User)])
+        self.assertRaises(ZeroDivisionError, lambda: LoadSeries(self.books, Sheet, User) / 0)
+
+
+class SheetSourceTests(unittest.TestCase):
+
+    def test_rows(self):
+        #
+        # Row for row, a row without a time is kept, every column is read down to the last row, and a column or
+        # sheet the book doesn't have is read as empty
+        #
+        Cache = SheetCache()
+        for (Name, Columns) in Fixtures.Sheets("web01.example.com", "2012-03-01", ["00:05:01", None, "00:15:01"],
+                                               Busy=[1.0, 2.0], Idle=[4.0, 6.0, 8.0]).items():
+            Cache.loadcolumns("web01", Name, Columns)
+        Source = SheetSource(Cache, ["web01"], 6)
+        Track = Evaluate([LoadSeries(Source, "Test", "Busy") + LoadSeries(Source, "Test", "Idle"),
+                          LoadSeries(Source, "Test", "Idle") / 2, LoadSeries(Source, "Test", "Missing"),
+                          LoadSeries(Source, "Missing", "Busy")])["web01.example.com"]
+        self.assertEqual(Track.Times.tolist(), [0, 1, 2, 3])
+        (Total, Half, Missing, NoSheet) = Track.Values
+        self.assertEqual(Total.tolist()[:3], [5.0, 8.0, 8.0])
+        self.assertEqual(Half.tolist()[:3], [2.0, 3.0, 4.0])
+        for Values in (Total, Half, Missing, NoSheet):
+            self.assertTrue(numpy.isnan(Values[-1]))
+        self.assertTrue(numpy.isnan(Missing).all() and numpy.isnan(NoSheet).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
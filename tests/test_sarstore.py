@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of SarStore: ingesting books, replacing them, and reading series over a period of time.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import Fixtures
+from SarStore import SarStore, StoreError, BookSamples, IsStoreFile
+
+March1 = 1330560000.0           # 2012-03-01 00:00:00, in seconds since 1970
+Hours = ["%02d:00:00" % Hour for Hour in range(24)]
+
+
+class BookSamplesTests(unittest.TestCase):
+
+    def test_samples(self):
+        Sheets = Fixtures.Sheets("web01.example.com", "2012-03-01", ["00:05:01", None, "00:10:01"],
+                                 Busy=[1.0, 2.0, 3.0], Empty=[None, None, None], Label=["a", "b", "c"])
+        (Name, FQDN, Date, Samples) = BookSamples(Sheets)
+        self.assertEqual((Name, FQDN, Date), ("web01", "web01.example.com", "2012-03-01"))
+        ((SheetName, Times, Series),) = Samples
+        self.assertEqual(SheetName, "Test")
+        self.assertEqual((Times - March1).tolist(), [301, 601])
+        #
+        # Rows without a time, and columns without any numbers, are left out
+        #
+        self.assertEqual([(Heading, Values.tolist()) for (Heading, Values) in Series], [("Busy", [1.0, 3.0])])
+
+    def test_nooverview(self):
+        Sheets = Fixtures.Sheets("web01.example.com", "2012-03-01", [])
+        del Sheets["Overview"]
+        self.assertRaises(StoreError, BookSamples, Sheets)
+
+
+class SarStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = SarStore(os.path.join(self.directory, "fleet.db"), create=True)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def ingest(self, fileName, hostName, sarDate, values):
+        Book = os.path.join(self.directory, fileName)
+        open(Book, "wb").close()
+        return self.store.ingest(Book, BookSamples(Fixtures.Sheets(hostName, sarDate, Hours, Busy=values)))
+
+    def test_open(self):
+        self.assertTrue(IsStoreFile(self.store.fileName))
+        self.assertRaises(StoreError, SarStore, os.path.join(self.directory, "missing.db"))
+        NotStore = os.path.join(self.directory, "book.xls")
+        with open(NotStore, "wb") as File:
+            File.write("not a store")
+        self.assertFalse(IsStoreFile(NotStore))
+
+    def test_rangescan(self):
+        for (Day, Date) in enumerate(("2012-03-01", "2012-03-02", "2012-03-03")):
+            self.ingest("web01-" + Date + ".xls", "web01.example.com", Date, [Day * 100.0 + Hour for Hour in range(24)])
+        self.ingest("db01-2012-03-02.xls", "db01.example.com", "2012-03-02", [-1.0] * 24)
+        self.assertEqual(self.store.hosts().keys(), ["db01.example.com", "web01.example.com"])
+        self.assertEqual(self.store.hosts(["web01"], "2012-03-02").values(), [("web01", "2012-03-02", "2012-03-03")])
+        #
+        # From 20:00 on the first day (part way through its chunk) to 02:00 on the third (not included)
+        #
+        (Start, End) = (March1 + 20 * 3600, March1 + 2 * 86400 + 2 * 3600)
+        self.store.chunks = 0
+        Data = self.store.read(["web01.example.com"], [("Test", "Busy"), ("Test", "Missing")], Start, End)
+        self.assertEqual(Data.keys(), [("web01.example.com", "Test", "Busy")])
+        (Times, Values) = Data[("web01.example.com", "Test", "Busy")]
+        self.assertEqual(Times.tolist(), numpy.arange(Start, End, 3600).tolist())
+        self.assertEqual(Values.tolist(), [20, 21, 22, 23] + range(100, 124) + [200, 201])
+        self.assertEqual(self.store.chunks, 3)
+        #
+        # A period after the second day doesn't read the chunks of the first two
+        #
+        self.store.chunks = 0
+        (Times, Values) = self.store.read(["web01.example.com"], [("Test", "Busy")], March1 + 2 * 86400 + 3600)[
+            ("web01.example.com", "Test", "Busy")]
+        self.assertEqual(Values.tolist(), range(201, 224))
+        self.assertEqual(self.store.chunks, 1)
+
+    def test_replace(self):
+        self.assertEqual(self.ingest("web01.sar", "web01.example.com", "2012-03-01", [1.0] * 24), (24, []))
+        self.assertEqual(self.ingest("web01.sar", "web01.example.com", "2012-03-01", [2.0] * 24), (24, []))
+        (Samples, Replaced) = self.ingest("web01.xls", "web01.example.com", "2012-03-01", [3.0] * 24)
+        self.assertEqual(Replaced, [os.path.join(self.directory, "web01.sar")])
+        (Times, Values) = self.store.read(["web01.example.com"], [("Test", "Busy")])[("web01.example.com", "Test", "Busy")]
+        self.assertEqual(Values.tolist(), [3.0] * 24)
+        self.assertTrue(self.store.current(os.path.join(self.directory, "web01.xls")))
+        self.assertFalse(self.store.current(os.path.join(self.directory, "web01.sar")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of Stitch: working out sample times, and joining each host's books in time order.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import unittest
+import numpy
+import Fixtures
+from Stitch import SampleTimes, ToTimesOfDay, Stitcher, SecondsPerDay
+
+March1 = 1330560000.0           # 2012-03-01 00:00:00, in seconds since 1970
+
+
+class SampleTimesTests(unittest.TestCase):
+
+    def test_times(self):
+        numpy.testing.assert_array_equal(SampleTimes("2012-03-01", ["00:05:01", " 12:00:00 ", 0.5]),
+                                         [March1 + 301, March1 + 43200, March1 + 43200])
+
+    def test_dayrollover(self):
+        #
+        # sar starts the day again after midnight, so the samples after it are on the next day
+        #
+        Seconds = SampleTimes("2012-03-01", ["23:50:01", "23:55:01", "00:00:01", "00:05:01"])
+        numpy.testing.assert_array_equal(Seconds - March1, [85801, 86101, SecondsPerDay + 1, SecondsPerDay + 301])
+
+    def test_notimes(self):
+        #
+        # Cells that aren't times are NaN, and don't start a new day
+        #
+        Seconds = SampleTimes("2012-03-01", ["23:55:01", None, "Average:", "23:56:01", 2.5, "00:00:01"])
+        numpy.testing.assert_array_equal(Seconds - March1, [86101, numpy.nan, numpy.nan, 86161, numpy.nan,
+                                                            SecondsPerDay + 1])
+
+    def test_totimesofday(self):
+        self.assertEqual(ToTimesOfDay(numpy.array([86101.0, SecondsPerDay + 1, 59.6])), ["23:55:01", "00:00:01", "00:01:00"])
+
+
+class StitcherTests(unittest.TestCase):
+
+    def test_stitch(self):
+        #
+        # The books are added out of order, with the second overlapping the first by one sample, and a row
+        # without a time
+        #
+        Books = Stitcher()
+        for (SystemName, SarDate, Times, Values) in (("web01", "2012-03-02", ["00:00:01", None, "00:10:01"], [3.0, 9.0, 4.0]),
+                                                     ("web01", "2012-03-01", ["23:50:01", "00:00:01"], [1.0, 2.0]),
+                                                     ("db01", "2012-03-01", ["12:00:00"], [5.0])):
+            Books.addsamples(SystemName, SystemName + ".example.com", SarDate, SampleTimes(SarDate, Times),
+                             [numpy.array(Values)])
+        Stitched = Books.series()
+        self.assertEqual(Stitched.keys(), ["web01.example.com", "db01.example.com"])
+        (Name, FirstDate, LastDate, Times, Series) = Stitched["web01.example.com"]
+        self.assertEqual((Name, FirstDate, LastDate), ("web01", "2012-03-01", "2012-03-02"))
+        self.assertEqual((Times - March1).tolist(), [85801, SecondsPerDay + 1, SecondsPerDay + 601])
+        #
+        # Where books overlap, the sample of the book added first is kept
+        #
+        self.assertEqual(Series[0].tolist(), [1.0, 3.0, 4.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of SummaryStats: the statistics of each column of a sheet, with and without empty cells.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import unittest
+import numpy
+import Fixtures
+from ColumnMath import NumericColumn
+from SummaryStats import SummarizeArray, SummarizeColumns
+
+
+class SummarizeArrayTests(unittest.TestCase):
+
+    def test_statistics(self):
+        Data = numpy.column_stack((numpy.arange(1.0, 102.0), numpy.arange(101.0, 0.0, -1.0)))
+        Data[50, 1] = numpy.nan
+        Results = SummarizeArray(Data)
+        self.assertEqual(Results["Count"].tolist(), [101, 100])
+        self.assertEqual(Results["Min"].tolist(), [1.0, 1.0])
+        self.assertEqual(Results["Max"].tolist(), [101.0, 101.0])
+        self.assertEqual(Results["PeakRow"].tolist(), [100, 0])
+        self.assertEqual(Results["Mean"].tolist(), [51.0, 51.0])
+        self.assertEqual(Results["P50"][0], 51.0)
+        self.assertAlmostEqual(Results["P90"][0], 91.0)
+        numpy.testing.assert_allclose(Results["StdDev"][0], numpy.std(numpy.arange(1.0, 102.0), ddof=1))
+
+    def test_emptycolumns(self):
+        Data = numpy.array([[numpy.nan, 4.0], [numpy.nan, numpy.nan]])
+        Results = SummarizeArray(Data)
+        self.assertEqual(Results["Count"].tolist(), [0, 1])
+        self.assertEqual(Results["PeakRow"].tolist(), [-1, 0])
+        for Statistic in ("Mean", "Min", "Max", "StdDev", "P50", "P99"):
+            self.assertTrue(numpy.isnan(Results[Statistic][0]))
+        self.assertTrue(numpy.isnan(Results["StdDev"][1]))
+        self.assertEqual((Results["Max"][1], Results["P99"][1]), (4.0, 4.0))
+
+    def test_norows(self):
+        Results = SummarizeArray(numpy.empty((0, 2)))
+        self.assertEqual(Results["Count"].tolist(), [0, 0])
+        self.assertTrue(numpy.isnan(Results["P95"]).all())
+
+
+class SummarizeColumnsTests(unittest.TestCase):
+
+    def test_columns(self):
+        Columns = Fixtures.Sheets("web01", "2012-03-01", ["00:05:01", "00:10:01", "00:15:01"],
+                                  Busy=[1.0, 7.0, None], Idle=[None, None, None])["Test"]
+        Columns.append(NumericColumn(["Free", None], numpy.array([3.0, 2.0])))
+        Columns.append([])
+        (Busy, Idle, Free) = SummarizeColumns(Columns)
+        self.assertEqual((Busy.Heading, Busy.Count, Busy.Min, Busy.Max, Busy.Mean, Busy.PeakTime),
+                         ("Busy", 2, 1.0, 7.0, 4.0, "00:10:01"))
+        self.assertEqual((Idle.Count, Idle.Mean, Idle.StdDev, Idle.PeakTime), (0, None, None, None))
+        self.assertEqual((Free.Heading, Free.Max, Free.PeakTime), ("Free", 3.0, "00:05:01"))
+        self.assertEqual(SummarizeColumns([["Time", None]]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of Thresholds: reading a thresholds file, and finding the breach intervals of books.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+import Fixtures
+from Thresholds import Thresholds, ReadThresholds, ThresholdHeading, ThresholdColumns, ScanBooks, AMBER, RED
+
+Times = ["00:05:01", "00:10:01", "00:15:01", "00:20:01", "00:25:01", "00:30:01"]
+
+
+class ThresholdsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.thresholds = Thresholds({"%swpused": 10.0, "spare": -10.0}, {"%swpused": 20.0})
+
+    def test_readthresholds(self):
+        Directory = tempfile.mkdtemp()
+        try:
+            FileName = os.path.join(Directory, "thresholds.txt")
+            with open(FileName, "wb") as File:
+                File.write("# Comment\n[Amber]\n%swpused=10\nspare = -10\n\n[Red]\n%swpused=20\n")
+            self.assertEqual(ReadThresholds(FileName), self.thresholds)
+            with open(FileName, "wb") as File:
+                File.write("[Red]\n%swpused=high\n")
+            self.assertRaises(ValueError, ReadThresholds, FileName)
+        finally:
+            shutil.rmtree(Directory)
+
+    def test_thresholdheading(self):
+        self.assertEqual(ThresholdHeading("% Swap Used", self.thresholds), "%swpused")
+        self.assertEqual(ThresholdHeading("spare", self.thresholds), "spare")
+        self.assertEqual(ThresholdHeading("% Idle", self.thresholds), None)
+
+    def test_thresholdcolumns(self):
+        Book = ThresholdColumns("web01.xlsx", Fixtures.Sheets("web01.example.com", "2012-03-01", Times,
+                                                              **{"% Swap Used": [1.0] * 6, "% Idle": [2.0] * 6}),
+                                self.thresholds)
+        self.assertEqual((Book.Book, Book.Host, Book.Date), ("web01.xlsx", "web01.example.com", "2012-03-01"))
+        (ColumnTimes, Series) = Book.Columns["Test"]
+        self.assertEqual(ColumnTimes, Times)
+        self.assertEqual([(Heading, SarHeading) for (Heading, SarHeading, Data) in Series], [("% Swap Used", "%swpused")])
+
+    def test_scanbooks(self):
+        #
+        # A value equal to the Amber threshold isn't a breach, one equal to the Red threshold is
+        #
+        Books = [ThresholdColumns("web01.xlsx", Fixtures.Sheets("web01.example.com", "2012-03-01", Times,
+                                                                **{"% Swap Used": [10.0, 12.0, 20.0, 15.0, 5.0, 11.0],
+                                                                   "spare": [50.0, 8.0, 3.0, 20.0, None, 30.0]}),
+                                  self.thresholds),
+                 ThresholdColumns("db01.xlsx", Fixtures.Sheets("db01.example.com", "2012-03-01", Times[:2],
+                                                               **{"% Swap Used": [1.0, 2.0]}),
+                                  self.thresholds)]
+        Breaches = ScanBooks(Books, self.thresholds)
+        self.assertEqual([(Breach.Level, Breach.Host, Breach.Heading, Breach.Limit, Breach.Start, Breach.End,
+                           Breach.Samples, Breach.RedSamples, Breach.Peak) for Breach in Breaches],
+                         [(RED, "web01.example.com", "% Swap Used", 20.0, "00:10:01", "00:20:01", 3, 1, 20.0),
+                          (AMBER, "web01.example.com", "spare", -10.0, "00:10:01", "00:15:01", 2, 0, 3.0),
+                          (AMBER, "web01.example.com", "% Swap Used", 10.0, "00:30:01", "00:30:01", 1, 0, 11.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
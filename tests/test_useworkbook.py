@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+#
+#-------------------------------------------------------------------------------------------------------------
+# Author:   agent
+#
+# Description:  Tests of UseWorkbook: column names and cell addresses, the size limits of .xls and .xlsx files,
+#               and saving a workbook and reading it back.
+#
+# Revision History
+#
+# Version:  0.1     18-Oct-26   agent   Original version
+#
+#-------------------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+import Fixtures
+from UseWorkbook import UseWorkbook, ColumnNumber, ColumnLetter, CellAddressToRowColumn, RangeAddressToRowsColumns, \
+    MaxRows, MaxColumns, MaxXlsRows, MaxXlsColumns, MaxXlsxRows, MaxXlsxColumns
+
+
+class AddressTests(unittest.TestCase):
+
+    def test_columns(self):
+        for (Letters, Number) in (("A", 1), ("Z", 26), ("AA", 27), ("AZ", 52), ("BA", 53), ("IV", 256), ("ZZ", 702),
+                                  ("AAA", 703), ("XFD", 16384)):
+            self.assertEqual(ColumnNumber(Letters), Number)
+            self.assertEqual(ColumnLetter(Number), Letters)
+        self.assertEqual(ColumnNumber("ab"), 28)
+        for Number in range(1, 1000):
+            self.assertEqual(ColumnNumber(ColumnLetter(Number)), Number)
+
+    def test_badcolumns(self):
+        for Letters in ("", "A1", "ABCD", "XFE"):
+            self.assertRaises(ValueError, ColumnNumber, Letters)
+        for Number in (0, -1, 16385):
+            self.assertRaises(ValueError, ColumnLetter, Number)
+
+    def test_addresses(self):
+        self.assertEqual(CellAddressToRowColumn("AB12"), (12, 28))
+        self.assertEqual(CellAddressToRowColumn("$C$3"), (3, 3))
+        self.assertEqual(CellAddressToRowColumn((3, 4)), (3, 4))
+        self.assertRaises(ValueError, CellAddressToRowColumn, "12AB")
+        self.assertEqual(RangeAddressToRowsColumns("G5:B1"), (1, 2, 5, 7))
+        self.assertEqual(RangeAddressToRowsColumns("AA3"), (3, 27, 3, 27))
+
+    def test_limits(self):
+        self.assertEqual((MaxRows("graphs.xls"), MaxColumns("GRAPHS.XLS")), (MaxXlsRows, MaxXlsColumns))
+        self.assertEqual((MaxRows("graphs.xlsx"), MaxColumns("graphs.xlsx")), (MaxXlsxRows, MaxXlsxColumns))
+        self.assertEqual((MaxXlsRows, MaxXlsColumns, MaxXlsxRows, MaxXlsxColumns), (65536, 256, 1048576, 16384))
+
+
+class UseWorkbookTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def workbook(self):
+        Book = UseWorkbook()
+        Book.addnewworksheetbefore("Sheet1", "Overview")
+        Book.deleteworksheet("Sheet1")
+        Book.addnewworksheetafter("Overview", "Data")
+        Book.setcellvalue("Overview", "Performance Details", "B2", fontStyle=("Bold",))
+        Book.setrange("Data", 1, 1, (("Time", "Busy"), (None, None), ("00:05:01", 1.5), ("00:10:01", 2.5)))
+        Book.setcellvalue("Data", 7.0, (4, 30))
+        return Book
+
+    def test_cells(self):
+        Book = self.workbook()
+        self.assertEqual(Book.sheetnames(), ["Overview", "Data"])
+        self.assertEqual(Book.getcell("Data", "B3"), 1.5)
+        self.assertEqual(Book.getcell("Data", "C9"), None)
+        self.assertEqual(Book.getrange("Data", "A3:B4"), (("00:05:01", 1.5), ("00:10:01", 2.5)))
+        self.assertEqual((Book.lastcellincolumn("Data", "AD"), Book.lastcellincolumn("Data", 3)), (4, 1))
+        self.assertEqual(len(Book.getusedrange("Data")[0]), 30)
+        self.assertRaises(KeyError, Book.getcell, "Missing", "A1")
+        self.assertRaises(ValueError, Book.addnewworksheetafter, "Overview", "Data")
+
+    def test_roundtrip(self):
+        for Extension in (".xls", ".xlsx"):
+            FileName = os.path.join(self.directory, "graphs" + Extension)
+            self.workbook().save(FileName)
+            Book = UseWorkbook(FileName)
+            self.assertEqual(Book.sheetnames(), ["Overview", "Data"])
+            self.assertEqual(Book.getcell("Overview", "B2"), "Performance Details")
+            self.assertEqual(Book.getrange("Data", "A1:B4"), (("Time", "Busy"), (None, None), ("00:05:01", 1.5),
+                                                              ("00:10:01", 2.5)))
+            self.assertEqual(Book.getcell("Data", "AD4"), 7.0)
+        self.assertRaises(IOError, UseWorkbook, os.path.join(self.directory, "missing.xlsx"))
+
+    def test_xlslimits(self):
+        Book = UseWorkbook()
+        Book.setcellvalue("Sheet1", 1.0, (1, MaxXlsColumns + 1))
+        self.assertRaises(ValueError, Book.save, os.path.join(self.directory, "wide.xls"))
+        Book.save(os.path.join(self.directory, "wide.xlsx"))
+        Book = UseWorkbook()
+        Book.setcellvalue("Sheet1", 1.0, (MaxXlsRows + 1, 1))
+        self.assertRaises(ValueError, Book.save, os.path.join(self.directory, "long.xls"))
+
+
+if __name__ == "__main__":
+    unittest.main()